@@ -0,0 +1,6 @@
+"""
+플랫폼(카카오스토리, Instagram, Facebook) 스크립트가 함께 사용하는 공용 모듈
+
+각 플랫폼 디렉터리의 스크립트는 프로젝트 루트를 sys.path에 추가한 뒤
+`from common.<모듈> import ...` 형태로 사용합니다.
+"""
@@ -0,0 +1,439 @@
+"""
+플랫폼/게시물을 가로지르는 음성 인식 결과 캐시 (SQLite, 오디오 지문)
+
+배포자들이 같은 보이스오버/유행 음원을 여러 릴스와 카카오스토리 영상, 캐러셀의 여러 비디오에 반복해서 쓰므로,
+디코딩한 16kHz 오디오의 지문으로 이전 음성 인식 결과(텍스트, 데시벨, 음성 구간 통계)를 찾아 Whisper를 건너뜁니다.
+
+- 지문: 0.016초 간격 프레임마다 300~3000Hz를 33개 대역으로 나눈 에너지의 (주파수, 시간) 2차 차분 부호 32비트
+  (스펙트럼 봉우리 모양만 남기므로 다시 인코딩/음량 변경에는 거의 변하지 않고, 프레임당 4바이트)
+- 완전히 같은 오디오: 지문 전체의 SHA-256으로 바로 찾음
+- 다시 인코딩된 같은 오디오: 길이가 DURATION_TOLERANCE_SECONDS 이내인 항목 중 지문을 ±MAX_SHIFT_FRAMES 프레임 밀어 가며
+  비트 오류율(BER)이 가장 낮은 위치에서 전체 BER이 MAX_BIT_ERROR_RATE 이하이고, BLOCK_SECONDS 구간별 BER의
+  최대-최소 차이가 MAX_BLOCK_SPREAD 이하이면 같은 오디오로 봄
+  (다시 인코딩하면 BER이 전체적으로 고르게 오르지만, 같은 음악에 다른 목소리가 얹힌 영상은 그 구간만 크게 오름)
+- 결과는 Whisper 백엔드/모델과, 음성 구간 검출 설정 + 음성 인식 옵션(언어 등)의 해시로 만든 profile로 구분
+  (VAD 설정이나 옵션을 바꾸면 이전 결과를 쓰지 않음)
+- 최근 사용 순서(LRU)로 항목 수와 전체 크기 제한을 넘는 오래된 항목부터 삭제
+- 조회 통계(같은 오디오 적중, 유사 오디오 적중, 미적중, 적중률)를 종료 시 로그로 출력
+
+사용 예:
+    python -m common.audio_cache stats
+    python -m common.audio_cache clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from common.audio_decode import DB_FLOOR, SAMPLE_RATE, audio_levels, average_db, is_silent
+from common.speech_vad import speech_stats, transcribe_speech, vad_settings
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_ENV = "AUDIO_CACHE"  # "0"이면 캐시를 사용하지 않음, 그 외 값이 경로면 그 파일 사용
+DEFAULT_CACHE_PATH = PROJECT_ROOT / "audio_cache.db"
+MAX_ENTRIES = 100_000
+MAX_BYTES = 512 * 1024 * 1024  # 저장한 지문 + 결과(JSON) 크기 합계 제한
+EVICT_CHECK_EVERY = 100  # 이 개수만큼 저장할 때마다 제한 확인
+
+FP_WINDOW = 2048
+FP_HOP = 256  # 0.016초 (창 길이의 1/8, 어긋남에 덜 민감)
+FP_BANDS = 33  # 인접 대역 차분 32개 = 프레임당 32비트
+FP_MIN_HZ = 300.0
+FP_MAX_HZ = 3000.0
+FP_CHUNK_FRAMES = 4096  # 긴 영상도 메모리를 적게 쓰도록 나눠서 계산
+DURATION_TOLERANCE_SECONDS = 0.5
+MAX_SHIFT_FRAMES = 40  # 다시 인코딩할 때 생기는 앞부분 지연(AAC priming 등) 허용 범위 (약 0.64초)
+MIN_MATCH_FRAMES = 30  # 이보다 짧은 오디오는 같은 지문일 때만 재사용
+MAX_BIT_ERROR_RATE = 0.2
+BLOCK_SECONDS = 1.0
+MAX_BLOCK_SPREAD = 0.12
+MAX_CANDIDATES = 200  # 비슷한 길이의 항목 중 최근 사용한 것부터 비교할 최대 개수
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_results (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL,
+    results TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audio_results_duration ON audio_results(profile, duration_ms);
+CREATE INDEX IF NOT EXISTS idx_audio_results_last_used ON audio_results(last_used);
+CREATE TABLE IF NOT EXISTS audio_fingerprint_hashes (
+    profile TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    result_id INTEGER NOT NULL,
+    PRIMARY KEY (profile, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_audio_fingerprint_hashes_result ON audio_fingerprint_hashes(result_id);
+"""
+
+
+def _band_matrix() -> np.ndarray:
+    """rfft 주파수 빈 → FP_BANDS개 로그 간격 대역 에너지 합 행렬"""
+    freqs = np.fft.rfftfreq(FP_WINDOW, 1.0 / SAMPLE_RATE)
+    edges = np.geomspace(FP_MIN_HZ, FP_MAX_HZ, FP_BANDS + 1)
+    matrix = np.zeros((len(freqs), FP_BANDS), dtype=np.float32)
+    for band in range(FP_BANDS):
+        matrix[(freqs >= edges[band]) & (freqs < edges[band + 1]), band] = 1.0
+    return matrix
+
+
+_BANDS = _band_matrix()
+_WINDOW = np.hanning(FP_WINDOW).astype(np.float32)
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def audio_fingerprint(samples: np.ndarray) -> np.ndarray:
+    """16kHz 모노 PCM의 프레임별 32비트 지문 (uint32 배열, 프레임이 2개 미만이면 빈 배열)"""
+    samples = np.asarray(samples, dtype=np.float32)
+    count = 1 + (len(samples) - FP_WINDOW) // FP_HOP if len(samples) >= FP_WINDOW else 0
+    if count < 2:
+        return np.zeros(0, dtype=np.uint32)
+    frames = np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(count, FP_WINDOW),
+        strides=(samples.strides[0] * FP_HOP, samples.strides[0]),
+        writeable=False,
+    )
+    energies = np.empty((count, FP_BANDS), dtype=np.float32)
+    for start in range(0, count, FP_CHUNK_FRAMES):
+        spectrum = np.fft.rfft(frames[start : start + FP_CHUNK_FRAMES] * _WINDOW, axis=1)
+        energies[start : start + FP_CHUNK_FRAMES] = (np.abs(spectrum) ** 2).astype(np.float32) @ _BANDS
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    return np.packbits(bits, axis=1).view(">u4").ravel().astype(np.uint32)
+
+
+def _bit_errors(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """두 지문의 프레임별 다른 비트 수"""
+    return _POPCOUNT[np.bitwise_xor(a, b).view(np.uint8)].reshape(-1, 4).sum(axis=1)
+
+
+def match_fingerprints(a: np.ndarray, b: np.ndarray) -> Optional[float]:
+    """
+    두 지문이 같은 오디오면 가장 잘 맞는 위치의 전체 비트 오류율, 아니면 None
+
+    ±MAX_SHIFT_FRAMES 프레임 안에서 전체 BER이 가장 낮은 위치를 찾고, 겹치는 부분이 짧은 쪽의 90% 이상이며
+    전체 BER이 기준 이하이고 BLOCK_SECONDS 구간별 BER의 최대-최소 차이가 MAX_BLOCK_SPREAD 이하일 때만 같은 오디오로 봄
+    """
+    shortest = min(len(a), len(b))
+    if shortest < MIN_MATCH_FRAMES:
+        return None
+    best: Optional[Tuple[float, np.ndarray]] = None
+    for shift in range(-MAX_SHIFT_FRAMES, MAX_SHIFT_FRAMES + 1):
+        left, right = (a[shift:], b) if shift >= 0 else (a, b[-shift:])
+        overlap = min(len(left), len(right))
+        if overlap < shortest * 0.9:
+            continue
+        errors = _bit_errors(left[:overlap], right[:overlap])
+        rate = float(errors.sum()) / (overlap * 32)
+        if best is None or rate < best[0]:
+            best = (rate, errors)
+    if best is None or best[0] > MAX_BIT_ERROR_RATE:
+        return None
+    rate, errors = best
+    block = max(1, int(BLOCK_SECONDS * SAMPLE_RATE / FP_HOP))
+    usable = max(block, len(errors) - len(errors) % block)
+    blocks = errors[:usable].reshape(-1, block).mean(axis=1) / 32 if len(errors) >= block else np.array([rate])
+    if float(blocks.max() - blocks.min()) > MAX_BLOCK_SPREAD:
+        return None
+    return rate
+
+
+class AudioCache:
+    """음성 인식 결과를 오디오 지문으로 저장/조회하는 캐시 (여러 스레드에서 사용 가능)"""
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def lookup(self, profile: str, samples: np.ndarray, fingerprint: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """오디오(16kHz PCM)에 해당하는 저장된 결과, 없으면 None (fingerprint를 주면 다시 계산하지 않음)"""
+        if self._conn is None:
+            return None
+        fingerprint = audio_fingerprint(samples) if fingerprint is None else fingerprint
+        if not len(fingerprint):
+            return None
+        sha256 = hashlib.sha256(fingerprint.tobytes()).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.id, r.results FROM audio_fingerprint_hashes h JOIN audio_results r ON r.id = h.result_id "
+                "WHERE h.profile = ? AND h.sha256 = ?",
+                (profile, sha256),
+            ).fetchone()
+            if row is not None:
+                self.exact_hits += 1
+                self._touch(row[0])
+                return json.loads(row[1])
+
+            duration_ms = int(len(samples) * 1000 / SAMPLE_RATE)
+            tolerance = int(DURATION_TOLERANCE_SECONDS * 1000)
+            rows = self._conn.execute(
+                "SELECT id, fingerprint, results FROM audio_results WHERE profile = ? AND duration_ms BETWEEN ? AND ? "
+                "ORDER BY last_used DESC LIMIT ?",
+                (profile, duration_ms - tolerance, duration_ms + tolerance, MAX_CANDIDATES),
+            ).fetchall()
+            best: Optional[Tuple[float, int, str]] = None
+            for row_id, blob, payload in rows:
+                rate = match_fingerprints(fingerprint, np.frombuffer(blob, dtype=np.uint32))
+                if rate is not None and (best is None or rate < best[0]):
+                    best = (rate, row_id, payload)
+            if best is None:
+                self.misses += 1
+                return None
+            self.similar_hits += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_fingerprint_hashes(profile, sha256, result_id) VALUES (?, ?, ?)",
+                (profile, sha256, best[1]),
+            )
+            self._touch(best[1])
+            return json.loads(best[2])
+
+    def store(
+        self, profile: str, samples: np.ndarray, results: Dict[str, Any], fingerprint: Optional[np.ndarray] = None
+    ) -> None:
+        """오디오(16kHz PCM)의 결과(JSON으로 저장할 수 있는 dict) 저장"""
+        if self._conn is None:
+            return
+        fingerprint = audio_fingerprint(samples) if fingerprint is None else fingerprint
+        if not len(fingerprint):
+            return
+        blob = fingerprint.tobytes()
+        sha256 = hashlib.sha256(blob).hexdigest()
+        payload = json.dumps(results, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO audio_results(profile, duration_ms, fingerprint, results, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    profile,
+                    int(len(samples) * 1000 / SAMPLE_RATE),
+                    blob,
+                    payload,
+                    len(blob) + len(payload.encode("utf-8")),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO audio_fingerprint_hashes(profile, sha256, result_id) VALUES (?, ?, ?)",
+                (profile, sha256, cursor.lastrowid),
+            )
+            self._conn.commit()
+            self.stored += 1
+            if self.stored % EVICT_CHECK_EVERY == 0:
+                self._evict()
+
+    def _touch(self, row_id: int) -> None:
+        self._conn.execute(
+            "UPDATE audio_results SET hits = hits + 1, last_used = ? WHERE id = ?", (time.time(), row_id)
+        )
+        self._conn.commit()
+
+    def _evict(self) -> int:
+        """항목 수/크기 제한을 넘으면 오래 사용하지 않은 항목부터 제한의 90%까지 삭제"""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio_results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+        excess_count = count - int(self.max_entries * 0.9)
+        excess_bytes = total - int(self.max_bytes * 0.9)
+        victims: List[Tuple[int]] = []
+        freed = 0
+        for row_id, size in self._conn.execute("SELECT id, size FROM audio_results ORDER BY last_used"):
+            if len(victims) >= excess_count and freed >= excess_bytes:
+                break
+            victims.append((row_id,))
+            freed += size
+        self._conn.executemany("DELETE FROM audio_fingerprint_hashes WHERE result_id = ?", victims)
+        self._conn.executemany("DELETE FROM audio_results WHERE id = ?", victims)
+        self._conn.commit()
+        logger.info("🧹 오디오 캐시 정리: 오래된 항목 %d개 삭제 (%.1fMB)", len(victims), freed / 1024 / 1024)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """이번 실행의 조회 통계와 캐시 전체 크기"""
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        stats: Dict[str, Any] = {
+            "lookups": lookups,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else 0.0,
+        }
+        if self._conn is not None:
+            with self._lock:
+                count, total, hits = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM audio_results"
+                ).fetchone()
+            stats.update(entries=count, bytes=total, total_hits=hits)
+        return stats
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        if not stats["lookups"]:
+            return
+        logger.info(
+            "📊 오디오 캐시: 조회 %d회, 적중 %d회 (같은 오디오 %d, 유사 오디오 %d), 적중률 %.1f%%, 저장 항목 %d개",
+            stats["lookups"],
+            stats["exact_hits"] + stats["similar_hits"],
+            stats["exact_hits"],
+            stats["similar_hits"],
+            stats["hit_rate"] * 100,
+            stats.get("entries", 0),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM audio_fingerprint_hashes")
+            self._conn.execute("DELETE FROM audio_results")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """통계를 로그로 남기고 연결 종료 (여러 번 호출해도 안전)"""
+        if self._conn is None:
+            return
+        self.log_stats()
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+
+def cache_path() -> Optional[Path]:
+    """AUDIO_CACHE 설정에 따른 캐시 파일 경로 (0이면 None)"""
+    setting = os.getenv(CACHE_ENV, "").strip()
+    if setting == "0":
+        return None
+    return Path(setting) if setting and setting != "1" else DEFAULT_CACHE_PATH
+
+
+_cache: Optional[AudioCache] = None
+_cache_opened = False
+
+
+def get_audio_cache() -> Optional[AudioCache]:
+    """
+    프로세스 공용 오디오 캐시 (AUDIO_CACHE=0이면 None)
+
+    처음 호출할 때 열고, 프로세스 종료 시 통계를 로그로 남기고 닫습니다.
+    캐시 파일을 열 수 없으면 경고만 남기고 None을 반환합니다 (음성 인식은 캐시 없이 진행).
+    """
+    global _cache, _cache_opened  # pylint: disable=global-statement
+    if _cache_opened:
+        return _cache
+    _cache_opened = True
+    path = cache_path()
+    if path is None:
+        return None
+    try:
+        _cache = AudioCache(path)
+    except sqlite3.Error as exc:
+        logger.warning("⚠️ 오디오 캐시를 열 수 없어 캐시 없이 진행합니다 (%s): %s", path, exc)
+        return None
+    atexit.register(_cache.close)
+    return _cache
+
+
+def transcribe_profile(model: Any, options: Dict[str, Any]) -> str:
+    """캐시 profile: 백엔드:모델:(VAD 설정 + 음성 인식 옵션의 SHA-1 앞 12자리)"""
+    settings = json.dumps({"vad": vad_settings(), "options": options}, sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+    return f"{getattr(model, 'backend', 'openai')}:{getattr(model, 'model_name', '')}:{digest}"
+
+
+def transcribe_audio(samples: np.ndarray, model: Any, **options: Any) -> Dict[str, Any]:
+    """
+    캐시를 먼저 찾고, 없으면 무음 판단 → 음성 구간만 Whisper 음성 인식 → 결과를 캐시에 저장
+
+    Args:
+        samples: 16kHz 모노 float32 PCM (common.audio_decode.decode_audio 결과)
+        model: transcribe(audio, **options)를 가진 모델 (common.whisper_model 관리자)
+
+    Returns:
+        {"text", "speech": {"duration_seconds", "speech_seconds", "skipped_seconds"},
+         "mean_db", "max_db", "average_db", "silent", "cached"}
+    """
+    cache = get_audio_cache()
+    profile = transcribe_profile(model, options)
+    fingerprint = audio_fingerprint(samples) if cache is not None else None
+    if cache is not None:
+        cached = cache.lookup(profile, samples, fingerprint)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+    mean_db, max_db = audio_levels(samples)
+    silent = is_silent(mean_db, max_db)
+    if silent:
+        text, speech = "", speech_stats(len(samples) / SAMPLE_RATE, 0.0)
+    else:
+        text, speech = transcribe_speech(samples, model, **options)
+    results = {
+        "text": text,
+        "speech": speech,
+        # 디지털 무음의 -inf는 JSON으로 저장할 수 없으므로 DB_FLOOR로 제한
+        "mean_db": None if mean_db is None else max(mean_db, DB_FLOOR),
+        "max_db": None if max_db is None else max(max_db, DB_FLOOR),
+        "average_db": average_db(samples),
+        "silent": silent,
+    }
+    if cache is not None:
+        cache.store(profile, samples, results, fingerprint)
+    return {**results, "cached": False}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="음성 인식 결과 캐시")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", type=Path, default=None, help=f"캐시 파일 (기본값: {DEFAULT_CACHE_PATH.name})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    path = args.path or cache_path() or DEFAULT_CACHE_PATH
+    cache = AudioCache(path)
+    try:
+        if args.command == "clear":
+            cache.clear()
+            print(f"오디오 캐시를 비웠습니다: {path}")
+        else:
+            stats = cache.stats()
+            print(f"항목 {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f}MB, 누적 적중 {stats['total_hits']}회")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
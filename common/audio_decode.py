@@ -0,0 +1,191 @@
+"""
+비디오 오디오를 ffmpeg 한 번으로 16kHz 모노 float PCM(numpy 배열)으로 디코딩
+
+기존 오디오 단계는 비디오 바이트를 임시 .mp4로 쓰고, ffmpeg로 임시 .wav를 만들고, volumedetect로 ffmpeg를 한 번 더 실행한 뒤,
+Whisper가 wav를 읽으려고 ffmpeg를 세 번째로 실행했습니다 (kakaostory_extract_audio는 데시벨 계산에 librosa로 mp4를 다시 디코딩).
+
+- decode_audio(): ffmpeg 프로세스 하나가 stdin(비디오 바이트) 또는 URL을 읽어 16kHz 모노 float32 PCM을 파이프로 출력
+  (moov 박스가 파일 끝에 있는 mp4처럼 파이프로는 읽을 수 없는 입력만 임시 입력 파일로 한 번 더 시도)
+- 디코딩한 배열 하나를 무음 판단(audio_levels/is_silent, ffmpeg volumedetect와 같은 기준),
+  평균 데시벨(average_db), Whisper transcribe(배열 그대로 전달)가 함께 사용
+
+명령행 확인:
+    python -m common.audio_decode video1.mp4 video2.mp4 ...
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional, Tuple, Union
+
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000  # Whisper 입력 샘플링 레이트
+DECODE_TIMEOUT = 300  # 초
+# 무음 판단 기준 (기존 volumedetect 기준과 같음: 평균 -60dB 미만이고 최대 -50dB 미만)
+SILENT_MEAN_DB = -60.0
+SILENT_MAX_DB = -50.0
+# average_db: librosa.feature.rms + amplitude_to_db(ref=1.0)의 프레임 평균과 같은 계산
+RMS_FRAME_LENGTH = 2048
+RMS_HOP_LENGTH = 512
+DB_FLOOR = -100.0  # amplitude_to_db의 amin=1e-5
+DB_TOP = 80.0  # amplitude_to_db의 top_db
+
+AudioSource = Union[bytes, str]
+
+
+class AudioDecodeError(Exception):
+    """ffmpeg 오디오 디코딩 실패"""
+
+
+class NoAudioStreamError(AudioDecodeError):
+    """비디오에 오디오 스트림이 없음"""
+
+
+def find_ffmpeg_executable() -> Optional[str]:
+    return shutil.which("ffmpeg")
+
+
+def _ffmpeg_command(ffmpeg: str, input_arg: str) -> List[str]:
+    return [
+        ffmpeg,
+        "-hide_banner",
+        *(["-nostdin"] if input_arg != "pipe:0" else []),
+        "-err_detect", "ignore_err",  # DASH 스트림 등 불완전한 파일도 최대한 디코딩
+        "-fflags", "+genpts",
+        "-i", input_arg,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(SAMPLE_RATE),
+        "-f", "f32le",
+        "-acodec", "pcm_f32le",
+        "pipe:1",
+    ]
+
+
+def _run_ffmpeg(command: List[str], data: Optional[bytes], timeout: float) -> np.ndarray:
+    try:
+        result = subprocess.run(
+            command,
+            input=data,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            check=False,
+        )
+    except subprocess.TimeoutExpired as exc:
+        raise AudioDecodeError(f"ffmpeg 시간 초과 ({timeout:.0f}초)") from exc
+    except OSError as exc:
+        raise AudioDecodeError(f"ffmpeg 실행 실패: {exc}") from exc
+    stderr = result.stderr.decode("utf-8", errors="replace")
+    if "does not contain any stream" in stderr or "matches no streams" in stderr:
+        raise NoAudioStreamError("비디오에 오디오 스트림이 없습니다")
+    # ignore_err로 일부 오류가 있어도 디코딩한 부분은 사용 (출력이 없을 때만 실패)
+    if not result.stdout:
+        raise AudioDecodeError(f"ffmpeg 오디오 디코딩 실패 (returncode={result.returncode}): {stderr[-500:]}")
+    if result.returncode != 0:
+        logger.debug("ffmpeg가 오류를 보고했지만 디코딩한 %d바이트를 사용합니다: %s", len(result.stdout), stderr[-300:])
+    usable = len(result.stdout) - len(result.stdout) % 4
+    return np.frombuffer(result.stdout[:usable], dtype=np.float32)
+
+
+def decode_audio(source: AudioSource, ffmpeg: Optional[str] = None, timeout: float = DECODE_TIMEOUT) -> np.ndarray:
+    """
+    비디오 바이트(stdin으로 전달) 또는 URL/파일 경로를 16kHz 모노 float32 PCM 배열로 디코딩
+
+    Raises:
+        NoAudioStreamError: 오디오 스트림이 없음
+        AudioDecodeError: ffmpeg가 없거나 디코딩 실패
+    """
+    ffmpeg = ffmpeg or find_ffmpeg_executable()
+    if not ffmpeg:
+        raise AudioDecodeError("ffmpeg를 찾을 수 없습니다. PATH에 ffmpeg가 있는지 확인하세요.")
+    if isinstance(source, str):
+        return _run_ffmpeg(_ffmpeg_command(ffmpeg, source), None, timeout)
+    try:
+        return _run_ffmpeg(_ffmpeg_command(ffmpeg, "pipe:0"), source, timeout)
+    except NoAudioStreamError:
+        raise
+    except AudioDecodeError as exc:
+        # moov 박스가 끝에 있는 mp4는 탐색할 수 없는 파이프로 읽을 수 없으므로 입력만 임시 파일로 다시 시도
+        logger.debug("파이프 입력 디코딩 실패, 임시 입력 파일로 재시도합니다: %s", exc)
+    with tempfile.NamedTemporaryFile(suffix=".mp4") as video_file:
+        video_file.write(source)
+        video_file.flush()
+        return _run_ffmpeg(_ffmpeg_command(ffmpeg, video_file.name), None, timeout)
+
+
+def audio_levels(samples: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+    """ffmpeg volumedetect와 같은 평균(RMS)/최대 볼륨(dBFS), 샘플이 없으면 (None, None)"""
+    if samples.size == 0:
+        return None, None
+    power = float(np.mean(np.square(samples, dtype=np.float64)))
+    peak = float(np.max(np.abs(samples)))
+    mean_db = 10.0 * np.log10(power) if power > 0 else -np.inf
+    max_db = 20.0 * np.log10(peak) if peak > 0 else -np.inf
+    return float(mean_db), float(max_db)
+
+
+def is_silent(mean_db: Optional[float], max_db: Optional[float]) -> bool:
+    """기존 volumedetect 기준의 무음 판단 (값을 확인할 수 없으면 무음이 아닌 것으로 봄)"""
+    if mean_db is None:
+        return False
+    if max_db is None:
+        return mean_db < SILENT_MEAN_DB
+    return mean_db < SILENT_MEAN_DB and max_db < SILENT_MAX_DB
+
+
+def average_db(samples: np.ndarray) -> Optional[float]:
+    """프레임별 RMS 데시벨의 평균 (librosa rms/amplitude_to_db 계산과 같음, 샘플이 없으면 None)"""
+    if samples.size == 0:
+        return None
+    pad = RMS_FRAME_LENGTH // 2
+    padded = np.pad(samples.astype(np.float64), pad, mode="constant")
+    count = 1 + (len(padded) - RMS_FRAME_LENGTH) // RMS_HOP_LENGTH
+    if count <= 0:
+        return None
+    frames = np.lib.stride_tricks.as_strided(
+        padded,
+        shape=(count, RMS_FRAME_LENGTH),
+        strides=(padded.strides[0] * RMS_HOP_LENGTH, padded.strides[0]),
+        writeable=False,
+    )
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    db = 20.0 * np.log10(np.maximum(rms, 10 ** (DB_FLOOR / 20.0)))
+    db = np.maximum(db, db.max() - DB_TOP)
+    return float(np.mean(db))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    paths = argv if argv is not None else sys.argv[1:]
+    if not paths:
+        print("사용법: python -m common.audio_decode video1.mp4 video2.mp4 ...")
+        return 1
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as video_file:
+                samples = decode_audio(video_file.read())
+        except (OSError, AudioDecodeError) as exc:
+            print(f"{os.path.basename(path)}: {exc}")
+            continue
+        mean_db, max_db = audio_levels(samples)
+        print(
+            f"{os.path.basename(path)}: {len(samples) / SAMPLE_RATE:.1f}초, 평균 {mean_db:.1f} dB, 최대 {max_db:.1f} dB, "
+            f"프레임 평균 {average_db(samples):.1f} dB, 무음 {is_silent(mean_db, max_db)}, "
+            f"디코딩 {time.perf_counter() - started:.2f}초"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""
+OCR/음성 인식 결과(media_caption, audio_caption, audio_speech, is_video) 필드별 사이드카 저장소
+
+OCR/Whisper 단계가 게시물 몇 백 바이트를 추가하려고 미디어 JSON 파일(크롤러가 만든 문서)을 통째로 다시 쓰던 방식 대신,
+필드마다 별도의 JSONL 파일(<미디어 파일 이름>.<필드>.jsonl)에 게시물 키와 값만 한 줄씩 추가 기록합니다.
+
+- 키: Instagram은 shortcode, 카카오스토리는 shortcode, Facebook은 첫 번째 미디어 URL(없으면 내용 해시)
+  (Facebook 재수집으로 미디어 URL이 바뀌면 크롤러가 이전 키를 게시물의 post_key 필드에 고정)
+- 한 줄 형식: {"key": "<게시물 키>", "value": <필드 값>} (같은 키가 여러 번 나오면 마지막 값 사용)
+- 읽을 때 value()/join()으로 문서 값 위에 사이드카 값을 덮어씀 (사이드카에 없으면 문서의 기존 값 사용)
+- 필드 파일은 처음 접근할 때 한 번만 로드되며, 종료 시 중복 줄이 많으면 정리(compaction)
+- flush_every/flush_interval을 주면 기록을 메모리에 모았다가(write-behind) 일정 개수/시간마다 한 번에 추가
+  (같은 게시물의 값을 여러 번 바꾸면 마지막 값 한 줄만 기록, 통계는 io_stats())
+
+예:
+    enrichment = EnrichmentStore(BASE_DIR / "instagram_media.json", key_func=media_key)
+    caption = enrichment.value(post, "media_caption", [])
+    enrichment.set(post, "media_caption", caption + ocr_texts)
+    ...
+    enrichment.close()
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_FIELDS = ("media_caption", "audio_caption", "audio_speech", "is_video")
+
+_MISSING = object()
+
+
+def default_post_key(item: dict) -> Optional[str]:
+    """게시물 키 기본값: shortcode, 없으면 id"""
+    key = item.get("shortcode") or item.get("id")
+    return str(key) if key else None
+
+
+class FieldSidecar:
+    """필드 하나의 {키: 값}을 기록하는 append-only JSONL 파일 + 메모리 dict"""
+
+    def __init__(
+        self,
+        path: Path,
+        fsync_every: int = 20,
+        fsync_interval: float = 5.0,
+        flush_every: int = 1,
+        flush_interval: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            path: 사이드카 파일 경로 (예: instagram_media.media_caption.jsonl)
+            fsync_every: 이 개수만큼 기록할 때마다 fsync
+            fsync_interval: 마지막 fsync 이후 이 시간(초)이 지나면 fsync
+            flush_every: 기록을 이 개수(서로 다른 키 기준)만큼 모았다가 한 번에 추가 (1이면 바로 기록)
+            flush_interval: 마지막 기록 이후 이 시간(초)이 지나면 모인 개수와 관계없이 기록 (0 이하면 사용 안 함)
+        """
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.values: Dict[str, Any] = {}
+        self._loaded = False
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._line_count = 0  # 파일의 줄 수 (덮어쓴 값 포함) - compaction 필요 여부 판단용
+        self._unflushed: Dict[str, Any] = {}  # 아직 파일에 기록하지 않은 값 (키 -> 값)
+        self._last_flush = time.monotonic()
+        self.set_count = 0  # set()으로 요청된 기록 수
+        self.write_count = 0  # 파일에 기록한 줄 수
+        self.flush_count = 0  # 파일에 기록한 횟수
+        self.bytes_written = 0
+
+    def load(self) -> Dict[str, Any]:
+        """사이드카 파일을 읽어 dict 구성 (한 번만 수행)"""
+        if self._loaded:
+            return self.values
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line_no, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 강제 종료로 마지막 줄이 잘린 경우 등
+                        logger.warning("⚠️ %s %d번째 줄이 손상되어 건너뜁니다", self.path.name, line_no)
+                        continue
+                    if not isinstance(entry, dict) or not entry.get("key") or "value" not in entry:
+                        continue
+                    self.values[str(entry["key"])] = entry["value"]
+                    self._line_count += 1
+        self._loaded = True
+        return self.values
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.load()
+
+    def __len__(self) -> int:
+        return len(self.load())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.load().get(key, default)
+
+    def set(self, key: str, value: Any) -> bool:
+        """
+        값을 기록 (현재 값과 같으면 기록하지 않음)
+
+        Returns:
+            bool: 새로 기록했으면 True (write-behind 중이면 flush될 때 파일에 추가됨)
+        """
+        values = self.load()
+        if key in values and values[key] == value:
+            return False
+
+        values[key] = value
+        self._unflushed[key] = value
+        self.set_count += 1
+        if (
+            self.flush_every <= 1
+            or len(self._unflushed) >= self.flush_every
+            or (self.flush_interval > 0 and time.monotonic() - self._last_flush >= self.flush_interval)
+        ):
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """
+        모아 둔 값을 파일에 한 번에 추가
+
+        Returns:
+            int: 기록한 줄 수
+        """
+        self._last_flush = time.monotonic()
+        if not self._unflushed:
+            return 0
+        entries, self._unflushed = self._unflushed, {}
+        lines = "".join(
+            json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n" for key, value in entries.items()
+        )
+        if self._file is None:
+            needs_newline = False
+            if self.path.exists() and self.path.stat().st_size > 0:
+                # 이전 실행이 줄 중간에서 끊겼다면 새 줄에서 시작
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if needs_newline:
+                self._file.write("\n")
+        self._file.write(lines)
+        self._file.flush()  # 프로세스가 강제 종료되어도 OS 버퍼에는 남도록
+        self._line_count += len(entries)
+        self._unsynced += len(entries)
+        self.write_count += len(entries)
+        self.flush_count += 1
+        self.bytes_written += len(lines.encode("utf-8"))
+
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        return len(entries)
+
+    def sync(self) -> None:
+        """버퍼에 남은 기록을 디스크에 동기화"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """키마다 마지막 값만 남겨 사이드카 파일을 다시 씀 (임시 파일 + rename)"""
+        self.load()
+        self._unflushed = {}  # 모아 둔 값은 values에 있으므로 함께 기록됨
+        self._close_file()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key, value in self.values.items():
+                f.write(json.dumps({"key": key, "value": value}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self.bytes_written += f.tell()
+        self.flush_count += 1
+        os.replace(tmp_path, self.path)
+        self._line_count = len(self.values)
+
+    def close(self) -> None:
+        """남은 기록을 동기화하고, 덮어쓴 줄이 절반 이상이면 compaction"""
+        if not self._loaded:
+            return
+        self._close_file()
+        if self._line_count > 2 * len(self.values):
+            self.compact()
+
+    def _close_file(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+
+class EnrichmentStore:
+    """미디어 JSON 파일 옆에 필드별 사이드카를 두고, 읽을 때 문서와 합쳐 보여주는 저장소"""
+
+    def __init__(
+        self,
+        media_path: Path,
+        key_func: Callable[[dict], Optional[str]] = default_post_key,
+        fields: Iterable[str] = ENRICHMENT_FIELDS,
+        fsync_every: int = 20,
+        fsync_interval: float = 5.0,
+        flush_every: int = 1,
+        flush_interval: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            media_path: 크롤러가 만든 미디어 JSON 파일 경로 (사이드카는 같은 디렉터리에 생성)
+            key_func: 게시물의 키를 반환하는 함수 (None이면 사이드카에 기록할 수 없음)
+            fields: 사이드카로 관리할 필드 목록
+            fsync_every, fsync_interval: 사이드카 fsync 주기 (개수, 초)
+            flush_every, flush_interval: 사이드카 write-behind 주기 (개수, 초) - 기본값은 바로 기록
+        """
+        self.media_path = Path(media_path)
+        self.key_func = key_func
+        self.fields = tuple(fields)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._sidecars: Dict[str, FieldSidecar] = {}
+
+    def sidecar_path(self, field: str) -> Path:
+        return self.media_path.with_name(f"{self.media_path.stem}.{field}.jsonl")
+
+    def sidecar(self, field: str) -> FieldSidecar:
+        """필드의 사이드카 반환 (처음 접근할 때 생성)"""
+        if field not in self.fields:
+            raise KeyError(f"사이드카로 관리하지 않는 필드입니다: {field}")
+        sidecar = self._sidecars.get(field)
+        if sidecar is None:
+            sidecar = FieldSidecar(
+                self.sidecar_path(field),
+                self.fsync_every,
+                self.fsync_interval,
+                self.flush_every,
+                self.flush_interval,
+            )
+            self._sidecars[field] = sidecar
+        return sidecar
+
+    def key_of(self, item: dict) -> Optional[str]:
+        return self.key_func(item)
+
+    def value(self, item: dict, field: str, default: Any = None) -> Any:
+        """사이드카 값이 있으면 사이드카 값, 없으면 문서의 값"""
+        key = self.key_func(item)
+        if key:
+            stored = self.sidecar(field).get(key, _MISSING)
+            if stored is not _MISSING:
+                return stored
+        return item.get(field, default)
+
+    def set(self, item: dict, field: str, value: Any) -> bool:
+        """
+        게시물의 필드 값을 사이드카에 기록 (문서는 수정하지 않음)
+
+        Returns:
+            bool: 기록했으면 True (값이 같아 기록하지 않았거나 키가 없으면 False)
+        """
+        key = self.key_func(item)
+        if not key:
+            logger.warning("⚠️ 게시물 키가 없어 %s를 저장할 수 없습니다", field)
+            return False
+        return self.sidecar(field).set(key, value)
+
+    def update(self, item: dict, values: Dict[str, Any]) -> int:
+        """여러 필드를 한 번에 기록하고 기록한 필드 수 반환"""
+        return sum(1 for field, value in values.items() if self.set(item, field, value))
+
+    def join(self, item: dict) -> dict:
+        """문서에 사이드카 값을 합친 새 dict 반환 (사이드카에 값이 없으면 원본 그대로 반환)"""
+        key = self.key_func(item)
+        if not key:
+            return item
+        joined = None
+        for field in self.fields:
+            stored = self.sidecar(field).get(key, _MISSING)
+            if stored is not _MISSING:
+                if joined is None:
+                    joined = dict(item)
+                joined[field] = stored
+        return item if joined is None else joined
+
+    def iter_joined(self, records: Iterable[Tuple[int, dict]]) -> Iterator[Tuple[int, dict]]:
+        """(인덱스, 문서) iterable의 각 문서에 사이드카 값을 합쳐 반환"""
+        for index, item in records:
+            yield index, self.join(item)
+
+    def flush(self) -> int:
+        """모든 사이드카의 모아 둔 값을 파일에 기록하고 기록한 줄 수 반환"""
+        return sum(sidecar.flush() for sidecar in self._sidecars.values())
+
+    def io_stats(self) -> Dict[str, int]:
+        """쓰기 통계(모든 사이드카 합계): 요청된 기록 수, 실제 기록 횟수, 기록한 바이트 수"""
+        sidecars = self._sidecars.values()
+        return {
+            "requests": sum(sidecar.set_count for sidecar in sidecars),
+            "flushes": sum(sidecar.flush_count for sidecar in sidecars),
+            "bytes": sum(sidecar.bytes_written for sidecar in sidecars),
+        }
+
+    def close(self) -> None:
+        """사이드카 기록을 동기화하고 필요하면 정리"""
+        for sidecar in self._sidecars.values():
+            sidecar.close()
@@ -0,0 +1,454 @@
+"""
+JSON 스냅샷 + append-only JSONL 저널 저장소
+
+facebook_media.json처럼 크기가 큰 JSON 배열 파일을 저장할 때마다 전체를 다시 쓰지 않고,
+신규/변경된 레코드만 저널 파일(<스냅샷 이름>.journal.jsonl)에 한 줄씩 추가 기록합니다.
+저널은 일정 개수마다(또는 스크립트 종료 시) 스냅샷 파일에 병합(compaction)됩니다.
+
+- 스냅샷 파일 형식은 기존과 동일한 JSON 배열(indent=2)이므로 다른 스크립트와 호환됩니다.
+- 읽는 쪽은 load()로 스냅샷을 한 번만 읽고 저널을 순서대로 재생해 병합된 리스트를 얻습니다.
+- 저널 한 줄 형식: {"op": "put", "index": <리스트 인덱스>, "record": {...}}
+  (index == 현재 길이이면 추가, 그보다 작으면 해당 위치 교체)
+- 인덱스는 저널을 시작할 때의 스냅샷 기준이므로, 저널 첫 줄에 스냅샷 내용의 지문을 기록합니다:
+  {"op": "snapshot", "sha256": <스냅샷 파일의 SHA-256, 없으면 null>}
+  (수정 시각은 touch/복사/해상도가 낮은 파일 시스템에서 내용과 무관하게 바뀌므로 사용하지 않음)
+  다른 스크립트가 스냅샷을 직접 다시 써서 지문이 달라졌다면 저널을 재생하지 않고
+  <스냅샷 이름>.journal.stale-<시각>.jsonl로 옮겨 둡니다 (잘못된 위치에 레코드를 덮어쓰지 않도록).
+- 일부 항목만 다루는 단계는 load() 대신 iter_records(where=...)로 스냅샷을 스트리밍하고
+  put(index, ...)으로 변경분만 저널에 기록할 수 있습니다 (지연 모드).
+  이 경우 메모리에는 변경된 항목만 남고, compaction도 스냅샷을 스트리밍으로 다시 씁니다.
+- flush_every/flush_interval을 주면 저널 기록을 메모리에 모았다가(write-behind) 일정 개수/시간마다 한 번에 기록합니다.
+  같은 인덱스를 여러 번 put하면 마지막 레코드만 기록되며, io_stats()로 요청 수/기록 횟수/바이트 수를 확인할 수 있습니다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from common.json_stream import Predicate, count_json_array, iter_json_array, rewrite_json_array
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+STALE_JOURNAL_SUFFIX = ".journal.stale-{stamp}.jsonl"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def atomic_write_json(path: Path, data: Any, indent: Optional[int] = 2) -> int:
+    """
+    임시 파일에 쓴 뒤 rename하여 JSON 파일을 원자적으로 저장
+
+    Returns:
+        int: 기록한 바이트 수
+    """
+    path = Path(path)
+    payload = json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return len(payload)
+
+
+class JournaledJsonStore:
+    """JSON 배열 스냅샷과 append-only 저널을 묶어 관리하는 저장소"""
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        journal_enabled: bool = True,
+        compact_threshold: int = 500,
+        fsync: bool = True,
+        indent: Optional[int] = 2,
+        flush_every: int = 1,
+        flush_interval: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            snapshot_path: 스냅샷 JSON 파일 경로 (예: facebook_media.json)
+            journal_enabled: False면 기존처럼 변경 시마다 스냅샷 전체를 다시 씀
+            compact_threshold: 저널 항목이 이 개수 이상 쌓이면 자동으로 compaction (0 이하면 자동 병합 안 함)
+            fsync: 저널 기록 후 디스크 동기화 여부 (강제 종료 대비)
+            indent: 스냅샷 저장 시 JSON 들여쓰기
+            flush_every: 저널 기록을 이 개수(서로 다른 인덱스 기준)만큼 모았다가 한 번에 기록 (1이면 바로 기록)
+            flush_interval: 마지막 기록 이후 이 시간(초)이 지나면 모인 개수와 관계없이 기록 (0 이하면 사용 안 함)
+        """
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_name(self.snapshot_path.stem + JOURNAL_SUFFIX)
+        self.journal_enabled = journal_enabled
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.indent = indent
+        self._records: Optional[List[dict]] = None
+        self._overrides: Optional[Dict[int, dict]] = None  # 지연 모드: 저널에 기록된 변경분 (인덱스 -> 레코드)
+        self._length: Optional[int] = None  # 지연 모드: 전체 레코드 수 (알고 있는 경우)
+        self._iterating = 0  # 지연 모드: 스냅샷을 스트리밍 중인 iter_records() 수 (이 동안 자동 병합 보류)
+        self._pending = 0  # 스냅샷에 아직 병합되지 않은 저널 항목 수
+        self._tail_checked = False  # 저널 끝의 잘린 줄 확인 여부 (프로세스당 1회)
+        self._hash_cache: Optional[Tuple[Tuple[int, int, int], str]] = None  # (inode, 크기, 수정 시각) -> SHA-256
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._unflushed: Dict[int, dict] = {}  # 아직 저널에 기록하지 않은 변경분 (인덱스 -> 레코드)
+        self._last_flush = time.monotonic()
+        self.write_requests = 0  # put/append/extend로 요청된 레코드 수
+        self.flush_count = 0  # 저널/스냅샷 파일에 실제로 기록한 횟수
+        self.bytes_written = 0  # 저널/스냅샷 파일에 기록한 바이트 수
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+    def exists(self) -> bool:
+        """스냅샷 또는 저널 파일이 하나라도 존재하는지 확인"""
+        return self.snapshot_path.exists() or self.journal_path.exists()
+
+    def load(self) -> List[dict]:
+        """스냅샷을 한 번 읽고 저널을 재생하여 병합된 레코드 리스트 반환 (결과는 캐시됨)"""
+        if self._records is not None:
+            return self._records
+        # 지연 모드에서 모아 둔 변경분은 저널 재생으로 반영되도록 먼저 기록
+        self.flush()
+
+        records: List[dict] = []
+        if self.snapshot_path.exists():
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    records = data
+                else:
+                    logger.warning("⚠️ %s 파일이 리스트 형식이 아닙니다. 빈 리스트로 시작합니다.", self.snapshot_path)
+            except json.JSONDecodeError as exc:
+                logger.warning("⚠️ %s 파일의 JSON 형식이 올바르지 않습니다. 빈 리스트로 시작합니다: %s", self.snapshot_path, exc)
+
+        self._pending = self._replay_journal(records)
+        if self._pending:
+            logger.info("📒 저널 %d개 항목 병합 (%s)", self._pending, self.journal_path.name)
+        self._records = records
+        self._overrides = None  # 지연 모드에서 기록한 변경분도 저널 재생으로 반영됨
+        self._length = None
+        return records
+
+    @property
+    def records(self) -> List[dict]:
+        return self.load()
+
+    def iter_records(self, where: Optional[Predicate] = None) -> Iterator[Tuple[int, dict]]:
+        """
+        (인덱스, 레코드)를 순서대로 반환 - 전체를 로드하지 않았다면 스냅샷을 스트리밍으로 읽음
+
+        Args:
+            where: 레코드 필터 (common.json_stream.field_filter 등)
+        """
+        if self._records is not None:
+            for index, record in enumerate(self._records):
+                if where is None or where(record):
+                    yield index, record
+            return
+
+        overrides = self._load_overrides()
+        length = 0
+        if self.snapshot_path.exists():
+            self._iterating += 1
+            try:
+                for index, record in iter_json_array(self.snapshot_path):
+                    length = index + 1
+                    record = overrides.get(index, record)
+                    if isinstance(record, dict) and (where is None or where(record)):
+                        yield index, record
+            except ValueError as exc:
+                logger.warning("⚠️ %s 파일의 JSON 형식이 올바르지 않습니다: %s", self.snapshot_path, exc)
+                return
+            finally:
+                self._iterating -= 1
+        # 스냅샷 이후에 저널로 추가된 레코드
+        while length in overrides:
+            record = overrides[length]
+            if where is None or where(record):
+                yield length, record
+            length += 1
+        self._length = length
+
+    def __len__(self) -> int:
+        if self._records is not None:
+            return len(self._records)
+        if self._length is None:
+            overrides = self._load_overrides()
+            length = count_json_array(self.snapshot_path) if self.snapshot_path.exists() else 0
+            while length in overrides:
+                length += 1
+            self._length = length
+        return self._length
+
+    def _load_overrides(self) -> Dict[int, dict]:
+        """지연 모드: 저널을 읽어 인덱스별 최신 레코드 구성 (한 번만 수행)"""
+        if self._overrides is None:
+            self._overrides = {}
+            self._pending = 0
+            for index, record in self._iter_journal():
+                self._overrides[index] = record
+                self._pending += 1
+        return self._overrides
+
+    def _snapshot_fingerprint(self) -> Dict[str, Optional[str]]:
+        """
+        저널 인덱스가 가리키는 스냅샷 내용의 지문 (파일 전체의 SHA-256, 스냅샷이 없으면 None)
+
+        같은 파일을 다시 해시하지 않도록 (inode, 크기, 수정 시각)이 그대로면 이 프로세스에서 계산한 값을 재사용합니다.
+        스냅샷은 항상 rename으로 교체되므로 다시 쓰이면 inode가 바뀝니다.
+        """
+        try:
+            stat = self.snapshot_path.stat()
+        except FileNotFoundError:
+            return {"sha256": None}
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._hash_cache is None or self._hash_cache[0] != key:
+            digest = hashlib.sha256()
+            with open(self.snapshot_path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            self._hash_cache = (key, digest.hexdigest())
+        return {"sha256": self._hash_cache[1]}
+
+    def _journal_matches_snapshot(self) -> bool:
+        """저널 첫 줄의 스냅샷 지문이 현재 스냅샷과 같은지 확인 (다르면 저널을 옮겨 두고 False)"""
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            first_line = f.readline().strip()
+        if not first_line:
+            return True  # 빈 저널
+        try:
+            header = json.loads(first_line)
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get("op") != "snapshot":
+            reason = "스냅샷 지문이 없음"
+        elif {"sha256": header.get("sha256")} != self._snapshot_fingerprint():
+            reason = "저널 이후 스냅샷이 다시 쓰임"
+        else:
+            return True
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        stale_path = self.snapshot_path.with_name(self.snapshot_path.stem + STALE_JOURNAL_SUFFIX.format(stamp=stamp))
+        os.replace(self.journal_path, stale_path)
+        self._tail_checked = False
+        logger.warning(
+            "⚠️ 저널이 현재 스냅샷과 맞지 않아 재생하지 않습니다 (%s) - %s로 옮김",
+            reason,
+            stale_path.name,
+        )
+        return False
+
+    def _iter_journal(self) -> Iterator[Tuple[int, dict]]:
+        if not self.journal_path.exists() or not self._journal_matches_snapshot():
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 강제 종료로 마지막 줄이 잘린 경우 등
+                    logger.warning("⚠️ 저널 %d번째 줄이 손상되어 건너뜁니다 (%s)", line_no, self.journal_path.name)
+                    continue
+
+                if line_no == 1 and entry.get("op") == "snapshot":
+                    continue
+                index = entry.get("index")
+                record = entry.get("record")
+                if entry.get("op") != "put" or not isinstance(index, int) or not isinstance(record, dict):
+                    logger.warning("⚠️ 알 수 없는 저널 항목을 건너뜁니다 (%d번째 줄)", line_no)
+                    continue
+                yield index, record
+
+    def _replay_journal(self, records: List[dict]) -> int:
+        applied = 0
+        for index, record in self._iter_journal():
+            if index == len(records):
+                records.append(record)
+            elif 0 <= index < len(records):
+                records[index] = record
+            else:
+                logger.warning(
+                    "⚠️ 저널 인덱스 범위 초과 (index=%d, 현재 %d개) - 건너뜁니다 (%s)",
+                    index,
+                    len(records),
+                    self.journal_path.name,
+                )
+                continue
+            applied += 1
+        return applied
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+    def append(self, record: dict) -> int:
+        """레코드를 맨 뒤에 추가하고 인덱스 반환"""
+        if self._records is None and self._overrides is not None:
+            # 지연 모드: 전체를 로드하지 않고 저널에만 기록
+            index = len(self)
+            self.put(index, record)
+            return index
+        records = self.load()
+        index = len(records)
+        records.append(record)
+        self._write_entry(index, record)
+        return index
+
+    def extend(self, new_records: List[dict]) -> None:
+        """여러 레코드를 맨 뒤에 추가 (저널에는 한 번에 기록하고 fsync도 한 번만 수행)"""
+        if not new_records:
+            return
+        records = self.load()
+        entries = []
+        for record in new_records:
+            entries.append((len(records), record))
+            records.append(record)
+        self._write_entries(entries)
+
+    def put(self, index: int, record: dict) -> None:
+        """
+        index 위치의 레코드를 교체 (index == 길이이면 추가)
+
+        iter_records()로 스트리밍 중이면(전체 미로드) 변경분만 메모리에 유지하고 저널에 기록합니다.
+        """
+        if self._records is None:
+            overrides = self._load_overrides()
+            if index < 0 or (self._length is not None and index > self._length):
+                raise IndexError(f"레코드 인덱스 범위 초과: {index} (현재 {self._length}개)")
+            overrides[index] = record
+            if self._length is not None and index == self._length:
+                self._length += 1
+            self._write_entry(index, record)
+            return
+        records = self.load()
+        if index == len(records):
+            records.append(record)
+        elif 0 <= index < len(records):
+            records[index] = record
+        else:
+            raise IndexError(f"레코드 인덱스 범위 초과: {index} (현재 {len(records)}개)")
+        self._write_entry(index, record)
+
+    def save_all(self, records: List[dict]) -> None:
+        """전체 레코드를 스냅샷으로 저장하고 저널을 비움"""
+        self._records = records
+        self.compact()
+
+    def compact(self) -> None:
+        """저널을 스냅샷에 병합: 스냅샷을 원자적으로 다시 쓰고 저널 파일 삭제"""
+        if self._records is None and self._overrides is not None:
+            # 지연 모드: 스냅샷을 스트리밍하며 변경분만 교체
+            total = rewrite_json_array(self.snapshot_path, self._overrides, indent=self.indent)
+            self._overrides = {}
+            self._length = total
+            self.bytes_written += self.snapshot_path.stat().st_size
+        else:
+            records = self.load()
+            self.bytes_written += atomic_write_json(self.snapshot_path, records, indent=self.indent)
+            total = len(records)
+        self.flush_count += 1
+        # 아직 저널에 기록하지 않은 변경분도 스냅샷에 포함되었으므로 버림
+        self._pending += len(self._unflushed)
+        self._unflushed = {}
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+        if self._pending:
+            logger.info("🗜️ 저널 %d개 항목을 %s에 병합 완료 (총 %d개)", self._pending, self.snapshot_path.name, total)
+        self._pending = 0
+
+    def close(self) -> None:
+        """남은 저널 항목이 있으면 병합 (모아 둔 변경분 포함)"""
+        pending = self._pending or self._unflushed
+        if self._records is not None and (pending or not self.snapshot_path.exists()):
+            self.compact()
+        elif self._overrides is not None and pending:
+            self.compact()
+
+    def flush(self) -> int:
+        """
+        모아 둔 변경분을 저널에 한 번에 기록 (fsync도 한 번만 수행)
+
+        Returns:
+            int: 기록한 항목 수
+        """
+        self._last_flush = time.monotonic()
+        if not self._unflushed:
+            return 0
+        entries = list(self._unflushed.items())
+        self._unflushed = {}
+        self._flush_entries(entries)
+        return len(entries)
+
+    def io_stats(self) -> Dict[str, int]:
+        """쓰기 통계: 요청된 레코드 수, 실제 기록 횟수, 기록한 바이트 수"""
+        return {"requests": self.write_requests, "flushes": self.flush_count, "bytes": self.bytes_written}
+
+    def _write_entry(self, index: int, record: dict) -> None:
+        self._write_entries([(index, record)])
+
+    def _write_entries(self, entries: List[Tuple[int, dict]]) -> None:
+        self.write_requests += len(entries)
+        for index, record in entries:
+            # 같은 인덱스는 마지막 레코드만 남김 (처음 추가된 순서는 유지되므로 append 순서도 보존됨)
+            self._unflushed[index] = record
+        if (
+            self.flush_every <= 1
+            or len(self._unflushed) >= self.flush_every
+            or (self.flush_interval > 0 and time.monotonic() - self._last_flush >= self.flush_interval)
+        ):
+            self.flush()
+
+    def _flush_entries(self, entries: List[Tuple[int, dict]]) -> None:
+        if not self.journal_enabled:
+            # 저널 비활성화: 기존 방식대로 매번 전체 저장
+            self._pending += len(entries)
+            self.compact()
+            return
+
+        lines = "".join(
+            json.dumps({"op": "put", "index": index, "record": record}, ensure_ascii=False) + "\n"
+            for index, record in entries
+        )
+        needs_newline = False
+        if not self.journal_path.exists() or self.journal_path.stat().st_size == 0:
+            # 새 저널: 인덱스 기준이 되는 스냅샷 지문을 첫 줄에 기록
+            lines = json.dumps({"op": "snapshot", **self._snapshot_fingerprint()}) + "\n" + lines
+            self._tail_checked = True
+        elif not self._tail_checked:
+            # 이전 실행이 줄 중간에서 끊겼다면 새 줄에서 시작
+            with open(self.journal_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+            self._tail_checked = True
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            if needs_newline:
+                f.write("\n")
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.flush_count += 1
+        self.bytes_written += len(lines.encode("utf-8")) + (1 if needs_newline else 0)
+        self._pending += len(entries)
+
+        if self.compact_threshold > 0 and self._pending >= self.compact_threshold and not self._iterating:
+            self.compact()
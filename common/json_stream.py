@@ -0,0 +1,234 @@
+"""
+큰 JSON 배열 파일(instagram_media.json, facebook_media.json, kakaostory_popup_posts.json 등)을
+전체를 메모리에 올리지 않고 한 항목씩 읽고 다시 쓰는 스트리밍 유틸리티
+
+- iter_json_array(): 파일을 일정 크기씩 읽으면서 배열 항목을 하나씩 디코딩하여 (인덱스, 항목)을 yield
+  where 조건에 맞지 않는 항목은 바로 버리므로 메모리에는 현재 항목과 필터를 통과한 항목만 남습니다.
+- rewrite_json_array(): 원본을 다시 스트리밍하면서 변경된 인덱스의 항목만 교체/추가하여
+  임시 파일에 기록한 뒤 rename (출력 형식은 json.dump(..., indent=2)와 동일)
+- field_filter(): 자주 쓰는 "필드 값이 ~인 항목" 조건을 만드는 헬퍼
+
+처리 비용은 파일 크기에 비례하지만, 최대 메모리 사용량은 파일 크기와 무관하게 항목 하나 수준입니다.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+READ_CHUNK_SIZE = 1 << 20  # 1MB
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+Predicate = Callable[[dict], bool]
+
+
+def field_filter(**conditions: Any) -> Predicate:
+    """
+    필드 조건으로 항목 필터 함수 생성
+
+    값이 tuple/list/set이면 그중 하나와 일치하는지, callable이면 필드 값을 넣어 호출한 결과로 판단합니다.
+
+    예:
+        field_filter(media_type=("VIDEO", "CAROUSEL_ALBUM"))
+        field_filter(audio_caption=lambda v: not v)
+    """
+
+    def predicate(item: dict) -> bool:
+        for field, expected in conditions.items():
+            value = item.get(field)
+            if callable(expected):
+                if not expected(value):
+                    return False
+            elif isinstance(expected, (tuple, list, set, frozenset)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    return predicate
+
+
+def iter_json_array(path: Path, where: Optional[Predicate] = None) -> Iterator[Tuple[int, Any]]:
+    """
+    JSON 배열 파일을 스트리밍으로 읽어 (원본 인덱스, 항목)을 순서대로 반환
+
+    Args:
+        path: JSON 배열 파일 경로
+        where: 항목을 받아 True/False를 반환하는 필터 (None이면 전체)
+
+    Raises:
+        ValueError: 최상위 값이 배열이 아니거나 JSON 형식이 잘못된 경우
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _ChunkReader(f)
+        if not reader.skip_whitespace():
+            return
+        if reader.peek() != "[":
+            raise ValueError(f"{Path(path).name}: 최상위 값이 JSON 배열이 아닙니다")
+        reader.pos += 1
+
+        index = 0
+        expect_value = True
+        while True:
+            if not reader.skip_whitespace():
+                raise ValueError(f"{Path(path).name}: 배열이 닫히지 않았습니다 (항목 {index}개 읽음)")
+            ch = reader.peek()
+            if ch == "]":
+                return
+            if ch == ",":
+                if expect_value:
+                    raise ValueError(f"{Path(path).name}: {index}번째 항목 위치에 잘못된 ','가 있습니다")
+                reader.pos += 1
+                expect_value = True
+                continue
+            if not expect_value:
+                raise ValueError(f"{Path(path).name}: {index}번째 항목 앞에 ','가 없습니다")
+
+            item = reader.decode_value()
+            if where is None or (isinstance(item, dict) and where(item)):
+                yield index, item
+            index += 1
+            expect_value = False
+
+
+def count_json_array(path: Path) -> int:
+    """JSON 배열 파일의 항목 개수 (스트리밍)"""
+    count = 0
+    for count, _ in enumerate(iter_json_array(path), 1):
+        pass
+    return count
+
+
+def dump_json_array(path: Path, items: Iterable[Any], indent: Optional[int] = 2) -> Tuple[int, int]:
+    """
+    항목 iterable을 JSON 배열로 원자적으로 저장 (임시 파일 + rename)
+
+    json.dump(list(items), f, ensure_ascii=False, indent=indent)와 같은 형식으로 기록하지만
+    리스트 전체를 만들지 않고 항목을 하나씩 기록합니다.
+
+    Returns:
+        Tuple[int, int]: (기록한 항목 수, 기록한 바이트 수)
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            if indent is None:
+                separator, head, tail = ", ", "[", "]"
+            else:
+                pad = " " * indent
+                separator, head, tail = ",\n" + pad, "[\n" + pad, "\n]"
+            for item in items:
+                text = json.dumps(item, ensure_ascii=False, indent=indent)
+                if indent is not None:
+                    # JSON 문자열 안에는 줄바꿈 문자가 그대로 들어가지 않으므로 안전하게 들여쓰기 가능
+                    text = text.replace("\n", "\n" + pad)
+                f.write((separator if count else head) + text)
+                count += 1
+            f.write(tail if count else "[]")
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return count, size
+
+
+def rewrite_json_array(
+    path: Path,
+    updates: Dict[int, Any],
+    indent: Optional[int] = 2,
+) -> int:
+    """
+    JSON 배열 파일에서 지정한 인덱스의 항목만 교체하여 다시 저장 (스트리밍)
+
+    Args:
+        path: JSON 배열 파일 경로 (없으면 빈 배열로 간주)
+        updates: {인덱스: 새 항목} - 기존 길이 이상인 인덱스는 끝에 이어서 추가됨 (연속된 인덱스만)
+        indent: JSON 들여쓰기
+
+    Returns:
+        int: 저장 후 전체 항목 수
+    """
+    path = Path(path)
+
+    def merged() -> Iterator[Any]:
+        length = 0
+        if path.exists():
+            for index, item in iter_json_array(path):
+                yield updates.get(index, item)
+                length = index + 1
+        while length in updates:
+            yield updates[length]
+            length += 1
+
+    count, _ = dump_json_array(path, merged(), indent=indent)
+    return count
+
+
+class _ChunkReader:
+    """파일을 일정 크기씩 읽으면서 json.JSONDecoder.raw_decode로 값을 하나씩 디코딩"""
+
+    def __init__(self, f, chunk_size: int = READ_CHUNK_SIZE) -> None:
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_chunk: int = 0) -> bool:
+        """버퍼에 데이터를 더 읽어 옴 (더 읽을 것이 없으면 False)"""
+        if self.eof:
+            return False
+        data = self.f.read(max(self.chunk_size, min_chunk))
+        if not data:
+            self.eof = True
+            return False
+        # 이미 처리한 앞부분은 버림
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def skip_whitespace(self) -> bool:
+        """공백을 건너뜀 (파일 끝이면 False)"""
+        while True:
+            length = len(self.buf)
+            while self.pos < length and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < length:
+                return True
+            if not self._fill():
+                return False
+
+    def peek(self) -> str:
+        return self.buf[self.pos]
+
+    def decode_value(self) -> Any:
+        min_chunk = 0
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # 항목이 버퍼 경계에서 잘린 경우: 더 읽어서 재시도 (큰 항목은 읽는 크기를 늘려 재파싱 횟수 감소)
+                min_chunk = max(self.chunk_size, min_chunk * 2)
+                if not self._fill(min_chunk):
+                    raise
+                continue
+            if end >= len(self.buf) and not self.eof:
+                # 숫자 등 끝이 명확하지 않은 값이 버퍼 끝에 걸린 경우
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
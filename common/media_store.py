@@ -0,0 +1,168 @@
+"""
+한 번 로드해서 계속 사용하는 미디어 저장소 (키 인덱스 + 쓰기 버퍼)
+
+게시물 하나를 저장할 때마다 미디어 JSON 파일 전체를 읽고, 키 set을 다시 만들고, 전체를 다시 쓰던 방식 대신
+- 시작 시 한 번만 로드하여 키(예: Instagram shortcode) 인덱스를 메모리에 유지하고
+- 새 항목은 버퍼에 모았다가 일정 개수/시간마다 저널(JournaledJsonStore)에 한 번에 추가하며
+- 종료 시(정상 종료, 예외, SIGINT/SIGTERM) 버퍼를 비우고 저널을 스냅샷에 병합합니다.
+
+항목별 비용은 인덱스 조회 + 버퍼 추가(O(1))이고, 파일 전체 재작성은 종료 시 한 번만 일어납니다.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+from common.json_journal import JournaledJsonStore
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedMediaStore:
+    """키 인덱스와 쓰기 버퍼를 가진 미디어 JSON 저장소"""
+
+    def __init__(
+        self,
+        path: Path,
+        key_func: Callable[[dict], Optional[str]],
+        flush_every: int = 20,
+        flush_interval: float = 60.0,
+    ) -> None:
+        """
+        Args:
+            path: 미디어 JSON 파일 경로 (예: instagram_media.json)
+            key_func: 항목의 중복 체크 키를 반환하는 함수 (None이면 인덱싱하지 않음)
+            flush_every: 버퍼에 이 개수만큼 쌓이면 flush
+            flush_interval: 마지막 flush 이후 이 시간(초)이 지나면 flush
+        """
+        self.store = JournaledJsonStore(Path(path), compact_threshold=0)
+        self.key_func = key_func
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.keys: Set[str] = set()
+        self._buffer: List[dict] = []
+        self._on_flush: List[Callable[[], None]] = []
+        self._last_flush = time.monotonic()
+        self._loaded = False
+        self._closed = False
+        self.flush_count = 0
+
+    @property
+    def path(self) -> Path:
+        return self.store.snapshot_path
+
+    @property
+    def records(self) -> List[dict]:
+        """저장소의 전체 항목 (버퍼에 있는 항목 포함)"""
+        self.load()
+        return self.store.records + self._buffer
+
+    def load(self) -> "BufferedMediaStore":
+        """파일을 한 번 로드하고 키 인덱스 구성"""
+        if self._loaded:
+            return self
+        for item in self.store.load():
+            key = self.key_func(item)
+            if key:
+                self.keys.add(key)
+        self._loaded = True
+        return self
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.store.records) + len(self._buffer)
+
+    def contains(self, key: Optional[str]) -> bool:
+        """키가 이미 저장소(버퍼 포함)에 있는지 확인"""
+        self.load()
+        return bool(key) and key in self.keys
+
+    def add(self, item: dict, on_flush: Optional[Callable[[], None]] = None) -> bool:
+        """
+        항목을 버퍼에 추가 (키가 이미 있으면 추가하지 않음)
+
+        Args:
+            item: 추가할 항목
+            on_flush: 항목이 디스크에 기록된 뒤 호출할 함수 (예: permalink 처리 완료 표시)
+
+        Returns:
+            bool: 추가되었으면 True, 중복이면 False
+        """
+        self.load()
+        key = self.key_func(item)
+        if key and key in self.keys:
+            return False
+        if key:
+            self.keys.add(key)
+        self._buffer.append(item)
+        if on_flush is not None:
+            self._on_flush.append(on_flush)
+
+        if len(self._buffer) >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """
+        버퍼의 항목을 저널에 한 번에 기록
+
+        Returns:
+            int: 기록한 항목 수
+        """
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return 0
+        items, self._buffer = self._buffer, []
+        callbacks, self._on_flush = self._on_flush, []
+        self.store.extend(items)
+        self.flush_count += 1
+        logger.info("💾 %s에 %d개 항목 기록 (총 %d개)", self.path.name, len(items), len(self.store.records))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("⚠️ flush 후처리 실패: %s", exc)
+        return len(items)
+
+    def close(self) -> None:
+        """버퍼를 비우고 저널을 스냅샷 파일에 병합 (여러 번 호출해도 안전)"""
+        if self._closed or not self._loaded:
+            return
+        self._closed = True
+        self.flush()
+        self.store.close()
+
+    def register_exit_handlers(self) -> None:
+        """
+        프로세스 종료 시 close()가 호출되도록 등록
+
+        - 정상 종료/처리되지 않은 예외: atexit
+        - SIGTERM: SystemExit로 바꿔 finally/atexit가 실행되도록 함
+        - SIGINT: 기본 동작(KeyboardInterrupt)으로 finally/atexit가 실행됨
+        """
+        close_on_exit(self.close)
+
+
+def close_on_exit(*closers: Callable[[], None]) -> None:
+    """
+    프로세스 종료 시(정상 종료, 예외, SIGINT/SIGTERM) 주어진 함수가 호출되도록 등록
+
+    write-behind 버퍼를 가진 저장소의 close()/flush()를 등록하는 용도이며, 여러 번 호출해도 안전해야 합니다.
+    """
+    for closer in closers:
+        atexit.register(closer)
+    if threading.current_thread() is threading.main_thread():
+        try:
+            signal.signal(signal.SIGTERM, _raise_system_exit)
+        except (ValueError, OSError) as exc:
+            logger.debug("SIGTERM 핸들러 등록 실패: %s", exc)
+
+
+def _raise_system_exit(signum, frame):  # pylint: disable=unused-argument
+    raise SystemExit(128 + signum)
@@ -0,0 +1,442 @@
+"""
+OCR 백엔드 선택 (EasyOCR PyTorch / ONNX Runtime CPU)
+
+각 스크립트의 get_easyocr_reader()는 OCR 데몬에 연결하지 못하면 create_ocr_reader()로 Reader를 만듭니다.
+백엔드는 실행마다 환경 변수 OCR_BACKEND로 고릅니다.
+
+- "easyocr" (기본값): 기존과 같은 easyocr.Reader (GPU 시도 후 CPU 재시도)
+- "onnx": easyocr.Reader의 전처리/후처리(크기 조정, CRAFT 박스 추출, 글줄 묶기, CTC 디코딩)는 그대로 쓰고
+  검출기(CRAFT)와 인식기(CRNN) 추론만 ONNX Runtime CPU 세션으로 교체합니다.
+  결과 형식이 같으므로 OCR 캐시, 배치, 워커 풀, 텍스트 프리필터(detect)를 그대로 사용할 수 있습니다.
+  모델은 처음 사용할 때 EasyOCR 가중치에서 ONNX로 변환하여 EasyOCR 모델 폴더의 onnx/ 아래에 저장하고,
+  OCR_ONNX_QUANTIZE로 ONNX Runtime 동적 int8 양자화 모델을 고를 수 있습니다.
+  onnxruntime/onnx가 없거나 변환에 실패하면 경고 후 EasyOCR 백엔드를 사용합니다.
+
+환경 변수:
+    OCR_BACKEND=easyocr|onnx
+    OCR_ONNX_QUANTIZE=none|recognizer|all  (기본 none, recognizer는 인식기만, all은 검출기까지 int8)
+    OCR_ONNX_THREADS=N                     (세션 연산 스레드 수, 0이면 ONNX Runtime 기본값, 워커 풀은 워커별 스레드 수로 설정)
+
+모델 변환 / EasyOCR 결과와의 동일성 비교 + 처리량 벤치마크:
+    python -m common.ocr_backend export [--quantize all]
+    python -m common.ocr_backend compare sample1.jpg sample2.png ... [--quantize recognizer] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import logging
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np  # type: ignore
+
+try:
+    import onnxruntime as ort  # type: ignore
+
+    HAS_ONNXRUNTIME = True
+except ImportError:
+    HAS_ONNXRUNTIME = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("easyocr", "onnx")
+QUANTIZE_MODES = ("none", "recognizer", "all")
+BACKEND_ENV = "OCR_BACKEND"
+QUANTIZE_ENV = "OCR_ONNX_QUANTIZE"
+THREADS_ENV = "OCR_ONNX_THREADS"
+OCR_BACKEND = os.getenv(BACKEND_ENV, "easyocr").strip().lower() or "easyocr"
+ONNX_QUANTIZE = os.getenv(QUANTIZE_ENV, "none").strip().lower() or "none"
+ONNX_OPSET = 17
+ONNX_DIR_NAME = "onnx"  # EasyOCR 모델 폴더 아래 변환 모델 저장 위치
+
+# 변환할 때 쓰는 예시 입력 크기 (배치/높이/너비는 동적 축으로 내보냄)
+DETECTOR_SAMPLE_SHAPE = (1, 3, 640, 640)
+RECOGNIZER_SAMPLE_SHAPE = (1, 1, 64, 256)  # EasyOCR 인식기 입력 높이 imgH=64
+
+
+class OCRBackendError(Exception):
+    """ONNX 모델 변환/로드 실패"""
+
+
+def _onnx_threads() -> int:
+    # 워커 풀이 워커 시작 시 환경 변수를 설정하므로 모듈 상수가 아니라 세션을 만들 때 읽음
+    try:
+        return max(0, int(os.getenv(THREADS_ENV, "0") or 0))
+    except ValueError:
+        return 0
+
+
+class _OnnxModule:
+    """EasyOCR이 torch 모델 대신 호출하는 ONNX Runtime 세션 (eval()과 호출만 지원)"""
+
+    def __init__(self, path: Path) -> None:
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = _onnx_threads()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.path = path
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def eval(self) -> "_OnnxModule":
+        return self
+
+    def run(self, tensor: Any) -> List[Any]:
+        import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        outputs = self.session.run(None, {self.input_name: tensor.detach().cpu().numpy()})
+        return [torch.from_numpy(output) for output in outputs]
+
+
+class _OnnxDetector(_OnnxModule):
+    def __call__(self, image: Any) -> Any:
+        score, feature = self.run(image)
+        return score, feature
+
+
+class _OnnxRecognizer(_OnnxModule):
+    def __call__(self, image: Any, text: Any = None) -> Any:
+        # CTC 인식기는 text 입력을 쓰지 않음
+        return self.run(image)[0]
+
+
+def _recognizer_wrapper(model: Any) -> Any:
+    """text 인자 없이 이미지 하나만 받도록 감싼 인식기 (ONNX 입력을 이미지 하나로 내보내기 위함)"""
+    import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    class RecognizerWrapper(torch.nn.Module):
+        def __init__(self, inner: Any) -> None:
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, image: Any) -> Any:  # pylint: disable=arguments-differ
+            return self.inner(image, None)
+
+    return RecognizerWrapper(model).eval()
+
+
+def _height_mean_pool() -> Any:
+    """AdaptiveAvgPool2d((None, 1))과 같은 계산 (마지막 축 평균, 너비가 동적이어도 ONNX로 내보낼 수 있음)"""
+    import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    class HeightMeanPool(torch.nn.Module):
+        def forward(self, features: Any) -> Any:  # pylint: disable=arguments-differ
+            return features.mean(dim=3, keepdim=True)
+
+    return HeightMeanPool()
+
+
+def _export(model: Any, sample: Any, path: Path, **kwargs: Any) -> None:
+    """torch.onnx.export (dynamic_axes를 쓰는 TorchScript 방식 변환기, torch 2.9부터 기본값이 dynamo라 명시)"""
+    import inspect  # pylint: disable=import-outside-toplevel
+
+    import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(model, sample, str(path), opset_version=ONNX_OPSET, **kwargs)
+
+
+def export_detector(model: Any, path: Path) -> None:
+    """CRAFT 검출기를 ONNX로 변환 (입력 NCHW float32, 출력 score 맵과 feature)"""
+    import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    _export(
+        model.eval(),
+        torch.randn(*DETECTOR_SAMPLE_SHAPE),
+        path,
+        input_names=["image"],
+        output_names=["score", "feature"],
+        dynamic_axes={
+            "image": {0: "batch", 2: "height", 3: "width"},
+            "score": {0: "batch", 1: "score_height", 2: "score_width"},
+            "feature": {0: "batch", 2: "feature_height", 3: "feature_width"},
+        },
+    )
+
+
+def export_recognizer(model: Any, path: Path) -> None:
+    """CRNN 인식기를 ONNX로 변환 (입력 높이 64 흑백 글줄, 너비 가변, 출력 글자별 점수)"""
+    import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    # 입력 너비가 동적이면 AdaptiveAvgPool2d((None, 1))은 변환되지 않으므로 변환하는 동안만 같은 계산의 평균으로 교체
+    pool = getattr(model, "AdaptiveAvgPool", None)
+    swap = isinstance(pool, torch.nn.AdaptiveAvgPool2d) and tuple(pool.output_size) == (None, 1)
+    if swap:
+        model.AdaptiveAvgPool = _height_mean_pool()
+    try:
+        _export(
+            _recognizer_wrapper(model.eval()),
+            torch.randn(*RECOGNIZER_SAMPLE_SHAPE),
+            path,
+            input_names=["image"],
+            output_names=["logits"],
+            dynamic_axes={"image": {0: "batch", 3: "width"}, "logits": {0: "batch", 1: "steps"}},
+        )
+    finally:
+        if swap:
+            model.AdaptiveAvgPool = pool
+
+
+def quantize_model(source: Path, target: Path) -> None:
+    """ONNX Runtime 동적 int8 양자화 (가중치 int8, 활성값은 실행 시 양자화)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+
+
+def model_paths(storage_dir: Path, model_lang: str, quantize: str) -> Dict[str, Path]:
+    """변환 모델 경로 (양자화 여부에 따라 .int8.onnx)"""
+    onnx_dir = storage_dir / ONNX_DIR_NAME
+    detector = onnx_dir / "craft.onnx"
+    recognizer = onnx_dir / f"recognizer_{model_lang}.onnx"
+    return {
+        "detector": detector.with_suffix(".int8.onnx") if quantize == "all" else detector,
+        "recognizer": recognizer.with_suffix(".int8.onnx") if quantize in ("recognizer", "all") else recognizer,
+        "detector_fp32": detector,
+        "recognizer_fp32": recognizer,
+    }
+
+
+def ensure_onnx_models(reader: Any, quantize: str = "none", force: bool = False) -> Dict[str, Path]:
+    """
+    easyocr.Reader(quantize=False)의 torch 모델을 ONNX로 변환하여 저장하고 사용할 모델 경로 반환
+
+    이미 변환된 파일이 있으면 그대로 사용합니다 (force=True면 다시 변환).
+    torch 동적 양자화가 적용된 모델은 ONNX로 내보낼 수 없으므로 양자화하지 않은 Reader가 필요합니다.
+    """
+    if getattr(reader, "detect_network", "craft") != "craft":
+        raise OCRBackendError(f"ONNX 백엔드는 CRAFT 검출기만 지원합니다: {reader.detect_network}")
+    if quantize not in QUANTIZE_MODES:
+        raise OCRBackendError(f"알 수 없는 양자화 설정: {quantize} ({'/'.join(QUANTIZE_MODES)})")
+    paths = model_paths(Path(reader.model_storage_directory), reader.model_lang, quantize)
+    if force or not paths["detector_fp32"].exists():
+        logger.info("🔄 CRAFT 검출기를 ONNX로 변환합니다: %s", paths["detector_fp32"])
+        export_detector(reader.detector, paths["detector_fp32"])
+    if force or not paths["recognizer_fp32"].exists():
+        logger.info("🔄 %s 인식기를 ONNX로 변환합니다: %s", reader.model_lang, paths["recognizer_fp32"])
+        export_recognizer(reader.recognizer, paths["recognizer_fp32"])
+    for name in ("detector", "recognizer"):
+        if paths[name] != paths[f"{name}_fp32"] and (force or not paths[name].exists()):
+            logger.info("🔄 int8 동적 양자화: %s", paths[name])
+            quantize_model(paths[f"{name}_fp32"], paths[name])
+    return paths
+
+
+def create_onnx_reader(langs: Sequence[str], quantize: Optional[str] = None) -> Any:
+    """
+    검출기/인식기 추론을 ONNX Runtime으로 바꾼 easyocr.Reader 반환
+
+    Reader의 readtext/readtext_batched/detect/recognize를 그대로 사용하므로 반환값 형식이 EasyOCR과 같습니다.
+    """
+    if not HAS_ONNXRUNTIME:
+        raise OCRBackendError("onnxruntime이 설치되어 있지 않습니다 (pip install onnxruntime onnx)")
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    quantize = quantize or ONNX_QUANTIZE
+    reader = easyocr.Reader(list(langs), gpu=False, quantize=False, verbose=False)
+    try:
+        paths = ensure_onnx_models(reader, quantize)
+        reader.detector = _OnnxDetector(paths["detector"])
+        reader.recognizer = _OnnxRecognizer(paths["recognizer"])
+    except OCRBackendError:
+        raise
+    except Exception as exc:  # pylint: disable=broad-except
+        raise OCRBackendError(f"ONNX 모델 준비 실패: {exc}") from exc
+    reader.ocr_backend = f"onnx:{quantize}"
+    return reader
+
+
+def create_ocr_reader(
+    langs: Sequence[str], gpu: bool = True, backend: Optional[str] = None, quantize: Optional[str] = None
+) -> Any:
+    """
+    설정한 백엔드의 OCR Reader 생성 (readtext/readtext_batched/detect 호환)
+
+    backend를 지정하지 않으면 OCR_BACKEND 환경 변수를 따르고, ONNX 백엔드를 쓸 수 없으면 EasyOCR로 대체합니다.
+    """
+    backend = (backend or OCR_BACKEND).lower()
+    if backend == "onnx":
+        try:
+            started = time.perf_counter()
+            reader = create_onnx_reader(langs, quantize)
+            logger.info("✅ OCR 백엔드 ONNX Runtime CPU로 초기화 완료 (%s, %.1f초)", reader.ocr_backend, time.perf_counter() - started)
+            return reader
+        except OCRBackendError as exc:
+            logger.warning("⚠️ ONNX Runtime 백엔드를 사용할 수 없어 EasyOCR로 대체합니다: %s", exc)
+    elif backend != "easyocr":
+        logger.warning("⚠️ 알 수 없는 OCR 백엔드(%s), EasyOCR을 사용합니다 (%s)", backend, "/".join(BACKENDS))
+
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    if gpu:
+        try:
+            reader = easyocr.Reader(list(langs), gpu=True)
+            logger.info("✅ EasyOCR %s 모드로 초기화 완료", "GPU" if str(reader.device).startswith("cuda") else "CPU")
+            return reader
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("⚠️ EasyOCR GPU 초기화 실패, CPU로 재시도합니다: %s", exc)
+    reader = easyocr.Reader(list(langs), gpu=False)
+    logger.info("✅ EasyOCR CPU 모드로 초기화 완료")
+    return reader
+
+
+def reader_backend(reader: Any) -> str:
+    """Reader가 사용하는 백엔드 이름 ("easyocr" 또는 "onnx:<양자화>")"""
+    return getattr(reader, "ocr_backend", "easyocr")
+
+
+def configured_backend() -> str:
+    """환경 변수로 설정한 백엔드 이름 (reader_backend()와 같은 형식)"""
+    return f"onnx:{ONNX_QUANTIZE}" if OCR_BACKEND == "onnx" else "easyocr"
+
+
+def profile_tag(reader: Any = None) -> str:
+    """
+    OCR 캐시 profile 앞에 붙일 백엔드 태그 ("easyocr" 또는 "onnx-<양자화>")
+
+    EasyOCR과 ONNX(int8 양자화 포함) 결과는 조금씩 다르므로 캐시 항목을 백엔드별로 나눕니다.
+    reader를 주면 그 Reader가 실제로 쓰는 백엔드(ONNX를 쓸 수 없어 EasyOCR로 대체된 경우 포함),
+    아직 Reader를 만들지 않았으면(None) 설정한 백엔드를 사용합니다.
+    """
+    backend = reader_backend(reader) if reader is not None else configured_backend()
+    return backend.replace(":", "-")
+
+
+# ----------------------------------------------------------------------
+# 동일성 비교 / 처리량 벤치마크
+# ----------------------------------------------------------------------
+IDENTIFIER_PATTERN = re.compile(r"\d[\d\- ]{4,}\d")
+
+
+def _joined_text(results: Sequence[Any], min_confidence: float) -> str:
+    return " ".join(text.strip() for _, text, conf in results if text and conf >= min_confidence)
+
+
+def _identifiers(text: str) -> set:
+    """전화번호/회원번호 같은 6자리 이상 숫자열 (구분 기호 제거)"""
+    return {re.sub(r"\D", "", match) for match in IDENTIFIER_PATTERN.findall(text)}
+
+
+def _timed_readtext(reader: Any, images: Sequence[np.ndarray], repeat: int) -> tuple:
+    """첫 실행(워밍업) 결과와 반복 실행 평균 시간(초/장)"""
+    results = [reader.readtext(image) for image in images]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for image in images:
+            reader.readtext(image)
+    seconds = (time.perf_counter() - started) / max(1, repeat * len(images))
+    return results, seconds
+
+
+def compare_backends(
+    images: Dict[str, np.ndarray],
+    baseline: Any,
+    candidate: Any,
+    repeat: int = 3,
+    min_confidence: float = 0.3,
+) -> Dict[str, Any]:
+    """
+    EasyOCR(baseline)과 다른 백엔드(candidate)의 결과 동일성과 처리량 비교
+
+    이미지별 텍스트가 완전히 같은 비율, 문자 유사도 평균, 숫자열 재현율, 박스 수 차이와
+    각 백엔드의 초/장을 반환합니다.
+    """
+    names = list(images)
+    arrays = [images[name] for name in names]
+    base_results, base_seconds = _timed_readtext(baseline, arrays, repeat)
+    cand_results, cand_seconds = _timed_readtext(candidate, arrays, repeat)
+
+    exact = similarity = found = expected_total = box_diff = 0
+    for name, base, cand in zip(names, base_results, cand_results):
+        base_text = _joined_text(base, min_confidence)
+        cand_text = _joined_text(cand, min_confidence)
+        ratio = difflib.SequenceMatcher(None, base_text, cand_text).ratio() if base_text or cand_text else 1.0
+        expected = _identifiers(base_text)
+        exact += base_text == cand_text
+        similarity += ratio
+        expected_total += len(expected)
+        found += len(expected & _identifiers(cand_text))
+        box_diff += abs(len(base) - len(cand))
+        if base_text != cand_text:
+            logger.info("  %s: 유사도 %.3f\n    easyocr: %s\n    %s: %s", name, ratio, base_text, reader_backend(candidate), cand_text)
+
+    count = len(names)
+    return {
+        "images": count,
+        "exact_match": round(exact / count, 3) if count else 1.0,
+        "similarity": round(similarity / count, 3) if count else 1.0,
+        "identifier_recall": round(found / expected_total, 3) if expected_total else 1.0,
+        "box_count_diff": round(box_diff / count, 2) if count else 0.0,
+        "baseline_seconds_per_image": round(base_seconds, 3),
+        "candidate_seconds_per_image": round(cand_seconds, 3),
+        "speedup": round(base_seconds / cand_seconds, 2) if cand_seconds else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR 백엔드 모델 변환 및 EasyOCR과의 동일성/처리량 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="EasyOCR 모델을 ONNX로 변환 (양자화 모델 포함)")
+    export_parser.add_argument("--force", action="store_true", help="이미 변환된 모델도 다시 변환")
+    compare_parser = sub.add_parser("compare", help="EasyOCR(CPU)과 ONNX Runtime 결과/속도 비교")
+    compare_parser.add_argument("images", nargs="+", type=Path, help="테스트 이미지 파일")
+    compare_parser.add_argument("--repeat", type=int, default=3, help="속도 측정 반복 횟수")
+    compare_parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime 스레드 수 (0이면 기본값)")
+    for command_parser in (export_parser, compare_parser):
+        command_parser.add_argument("--langs", nargs="+", default=["ko", "en"])
+        command_parser.add_argument("--quantize", choices=QUANTIZE_MODES, default=ONNX_QUANTIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    import cv2  # type: ignore  # pylint: disable=import-outside-toplevel
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    if args.command == "export":
+        reader = easyocr.Reader(args.langs, gpu=False, quantize=False, verbose=False)
+        for name, path in ensure_onnx_models(reader, args.quantize, force=args.force).items():
+            print(f"{name}: {path}")
+        return 0
+
+    images: Dict[str, np.ndarray] = {}
+    for path in args.images:
+        image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning("⚠️ 이미지를 읽을 수 없어 건너뜁니다: %s", path)
+            continue
+        images[path.name] = image
+    if not images:
+        return 1
+    if args.threads:
+        os.environ[THREADS_ENV] = str(args.threads)
+    try:
+        candidate = create_onnx_reader(args.langs, args.quantize)
+    except OCRBackendError as exc:
+        logger.error("❌ %s", exc)
+        return 1
+    # 기준: 스크립트가 CPU에서 쓰는 기본 EasyOCR (torch 동적 양자화 적용)
+    baseline = easyocr.Reader(args.langs, gpu=False, verbose=False)
+    report = compare_backends(images, baseline, candidate, repeat=args.repeat)
+    print(
+        f"{report['images']}장: 텍스트 일치 {report['exact_match']}, 유사도 {report['similarity']}, "
+        f"숫자열 재현율 {report['identifier_recall']}, 박스 수 차이 {report['box_count_diff']}/장"
+    )
+    print(
+        f"easyocr {report['baseline_seconds_per_image']}초/장, {reader_backend(candidate)} "
+        f"{report['candidate_seconds_per_image']}초/장 ({report['speedup']}배)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
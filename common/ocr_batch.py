@@ -0,0 +1,271 @@
+"""
+여러 게시물의 이미지를 모아 고정 크기 배치로 EasyOCR을 실행하는 엔진
+
+이미지 한 장마다 reader.readtext()를 따로 호출하던 방식 대신
+- submit(key, image)로 디코딩한 이미지를 큐에 넣고
+- batch_size장이 모이면 reader.readtext_batched()로 검출(CRAFT)/인식을 한 번에 수행한 뒤
+- 이미지별 결과 텍스트를 on_result(key, texts) 콜백으로 돌려줍니다 (key로 게시물/슬롯을 구분).
+on_raw_result(key, results)를 주면 신뢰도로 거르기 전의 readtext() 형식 결과도 받습니다 (OCR 캐시 저장용,
+OCR이 실패한 이미지는 호출하지 않음).
+
+readtext_batched()는 배치 안의 이미지 크기가 같아야 하므로, 배치에서 가장 큰 높이/너비에 맞춰
+각 이미지의 오른쪽/아래를 흰색으로 채웁니다 (박스 좌표는 원본 이미지 기준 그대로).
+채우는 픽셀을 줄이기 위해 size_sort_batches개 배치 분량의 이미지를 모은 뒤 (높이, 너비) 순으로 정렬하여
+비슷한 크기끼리 배치를 만들고, 채운 픽셀 비율(padding_overhead)을 처리량 통계에 함께 기록합니다.
+배치 실행이 실패하면(메모리 부족 등) 해당 배치만 이미지별 readtext()로 다시 처리합니다.
+pool(common.ocr_pool.OCRWorkerPool)을 주면 배치의 이미지를 워커 프로세스들에 나눠 readtext()로 처리합니다
+(이 경우 배치 크기는 워커 수 이상으로 맞춤).
+
+배치 크기별 처리량 비교:
+    python -m common.ocr_batch --batch-sizes 1 4 8 16 sample1.jpg sample2.png ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+OCRResultCallback = Callable[[Hashable, List[str]], None]
+RawResultCallback = Callable[[Hashable, List[Tuple[Any, str, float]]], None]
+# 이미지 하나의 readtext() 결과 (OCR 실패 시 None)
+RawResults = Optional[List[Tuple[Any, str, float]]]
+
+
+def filter_texts(results: Sequence[Tuple[Any, str, float]], min_confidence: float) -> List[str]:
+    """EasyOCR 결과 [(box, text, conf), ...]에서 신뢰도 기준을 넘는 텍스트만 반환"""
+    return [text.strip() for _, text, conf in results if text and text.strip() and conf >= min_confidence]
+
+
+def pad_to_shape(image: np.ndarray, height: int, width: int, fill: int = 255) -> np.ndarray:
+    """이미지의 오른쪽/아래를 fill 값으로 채워 (height, width) 크기로 맞춤"""
+    pad_h = height - image.shape[0]
+    pad_w = width - image.shape[1]
+    if pad_h <= 0 and pad_w <= 0:
+        return image
+    padding = [(0, max(pad_h, 0)), (0, max(pad_w, 0))] + [(0, 0)] * (image.ndim - 2)
+    return np.pad(image, padding, mode="constant", constant_values=fill)
+
+
+class BatchOCREngine:
+    """게시물을 가로질러 이미지를 고정 크기 배치로 모아 EasyOCR을 실행"""
+
+    def __init__(
+        self,
+        reader_factory: Callable[[], Any],
+        batch_size: int = 8,
+        min_confidence: float = 0.5,
+        on_result: Optional[OCRResultCallback] = None,
+        pool: Optional[Any] = None,
+        on_raw_result: Optional[RawResultCallback] = None,
+        size_sort_batches: int = 4,
+    ) -> None:
+        """
+        Args:
+            reader_factory: easyocr.Reader를 반환하는 함수 (첫 배치 실행 시 호출, 예: get_easyocr_reader)
+            batch_size: 한 번에 처리할 이미지 수 (1이면 기존처럼 이미지별 readtext)
+            min_confidence: 결과에 포함할 최소 신뢰도
+            on_result: 이미지 하나의 결과가 나오면 호출할 함수 (key, 텍스트 리스트)
+            pool: OCRWorkerPool (주면 메인 프로세스에서는 Reader를 만들지 않고 워커에서 처리)
+            on_raw_result: 이미지 하나의 readtext() 결과가 나오면 호출할 함수 (key, 결과), OCR 실패 시 호출 안 함
+            size_sort_batches: 이 배치 수만큼 이미지를 모아 크기순으로 정렬한 뒤 배치로 나눔 (1이면 들어온 순서대로)
+        """
+        self.reader_factory = reader_factory
+        self.pool = pool
+        self.batch_size = max(1, int(batch_size), pool.workers if pool is not None else 1)
+        self.min_confidence = min_confidence
+        self.on_result = on_result
+        self.on_raw_result = on_raw_result
+        self.size_sort_batches = max(1, int(size_sort_batches))
+        self._queue: List[Tuple[Hashable, np.ndarray]] = []
+        self.images = 0  # 처리한 이미지 수
+        self.batches = 0  # 실행한 배치 수
+        self.fallbacks = 0  # 이미지별 처리로 다시 실행한 배치 수
+        self.seconds = 0.0  # OCR에 걸린 시간 (초)
+        self.pixels = 0  # readtext_batched()로 처리한 이미지의 원본 픽셀 수
+        self.padded_pixels = 0  # 배치 크기를 맞추느라 채운 픽셀 수
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, key: Hashable, image: np.ndarray) -> None:
+        """이미지를 큐에 넣고, size_sort_batches개 배치 분량이 모이면 크기순으로 정렬해 배치 실행"""
+        self._queue.append((key, image))
+        if len(self._queue) >= self.batch_size * self.size_sort_batches:
+            self.flush()
+
+    def flush(self) -> int:
+        """큐에 남은 이미지를 모두 처리하고 처리한 이미지 수 반환"""
+        count = len(self._queue)
+        queue, self._queue = self._queue, []
+        for chunk in self._size_sorted_chunks(queue):
+            self._run(chunk)
+        return count
+
+    def run(self, images: Sequence[np.ndarray]) -> List[List[str]]:
+        """이미지 목록을 배치로 처리하고 입력 순서대로 텍스트 리스트 반환 (on_result 콜백은 호출하지 않음)"""
+        results: List[List[str]] = [[] for _ in images]
+        window = self.batch_size * self.size_sort_batches
+        for start in range(0, len(images), window):
+            items = [(start + offset, image) for offset, image in enumerate(images[start : start + window])]
+            for chunk in self._size_sorted_chunks(items):
+                for key, raw in self._recognize(chunk):
+                    results[key] = filter_texts(raw or [], self.min_confidence)
+        return results
+
+    def _size_sorted_chunks(
+        self, items: List[Tuple[Hashable, np.ndarray]]
+    ) -> List[List[Tuple[Hashable, np.ndarray]]]:
+        """(높이, 너비) 순으로 정렬해 batch_size장씩 나눔 (비슷한 크기끼리 묶어 채우는 픽셀을 줄임)"""
+        if self.size_sort_batches > 1:
+            items = sorted(items, key=lambda item: item[1].shape[:2])
+        return [items[start : start + self.batch_size] for start in range(0, len(items), self.batch_size)]
+
+    def _run(self, chunk: List[Tuple[Hashable, np.ndarray]]) -> None:
+        for key, raw in self._recognize(chunk):
+            if raw is not None and self.on_raw_result is not None:
+                self.on_raw_result(key, raw)
+            if self.on_result is not None:
+                self.on_result(key, filter_texts(raw or [], self.min_confidence))
+
+    def _recognize(self, chunk: List[Tuple[Hashable, np.ndarray]]) -> List[Tuple[Hashable, RawResults]]:
+        if not chunk:
+            return []
+        started = time.perf_counter()
+        if self.pool is not None:
+            results = self._readtext_pool(chunk)
+        elif len(chunk) == 1:
+            results = [(chunk[0][0], self._readtext(self.reader_factory(), chunk[0][1]))]
+        else:
+            reader = self.reader_factory()
+            try:
+                results = self._readtext_batched(reader, chunk)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("⚠️ OCR 배치 처리 실패, 이미지별로 다시 처리합니다 (%d장): %s", len(chunk), exc)
+                self.fallbacks += 1
+                results = [(key, self._readtext(reader, image)) for key, image in chunk]
+        self.seconds += time.perf_counter() - started
+        self.images += len(chunk)
+        self.batches += 1
+        return results
+
+    def _readtext(self, reader: Any, image: np.ndarray) -> RawResults:
+        try:
+            return list(reader.readtext(image))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.debug("EasyOCR 실패: %s", exc)
+            return None
+
+    def _readtext_pool(self, chunk: List[Tuple[Hashable, np.ndarray]]) -> List[Tuple[Hashable, RawResults]]:
+        try:
+            batch_results = self.pool.readtext_many([image for _, image in chunk])
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("⚠️ OCR 워커 처리 실패 (%d장): %s", len(chunk), exc)
+            return [(key, None) for key, _ in chunk]
+        return [(key, list(results)) for (key, _), results in zip(chunk, batch_results)]
+
+    def _readtext_batched(
+        self, reader: Any, chunk: List[Tuple[Hashable, np.ndarray]]
+    ) -> List[Tuple[Hashable, RawResults]]:
+        # 같은 크기로 맞춰야 하므로 채널 수를 통일하고 가장 큰 높이/너비에 맞춰 채움
+        images = [image if image.ndim == 3 else np.stack([image] * 3, axis=-1) for _, image in chunk]
+        height = max(image.shape[0] for image in images)
+        width = max(image.shape[1] for image in images)
+        padded = [pad_to_shape(image, height, width) for image in images]
+        pixels = sum(image.shape[0] * image.shape[1] for image in images)
+        self.pixels += pixels
+        self.padded_pixels += len(images) * height * width - pixels
+        batch_results = reader.readtext_batched(padded, batch_size=self.batch_size)
+        return [(key, list(results)) for (key, _), results in zip(chunk, batch_results)]
+
+    def stats(self) -> Dict[str, float]:
+        """처리 통계: 배치 크기, 이미지 수, 배치 수, 소요 시간, 초당 이미지 수, 채운 픽셀 비율(원본 대비 %)"""
+        return {
+            "batch_size": self.batch_size,
+            "images": self.images,
+            "batches": self.batches,
+            "fallbacks": self.fallbacks,
+            "seconds": round(self.seconds, 2),
+            "images_per_second": round(self.images / self.seconds, 2) if self.seconds else 0.0,
+            "padding_overhead": round(self.padded_pixels / self.pixels * 100, 1) if self.pixels else 0.0,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        logger.info(
+            "📊 OCR 처리량 (batch_size=%d%s): 이미지 %d장, 배치 %d회, %.1f초, %.2f장/초, 채운 픽셀 %.1f%%%s",
+            stats["batch_size"],
+            f", 워커 {self.pool.workers}개" if self.pool is not None else "",
+            stats["images"],
+            stats["batches"],
+            stats["seconds"],
+            stats["images_per_second"],
+            stats["padding_overhead"],
+            f" (이미지별 재처리 {stats['fallbacks']}회)" if stats["fallbacks"] else "",
+        )
+
+
+def benchmark(
+    reader_factory: Callable[[], Any],
+    images: Sequence[np.ndarray],
+    batch_sizes: Sequence[int],
+    min_confidence: float = 0.5,
+) -> List[Dict[str, float]]:
+    """같은 이미지 집합을 배치 크기별로 처리하여 처리량 비교 (첫 실행 전 reader를 미리 로드)"""
+    reader_factory()
+    report = []
+    for batch_size in batch_sizes:
+        engine = BatchOCREngine(reader_factory, batch_size=batch_size, min_confidence=min_confidence)
+        engine.run(list(images))
+        engine.log_stats()
+        report.append(engine.stats())
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EasyOCR 배치 크기별 처리량 비교")
+    parser.add_argument("images", nargs="+", type=Path, help="테스트 이미지 파일")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 8, 16])
+    parser.add_argument("--langs", nargs="+", default=["ko", "en"])
+    parser.add_argument("--gpu", action="store_true", help="GPU 사용")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    import cv2  # type: ignore  # pylint: disable=import-outside-toplevel
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    images = []
+    for path in args.images:
+        image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning("⚠️ 이미지를 읽을 수 없어 건너뜁니다: %s", path)
+            continue
+        images.append(image)
+    if not images:
+        logger.error("❌ 처리할 이미지가 없습니다")
+        return 1
+
+    reader: List[Any] = []
+
+    def reader_factory() -> Any:
+        if not reader:
+            reader.append(easyocr.Reader(args.langs, gpu=args.gpu))
+        return reader[0]
+
+    for stats in benchmark(reader_factory, images, args.batch_sizes):
+        print(
+            f"batch_size={stats['batch_size']}: {stats['images']}장 / {stats['seconds']}초 "
+            f"= {stats['images_per_second']}장/초 (채운 픽셀 {stats['padding_overhead']}%)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
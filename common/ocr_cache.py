@@ -0,0 +1,432 @@
+"""
+플랫폼/게시물을 가로지르는 OCR 결과 캐시 (SQLite)
+
+같은 홍보 이미지가 카카오스토리/인스타그램/페이스북의 여러 게시물에 반복해서 올라오므로,
+이미지를 한 번 OCR한 결과(박스, 텍스트, 신뢰도)를 저장해 두고 다음부터는 다운로드한 바이트로 먼저 찾습니다.
+
+- 완전히 같은 파일: 바이트의 SHA-256으로 바로 찾음 (디코딩/전처리 없음) - 기본값은 이 경우만 재사용
+- 다시 압축/크기 조정된 같은 이미지 (OCR_CACHE_SIMILAR=1일 때만): 축소 디코딩한 이미지의 perceptual hash(pHash 64비트)와
+  dHash(64비트), 가로세로 비율이 모두 가까우면 같은 이미지로 봄 (찾은 뒤 새 SHA-256도 함께 기록)
+- 결과는 OCR 백엔드(양자화 포함)/전처리 방식/언어별 profile로 구분 (백엔드나 전처리가 다르면 OCR 결과도 다르므로)
+- 최근 사용 순서(LRU)로 항목 수와 전체 크기 제한을 넘는 오래된 항목부터 삭제
+- 조회 통계(SHA-256 적중, 유사 이미지 적중, 미적중, 적중률)를 종료 시 로그로 출력
+
+같은 템플릿에 작은 글자(전화번호, 회원번호 등)만 다른 이미지는 perceptual hash가 같거나 가깝게 나오므로
+유사 이미지 재사용은 기본으로 끄고, 켠 경우에도 저장된 결과에 숫자가 있는 텍스트가 하나라도 있으면
+재사용하지 않습니다 (해시로는 숫자가 같은지 확인할 수 없으므로 다시 OCR).
+
+사용 예:
+    python -m common.ocr_cache stats
+    python -m common.ocr_cache clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np  # type: ignore
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_ENV = "OCR_CACHE"  # "0"이면 캐시를 사용하지 않음, 그 외 값이 경로면 그 파일 사용
+SIMILAR_ENV = "OCR_CACHE_SIMILAR"  # "1"이면 다시 압축/크기 조정된 유사 이미지의 결과도 재사용 (숫자가 없는 결과만)
+DEFAULT_CACHE_PATH = PROJECT_ROOT / "ocr_cache.db"
+MAX_ENTRIES = 200_000
+MAX_BYTES = 256 * 1024 * 1024  # 저장한 OCR 결과(JSON) 크기 합계 제한
+EVICT_CHECK_EVERY = 200  # 이 개수만큼 저장할 때마다 제한 확인
+PHASH_MAX_DISTANCE = 2  # 해밍 거리 (4개 밴드로 후보를 찾으므로 3 이하만 의미 있음)
+DHASH_MAX_DISTANCE = 4
+ASPECT_TOLERANCE = 0.02  # 가로세로 비율 허용 차이 (상대값)
+
+# EasyOCR readtext() 결과 한 줄: (박스 좌표, 텍스트, 신뢰도)
+OCRResult = Tuple[List[List[int]], str, float]
+ImageHashes = Tuple[int, int, float]  # (pHash, dHash, 가로/세로 비율)
+# 이미지 파일 바이트 또는 디코딩된 BGR 배열 (영상 프레임)
+ImageData = Union[bytes, np.ndarray]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_results (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,
+    phash INTEGER,
+    dhash INTEGER,
+    aspect REAL,
+    band0 INTEGER,
+    band1 INTEGER,
+    band2 INTEGER,
+    band3 INTEGER,
+    results TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_band0 ON ocr_results(profile, band0);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_band1 ON ocr_results(profile, band1);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_band2 ON ocr_results(profile, band2);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_band3 ON ocr_results(profile, band3);
+CREATE INDEX IF NOT EXISTS idx_ocr_results_last_used ON ocr_results(last_used);
+CREATE TABLE IF NOT EXISTS ocr_content_hashes (
+    profile TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    result_id INTEGER NOT NULL,
+    PRIMARY KEY (profile, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_ocr_content_hashes_result ON ocr_content_hashes(result_id);
+"""
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    k = np.arange(size)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def _to_signed(value: int) -> int:
+    """SQLite INTEGER(부호 있는 64비트)에 넣기 위해 변환"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _distance(a: int, b: int) -> int:
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def content_hash(data: ImageData) -> Optional[str]:
+    """이미지 바이트(또는 배열 크기+픽셀)의 SHA-256, 비어 있으면 None"""
+    if data is None or len(data) == 0:
+        return None
+    if isinstance(data, np.ndarray):
+        digest = hashlib.sha256(repr(data.shape).encode("ascii"))
+        digest.update(np.ascontiguousarray(data).data)
+        return digest.hexdigest()
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_hashes(data: ImageData) -> Optional[ImageHashes]:
+    """이미지 바이트(또는 BGR 배열)의 (pHash, dHash, 가로/세로 비율), 열 수 없으면 None"""
+    try:
+        if isinstance(data, np.ndarray):
+            image = Image.fromarray(np.ascontiguousarray(data[:, :, ::-1]) if data.ndim == 3 else data)
+        else:
+            image = Image.open(io.BytesIO(data))
+        width, height = image.size
+        # JPEG은 축소 디코딩하여 전체 디코딩 비용을 피함
+        image.draft("L", (64, 64))
+        gray = image.convert("L")
+    except Exception:  # pylint: disable=broad-except
+        return None
+    if not width or not height:
+        return None
+
+    pixels = np.asarray(gray.resize((32, 32), Image.BILINEAR), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8].flatten()
+    phash = _bits_to_int(low > np.median(low[1:]))
+    small = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    dhash = _bits_to_int(small[:, 1:] > small[:, :-1])
+    return phash, dhash, width / height
+
+
+def _has_identifier(payload: str) -> bool:
+    """저장된 결과(JSON)의 텍스트에 숫자가 하나라도 있는지 (전화번호, 회원번호, 가격 등)"""
+    return any(any(char.isdigit() for char in text) for _, text, _ in json.loads(payload))
+
+
+def _normalize_results(results: Sequence[Any]) -> List[List[Any]]:
+    return [[[[int(x), int(y)] for x, y in box], str(text), float(conf)] for box, text, conf in results]
+
+
+class OCRCache:
+    """OCR 결과를 이미지 해시로 저장/조회하는 캐시 (여러 스레드에서 사용 가능)"""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_CACHE_PATH,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        phash_max_distance: int = PHASH_MAX_DISTANCE,
+        dhash_max_distance: int = DHASH_MAX_DISTANCE,
+        similar: bool = False,
+    ) -> None:
+        """
+        Args:
+            path: 캐시 SQLite 파일 경로
+            max_entries, max_bytes: LRU 정리 기준 (항목 수, 저장한 결과 크기 합계)
+            phash_max_distance, dhash_max_distance: 유사 이미지로 볼 해밍 거리
+            similar: True면 SHA-256이 달라도 유사 이미지의 결과를 재사용 (숫자가 있는 결과는 제외)
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.phash_max_distance = phash_max_distance
+        self.dhash_max_distance = dhash_max_distance
+        self.similar = similar
+        self.exact_hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self.identifier_skips = 0  # 유사 이미지를 찾았지만 숫자가 있는 결과라 재사용하지 않은 횟수
+        self.stored = 0
+        self._hashes: Dict[str, Optional[ImageHashes]] = {}  # lookup에서 계산한 해시 (store에서 재사용)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def lookup(self, profile: str, data: ImageData) -> Optional[List[OCRResult]]:
+        """이미지 바이트(또는 영상 프레임 배열)에 해당하는 저장된 OCR 결과 (readtext() 형식), 없으면 None"""
+        sha256 = content_hash(data)
+        if sha256 is None or self._conn is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.id, r.results FROM ocr_content_hashes h JOIN ocr_results r ON r.id = h.result_id "
+                "WHERE h.profile = ? AND h.sha256 = ?",
+                (profile, sha256),
+            ).fetchone()
+            if row is not None:
+                self.exact_hits += 1
+                self._touch(row[0])
+                return self._decode(row[1])
+            if not self.similar:
+                self.misses += 1
+                return None
+
+        hashes = image_hashes(data)
+        with self._lock:
+            if len(self._hashes) > 1024:
+                self._hashes.clear()
+            self._hashes[sha256] = hashes
+            match = self._find_similar(profile, hashes) if hashes is not None else None
+            if match is None:
+                self.misses += 1
+                return None
+            self.perceptual_hits += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_content_hashes(profile, sha256, result_id) VALUES (?, ?, ?)",
+                (profile, sha256, match[0]),
+            )
+            self._touch(match[0])
+            return self._decode(match[1])
+
+    def store(self, profile: str, data: ImageData, results: Sequence[Any]) -> None:
+        """이미지 바이트(또는 영상 프레임 배열)의 OCR 결과(readtext() 형식) 저장"""
+        sha256 = content_hash(data)
+        if sha256 is None or self._conn is None:
+            return
+        with self._lock:
+            known = sha256 in self._hashes
+            hashes = self._hashes.pop(sha256, None)
+        if not known:
+            hashes = image_hashes(data)
+        payload = json.dumps(_normalize_results(results), ensure_ascii=False)
+        if hashes is not None:
+            phash, dhash, aspect = hashes
+            bands = [(phash >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+            perceptual = [_to_signed(phash), _to_signed(dhash), aspect, *bands]
+        else:
+            perceptual = [None] * 7
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO ocr_results(profile, phash, dhash, aspect, band0, band1, band2, band3, "
+                "results, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (profile, *perceptual, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_content_hashes(profile, sha256, result_id) VALUES (?, ?, ?)",
+                (profile, sha256, cursor.lastrowid),
+            )
+            self._conn.commit()
+            self.stored += 1
+            if self.stored % EVICT_CHECK_EVERY == 0:
+                self._evict()
+
+    def _find_similar(self, profile: str, hashes: ImageHashes) -> Optional[Tuple[int, str]]:
+        phash, dhash, aspect = hashes
+        bands = [(phash >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+        rows = self._conn.execute(
+            "SELECT id, phash, dhash, aspect, results FROM ocr_results WHERE profile = ? "
+            "AND (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)",
+            (profile, *bands),
+        ).fetchall()
+        best: Optional[Tuple[int, int, str]] = None
+        for row_id, row_phash, row_dhash, row_aspect, payload in rows:
+            phash_distance = _distance(phash, row_phash)
+            if phash_distance > self.phash_max_distance or _distance(dhash, row_dhash) > self.dhash_max_distance:
+                continue
+            if abs(aspect - row_aspect) > ASPECT_TOLERANCE * row_aspect:
+                continue
+            if best is None or phash_distance < best[0]:
+                best = (phash_distance, row_id, payload)
+        if best is not None and _has_identifier(best[2]):
+            # 전화번호/회원번호 등은 템플릿이 같은 다른 이미지와 다를 수 있으므로 다시 OCR
+            self.identifier_skips += 1
+            return None
+        return (best[1], best[2]) if best is not None else None
+
+    def _touch(self, row_id: int) -> None:
+        self._conn.execute(
+            "UPDATE ocr_results SET hits = hits + 1, last_used = ? WHERE id = ?", (time.time(), row_id)
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _decode(payload: str) -> List[OCRResult]:
+        return [(box, text, conf) for box, text, conf in json.loads(payload)]
+
+    def _evict(self) -> int:
+        """항목 수/크기 제한을 넘으면 오래 사용하지 않은 항목부터 제한의 90%까지 삭제"""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+        excess_count = count - int(self.max_entries * 0.9)
+        excess_bytes = total - int(self.max_bytes * 0.9)
+        victims: List[Tuple[int]] = []
+        freed = 0
+        for row_id, size in self._conn.execute("SELECT id, size FROM ocr_results ORDER BY last_used"):
+            if len(victims) >= excess_count and freed >= excess_bytes:
+                break
+            victims.append((row_id,))
+            freed += size
+        self._conn.executemany("DELETE FROM ocr_content_hashes WHERE result_id = ?", victims)
+        self._conn.executemany("DELETE FROM ocr_results WHERE id = ?", victims)
+        self._conn.commit()
+        logger.info("🧹 OCR 캐시 정리: 오래된 항목 %d개 삭제 (%.1fMB)", len(victims), freed / 1024 / 1024)
+        return len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """이번 실행의 조회 통계와 캐시 전체 크기"""
+        lookups = self.exact_hits + self.perceptual_hits + self.misses
+        stats: Dict[str, Any] = {
+            "lookups": lookups,
+            "exact_hits": self.exact_hits,
+            "perceptual_hits": self.perceptual_hits,
+            "misses": self.misses,
+            "identifier_skips": self.identifier_skips,
+            "hit_rate": round((self.exact_hits + self.perceptual_hits) / lookups, 3) if lookups else 0.0,
+        }
+        if self._conn is not None:
+            with self._lock:
+                count, total, hits = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM ocr_results"
+                ).fetchone()
+            stats.update(entries=count, bytes=total, total_hits=hits)
+        return stats
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        if not stats["lookups"]:
+            return
+        logger.info(
+            "📊 OCR 캐시: 조회 %d회, 적중 %d회 (같은 파일 %d, 유사 이미지 %d%s), 적중률 %.1f%%, 저장 항목 %d개",
+            stats["lookups"],
+            stats["exact_hits"] + stats["perceptual_hits"],
+            stats["exact_hits"],
+            stats["perceptual_hits"],
+            f", 숫자가 있어 다시 OCR {stats['identifier_skips']}" if stats["identifier_skips"] else "",
+            stats["hit_rate"] * 100,
+            stats.get("entries", 0),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_content_hashes")
+            self._conn.execute("DELETE FROM ocr_results")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """통계를 로그로 남기고 연결 종료 (여러 번 호출해도 안전)"""
+        if self._conn is None:
+            return
+        self.log_stats()
+        with self._lock:
+            self._conn.close()
+            self._conn = None
+
+
+def cache_path() -> Optional[Path]:
+    """OCR_CACHE 설정에 따른 캐시 파일 경로 (0이면 None)"""
+    setting = os.getenv(CACHE_ENV, "").strip()
+    if setting == "0":
+        return None
+    return Path(setting) if setting and setting != "1" else DEFAULT_CACHE_PATH
+
+
+_cache: Optional[OCRCache] = None
+_cache_opened = False
+
+
+def get_ocr_cache() -> Optional[OCRCache]:
+    """
+    프로세스 공용 OCR 캐시 (OCR_CACHE=0이면 None, OCR_CACHE_SIMILAR=1이면 유사 이미지 재사용)
+
+    처음 호출할 때 열고, 프로세스 종료 시 통계를 로그로 남기고 닫습니다.
+    캐시 파일을 열 수 없으면 경고만 남기고 None을 반환합니다 (OCR은 캐시 없이 진행).
+    """
+    global _cache, _cache_opened  # pylint: disable=global-statement
+    if _cache_opened:
+        return _cache
+    _cache_opened = True
+    path = cache_path()
+    if path is None:
+        return None
+    try:
+        _cache = OCRCache(path, similar=os.getenv(SIMILAR_ENV, "").strip() == "1")
+    except sqlite3.Error as exc:
+        logger.warning("⚠️ OCR 캐시를 열 수 없어 캐시 없이 진행합니다 (%s): %s", path, exc)
+        return None
+    atexit.register(_cache.close)
+    return _cache
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="OCR 결과 캐시")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", type=Path, default=None, help=f"캐시 파일 (기본값: {DEFAULT_CACHE_PATH.name})")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    path = args.path or cache_path() or DEFAULT_CACHE_PATH
+    cache = OCRCache(path)
+    try:
+        if args.command == "clear":
+            cache.clear()
+            print(f"OCR 캐시를 비웠습니다: {path}")
+        else:
+            stats = cache.stats()
+            print(f"항목 {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f}MB, 누적 적중 {stats['total_hits']}회")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
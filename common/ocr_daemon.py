@@ -0,0 +1,519 @@
+"""
+EasyOCR 모델을 한 번만 로드해 두고 Unix 소켓으로 OCR 요청을 받는 로컬 데몬
+
+OCR 스크립트(facebook_imgocr, kakaostory_postprocess, instagram_extract_imgurl,
+instagram_extract_single_media_ocr)는 실행할 때마다 EasyOCR 모델을 로드(CUDA 시도 후 CPU 재시도)하므로,
+셸 파이프라인에서 연달아 실행하면 모델 로드가 여러 번 반복됩니다.
+
+- 데몬은 시작할 때 모델을 로드하고 빈 이미지로 한 번 워밍업한 뒤 소켓에서 요청을 기다림
+- 요청은 큐에 넣고 OCR 스레드 하나가 순서대로 처리 (Reader는 스레드 안전하지 않음)
+- 각 스크립트의 get_easyocr_reader()는 connect_ocr_daemon()으로 데몬에 먼저 연결을 시도하고,
+  데몬이 없거나 언어 설정이 다르면 기존처럼 직접 모델을 로드함 (클라이언트는 readtext/readtext_batched 호환)
+- 실행 도중 데몬이 종료되어 연결할 수 없으면 클라이언트가 한 번 경고하고 직접 모델을 로드해 나머지 요청을 처리
+- 백엔드(EasyOCR/ONNX Runtime)는 데몬을 시작할 때의 OCR_BACKEND 환경 변수를 따름 (common/ocr_backend.py)
+- health 요청으로 장치(GPU/CPU), 백엔드, 모델 로드 시간, 처리한 요청 수, 대기 중인 요청 수 등을 확인
+
+메시지 형식: 4바이트(big-endian) 헤더 길이 + JSON 헤더 + 헤더의 "size"만큼의 바이너리(이미지 배열 원본 바이트)
+
+사용 예:
+    python -m common.ocr_daemon start      # 백그라운드로 시작 (이미 실행 중이면 그대로 사용)
+    python -m common.ocr_daemon status     # 상태 출력
+    python -m common.ocr_daemon stop
+    python -m common.ocr_daemon serve      # 포그라운드 실행
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+from common.ocr_backend import configured_backend, create_ocr_reader, reader_backend
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SOCKET_ENV = "OCR_DAEMON_SOCKET"  # 소켓 경로 (기본값: DEFAULT_SOCKET_PATH)
+DISABLE_ENV = "OCR_DAEMON"  # "0"이면 스크립트가 데몬을 사용하지 않고 직접 모델 로드
+DEFAULT_SOCKET_PATH = PROJECT_ROOT / "ocr_daemon.sock"
+DEFAULT_LOG_PATH = PROJECT_ROOT / "ocr_daemon.log"
+DEFAULT_LANGS = ["ko", "en"]
+DEFAULT_IDLE_TIMEOUT = 3600.0  # 이 시간(초) 동안 요청이 없으면 데몬 종료 (0 이하면 계속 실행)
+
+_HEADER = struct.Struct(">I")
+
+
+def socket_path() -> Path:
+    return Path(os.getenv(SOCKET_ENV) or DEFAULT_SOCKET_PATH)
+
+
+# ----------------------------------------------------------------------
+# 메시지 송수신
+# ----------------------------------------------------------------------
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1 << 20))
+        if not chunk:
+            raise ConnectionError("연결이 닫혔습니다")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, header: Dict[str, Any], payload: bytes = b"") -> None:
+    header = dict(header, size=len(payload))
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data + payload)
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, length).decode("utf-8"))
+    payload = _recv_exact(sock, header.get("size", 0)) if header.get("size") else b""
+    return header, payload
+
+
+def _encode_images(images: Sequence[np.ndarray]) -> Tuple[List[Dict[str, Any]], bytes]:
+    specs = []
+    payload = bytearray()
+    for image in images:
+        array = np.ascontiguousarray(image)
+        specs.append({"shape": list(array.shape), "dtype": str(array.dtype)})
+        payload += array.tobytes()
+    return specs, bytes(payload)
+
+
+def _decode_images(specs: Sequence[Dict[str, Any]], payload: bytes) -> List[np.ndarray]:
+    images = []
+    offset = 0
+    for spec in specs:
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        images.append(np.frombuffer(payload, dtype=dtype, count=count, offset=offset).reshape(spec["shape"]))
+        offset += count * dtype.itemsize
+    return images
+
+
+def _jsonable_results(results: Sequence[Any]) -> List[List[Any]]:
+    return [[[[int(x), int(y)] for x, y in box], text, float(conf)] for box, text, conf in results]
+
+
+# ----------------------------------------------------------------------
+# 서버
+# ----------------------------------------------------------------------
+class _Job:
+    def __init__(self, op: str, images: List[np.ndarray], kwargs: Dict[str, Any]) -> None:
+        self.op = op
+        self.images = images
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+
+class OCRDaemon:
+    """EasyOCR Reader 하나와 요청 큐를 가진 OCR 서버"""
+
+    def __init__(self, path: Path, langs: Sequence[str], gpu: bool = True, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        self.path = Path(path)
+        self.langs = list(langs)
+        self.gpu = gpu
+        self.idle_timeout = idle_timeout
+        self.reader: Any = None
+        self.device = "unknown"
+        self.backend = "unknown"
+        self.started_at = time.time()
+        self.model_load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.images = 0
+        self.busy = False
+        self.last_activity = time.monotonic()
+        self._jobs: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    def load_model(self) -> None:
+        started = time.perf_counter()
+        # OCR_BACKEND 설정에 따라 EasyOCR(GPU 시도 후 CPU) 또는 ONNX Runtime CPU 백엔드
+        self.reader = create_ocr_reader(self.langs, gpu=self.gpu)
+        self.device = "cuda" if str(getattr(self.reader, "device", "")).startswith("cuda") else "cpu"
+        self.backend = reader_backend(self.reader)
+        self.model_load_seconds = time.perf_counter() - started
+
+        # 첫 요청에서 지연 초기화 비용이 들지 않도록 빈 이미지로 한 번 실행
+        started = time.perf_counter()
+        self.reader.readtext(np.full((64, 256, 3), 255, dtype=np.uint8))
+        self.warmup_seconds = time.perf_counter() - started
+        logger.info(
+            "✅ OCR 모델 준비 완료 (%s, %s, 언어 %s, 로드 %.1f초, 워밍업 %.1f초)",
+            self.backend,
+            self.device,
+            ",".join(self.langs),
+            self.model_load_seconds,
+            self.warmup_seconds,
+        )
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self.reader is not None else "loading",
+            "pid": os.getpid(),
+            "langs": self.langs,
+            "device": self.device,
+            "backend": self.backend,
+            "model_load_seconds": round(self.model_load_seconds, 2),
+            "warmup_seconds": round(self.warmup_seconds, 2),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "requests": self.requests,
+            "images": self.images,
+            "errors": self.errors,
+            "queue_depth": self._jobs.qsize(),
+            "busy": self.busy,
+        }
+
+    def submit(self, job: _Job) -> _Job:
+        self.last_activity = time.monotonic()
+        self._jobs.put(job)
+        job.done.wait()
+        return job
+
+    def _ocr_loop(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self.busy = True
+            try:
+                if job.op == "readtext":
+                    job.result = [_jsonable_results(self.reader.readtext(job.images[0], **job.kwargs))]
+                else:
+                    batch = self.reader.readtext_batched(job.images, **job.kwargs)
+                    job.result = [_jsonable_results(results) for results in batch]
+                self.images += len(job.images)
+            except Exception as exc:  # pylint: disable=broad-except
+                self.errors += 1
+                job.error = f"{type(exc).__name__}: {exc}"
+                logger.warning("⚠️ OCR 요청 처리 실패: %s", job.error)
+            finally:
+                self.requests += 1
+                self.busy = False
+                self.last_activity = time.monotonic()
+                job.done.set()
+
+    def _idle_loop(self) -> None:
+        while self._server is not None:
+            time.sleep(min(30.0, self.idle_timeout))
+            idle = time.monotonic() - self.last_activity
+            if idle >= self.idle_timeout and self._jobs.empty() and not self.busy:
+                logger.info("💤 %.0f초 동안 요청이 없어 OCR 데몬을 종료합니다", idle)
+                self.shutdown()
+                return
+
+    def shutdown(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    def serve_forever(self) -> None:
+        if self.path.exists():
+            if ping(self.path):
+                raise RuntimeError(f"OCR 데몬이 이미 실행 중입니다: {self.path}")
+            self.path.unlink()  # 이전 실행이 남긴 소켓 파일
+
+        self.load_model()
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self) -> None:
+                while True:
+                    try:
+                        header, payload = recv_message(self.request)
+                    except (ConnectionError, OSError, ValueError):
+                        return
+                    daemon.handle_request(self.request, header, payload)
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._server = Server(str(self.path), Handler)
+        os.chmod(self.path, 0o600)
+        threading.Thread(target=self._ocr_loop, name="ocr", daemon=True).start()
+        if self.idle_timeout > 0:
+            threading.Thread(target=self._idle_loop, name="idle", daemon=True).start()
+        logger.info("🚀 OCR 데몬 시작: %s (pid %d)", self.path, os.getpid())
+        server = self._server
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            self._jobs.put(None)
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            logger.info("🛑 OCR 데몬 종료 (요청 %d건, 이미지 %d장)", self.requests, self.images)
+
+    def handle_request(self, sock: socket.socket, header: Dict[str, Any], payload: bytes) -> None:
+        op = header.get("op")
+        if op == "health":
+            send_message(sock, {"ok": True, "health": self.health()})
+        elif op == "shutdown":
+            send_message(sock, {"ok": True})
+            self.shutdown()
+        elif op in ("readtext", "readtext_batched"):
+            try:
+                images = _decode_images(header.get("images") or [], payload)
+            except (KeyError, TypeError, ValueError) as exc:
+                send_message(sock, {"ok": False, "error": f"잘못된 이미지 데이터: {exc}"})
+                return
+            job = self.submit(_Job(op, images, header.get("kwargs") or {}))
+            if job.error:
+                send_message(sock, {"ok": False, "error": job.error})
+            else:
+                send_message(sock, {"ok": True, "results": job.result})
+        else:
+            send_message(sock, {"ok": False, "error": f"알 수 없는 요청: {op}"})
+
+
+# ----------------------------------------------------------------------
+# 클라이언트
+# ----------------------------------------------------------------------
+class OCRDaemonError(RuntimeError):
+    """데몬이 OCR 요청을 처리하지 못한 경우"""
+
+
+class OCRDaemonClient:
+    """
+    OCR 데몬 클라이언트 (easyocr.Reader의 readtext/readtext_batched와 같은 형식의 결과 반환)
+
+    langs를 주면 데몬에 연결할 수 없게 되었을 때(실행 도중 종료 등) 한 번 경고하고
+    create_ocr_reader(langs)로 직접 모델을 로드해 이후 요청을 처리합니다.
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, timeout: Optional[float] = 600.0, langs: Optional[Sequence[str]] = None
+    ) -> None:
+        self.path = Path(path) if path else socket_path()
+        self.timeout = timeout
+        self.langs = list(langs) if langs else None
+        self.ocr_backend = "easyocr"
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._local_reader: Any = None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(str(self.path))
+            self._sock = sock
+        return self._sock
+
+    def request(self, header: Dict[str, Any], payload: bytes = b"") -> Dict[str, Any]:
+        with self._lock:
+            # 데몬이 재시작되었을 수 있으므로 연결이 끊겼으면 한 번 다시 연결
+            for attempt in range(2):
+                try:
+                    sock = self._connect()
+                    send_message(sock, header, payload)
+                    response, _ = recv_message(sock)
+                    break
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt:
+                        raise
+        if not response.get("ok"):
+            raise OCRDaemonError(response.get("error") or "OCR 데몬 요청 실패")
+        return response
+
+    def health(self) -> Dict[str, Any]:
+        return self.request({"op": "health"})["health"]
+
+    def _fall_back(self, exc: Exception) -> Any:
+        """데몬에 연결할 수 없으면 직접 로드한 Reader 반환 (langs가 없으면 예외를 그대로 전달)"""
+        if self.langs is None:
+            raise exc
+        if self._local_reader is None:
+            logger.warning("⚠️ OCR 데몬에 연결할 수 없어 직접 모델을 로드합니다 (이후 요청은 직접 처리): %s", exc)
+            self.close()
+            self._local_reader = create_ocr_reader(self.langs)
+            self.ocr_backend = reader_backend(self._local_reader)
+        return self._local_reader
+
+    def readtext(self, image: np.ndarray, **kwargs: Any) -> List[Tuple[Any, str, float]]:
+        if self._local_reader is not None:
+            return self._local_reader.readtext(image, **kwargs)
+        specs, payload = _encode_images([image])
+        try:
+            results = self.request({"op": "readtext", "images": specs, "kwargs": kwargs}, payload)["results"]
+        except (ConnectionError, OSError) as exc:
+            return self._fall_back(exc).readtext(image, **kwargs)
+        return [tuple(item) for item in results[0]]
+
+    def readtext_batched(self, images: Sequence[np.ndarray], **kwargs: Any) -> List[List[Tuple[Any, str, float]]]:
+        if self._local_reader is not None:
+            return self._local_reader.readtext_batched(images, **kwargs)
+        specs, payload = _encode_images(images)
+        try:
+            results = self.request({"op": "readtext_batched", "images": specs, "kwargs": kwargs}, payload)["results"]
+        except (ConnectionError, OSError) as exc:
+            return self._fall_back(exc).readtext_batched(images, **kwargs)
+        return [[tuple(item) for item in image_results] for image_results in results]
+
+    def shutdown(self) -> None:
+        self.request({"op": "shutdown"})
+        self.close()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+def ping(path: Optional[Path] = None, timeout: float = 2.0) -> Optional[Dict[str, Any]]:
+    """데몬이 응답하면 health 정보, 아니면 None"""
+    path = Path(path) if path else socket_path()
+    if not path.exists():
+        return None
+    client = OCRDaemonClient(path, timeout=timeout)
+    try:
+        return client.health()
+    except (OSError, ConnectionError, OCRDaemonError, ValueError):
+        return None
+    finally:
+        client.close()
+
+
+def usable_daemon_health(langs: Sequence[str] = DEFAULT_LANGS) -> Optional[Dict[str, Any]]:
+    """
+    이 스크립트가 사용할 수 있는 OCR 데몬이 실행 중이면 health 정보, 아니면 None
+
+    데몬이 없거나, 모델을 아직 로드 중이거나, 언어/백엔드 설정이 다르거나, OCR_DAEMON=0이면 None입니다.
+    """
+    if os.getenv(DISABLE_ENV, "").strip() == "0":
+        return None
+    health = ping(socket_path())
+    if health is None or health.get("status") != "ok":
+        return None
+    if list(health.get("langs") or []) != list(langs):
+        logger.info("ℹ️ OCR 데몬 언어 설정(%s)이 달라 직접 모델을 로드합니다", ",".join(health.get("langs") or []))
+        return None
+    daemon_backend = str(health.get("backend") or "easyocr")
+    if daemon_backend != configured_backend():
+        logger.info("ℹ️ OCR 데몬 백엔드(%s)가 설정(%s)과 달라 직접 모델을 로드합니다", daemon_backend, configured_backend())
+        return None
+    return health
+
+
+def connect_ocr_daemon(langs: Sequence[str] = DEFAULT_LANGS) -> Optional[OCRDaemonClient]:
+    """
+    실행 중인 OCR 데몬에 연결하여 readtext 호환 클라이언트 반환
+
+    사용할 수 있는 데몬이 없으면(usable_daemon_health() 참고) None을 반환하므로
+    호출하는 쪽은 기존처럼 직접 Reader를 만들면 됩니다 (common.ocr_backend.create_ocr_reader).
+    """
+    health = usable_daemon_health(langs)
+    if health is None:
+        return None
+    logger.info(
+        "🔌 OCR 데몬 사용 (%s, pid %s, 처리한 요청 %s건): 모델 로드 생략", health.get("device"), health.get("pid"), health.get("requests")
+    )
+    client = OCRDaemonClient(socket_path(), langs=langs)
+    client.ocr_backend = str(health.get("backend") or "easyocr")
+    return client
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def start_background(langs: Sequence[str], gpu: bool, idle_timeout: float, wait: float) -> int:
+    """데몬이 실행 중이 아니면 백그라운드로 시작하고 모델 준비가 끝날 때까지 대기"""
+    path = socket_path()
+    health = ping(path)
+    if health is not None:
+        logger.info("ℹ️ OCR 데몬이 이미 실행 중입니다 (pid %s)", health.get("pid"))
+        return 0
+
+    command = [sys.executable, "-m", "common.ocr_daemon", "serve", "--langs", *langs, "--idle-timeout", str(idle_timeout)]
+    if not gpu:
+        command.append("--cpu")
+    with open(DEFAULT_LOG_PATH, "a", encoding="utf-8") as log_file:
+        process = subprocess.Popen(  # pylint: disable=consider-using-with
+            command,
+            cwd=str(PROJECT_ROOT),
+            stdin=subprocess.DEVNULL,
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    logger.info("⏳ OCR 데몬 시작 중 (pid %d, 로그: %s)", process.pid, DEFAULT_LOG_PATH.name)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            logger.error("❌ OCR 데몬이 시작 중 종료되었습니다 (코드 %s). %s를 확인하세요.", process.returncode, DEFAULT_LOG_PATH.name)
+            return 1
+        health = ping(path)
+        if health is not None and health.get("status") == "ok":
+            logger.info("✅ OCR 데몬 준비 완료 (%s, 모델 로드 %.1f초)", health["device"], health["model_load_seconds"])
+            return 0
+        time.sleep(1.0)
+    logger.error("❌ %.0f초 안에 OCR 데몬이 준비되지 않았습니다", wait)
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EasyOCR 로컬 데몬")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("serve", "포그라운드로 실행"), ("start", "백그라운드로 시작 (이미 실행 중이면 그대로 사용)")):
+        command_parser = sub.add_parser(name, help=help_text)
+        command_parser.add_argument("--langs", nargs="+", default=DEFAULT_LANGS)
+        command_parser.add_argument("--cpu", action="store_true", help="GPU를 시도하지 않음")
+        command_parser.add_argument(
+            "--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="요청이 없을 때 종료할 시간(초, 0 이하면 계속 실행)"
+        )
+        if name == "start":
+            command_parser.add_argument("--wait", type=float, default=600.0, help="모델 준비를 기다릴 최대 시간(초)")
+    sub.add_parser("status", help="상태 출력 (JSON)")
+    sub.add_parser("stop", help="데몬 종료")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.command == "serve":
+        try:
+            OCRDaemon(socket_path(), args.langs, gpu=not args.cpu, idle_timeout=args.idle_timeout).serve_forever()
+        except RuntimeError as exc:
+            logger.error("❌ %s", exc)
+            return 1
+        return 0
+    if args.command == "start":
+        return start_background(args.langs, not args.cpu, args.idle_timeout, args.wait)
+    if args.command == "status":
+        health = ping()
+        print(json.dumps(health, ensure_ascii=False, indent=2) if health else "OCR 데몬이 실행 중이 아닙니다")
+        return 0 if health else 1
+    if ping() is None:
+        print("OCR 데몬이 실행 중이 아닙니다")
+        return 0
+    OCRDaemonClient().shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+EasyOCR 워커 프로세스 풀 (CPU 전용 서버에서 여러 코어로 OCR)
+
+한 프로세스의 전역 EasyOCR Reader 하나로 이미지를 차례로 처리하면 대부분의 코어가 놀기 때문에
+- N개의 워커 프로세스가 시작할 때 각자 reader_factory()로 Reader를 한 번만 만들고
+  (OCR 데몬 클라이언트를 돌려주는 get_easyocr_reader가 아니라, 워커 안에서 직접 모델을 로드하는 함수여야 함)
+- 워커마다 torch/OpenCV 스레드 수를 threads_per_worker로 제한하여 코어를 나눠 쓰며
+- 메인 프로세스는 이미지(numpy 배열)를 보내고 readtext() 결과를 받습니다.
+
+이미지 한 장은 항상 워커 하나에서 기존과 같은 readtext()로 처리되므로 결과는 단일 프로세스와 같고,
+readtext_many()는 입력 순서대로 결과를 반환합니다.
+
+워커는 fork로 만듭니다 (spawn은 워커마다 실행 중인 스크립트를 다시 import하여 크롤러 코드가 실행됨).
+메인 프로세스에서는 Reader를 만들지 않아야 합니다 (CUDA 초기화 후 fork 불가).
+
+create_ocr_pool()에 langs를 주면 OCR 데몬이 GPU에서 실행 중일 때는 풀을 만들지 않습니다
+(GPU 모델 하나가 CPU 워커 여러 개보다 빠르므로 데몬에 맡김). 데몬이 CPU에서 실행 중이면 데몬은 요청을
+하나씩 처리하므로 워커 풀을 만들며, 어느 쪽을 선택했는지 로그에 남깁니다.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.pool import AsyncResult
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# EasyOCR readtext() 결과 한 줄: (박스 좌표, 텍스트, 신뢰도)
+OCRResult = Tuple[List[List[int]], str, float]
+
+_worker_reader: Any = None
+
+
+def _limit_threads(threads: int) -> None:
+    """워커 프로세스의 연산 스레드 수 제한 (torch, OpenCV, ONNX Runtime 백엔드)"""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["OCR_ONNX_THREADS"] = str(threads)  # common.ocr_backend가 세션을 만들 때 읽음
+    try:
+        import torch  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        import cv2  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        cv2.setNumThreads(threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(reader_factory: Callable[[], Any], threads: int) -> None:
+    global _worker_reader  # pylint: disable=global-statement
+    # Ctrl+C는 메인 프로세스가 처리하고 풀을 정리함
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_threads(threads)
+    started = time.perf_counter()
+    _worker_reader = reader_factory()
+    logger.info("🧠 OCR 워커 %d 준비 완료 (스레드 %d개, %.1f초)", os.getpid(), threads, time.perf_counter() - started)
+
+
+def _readtext_task(image: np.ndarray) -> List[OCRResult]:
+    results = _worker_reader.readtext(image)
+    # numpy 타입은 그대로 두면 pickle 크기가 커지므로 기본 타입으로 변환
+    return [([[int(x), int(y)] for x, y in box], text, float(conf)) for box, text, conf in results]
+
+
+class OCRWorkerPool:
+    """Reader를 미리 로드한 워커 프로세스들에 이미지를 나눠 OCR"""
+
+    def __init__(
+        self,
+        reader_factory: Callable[[], Any],
+        workers: int,
+        threads_per_worker: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            reader_factory: 워커마다 한 번 호출하여 easyocr.Reader를 직접 만드는 함수
+                (예: lambda: create_ocr_reader(langs), 데몬 클라이언트를 돌려주면 워커가 모두 데몬 하나를 기다림)
+            workers: 워커 프로세스 수
+            threads_per_worker: 워커당 연산 스레드 수 (기본값: CPU 코어 수 / workers)
+        """
+        self.workers = max(1, int(workers))
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+        context = multiprocessing.get_context("fork")
+        self._pool = context.Pool(
+            processes=self.workers,
+            initializer=_init_worker,
+            initargs=(reader_factory, self.threads_per_worker),
+        )
+        self._closed = False
+        logger.info("🚀 OCR 워커 %d개 시작 (워커당 스레드 %d개, 워커마다 모델 직접 로드)", self.workers, self.threads_per_worker)
+
+    def __enter__(self) -> "OCRWorkerPool":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
+
+    def submit(
+        self, image: np.ndarray, callback: Optional[Callable[[List[OCRResult]], None]] = None
+    ) -> "AsyncResult[List[OCRResult]]":
+        """
+        이미지 한 장을 워커에 보내고 결과 핸들 반환 (.get()으로 readtext() 결과)
+
+        callback을 주면 결과가 나왔을 때 풀의 결과 처리 스레드에서 callback(결과)를 호출합니다.
+        """
+        return self._pool.apply_async(_readtext_task, (image,), callback=callback)
+
+    def readtext(self, image: np.ndarray) -> List[OCRResult]:
+        """reader.readtext(image)와 같은 결과를 워커에서 계산"""
+        return self.submit(image).get()
+
+    def readtext_many(self, images: Sequence[np.ndarray]) -> List[List[OCRResult]]:
+        """여러 이미지를 워커들에 나눠 처리하고 입력 순서대로 결과 반환"""
+        if not images:
+            return []
+        return self._pool.map(_readtext_task, images, chunksize=1)
+
+    def close(self) -> None:
+        """남은 작업을 마치고 워커 종료 (여러 번 호출해도 안전)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self) -> None:
+        """남은 작업을 버리고 워커를 바로 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.terminate()
+        self._pool.join()
+
+
+def create_ocr_pool(
+    reader_factory: Callable[[], Any],
+    workers: int,
+    threads_per_worker: Optional[int] = None,
+    langs: Optional[Sequence[str]] = None,
+) -> Optional[OCRWorkerPool]:
+    """
+    workers가 1 이상이면 OCRWorkerPool을 만들고, 0 이하면 None 반환 (기존 단일 프로세스 모드)
+
+    workers가 -1이면 CPU 코어 수만큼 워커를 만듭니다.
+    langs를 주면 같은 설정의 OCR 데몬이 GPU에서 실행 중일 때 풀을 만들지 않고 None을 반환합니다
+    (호출하는 쪽은 get_easyocr_reader의 데몬 클라이언트로 처리).
+
+    Args:
+        reader_factory: 워커 안에서 Reader를 직접 만드는 함수 (데몬을 거치지 않아야 함)
+        workers: 워커 프로세스 수
+        threads_per_worker: 워커당 연산 스레드 수
+        langs: OCR 언어 목록 (데몬 사용 여부 확인용, None이면 확인하지 않음)
+    """
+    if workers == -1:
+        workers = os.cpu_count() or 1
+    if workers <= 0:
+        logger.info("ℹ️ OCR 워커 풀 사용 안 함 (OCR_WORKERS=0): 메인 프로세스에서 처리")
+        return None
+    if langs is not None:
+        from common.ocr_daemon import usable_daemon_health  # pylint: disable=import-outside-toplevel
+
+        health = usable_daemon_health(langs)
+        if health is not None and health.get("device") == "cuda":
+            logger.info("🔌 OCR 데몬이 GPU에서 실행 중이므로 워커 풀 없이 데몬으로 처리합니다 (pid %s)", health.get("pid"))
+            return None
+        if health is not None:
+            logger.info("ℹ️ OCR 데몬이 CPU에서 실행 중이지만 요청을 하나씩 처리하므로 워커 풀을 사용합니다 (워커마다 모델 로드)")
+    return OCRWorkerPool(reader_factory, workers, threads_per_worker)
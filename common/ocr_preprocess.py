@@ -0,0 +1,213 @@
+"""
+OCR 전처리 (크기 조정, 중간값 블러, CLAHE, adaptive threshold)
+
+facebook_imgocr/kakaostory_postprocess의 전처리는 원래 이미지 크기와 관계없이 항상 3배 확대했기 때문에
+1080x1350 이미지도 9배 픽셀(3240x4050)이 되어 OCR 시간과 메모리가 그만큼 늘었습니다.
+EasyOCR은 검출 단계에서 긴 변을 canvas_size(기본 2560)로 다시 줄이므로 그 이상 확대해도 시간만 듭니다.
+
+- "fixed": 기존과 같은 3배 확대 전처리
+- "adaptive": 축소 이미지에서 글줄 높이를 추정하여 글자 높이가 TARGET_TEXT_HEIGHT 정도가 되도록 배율을 고르고
+  (글줄을 찾지 못하면 이미지 크기로 결정, 1배 미만으로는 줄이지 않음),
+  긴 변 MAX_SIDE/픽셀 수 MAX_PIXELS를 넘지 않도록 제한 (아주 큰 이미지만 축소).
+  adaptive threshold의 블록 크기도 배율에 맞춰 조정하여 원본 기준으로 같은 범위를 봅니다.
+
+기존 전처리와 정확도/속도 비교:
+    python -m common.ocr_preprocess sample1.jpg sample2.png ... [--ground-truth expected.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+from PIL import Image
+
+from common.text_prefilter import MAX_SIDE as PREFILTER_MAX_SIDE, text_line_boxes
+
+logger = logging.getLogger(__name__)
+
+MODES = ("adaptive", "fixed")
+FIXED_SCALE = 3.0
+MIN_SCALE = 1.0  # 글자가 커도 줄이지 않음 (추정에서 빠진 작은 글자를 보존), 축소는 MAX_SIDE/MAX_PIXELS 제한으로만
+MAX_SCALE = 3.0
+TARGET_TEXT_HEIGHT = 40  # 전처리 후 글줄 높이 목표 (픽셀)
+FALLBACK_LONG_SIDE = 1600  # 글줄을 찾지 못했을 때 긴 변을 이 크기 정도로 맞춤
+MAX_SIDE = 2560  # EasyOCR 검출 canvas_size 기본값
+MAX_PIXELS = 2560 * 2560
+THRESHOLD_BLOCK_SIZE = 31  # 3배 확대 기준 adaptive threshold 블록 크기
+
+
+def estimate_text_height(image: np.ndarray) -> Optional[float]:
+    """글줄 높이(원본 픽셀) 추정: 축소 흑백 이미지의 글줄 박스 높이 하위 25% 값, 글줄이 없으면 None"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    scale = PREFILTER_MAX_SIDE / max(gray.shape[:2])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    boxes = text_line_boxes(gray)
+    if not boxes:
+        return None
+    ratio = image.shape[0] / gray.shape[0]
+    return float(np.percentile([h for _, _, _, h in boxes], 25)) * ratio
+
+
+def choose_scale(image: np.ndarray, mode: str = "adaptive") -> float:
+    """이미지에 적용할 확대/축소 배율"""
+    if mode == "fixed":
+        return FIXED_SCALE
+    height, width = image.shape[:2]
+    text_height = estimate_text_height(image)
+    if text_height:
+        scale = TARGET_TEXT_HEIGHT / text_height
+    else:
+        scale = FALLBACK_LONG_SIDE / max(height, width)
+    scale = min(max(scale, MIN_SCALE), MAX_SCALE)
+    # EasyOCR이 다시 줄이는 크기 이상으로는 키우지 않고, 너무 큰 이미지는 축소
+    scale = min(scale, MAX_SIDE / max(height, width), (MAX_PIXELS / float(height * width)) ** 0.5)
+    if 0.9 <= scale <= 1.1:
+        return 1.0
+    return scale
+
+
+def preprocess_frame(frame: np.ndarray, scale: float) -> np.ndarray:
+    """BGR 이미지를 배율 조정 후 블러/CLAHE/adaptive threshold 처리한 흑백 이미지로 변환"""
+    if scale != 1.0:
+        interpolation = cv2.INTER_CUBIC if scale > 1.0 else cv2.INTER_AREA
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=interpolation)
+    frame = cv2.medianBlur(frame, 3)
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(gray)
+    # 3배 확대 기준 블록 크기를 배율에 맞춤 (홀수, 최소 11)
+    block_size = max(11, int(round(THRESHOLD_BLOCK_SIZE * scale / FIXED_SCALE)) | 1)
+    return cv2.adaptiveThreshold(
+        enhanced,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        block_size,
+        2,
+    )
+
+
+def preprocess_image(frame: np.ndarray, mode: str = "adaptive") -> np.ndarray:
+    """디코딩된 BGR 이미지(영상 프레임 등)를 OCR용 흑백 이미지로 전처리"""
+    return preprocess_frame(frame, choose_scale(frame, mode))
+
+
+def preprocess_image_bytes(data: bytes, mode: str = "adaptive") -> Optional[Image.Image]:
+    """이미지 바이트를 OCR용 흑백 이미지로 전처리 (디코딩 실패 시 None)"""
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    return Image.fromarray(preprocess_image(frame, mode))
+
+
+# ----------------------------------------------------------------------
+# 벤치마크
+# ----------------------------------------------------------------------
+IDENTIFIER_PATTERN = re.compile(r"\d[\d\- ]{4,}\d")
+
+
+def _identifiers(text: str) -> set:
+    """전화번호/회원번호 같은 6자리 이상 숫자열 (구분 기호 제거)"""
+    return {re.sub(r"\D", "", match) for match in IDENTIFIER_PATTERN.findall(text)}
+
+
+def _similarity(a: str, b: str) -> float:
+    return difflib.SequenceMatcher(None, a, b).ratio() if a or b else 1.0
+
+
+def benchmark(
+    paths: Sequence[Path],
+    reader: Any,
+    ground_truth: Optional[Dict[str, str]] = None,
+    min_confidence: float = 0.3,
+) -> Dict[str, Dict[str, float]]:
+    """
+    모드별 전처리+OCR 시간, 전처리 후 픽셀 수, 정확도 비교
+
+    ground_truth({파일 이름: 기대 텍스트})가 있으면 기대 텍스트와의 문자 유사도와 숫자열 재현율,
+    없으면 fixed 모드 결과를 기준으로 한 유사도와 숫자열 재현율을 계산합니다.
+    """
+    totals = {
+        mode: {"seconds": 0.0, "megapixels": 0.0, "similarity": 0.0, "identifiers": 0, "found": 0} for mode in MODES
+    }
+    count = 0
+    for path in paths:
+        data = path.read_bytes()
+        texts: Dict[str, str] = {}
+        for mode in ("fixed", "adaptive"):
+            started = time.perf_counter()
+            image = preprocess_image_bytes(data, mode)
+            if image is None:
+                break
+            array = np.array(image.convert("RGB"))
+            results = reader.readtext(array)
+            totals[mode]["seconds"] += time.perf_counter() - started
+            totals[mode]["megapixels"] += array.shape[0] * array.shape[1] / 1e6
+            texts[mode] = " ".join(text.strip() for _, text, conf in results if text and conf >= min_confidence)
+        if len(texts) != len(MODES):
+            logger.warning("⚠️ 이미지를 읽을 수 없어 건너뜁니다: %s", path)
+            continue
+        count += 1
+        expected = (ground_truth or {}).get(path.name, texts["fixed"])
+        expected_ids = _identifiers(expected)
+        for mode in MODES:
+            totals[mode]["similarity"] += _similarity(expected, texts[mode])
+            totals[mode]["identifiers"] += len(expected_ids)
+            totals[mode]["found"] += len(expected_ids & _identifiers(texts[mode]))
+        logger.info(
+            "  %s: fixed %.0f자 / adaptive %.0f자, 유사도 %.2f",
+            path.name,
+            len(texts["fixed"]),
+            len(texts["adaptive"]),
+            _similarity(texts["fixed"], texts["adaptive"]),
+        )
+
+    report: Dict[str, Dict[str, float]] = {}
+    for mode, total in totals.items():
+        report[mode] = {
+            "images": count,
+            "seconds_per_image": round(total["seconds"] / count, 3) if count else 0.0,
+            "megapixels_per_image": round(total["megapixels"] / count, 2) if count else 0.0,
+            "similarity": round(total["similarity"] / count, 3) if count else 0.0,
+            "identifier_recall": round(total["found"] / total["identifiers"], 3) if total["identifiers"] else 1.0,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="고정 3배 확대 전처리와 해상도 맞춤 전처리의 정확도/속도 비교")
+    parser.add_argument("images", nargs="+", type=Path, help="테스트 이미지 파일")
+    parser.add_argument("--ground-truth", type=Path, help='기대 텍스트 JSON ({"파일 이름": "텍스트", ...})')
+    parser.add_argument("--langs", nargs="+", default=["ko", "en"])
+    parser.add_argument("--gpu", action="store_true", help="GPU 사용")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    ground_truth = json.loads(args.ground_truth.read_text(encoding="utf-8")) if args.ground_truth else None
+    reader = easyocr.Reader(args.langs, gpu=args.gpu)
+    report = benchmark(args.images, reader, ground_truth)
+    basis = "기대 텍스트" if ground_truth else "fixed 결과"
+    for mode, stats in report.items():
+        print(
+            f"{mode}: {stats['seconds_per_image']}초/장, {stats['megapixels_per_image']}MP/장, "
+            f"{basis} 대비 유사도 {stats['similarity']}, 숫자열 재현율 {stats['identifier_recall']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,476 @@
+"""
+세 플랫폼(카카오스토리, Instagram, Facebook)의 게시물/사용자를 한 곳에 모아 두는 SQLite 저장소 (선택 사항)
+
+기존 JSON 파일(instagram_media.json 등)은 그대로 원본으로 유지하고, 이 저장소는
+- JSON 파일을 가져와(import) 플랫폼/게시물 키/사용자 키/해시태그/게시 시각 인덱스로 조회하거나
+- 크롤러가 저장할 때 함께 기록(SNS_POST_DB 환경 변수를 설정한 경우)하고
+- 필요하면 다시 기존 형식의 JSON 파일로 내보내는(export) 용도로 사용합니다.
+
+- WAL 모드로 열어 한 스크립트가 쓰는 동안 다른 스크립트가 읽을 수 있음
+- 원본 항목은 data 컬럼에 JSON 그대로 저장하고, 조회용 컬럼만 따로 뽑아 인덱싱
+- 가져온 순서(id)를 유지하므로 export 결과는 원본과 같은 순서의 JSON 배열(indent=2)
+
+사용 예:
+    python -m common.post_db import                 # 모든 플랫폼의 JSON 파일 가져오기
+    python -m common.post_db import --platform instagram
+    python -m common.post_db export --platform kakaostory --output /tmp/kakaostory_popup_posts.json
+    python -m common.post_db query --platform instagram --hashtag 독일피엠 --since 2025-01-01
+    python -m common.post_db stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from common.enrichment_store import EnrichmentStore
+from common.json_journal import JournaledJsonStore
+from common.json_stream import dump_json_array
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = PROJECT_ROOT / "sns_posts.db"
+POST_DB_ENV = "SNS_POST_DB"  # 설정하면 크롤러가 저장할 때 이 경로의 DB에도 함께 기록 ("1"이면 DEFAULT_DB_PATH)
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,          -- 가져온/추가된 순서 (export 순서)
+    platform TEXT NOT NULL,
+    post_key TEXT NOT NULL,          -- Instagram/카카오스토리: shortcode, Facebook: 고정된 post_key, 정규화한 첫 번째 미디어 URL 또는 내용 해시
+    user_key TEXT,                   -- Instagram: handle, 카카오스토리: user_id, Facebook: user_name
+    posted_at TEXT,                  -- 원본의 게시 시각 문자열 (ISO 형식이면 문자열 비교로 범위 조회 가능)
+    data TEXT NOT NULL,              -- 원본 항목 JSON
+    updated_at REAL NOT NULL,
+    UNIQUE (platform, post_key)
+);
+CREATE INDEX IF NOT EXISTS idx_posts_user ON posts (platform, user_key);
+CREATE INDEX IF NOT EXISTS idx_posts_posted_at ON posts (platform, posted_at);
+
+CREATE TABLE IF NOT EXISTS post_hashtags (
+    post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+    hashtag TEXT NOT NULL,           -- '#' 없이 저장
+    PRIMARY KEY (post_id, hashtag)
+);
+CREATE INDEX IF NOT EXISTS idx_post_hashtags_tag ON post_hashtags (hashtag);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    platform TEXT NOT NULL,
+    user_key TEXT NOT NULL,          -- Instagram: user_handle, 카카오스토리: user_id (없으면 "name:<이름>")
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (platform, user_key)
+);
+"""
+
+_INSTAGRAM_SHORTCODE_RE = re.compile(r"/(?:reel|p)/([^/?#]+)")
+
+
+def _instagram_post_key(item: dict) -> Optional[str]:
+    """instagram_media.json 항목 키 (permalink의 shortcode, 없으면 permalink 또는 id)"""
+    permalink = item.get("permalink")
+    if permalink:
+        match = _INSTAGRAM_SHORTCODE_RE.search(permalink.split("?")[0])
+        return match.group(1) if match else permalink
+    media_id = item.get("id")
+    return str(media_id) if media_id else None
+
+
+def _facebook_post_key(item: dict) -> Optional[str]:
+    """facebook_media.json 항목 키 (OCR/오디오 사이드카와 같은 키)"""
+    # facebook_dedupe_index는 표준 라이브러리만 사용하므로 common에서 가져와도 무거운 의존성이 없음
+    from facebook.facebook_dedupe_index import post_key  # pylint: disable=import-outside-toplevel
+
+    return post_key(item)
+
+
+def _kakaostory_post_key(item: dict) -> Optional[str]:
+    shortcode = item.get("shortcode")
+    return str(shortcode) if shortcode else None
+
+
+def _kakaostory_user_key(item: dict) -> Optional[str]:
+    """kakaostory_user.json 항목 키 (user_id가 없는 사용자는 이름 기준)"""
+    if item.get("user_id"):
+        return str(item["user_id"])
+    return f"name:{item['name']}" if item.get("name") else None
+
+
+def _field_key(field: str) -> Callable[[dict], Optional[str]]:
+    def key_func(item: dict) -> Optional[str]:
+        value = item.get(field)
+        return str(value) if value not in (None, "") else None
+
+    return key_func
+
+
+# 플랫폼별 JSON 파일 위치와 조회 컬럼 추출 규칙
+PLATFORMS: Dict[str, Dict[str, Any]] = {
+    "instagram": {
+        "posts_path": PROJECT_ROOT / "instagram" / "instagram_media.json",
+        "users_path": PROJECT_ROOT / "instagram" / "instagram_user.json",
+        "post_key": _instagram_post_key,
+        "user_field": "handle",
+        "time_field": "timestamp",
+        "hashtag_field": "hashtags",
+        "user_key": _field_key("user_handle"),
+    },
+    "kakaostory": {
+        "posts_path": PROJECT_ROOT / "kakaostory" / "kakaostory_popup_posts.json",
+        "users_path": PROJECT_ROOT / "kakaostory" / "kakaostory_user.json",
+        "post_key": _kakaostory_post_key,
+        "user_field": "user_id",
+        "time_field": "date",
+        "hashtag_field": "hashtag",
+        "user_key": _kakaostory_user_key,
+    },
+    "facebook": {
+        "posts_path": PROJECT_ROOT / "facebook" / "facebook_media.json",
+        "users_path": None,
+        "post_key": _facebook_post_key,
+        "user_field": "user_name",
+        "time_field": "datetime",
+        "hashtag_field": "hashtags",
+        "user_key": None,
+    },
+}
+
+
+def normalize_hashtag(tag: Any) -> Optional[str]:
+    """해시태그 비교용 정규화 ('#' 제거, 앞뒤 공백 제거)"""
+    text = str(tag or "").strip().lstrip("#").strip()
+    return text or None
+
+
+def _platform(platform: str) -> Dict[str, Any]:
+    try:
+        return PLATFORMS[platform]
+    except KeyError:
+        raise ValueError(f"지원하지 않는 플랫폼입니다: {platform} ({', '.join(PLATFORMS)})") from None
+
+
+class PostDatabase:
+    """게시물/사용자 SQLite 저장소 (WAL 모드)"""
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH, timeout: float = 30.0) -> None:
+        """
+        Args:
+            path: DB 파일 경로 (없으면 생성)
+            timeout: 다른 프로세스가 쓰는 중일 때 잠금을 기다릴 시간(초)
+        """
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path), timeout=timeout)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # WAL 모드에서는 NORMAL로도 커밋된 데이터가 손상되지 않음
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def __enter__(self) -> "PostDatabase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+    def upsert_posts(self, platform: str, items: Iterable[dict]) -> int:
+        """
+        게시물을 추가하거나 같은 키의 게시물을 교체 (한 트랜잭션)
+
+        Returns:
+            int: 저장한 게시물 수 (키를 만들 수 없는 항목은 건너뜀)
+        """
+        spec = _platform(platform)
+        count = 0
+        now = time.time()
+        with self.conn:
+            for item in items:
+                post_key = spec["post_key"](item)
+                if not post_key:
+                    continue
+                row = self.conn.execute(
+                    """
+                    INSERT INTO posts (platform, post_key, user_key, posted_at, data, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (platform, post_key) DO UPDATE SET
+                        user_key = excluded.user_key,
+                        posted_at = excluded.posted_at,
+                        data = excluded.data,
+                        updated_at = excluded.updated_at
+                    RETURNING id
+                    """,
+                    (
+                        platform,
+                        post_key,
+                        item.get(spec["user_field"]) or None,
+                        item.get(spec["time_field"]) or None,
+                        json.dumps(item, ensure_ascii=False),
+                        now,
+                    ),
+                ).fetchone()
+                post_id = row[0]
+                self.conn.execute("DELETE FROM post_hashtags WHERE post_id = ?", (post_id,))
+                hashtags = {normalize_hashtag(tag) for tag in item.get(spec["hashtag_field"]) or []}
+                hashtags.discard(None)
+                self.conn.executemany(
+                    "INSERT INTO post_hashtags (post_id, hashtag) VALUES (?, ?)",
+                    [(post_id, tag) for tag in hashtags],
+                )
+                count += 1
+        return count
+
+    def upsert_users(self, platform: str, items: Iterable[dict]) -> int:
+        """사용자를 추가하거나 같은 키의 사용자를 교체하고 저장한 수 반환"""
+        key_func = _platform(platform)["user_key"]
+        if key_func is None:
+            raise ValueError(f"{platform}은(는) 사용자 파일이 없습니다")
+        now = time.time()
+        rows = []
+        for item in items:
+            user_key = key_func(item)
+            if user_key:
+                rows.append((platform, user_key, json.dumps(item, ensure_ascii=False), now))
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO users (platform, user_key, data, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (platform, user_key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def get_post(self, platform: str, post_key: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT data FROM posts WHERE platform = ? AND post_key = ?", (platform, post_key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_user(self, platform: str, user_key: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT data FROM users WHERE platform = ? AND user_key = ?", (platform, user_key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_posts(
+        self,
+        platform: str,
+        user_key: Optional[str] = None,
+        hashtag: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Iterator[dict]:
+        """
+        조건에 맞는 게시물을 저장 순서대로 반환
+
+        Args:
+            platform: 플랫폼 이름
+            user_key: 작성자 키 (Instagram handle, 카카오스토리 user_id, Facebook user_name)
+            hashtag: 해시태그 ('#' 유무 무관)
+            since, until: 게시 시각 범위 (posted_at 문자열 비교, until은 미포함)
+        """
+        _platform(platform)
+        sql = "SELECT p.data FROM posts p"
+        where = ["p.platform = ?"]
+        params: List[Any] = [platform]
+        if hashtag is not None:
+            sql += " JOIN post_hashtags h ON h.post_id = p.id"
+            where.append("h.hashtag = ?")
+            params.append(normalize_hashtag(hashtag))
+        if user_key is not None:
+            where.append("p.user_key = ?")
+            params.append(user_key)
+        if since is not None:
+            where.append("p.posted_at >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("p.posted_at < ?")
+            params.append(until)
+        sql += " WHERE " + " AND ".join(where) + " ORDER BY p.id"
+        for row in self.conn.execute(sql, params):
+            yield json.loads(row[0])
+
+    def iter_users(self, platform: str) -> Iterator[dict]:
+        for row in self.conn.execute("SELECT data FROM users WHERE platform = ? ORDER BY id", (platform,)):
+            yield json.loads(row[0])
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """플랫폼별 게시물/사용자 수"""
+        result: Dict[str, Dict[str, int]] = {name: {"posts": 0, "users": 0} for name in PLATFORMS}
+        for table, label in (("posts", "posts"), ("users", "users")):
+            for platform, count in self.conn.execute(f"SELECT platform, COUNT(*) FROM {table} GROUP BY platform"):
+                result.setdefault(platform, {"posts": 0, "users": 0})[label] = count
+        return result
+
+    # ------------------------------------------------------------------
+    # JSON 파일 가져오기/내보내기
+    # ------------------------------------------------------------------
+    def import_json(self, platform: str, batch_size: int = 500) -> Dict[str, int]:
+        """
+        플랫폼의 게시물/사용자 JSON 파일을 가져옴 (저널과 OCR/오디오 사이드카 값도 합쳐서 저장)
+
+        Returns:
+            Dict[str, int]: {"posts": 가져온 게시물 수, "users": 가져온 사용자 수}
+        """
+        spec = _platform(platform)
+        result = {"posts": 0, "users": 0}
+
+        posts_path: Path = spec["posts_path"]
+        if posts_path.exists() or JournaledJsonStore(posts_path).exists():
+            enrichment = EnrichmentStore(posts_path, key_func=spec["post_key"])
+            batch: List[dict] = []
+            for _, item in JournaledJsonStore(posts_path).iter_records():
+                batch.append(enrichment.join(item))
+                if len(batch) >= batch_size:
+                    result["posts"] += self.upsert_posts(platform, batch)
+                    batch = []
+            result["posts"] += self.upsert_posts(platform, batch)
+
+        users_path: Optional[Path] = spec["users_path"]
+        if users_path is not None and users_path.exists():
+            users = json.loads(users_path.read_text(encoding="utf-8"))
+            if isinstance(users, list):
+                result["users"] = self.upsert_users(platform, users)
+            else:
+                logger.warning("⚠️ %s 파일이 리스트 형식이 아닙니다. 사용자 가져오기를 건너뜁니다.", users_path.name)
+
+        logger.info("📥 %s: 게시물 %d개, 사용자 %d명 가져옴", platform, result["posts"], result["users"])
+        return result
+
+    def export_json(self, platform: str, output: Optional[Path] = None, users_output: Optional[Path] = None) -> Dict[str, int]:
+        """
+        DB의 게시물/사용자를 기존 형식의 JSON 배열 파일로 내보냄 (임시 파일 + rename)
+
+        Args:
+            output: 게시물 파일 경로 (기본값: 플랫폼의 원본 JSON 파일)
+            users_output: 사용자 파일 경로 (기본값: 플랫폼의 원본 사용자 파일)
+
+        Raises:
+            RuntimeError: 원본 파일로 내보내는데 병합되지 않은 저널이 남아 있는 경우
+                (저널이 다음 실행에서 내보낸 파일 위에 다시 재생되어 덮어쓰는 것을 방지)
+        """
+        spec = _platform(platform)
+        posts_path = Path(output) if output else spec["posts_path"]
+        journal = JournaledJsonStore(posts_path).journal_path
+        if journal.exists():
+            raise RuntimeError(f"{journal.name}이 남아 있습니다. 해당 단계를 한 번 실행해 병합한 뒤 내보내세요.")
+
+        result = {"posts": 0, "users": 0}
+        result["posts"], _ = dump_json_array(posts_path, self.iter_posts(platform))
+        users_path = Path(users_output) if users_output else spec["users_path"]
+        if users_path is not None and spec["user_key"] is not None:
+            result["users"], _ = dump_json_array(users_path, self.iter_users(platform))
+        logger.info("📤 %s: 게시물 %d개, 사용자 %d명 내보냄", platform, result["posts"], result["users"])
+        return result
+
+
+_post_db: Optional[PostDatabase] = None
+_post_db_failed = False
+
+
+def get_post_db() -> Optional[PostDatabase]:
+    """
+    SNS_POST_DB 환경 변수가 설정된 경우에만 PostDatabase 싱글톤 반환 (설정하지 않았으면 None)
+
+    SNS_POST_DB=1이면 DEFAULT_DB_PATH, 그 외 값은 DB 파일 경로로 사용합니다.
+    """
+    global _post_db, _post_db_failed  # pylint: disable=global-statement
+    if _post_db is None and not _post_db_failed:
+        value = os.getenv(POST_DB_ENV, "").strip()
+        if not value or value == "0":
+            return None
+        try:
+            _post_db = PostDatabase(DEFAULT_DB_PATH if value == "1" else Path(value))
+        except sqlite3.Error as exc:
+            _post_db_failed = True
+            logger.warning("⚠️ 게시물 DB를 열 수 없어 DB 기록을 건너뜁니다 (%s): %s", value, exc)
+    return _post_db
+
+
+def mirror_posts(platform: str, items: Iterable[dict]) -> None:
+    """SNS_POST_DB가 설정되어 있으면 게시물을 DB에도 기록 (실패해도 JSON 저장에는 영향 없음)"""
+    db = get_post_db()
+    if db is None:
+        return
+    try:
+        db.upsert_posts(platform, items)
+    except (sqlite3.Error, ValueError) as exc:
+        logger.warning("⚠️ 게시물 DB 기록 실패 (%s): %s", platform, exc)
+
+
+def mirror_users(platform: str, items: Iterable[dict]) -> None:
+    """SNS_POST_DB가 설정되어 있으면 사용자를 DB에도 기록 (실패해도 JSON 저장에는 영향 없음)"""
+    db = get_post_db()
+    if db is None:
+        return
+    try:
+        db.upsert_users(platform, items)
+    except (sqlite3.Error, ValueError) as exc:
+        logger.warning("⚠️ 사용자 DB 기록 실패 (%s): %s", platform, exc)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="SNS 게시물/사용자 SQLite 저장소")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help=f"DB 파일 경로 (기본값: {DEFAULT_DB_PATH.name})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = sub.add_parser("import", help="JSON 파일을 DB로 가져오기")
+    import_parser.add_argument("--platform", choices=list(PLATFORMS), help="플랫폼 (생략하면 전체)")
+
+    export_parser = sub.add_parser("export", help="DB를 JSON 파일로 내보내기")
+    export_parser.add_argument("--platform", choices=list(PLATFORMS), required=True)
+    export_parser.add_argument("--output", type=Path, help="게시물 파일 경로 (기본값: 원본 JSON 파일)")
+    export_parser.add_argument("--users-output", type=Path, help="사용자 파일 경로 (기본값: 원본 사용자 파일)")
+
+    query_parser = sub.add_parser("query", help="게시물 조회 (JSON Lines로 출력)")
+    query_parser.add_argument("--platform", choices=list(PLATFORMS), required=True)
+    query_parser.add_argument("--user", help="작성자 키")
+    query_parser.add_argument("--hashtag", help="해시태그")
+    query_parser.add_argument("--since", help="게시 시각 시작 (예: 2025-01-01)")
+    query_parser.add_argument("--until", help="게시 시각 끝 (미포함)")
+
+    sub.add_parser("stats", help="플랫폼별 게시물/사용자 수")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    with PostDatabase(args.db) as db:
+        if args.command == "import":
+            for platform in [args.platform] if args.platform else list(PLATFORMS):
+                db.import_json(platform)
+        elif args.command == "export":
+            try:
+                db.export_json(args.platform, args.output, args.users_output)
+            except RuntimeError as exc:
+                logger.error("❌ %s", exc)
+                return 1
+        elif args.command == "query":
+            for item in db.iter_posts(args.platform, args.user, args.hashtag, args.since, args.until):
+                print(json.dumps(item, ensure_ascii=False))
+        else:
+            for platform, counts in db.counts().items():
+                print(f"{platform}: 게시물 {counts['posts']}개, 사용자 {counts['users']}명")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
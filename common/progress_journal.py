@@ -0,0 +1,166 @@
+"""
+처리 진행 상황(처리한 permalink, 스킵한 permalink 등)을 기록하는 append-only 키 저널
+
+키 하나를 추가할 때마다 JSON 파일 전체를 읽고 다시 쓰던 방식 대신,
+한 줄에 키 하나씩 텍스트 파일 끝에 추가하고 메모리의 set으로 중복을 확인합니다.
+
+- add(): set에 없을 때만 한 줄 추가 (매번 OS 버퍼로 flush, fsync는 일정 개수/시간마다 묶어서 수행)
+- compact(): 중복/잘린 줄을 정리하여 파일을 다시 씀 (임시 파일 + rename)
+- clear(): 모든 키를 지우고 빈 파일로 다시 씀 (한 주기의 작업을 끝까지 마친 뒤 진행 기록을 초기화할 때)
+- migrate_legacy_json(): 기존 {"<list_key>": [...]} 형식 JSON 파일을 한 번 병합한 뒤 .migrated로 이름 변경
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Set, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class AppendOnlyKeyJournal:
+    """한 줄에 키 하나를 기록하는 append-only 저널 + 메모리 set"""
+
+    def __init__(self, path: Path, fsync_every: int = 50, fsync_interval: float = 5.0) -> None:
+        """
+        Args:
+            path: 저널 파일 경로 (예: instagram_processed_permalinks.txt)
+            fsync_every: 이 개수만큼 추가할 때마다 fsync
+            fsync_interval: 마지막 fsync 이후 이 시간(초)이 지나면 fsync
+        """
+        self.path = Path(path)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.keys: Set[str] = set()
+        self._loaded = False
+        self._file: Optional[TextIO] = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._line_count = 0  # 파일의 줄 수 (중복 포함) - compaction 필요 여부 판단용
+
+    def __contains__(self, key: object) -> bool:
+        self.load()
+        return key in self.keys
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[str]:
+        self.load()
+        return iter(self.keys)
+
+    def load(self) -> Set[str]:
+        """저널 파일을 읽어 set 구성 (한 번만 수행)"""
+        if self._loaded:
+            return self.keys
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    key = line.strip()
+                    if key:
+                        self.keys.add(key)
+                        self._line_count += 1
+        self._loaded = True
+        return self.keys
+
+    def migrate_legacy_json(self, json_path: Path, list_key: str) -> int:
+        """
+        기존 JSON 파일({"<list_key>": [...]})의 항목을 저널로 옮기고 원본은 <이름>.migrated로 변경
+
+        중간에 중단되어도 다음 실행에서 다시 병합하면 되므로(set 합집합) 여러 번 호출해도 안전합니다.
+
+        Returns:
+            int: 새로 추가된 키 개수
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+
+        self.load()
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            legacy_keys = data.get(list_key, []) if isinstance(data, dict) else []
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("⚠️ %s 마이그레이션 실패 (원본 유지): %s", json_path.name, exc)
+            return 0
+
+        before = len(self.keys)
+        self.keys.update(str(key).strip() for key in legacy_keys if key and str(key).strip())
+        added = len(self.keys) - before
+        self.compact()
+        json_path.replace(json_path.with_name(json_path.name + ".migrated"))
+        logger.info("📦 %s → %s 마이그레이션 완료 (%d개 추가, 총 %d개)", json_path.name, self.path.name, added, len(self.keys))
+        return added
+
+    def add(self, key: str) -> bool:
+        """
+        키를 추가 (이미 있으면 무시)
+
+        Returns:
+            bool: 새로 추가되었으면 True
+        """
+        key = (key or "").strip()
+        if not key or "\n" in key:
+            return False
+        self.load()
+        if key in self.keys:
+            return False
+
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(key + "\n")
+        self._file.flush()  # 프로세스가 강제 종료되어도 OS 버퍼에는 남도록
+        self.keys.add(key)
+        self._line_count += 1
+        self._unsynced += 1
+
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+        return True
+
+    def sync(self) -> None:
+        """버퍼에 남은 기록을 디스크에 동기화"""
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def compact(self) -> None:
+        """중복/빈 줄을 제거하여 저널 파일을 다시 씀"""
+        self.load()
+        self._close_file()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for key in sorted(self.keys):
+                f.write(key + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._line_count = len(self.keys)
+
+    def clear(self) -> None:
+        """모든 키를 지우고 저널 파일을 빈 파일로 다시 씀"""
+        self.load()
+        self.keys.clear()
+        self.compact()
+
+    def close(self) -> None:
+        """남은 기록을 동기화하고, 중복 줄이 있으면 compaction"""
+        if not self._loaded:
+            return
+        self._close_file()
+        if self._line_count != len(self.keys):
+            self.compact()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
@@ -0,0 +1,225 @@
+"""
+음성 구간 검출(VAD) 후 음성 구간만 Whisper로 인식
+
+기존 무음 판단은 volumedetect 평균/최대 볼륨 기준 하나뿐이라, 배경 음악이 큰 음악 전용 릴스도 전체를 Whisper로 디코딩했습니다.
+
+- 디코딩한 16kHz PCM(common/audio_decode.py)을 30ms 프레임으로 나눠 음성 프레임 판단
+  - 에너지: 주변 ENERGY_WINDOW_SECONDS 구간의 바닥(하위 ENERGY_FLOOR_PERCENTILE% 프레임 에너지)보다 ENERGY_MARGIN_DB 이상 크고
+    ABS_MIN_DB 이상인 프레임 (계속 이어지는 배경 음악은 바닥 자체가 높아 걸러지고, 음악 위의 목소리는 음절마다 바닥 위로 올라옴)
+  - 영교차율(ZCR): ZCR_MAX 이상인 프레임은 잡음(치찰음보다 넓은 대역)으로 보고 제외
+  - webrtcvad가 설치되어 있으면 WebRTC VAD 판단도 함께 만족해야 음성 프레임 (pip install webrtcvad)
+- 음성 프레임을 구간으로 묶고 (MERGE_GAP_SECONDS 미만의 틈은 합침, MIN_SEGMENT_SECONDS 미만 구간은 버림, 앞뒤 PAD_SECONDS 여유)
+  음성이 MIN_SPEECH_SECONDS 미만이면 Whisper를 호출하지 않고, 아니면 음성 구간만 짧은 무음으로 이어 붙여 한 번에 인식
+- 영상마다 전체 길이/음성 길이/건너뛴 길이를 반환하고, SpeechStatsRecorder로 게시물 단위 합계를 만들어
+  audio_speech 사이드카에 기록 ({"videos", "duration_seconds", "speech_seconds", "skipped_seconds"})
+
+검출 결과 확인:
+    python -m common.speech_vad video1.mp4 video2.mp4 ...
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np  # type: ignore
+
+from common.audio_decode import SAMPLE_RATE, AudioDecodeError, decode_audio
+
+try:
+    import webrtcvad  # type: ignore
+
+    HAS_WEBRTCVAD = True
+except ImportError:
+    HAS_WEBRTCVAD = False
+
+logger = logging.getLogger(__name__)
+
+FRAME_MS = 30  # WebRTC VAD가 받는 프레임 길이 (10/20/30ms)
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+WEBRTC_AGGRESSIVENESS = 3  # 0~3, 클수록 음성이 아닌 프레임을 더 많이 걸러냄
+ENERGY_WINDOW_SECONDS = 1.5
+ENERGY_FLOOR_PERCENTILE = 10
+ENERGY_MARGIN_DB = 6.0
+ABS_MIN_DB = -50.0
+ZCR_MAX = 0.4  # 샘플당 부호 변화 비율
+MERGE_GAP_SECONDS = 0.5
+MIN_SEGMENT_SECONDS = 0.25
+PAD_SECONDS = 0.2
+MIN_SPEECH_SECONDS = 0.5  # 음성이 이보다 짧으면 Whisper를 호출하지 않음
+JOIN_GAP_SECONDS = 0.3  # 음성 구간을 이어 붙일 때 사이에 넣는 무음
+
+Segment = Tuple[float, float]  # (시작 초, 끝 초)
+
+
+def vad_settings() -> Dict[str, Any]:
+    """음성 구간 검출 결과를 바꾸는 설정 (음성 인식 캐시 profile에 포함)"""
+    return {
+        "frame_ms": FRAME_MS,
+        "webrtc": WEBRTC_AGGRESSIVENESS if HAS_WEBRTCVAD else None,
+        "energy_window": ENERGY_WINDOW_SECONDS,
+        "energy_floor_percentile": ENERGY_FLOOR_PERCENTILE,
+        "energy_margin_db": ENERGY_MARGIN_DB,
+        "abs_min_db": ABS_MIN_DB,
+        "zcr_max": ZCR_MAX,
+        "merge_gap": MERGE_GAP_SECONDS,
+        "min_segment": MIN_SEGMENT_SECONDS,
+        "pad": PAD_SECONDS,
+        "min_speech": MIN_SPEECH_SECONDS,
+        "join_gap": JOIN_GAP_SECONDS,
+    }
+
+
+def _frames(samples: np.ndarray) -> np.ndarray:
+    count = len(samples) // FRAME_SAMPLES
+    return samples[: count * FRAME_SAMPLES].reshape(count, FRAME_SAMPLES)
+
+
+def energy_zcr_frames(samples: np.ndarray) -> np.ndarray:
+    """에너지(주변 구간의 바닥 기준)와 영교차율로 판단한 음성 프레임 (bool 배열)"""
+    frames = _frames(samples)
+    if not len(frames):
+        return np.zeros(0, dtype=bool)
+    energy_db = 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-10)
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+    window = max(1, int(ENERGY_WINDOW_SECONDS * 1000 / FRAME_MS)) | 1
+    padded = np.pad(energy_db, window // 2, mode="edge")
+    floor = np.percentile(np.lib.stride_tricks.sliding_window_view(padded, window), ENERGY_FLOOR_PERCENTILE, axis=1)
+    threshold = np.maximum(floor + ENERGY_MARGIN_DB, ABS_MIN_DB)
+    return (energy_db > threshold) & (zcr < ZCR_MAX)
+
+
+def webrtc_frames(samples: np.ndarray) -> Optional[np.ndarray]:
+    """WebRTC VAD로 판단한 음성 프레임 (webrtcvad가 없으면 None)"""
+    if not HAS_WEBRTCVAD:
+        return None
+    vad = webrtcvad.Vad(WEBRTC_AGGRESSIVENESS)
+    pcm = (np.clip(_frames(samples), -1.0, 1.0) * 32767).astype("<i2")
+    return np.array([vad.is_speech(frame.tobytes(), SAMPLE_RATE) for frame in pcm], dtype=bool)
+
+
+def speech_segments(samples: np.ndarray) -> List[Segment]:
+    """음성 구간 목록 (초 단위, 겹치지 않고 시간순)"""
+    speech = energy_zcr_frames(samples)
+    webrtc = webrtc_frames(samples)
+    if webrtc is not None:
+        speech &= webrtc
+    frame_seconds = FRAME_MS / 1000.0
+    duration = len(samples) / SAMPLE_RATE
+
+    segments: List[List[float]] = []
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], speech.astype(np.int8), [0]))))
+    for start, end in zip(edges[::2], edges[1::2]):
+        begin, finish = start * frame_seconds, end * frame_seconds
+        if segments and begin - segments[-1][1] < MERGE_GAP_SECONDS:
+            segments[-1][1] = finish
+        else:
+            segments.append([begin, finish])
+    return [
+        (float(max(0.0, begin - PAD_SECONDS)), float(min(duration, finish + PAD_SECONDS)))
+        for begin, finish in segments
+        if finish - begin >= MIN_SEGMENT_SECONDS
+    ]
+
+
+def speech_audio(samples: np.ndarray, segments: List[Segment]) -> np.ndarray:
+    """음성 구간만 짧은 무음으로 이어 붙인 PCM"""
+    gap = np.zeros(int(JOIN_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    parts: List[np.ndarray] = []
+    for begin, finish in segments:
+        if parts:
+            parts.append(gap)
+        parts.append(samples[int(begin * SAMPLE_RATE) : int(finish * SAMPLE_RATE)])
+    return np.concatenate(parts).astype(np.float32, copy=False) if parts else np.zeros(0, dtype=np.float32)
+
+
+def speech_stats(duration: float, speech: float) -> Dict[str, float]:
+    return {
+        "duration_seconds": round(duration, 2),
+        "speech_seconds": round(speech, 2),
+        "skipped_seconds": round(max(0.0, duration - speech), 2),
+    }
+
+
+def transcribe_speech(samples: np.ndarray, model: Any, **options: Any) -> Tuple[str, Dict[str, float]]:
+    """
+    음성 구간만 Whisper로 인식
+
+    Args:
+        samples: 16kHz 모노 float32 PCM
+        model: transcribe(audio, **options)를 가진 모델 (common.whisper_model 관리자 또는 whisper 모델)
+
+    Returns:
+        (인식한 텍스트 - 음성이 없으면 빈 문자열, {"duration_seconds", "speech_seconds", "skipped_seconds"})
+    """
+    duration = len(samples) / SAMPLE_RATE
+    segments = speech_segments(samples)
+    speech = sum((finish - begin for begin, finish in segments), 0.0)
+    stats = speech_stats(duration, speech)
+    if speech < MIN_SPEECH_SECONDS:
+        logger.info("🔇 음성 구간 없음 (%.1f초 중 %.1f초): Whisper 생략", duration, speech)
+        return "", stats
+    logger.info("🗣️ 음성 구간 %d개, %.1f초 / %.1f초 (%.1f초 건너뜀)", len(segments), speech, duration, stats["skipped_seconds"])
+    result = model.transcribe(speech_audio(samples, segments), **options)
+    return result["text"].strip(), stats
+
+
+class SpeechStatsRecorder:
+    """게시물 하나에서 처리한 비디오들의 음성/건너뛴 길이 합계 (게시물을 시작할 때 reset, 저장할 때 summary)"""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.videos = 0
+        self.duration = 0.0
+        self.speech = 0.0
+
+    def add(self, stats: Dict[str, float]) -> None:
+        self.videos += 1
+        self.duration += stats.get("duration_seconds", 0.0)
+        self.speech += stats.get("speech_seconds", 0.0)
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        """audio_speech 사이드카 값 (처리한 비디오가 없으면 None)"""
+        if not self.videos:
+            return None
+        return {"videos": self.videos, **speech_stats(self.duration, self.speech)}
+
+
+_recorder = SpeechStatsRecorder()
+
+
+def get_speech_recorder() -> SpeechStatsRecorder:
+    """프로세스 공용 게시물 단위 음성 통계 (process_video_with_ffmpeg_whisper가 비디오마다 추가)"""
+    return _recorder
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    paths = argv if argv is not None else sys.argv[1:]
+    if not paths:
+        print("사용법: python -m common.speech_vad video1.mp4 video2.mp4 ...")
+        return 1
+    print(f"검출 방식: 에너지+ZCR{' + WebRTC VAD' if HAS_WEBRTCVAD else ''}")
+    for path in paths:
+        try:
+            with open(path, "rb") as video_file:
+                samples = decode_audio(video_file.read())
+        except (OSError, AudioDecodeError) as exc:
+            print(f"{os.path.basename(path)}: {exc}")
+            continue
+        segments = speech_segments(samples)
+        stats = speech_stats(len(samples) / SAMPLE_RATE, sum(finish - begin for begin, finish in segments))
+        spans = ", ".join(f"{begin:.1f}-{finish:.1f}" for begin, finish in segments) or "없음"
+        print(
+            f"{os.path.basename(path)}: 음성 {stats['speech_seconds']}초 / {stats['duration_seconds']}초 "
+            f"(건너뜀 {stats['skipped_seconds']}초), 구간: {spans}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+EasyOCR 전에 글자가 없는 이미지를 빠르게 걸러내는 사전 필터
+
+상품 사진 등 글자가 없는 이미지도 모두 검출(CRAFT)/인식을 거치고, facebook_imgocr에서는 3배 확대까지 하므로
+축소 디코딩한 흑백 이미지에서 글자가 있을 법한지 먼저 확인합니다.
+
+- "edges": Canny 에지를 가로로 이어 붙인 덩어리 중 글줄 모양(가로로 긴 박스, 에지 밀도)이 있으면 글자 있음 (기본값)
+- "mser": MSER 영역 중 글자 크기/비율인 영역이 같은 줄에 3개 이상 나란히 있으면 글자 있음
+- "detector": EasyOCR 검출기(reader.detect)만 축소 이미지에 실행하여 박스가 있으면 글자 있음 (인식 단계 생략)
+
+걸러낸 이미지 중 audit_rate 비율은 그대로 OCR하고 결과를 report()로 알려주면, 실제로 글자가 있었던 비율
+(놓친 비율)을 종료 시 통계로 남깁니다. 이미지 파일로 미리 측정하려면:
+    python -m common.text_prefilter --method edges sample1.jpg sample2.png ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("edges", "mser", "detector")
+MAX_SIDE = 640  # 판정에 사용할 축소 이미지의 긴 변 (픽셀)
+MIN_TEXT_HEIGHT = 6  # 축소 이미지에서 글자로 볼 최소 높이 (픽셀)
+MIN_LINE_REGIONS = 3  # 같은 줄에 나란히 있어야 하는 글자 영역 수 (mser)
+MAX_MSER_REGIONS = 1500  # 비교할 MSER 영역 수 상한 (많으면 큰 영역부터)
+
+# 이미지 파일 바이트 또는 디코딩된 BGR 배열 (영상 프레임)
+ImageData = Union[bytes, np.ndarray]
+
+
+def decode_small_gray(data: ImageData, max_side: int = MAX_SIDE) -> Optional[np.ndarray]:
+    """이미지 바이트(또는 BGR 배열)를 긴 변이 max_side 이하인 흑백 배열로 변환 (JPEG은 축소 디코딩)"""
+    if isinstance(data, np.ndarray):
+        gray = cv2.cvtColor(data, cv2.COLOR_BGR2GRAY) if data.ndim == 3 else data
+    else:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+        if gray is None:
+            gray = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    scale = max_side / max(gray.shape[:2])
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def has_text_mser(gray: np.ndarray) -> bool:
+    """MSER 영역 중 글자 모양인 것들이 한 줄에 MIN_LINE_REGIONS개 이상 나란히 있는지"""
+    height = gray.shape[0]
+    # min_diversity=0: 글자 안쪽/바깥쪽으로 겹친 영역도 모두 받고, 겹친 영역은 아래 이웃 판정에서 제외
+    mser = cv2.MSER_create(
+        delta=5, min_area=MIN_TEXT_HEIGHT * 2, max_area=int(gray.size * 0.05), max_variation=0.5, min_diversity=0.0
+    )
+    _, boxes = mser.detectRegions(gray)
+    if len(boxes) < MIN_LINE_REGIONS:
+        return False
+    boxes = np.asarray(boxes, dtype=np.float32)
+    w, h = boxes[:, 2], boxes[:, 3]
+    keep = (h >= MIN_TEXT_HEIGHT) & (h <= height * 0.3) & (w <= h * 3.0) & (w >= h * 0.1)
+    boxes = boxes[keep]
+    if len(boxes) < MIN_LINE_REGIONS:
+        return False
+    if len(boxes) > MAX_MSER_REGIONS:
+        boxes = boxes[np.argsort(-boxes[:, 3])[:MAX_MSER_REGIONS]]
+
+    x, y, w, h = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    center_y = y + h / 2
+    # 같은 줄의 이웃: 세로 중심이 가깝고, 높이가 비슷하며, 가로 간격이 글자 높이 2배 이내
+    same_line = np.abs(center_y[:, None] - center_y[None, :]) < 0.5 * np.minimum(h[:, None], h[None, :])
+    similar_height = (h[:, None] < h[None, :] * 2.0) & (h[None, :] < h[:, None] * 2.0)
+    gap = np.maximum(x[:, None], x[None, :]) - np.minimum(x[:, None] + w[:, None], x[None, :] + w[None, :])
+    near = (gap > -0.5 * np.minimum(w[:, None], w[None, :])) & (gap < 2.0 * np.maximum(h[:, None], h[None, :]))
+    neighbors = same_line & similar_height & near
+    np.fill_diagonal(neighbors, False)
+    return bool((neighbors.sum(axis=1) >= MIN_LINE_REGIONS - 1).any())
+
+
+def text_line_boxes(gray: np.ndarray, limit: int = 0) -> List[Tuple[int, int, int, int]]:
+    """
+    에지를 가로로 이어 붙인 덩어리 중 글줄 모양(가로로 긴 박스, 에지 밀도 충분)인 박스 (x, y, w, h) 목록
+
+    limit이 1 이상이면 그 개수를 찾는 즉시 반환합니다.
+    """
+    edges = cv2.Canny(gray, 100, 200)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 3))
+    merged = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(merged, connectivity=8)
+    height = gray.shape[0]
+    boxes: List[Tuple[int, int, int, int]] = []
+    for index in range(1, count):
+        x, y, w, h, _ = (int(value) for value in stats[index])
+        if h < MIN_TEXT_HEIGHT or h > height * 0.3 or w < h * 2:
+            continue
+        density = np.count_nonzero(edges[y : y + h, x : x + w]) / float(w * h)
+        if 0.1 <= density <= 0.6:
+            boxes.append((x, y, w, h))
+            if limit and len(boxes) >= limit:
+                break
+    return boxes
+
+
+def has_text_edges(gray: np.ndarray) -> bool:
+    """에지를 가로로 이어 붙인 덩어리 중 글줄 모양이 하나라도 있는지"""
+    return bool(text_line_boxes(gray, limit=1))
+
+
+def _audit_key(data: ImageData) -> bytes:
+    if isinstance(data, np.ndarray):
+        return hashlib.sha1(np.ascontiguousarray(data).data).digest()
+    return hashlib.sha1(data).digest()
+
+
+class TextPrefilter:
+    """글자가 없어 보이는 이미지를 OCR 전에 걸러내는 필터 (걸러낸 비율, 놓친 비율 통계 포함)"""
+
+    def __init__(
+        self,
+        method: str = "edges",
+        audit_rate: float = 0.0,
+        reader_factory: Optional[Callable[[], Any]] = None,
+        max_side: int = MAX_SIDE,
+    ) -> None:
+        """
+        Args:
+            method: "edges", "mser", "detector" 중 하나
+            audit_rate: 걸러낸 이미지 중 그래도 OCR하여 놓친 비율을 측정할 비율 (0~1)
+            reader_factory: "detector" 방식에서 easyocr.Reader를 반환하는 함수 (예: get_easyocr_reader)
+            max_side: 판정에 사용할 축소 이미지의 긴 변
+        """
+        if method not in METHODS:
+            raise ValueError(f"지원하지 않는 사전 필터 방식: {method} (가능한 값: {', '.join(METHODS)})")
+        if method == "detector" and reader_factory is None:
+            raise ValueError("detector 방식에는 reader_factory가 필요합니다")
+        self.method = method
+        self.audit_rate = audit_rate
+        self.reader_factory = reader_factory
+        self.max_side = max_side
+        self.checked = 0  # 판정한 이미지 수
+        self.rejected = 0  # 글자 없음으로 판정한 이미지 수
+        self.skipped = 0  # 실제로 OCR을 건너뛴 이미지 수 (rejected - 감사 대상)
+        self.audited = 0  # 감사 대상 중 OCR 결과를 받은 이미지 수
+        self.missed = 0  # 감사 대상 중 실제로 글자가 있던 이미지 수
+        self.seconds = 0.0
+        self._audit_keys: set = set()
+        self._random = random.Random()
+
+    def has_text(self, data: ImageData) -> bool:
+        """이미지에 글자가 있을 법하면 True (디코딩 실패 등 판단할 수 없으면 True)"""
+        started = time.perf_counter()
+        try:
+            gray = decode_small_gray(data, self.max_side)
+            if gray is None:
+                return True
+            if self.method == "mser":
+                result = has_text_mser(gray)
+            elif self.method == "edges":
+                result = has_text_edges(gray)
+            else:
+                result = self._has_text_detector(gray)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.debug("글자 사전 필터 실패 (OCR 진행): %s", exc)
+            return True
+        finally:
+            self.seconds += time.perf_counter() - started
+        self.checked += 1
+        if not result:
+            self.rejected += 1
+        return result
+
+    def _has_text_detector(self, gray: np.ndarray) -> bool:
+        reader = self.reader_factory()
+        if not hasattr(reader, "detect"):
+            # OCR 데몬 클라이언트 등 검출기만 실행할 수 없는 경우
+            return True
+        horizontal_list, free_list = reader.detect(cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB))
+        return bool((horizontal_list and horizontal_list[0]) or (free_list and free_list[0]))
+
+    def should_ocr(self, data: ImageData) -> bool:
+        """
+        OCR을 실행해야 하면 True
+
+        글자가 없다고 판정해도 audit_rate 비율만큼은 True를 반환하며, 이 이미지의 OCR 결과를
+        report()로 알려주면 놓친 비율을 측정합니다.
+        """
+        if self.has_text(data):
+            return True
+        if self.audit_rate > 0 and self._random.random() < self.audit_rate:
+            self._audit_keys.add(_audit_key(data))
+            return True
+        self.skipped += 1
+        return False
+
+    def report(self, data: ImageData, texts: Sequence[str]) -> None:
+        """should_ocr()가 감사용으로 통과시킨 이미지의 OCR 결과 기록 (다른 이미지는 무시)"""
+        if not self._audit_keys:
+            return
+        key = _audit_key(data)
+        if key not in self._audit_keys:
+            return
+        self._audit_keys.discard(key)
+        self.audited += 1
+        if texts:
+            self.missed += 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "method": self.method,
+            "checked": self.checked,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "reject_rate": round(self.rejected / self.checked, 3) if self.checked else 0.0,
+            "audited": self.audited,
+            "missed": self.missed,
+            "miss_rate": round(self.missed / self.audited, 3) if self.audited else 0.0,
+            "ms_per_image": round(self.seconds * 1000 / self.checked, 1) if self.checked else 0.0,
+        }
+
+    def log_stats(self) -> None:
+        stats = self.stats()
+        if not stats["checked"]:
+            return
+        logger.info(
+            "📊 글자 사전 필터 (%s): 이미지 %d장 중 %d장 글자 없음 판정 (%.1f%%), OCR 생략 %d장, 장당 %.1fms%s",
+            stats["method"],
+            stats["checked"],
+            stats["rejected"],
+            stats["reject_rate"] * 100,
+            stats["skipped"],
+            stats["ms_per_image"],
+            f", 감사 {stats['audited']}장 중 글자 있음 {stats['missed']}장 ({stats['miss_rate'] * 100:.1f}%)"
+            if stats["audited"]
+            else "",
+        )
+
+
+def create_text_prefilter(
+    method: Optional[str], audit_rate: float = 0.0, reader_factory: Optional[Callable[[], Any]] = None
+) -> Optional[TextPrefilter]:
+    """method가 None이나 빈 값이면 None (사전 필터 사용 안 함)"""
+    if not method:
+        return None
+    return TextPrefilter(method, audit_rate=audit_rate, reader_factory=reader_factory)
+
+
+def evaluate(
+    paths: Sequence[Path], method: str, langs: Sequence[str], min_confidence: float, gpu: bool
+) -> Dict[str, float]:
+    """이미지마다 사전 필터와 EasyOCR을 모두 실행하여 건너뛸 비율과 놓친 비율(글자가 있는데 걸러낸 비율) 측정"""
+    import easyocr  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    reader = easyocr.Reader(list(langs), gpu=gpu)
+    prefilter = TextPrefilter(method, reader_factory=lambda: reader)
+    with_text = missed = rejected = 0
+    ocr_seconds = 0.0
+    for path in paths:
+        data = path.read_bytes()
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            logger.warning("⚠️ 이미지를 읽을 수 없어 건너뜁니다: %s", path)
+            continue
+        passed = prefilter.has_text(data)
+        started = time.perf_counter()
+        texts = [text for _, text, conf in reader.readtext(image) if text.strip() and conf >= min_confidence]
+        ocr_seconds += time.perf_counter() - started
+        rejected += not passed
+        with_text += bool(texts)
+        if texts and not passed:
+            missed += 1
+            logger.info("  놓침: %s (%s)", path, " / ".join(texts[:3]))
+    stats = prefilter.stats()
+    checked = stats["checked"] or 1
+    return {
+        "images": stats["checked"],
+        "with_text": with_text,
+        "rejected": rejected,
+        "missed": missed,
+        "false_negative_rate": round(missed / with_text, 3) if with_text else 0.0,
+        "prefilter_ms": stats["ms_per_image"],
+        "ocr_ms": round(ocr_seconds * 1000 / checked, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="글자 사전 필터 정확도/속도 측정")
+    parser.add_argument("images", nargs="+", type=Path, help="테스트 이미지 파일")
+    parser.add_argument("--method", choices=METHODS, default="edges")
+    parser.add_argument("--langs", nargs="+", default=["ko", "en"])
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--gpu", action="store_true", help="GPU 사용")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    result = evaluate(args.images, args.method, args.langs, args.min_confidence, args.gpu)
+    print(
+        f"{args.method}: 이미지 {result['images']}장 (글자 있음 {result['with_text']}장), "
+        f"글자 없음 판정 {result['rejected']}장, 놓침 {result['missed']}장 "
+        f"(false negative {result['false_negative_rate'] * 100:.1f}%), "
+        f"사전 필터 {result['prefilter_ms']}ms/장, EasyOCR {result['ocr_ms']}ms/장"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""
+영상 OCR용 장면 전환 프레임 샘플링
+
+기존 kakaostory_postprocess는 첫/마지막 프레임만 OCR했고, 마지막 프레임은 CAP_PROP_POS_FRAMES로 이동했는데
+코덱에 따라 처음부터 다시 디코딩하므로 영상을 두 번 읽는 셈이었습니다. 추출한 프레임은 PNG로 인코딩한 뒤
+OCR 전에 다시 디코딩했습니다.
+
+- 영상을 처음부터 끝까지 한 번만 읽으면서 SAMPLE_FPS 간격의 프레임만 꺼내고 (seek 없음),
+  PyAV가 설치되어 있으면 키프레임만 디코딩 (+ 마지막 GOP만 다시 디코딩하여 마지막 프레임 포함)
+- 꺼낸 프레임의 축소 흑백 이미지로 dHash, 밝기 히스토그램, 16x16 격자 밝기를 계산하여
+  마지막으로 고른 프레임과 충분히 다른 프레임(장면 전환, 자막/연락처 화면 등장)만 고름
+- 영상당 최대 max_frames장 (넘으면 변화가 가장 작은 프레임부터 제외, 첫/마지막 프레임은 유지)
+- 프레임은 BGR numpy 배열로 반환하며 PNG 인코딩 없이 그대로 OCR 전처리에 넘김
+
+브라우저의 <video>에서 특정 시점 프레임 얻기 (VideoFrameService):
+facebook_imgocr/instagram 스크립트는 <video>를 seek하고 0.5초 기다린 뒤 canvas에 그려 PNG data URL로 내보내고,
+base64 문자열 전체를 WebDriver로 받아 다시 디코딩했습니다. 대신 <video>의 실제 미디어 URL(currentSrc/src/
+<source>, 또는 페이지가 받은 리소스 목록)을 찾아 브라우저 쿠키로 한 번만 내려받아 캐시하고, 요청한 시점을
+로컬에서 디코딩하여 배열로 반환합니다. URL을 찾지 못하거나 디코딩할 수 없으면 None을 반환하며,
+이때만 기존 canvas 방식으로 추출합니다.
+
+단독 실행으로 고르는 프레임 확인:
+    python -m common.video_frames sample.mp4 [--max-frames 6] [--save-dir frames/]
+    python -m common.video_frames sample.mp4 --at 0 5.5 10 --save-dir frames/
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import hashlib
+import logging
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import cv2  # type: ignore
+import numpy as np  # type: ignore
+import requests
+
+try:
+    import av  # type: ignore
+
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+logger = logging.getLogger(__name__)
+
+MAX_FRAMES = 6  # 영상당 OCR할 최대 프레임 수
+SAMPLE_FPS = 2.0  # 장면 변화를 확인할 프레임 간격 (초당 프레임 수, cv2 디코딩)
+KEYFRAMES_ONLY = True  # PyAV가 있으면 키프레임만 디코딩
+SIGNATURE_SIZE = 64  # 변화 판정용 축소 흑백 이미지 크기
+HASH_DISTANCE = 10  # dHash(64비트) 해밍 거리가 이 값 이상이면 다른 장면
+HIST_DISTANCE = 0.25  # 밝기 히스토그램 Bhattacharyya 거리가 이 값 이상이면 다른 장면
+# 자막처럼 일부만 바뀌는 경우: 16x16 격자 중 밝기가 CELL_DIFF 이상 바뀐 칸의 비율이 이 값 이상이면 다른 장면
+CELL_DIFF = 24
+CELL_CHANGE_RATIO = 0.04
+LAST_GOP_SECONDS = 1.0  # 키프레임 모드에서 마지막 프레임을 얻기 위해 다시 디코딩할 끝부분 길이
+VIDEO_CACHE_MAX_FILES = 8  # VideoFrameService가 보관할 내려받은 영상 수 (오래 사용하지 않은 것부터 삭제)
+VIDEO_MAX_BYTES = 200 * 1024 * 1024  # 이보다 큰 영상은 내려받지 않음 (canvas 방식 사용)
+DOWNLOAD_TIMEOUT = 60
+# 페이스북/인스타그램 CDN의 DASH 조각 URL에서 제거하면 영상 전체를 받을 수 있는 쿼리 파라미터
+BYTE_RANGE_PARAMS = ("bytestart", "byteend")
+
+Signature = Tuple[int, np.ndarray, np.ndarray]
+
+
+class VideoFrameError(Exception):
+    """영상을 열거나 디코딩할 수 없음"""
+
+
+def frame_signature(frame: np.ndarray) -> Signature:
+    """프레임의 (dHash 64비트, 정규화한 32구간 밝기 히스토그램, 16x16 축소 흑백 이미지)"""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA)
+    tiny = cv2.resize(small, (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (tiny[:, 1:] > tiny[:, :-1]).flatten()
+    dhash = int("".join("1" if bit else "0" for bit in bits), 2)
+    hist = cv2.calcHist([small], [0], None, [32], [0, 256])
+    cv2.normalize(hist, hist, 1.0, 0.0, cv2.NORM_L1)
+    cells = cv2.resize(small, (16, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return dhash, hist, cells
+
+
+def signature_distance(a: Signature, b: Signature) -> float:
+    """두 프레임의 변화 정도 (기준값 대비 비율, 1 이상이면 다른 장면)"""
+    hash_distance = bin(a[0] ^ b[0]).count("1")
+    hist_distance = cv2.compareHist(a[1], b[1], cv2.HISTCMP_BHATTACHARYYA)
+    cell_ratio = float(np.mean(np.abs(a[2] - b[2]) >= CELL_DIFF))
+    return max(hash_distance / HASH_DISTANCE, hist_distance / HIST_DISTANCE, cell_ratio / CELL_CHANGE_RATIO)
+
+
+def _iter_frames_cv2(video_path: Path, sample_fps: float) -> Iterator[Tuple[bool, np.ndarray]]:
+    """(마지막 프레임 여부, BGR 프레임): grab()으로 순서대로 읽고 간격마다/마지막에만 retrieve() (디코딩 한 번)"""
+    capture = cv2.VideoCapture(str(video_path))
+    if not capture.isOpened():
+        raise VideoFrameError("영상 열기 실패")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+        stride = max(1, int(round(fps / sample_fps))) if sample_fps > 0 else 1
+        index = 0
+        pending: Optional[np.ndarray] = None
+        while capture.grab():
+            # 프레임 수가 정확하지 않을 수 있으므로 끝부분은 매 프레임 꺼내 두고 마지막 것만 사용
+            if index % stride == 0 or (frame_count and index >= frame_count - 2):
+                ok, frame = capture.retrieve()
+                if ok and frame is not None:
+                    if pending is not None:
+                        yield False, pending
+                    pending = frame
+            index += 1
+        if pending is not None:
+            yield True, pending
+    finally:
+        capture.release()
+
+
+def _iter_frames_pyav(video_path: Path) -> Iterator[Tuple[bool, np.ndarray]]:
+    """(마지막 프레임 여부, BGR 프레임): 키프레임만 디코딩한 뒤, 끝부분 GOP만 다시 디코딩하여 마지막 프레임"""
+    try:
+        container = av.open(str(video_path))
+    except Exception as exc:  # pylint: disable=broad-except
+        raise VideoFrameError(f"영상 열기 실패: {exc}") from exc
+    try:
+        if not container.streams.video:
+            raise VideoFrameError("영상 스트림이 없습니다")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.codec_context.skip_frame = "NONKEY"
+        last_time = None
+        for frame in container.decode(stream):
+            last_time = frame.time
+            yield False, frame.to_ndarray(format="bgr24")
+
+        duration = float(stream.duration * stream.time_base) if stream.duration else None
+        if duration is None and container.duration:
+            duration = container.duration / av.time_base
+        if duration is None or last_time is None or duration - last_time < 1.0 / SAMPLE_FPS:
+            return
+        stream.codec_context.skip_frame = "DEFAULT"
+        start = max(0.0, duration - LAST_GOP_SECONDS)
+        container.seek(int(start / stream.time_base), stream=stream, backward=True, any_frame=False)
+        final = None
+        for frame in container.decode(stream):
+            final = frame
+        if final is not None and (final.time is None or final.time > last_time):
+            yield True, final.to_ndarray(format="bgr24")
+    except (av.error.FFmpegError, ValueError) as exc:
+        raise VideoFrameError(f"영상 디코딩 실패: {exc}") from exc
+    finally:
+        container.close()
+
+
+def sample_scene_frames(
+    video_path: Path,
+    max_frames: int = MAX_FRAMES,
+    sample_fps: float = SAMPLE_FPS,
+    keyframes_only: bool = KEYFRAMES_ONLY,
+) -> List[np.ndarray]:
+    """
+    영상에서 서로 다른 장면의 프레임을 시간 순서대로 최대 max_frames장 반환 (BGR 배열)
+
+    Raises:
+        VideoFrameError: 영상을 열 수 없거나 프레임을 하나도 얻지 못한 경우
+    """
+    if keyframes_only and HAS_PYAV:
+        frames_iter = _iter_frames_pyav(video_path)
+    else:
+        frames_iter = _iter_frames_cv2(video_path, sample_fps)
+
+    # (변화 정도, 프레임): 첫 프레임과 마지막 프레임은 변화 정도를 무한대로 두어 제외되지 않게 함
+    selected: List[Tuple[float, np.ndarray]] = []
+    reference: Optional[Signature] = None
+    for is_last, frame in frames_iter:
+        signature = frame_signature(frame)
+        if reference is None:
+            score = float("inf")
+        else:
+            score = signature_distance(reference, signature)
+            if score < 1.0:
+                continue
+            if is_last:
+                score = float("inf")
+        reference = signature
+        selected.append((score, frame))
+        if len(selected) > max(max_frames, 1):
+            # 변화가 가장 작은 중간 프레임 제외
+            drop = min(range(1, len(selected)), key=lambda i: selected[i][0])
+            del selected[drop]
+
+    if not selected:
+        raise VideoFrameError("프레임 추출에 실패했습니다")
+    return [frame for _, frame in selected[:max_frames]]
+
+
+# ----------------------------------------------------------------------
+# 특정 시점 프레임 디코딩 (브라우저 canvas 대신)
+# ----------------------------------------------------------------------
+def decode_frames_at(video_path: Path, timestamps: Sequence[float]) -> List[Optional[np.ndarray]]:
+    """
+    영상 파일에서 각 시점(초)의 프레임을 BGR 배열로 반환 (요청 순서 유지, 얻지 못한 시점은 None)
+
+    영상 길이를 넘는 시점은 마지막 프레임을 반환합니다.
+    """
+    if not timestamps:
+        return []
+    if HAS_PYAV:
+        return _decode_frames_at_pyav(video_path, timestamps)
+    return _decode_frames_at_cv2(video_path, timestamps)
+
+
+def _decode_frames_at_pyav(video_path: Path, timestamps: Sequence[float]) -> List[Optional[np.ndarray]]:
+    frames: List[Optional[np.ndarray]] = [None] * len(timestamps)
+    try:
+        container = av.open(str(video_path))
+    except Exception as exc:  # pylint: disable=broad-except
+        raise VideoFrameError(f"영상 열기 실패: {exc}") from exc
+    try:
+        if not container.streams.video:
+            raise VideoFrameError("영상 스트림이 없습니다")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        for index in sorted(range(len(timestamps)), key=lambda i: timestamps[i]):
+            target = max(0.0, float(timestamps[index]))
+            # 앞쪽 키프레임으로 이동한 뒤 목표 시점까지만 디코딩
+            container.seek(int(target / stream.time_base), stream=stream, backward=True, any_frame=False)
+            found = None
+            for frame in container.decode(stream):
+                found = frame
+                if frame.time is not None and frame.time >= target:
+                    break
+            if found is not None:
+                frames[index] = found.to_ndarray(format="bgr24")
+    except (av.error.FFmpegError, ValueError) as exc:
+        raise VideoFrameError(f"영상 디코딩 실패: {exc}") from exc
+    finally:
+        container.close()
+    return frames
+
+
+def _decode_frames_at_cv2(video_path: Path, timestamps: Sequence[float]) -> List[Optional[np.ndarray]]:
+    capture = cv2.VideoCapture(str(video_path))
+    if not capture.isOpened():
+        raise VideoFrameError("영상 열기 실패")
+    frames: List[Optional[np.ndarray]] = [None] * len(timestamps)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
+        for index, target in enumerate(timestamps):
+            position = int(max(0.0, float(target)) * fps)
+            if frame_count:
+                position = min(position, frame_count - 1)
+            capture.set(cv2.CAP_PROP_POS_FRAMES, position)
+            ok, frame = capture.read()
+            if ok and frame is not None:
+                frames[index] = frame
+    finally:
+        capture.release()
+    return frames
+
+
+_RESOLVE_VIDEO_URL_SCRIPT = """
+var video = arguments[0];
+var urls = [];
+function add(url) {
+    if (url && url.indexOf('blob:') !== 0 && url.indexOf('data:') !== 0 && urls.indexOf(url) < 0) {
+        urls.push(url);
+    }
+}
+add(video.currentSrc);
+add(video.src);
+var sources = video.querySelectorAll('source');
+for (var i = 0; i < sources.length; i++) {
+    add(sources[i].src);
+}
+// blob(MSE) 재생이면 페이지가 실제로 받은 영상 리소스 (최근 것부터)
+var entries = performance.getEntriesByType('resource');
+for (var j = entries.length - 1; j >= 0; j--) {
+    var name = entries[j].name;
+    var lower = name.toLowerCase();
+    if (/\\.(jpg|jpeg|png|webp|gif)(\\?|$)/.test(lower) || lower.indexOf('poster') >= 0) {
+        continue;
+    }
+    if (/\\.(mp4|webm|m4v)(\\?|$)/.test(lower) ||
+        ((lower.indexOf('fbcdn') >= 0 || lower.indexOf('cdninstagram') >= 0) && lower.indexOf('/v/t') >= 0 &&
+         (lower.indexOf('bytestart') >= 0 || lower.indexOf('video') >= 0))) {
+        add(name);
+    }
+}
+return urls;
+"""
+
+
+def strip_byte_range(url: str) -> str:
+    """DASH 조각 URL(bytestart/byteend)을 영상 전체 URL로 변환"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in BYTE_RANGE_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def resolve_video_urls(driver: Any, video_element: Any) -> List[str]:
+    """브라우저 <video> 요소의 실제 미디어 URL 후보 (blob이 아닌 src, 페이지가 받은 영상 리소스 순)"""
+    try:
+        urls = driver.execute_script(_RESOLVE_VIDEO_URL_SCRIPT, video_element) or []
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.debug("영상 URL 확인 실패: %s", exc)
+        return []
+    resolved: List[str] = []
+    for url in urls:
+        url = strip_byte_range(url)
+        if url.startswith(("http://", "https://")) and url not in resolved:
+            resolved.append(url)
+    return resolved
+
+
+class VideoFrameService:
+    """
+    영상 URL(또는 파일)의 특정 시점 프레임을 로컬에서 디코딩하는 서비스
+
+    URL은 한 번만 내려받아 임시 폴더에 보관하고(최근 사용한 max_files개), 같은 영상의 다른 시점은
+    내려받은 파일에서 바로 디코딩합니다. 내려받기/디코딩에 실패한 URL은 기억해 두고 다시 시도하지 않습니다.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_files: int = VIDEO_CACHE_MAX_FILES) -> None:
+        self._own_dir = cache_dir is None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else Path(tempfile.mkdtemp(prefix="video_frames_"))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_files = max_files
+        self.local_frames = 0  # 로컬에서 디코딩한 프레임 수
+        self.unresolved = 0  # URL을 찾지 못하거나 디코딩에 실패하여 None을 반환한 횟수
+        self._files: Dict[str, Path] = {}  # URL -> 내려받은 파일 (삽입 순서 = 사용 순서)
+        self._failed: set = set()
+        self._element_urls: Dict[str, List[str]] = {}  # WebElement id -> URL 후보
+        self._lock = threading.Lock()
+
+    def fetch(self, url: str, cookies: Optional[Dict[str, str]] = None) -> Optional[Path]:
+        """URL의 영상을 내려받은 파일 경로 (이미 받았으면 그대로, 실패하면 None)"""
+        with self._lock:
+            if url in self._failed:
+                return None
+            path = self._files.pop(url, None)
+            if path is not None and path.exists():
+                self._files[url] = path
+                return path
+
+        path = self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.mp4"
+        try:
+            with requests.get(url, cookies=cookies, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                size = 0
+                with path.open("wb") as file:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        size += len(chunk)
+                        if size > VIDEO_MAX_BYTES:
+                            raise VideoFrameError(f"영상이 너무 큽니다 (>{VIDEO_MAX_BYTES // (1024 * 1024)}MB)")
+                        file.write(chunk)
+        except (requests.RequestException, OSError, VideoFrameError) as exc:
+            logger.debug("영상 내려받기 실패 (%s): %s", url[:80], exc)
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._failed.add(url)
+            return None
+
+        with self._lock:
+            self._files[url] = path
+            while len(self._files) > self.max_files:
+                oldest = next(iter(self._files))
+                self._files.pop(oldest).unlink(missing_ok=True)
+        return path
+
+    def frames_at(
+        self,
+        source: Union[str, Path],
+        timestamps: Sequence[float],
+        cookies: Optional[Dict[str, str]] = None,
+    ) -> Optional[List[Optional[np.ndarray]]]:
+        """영상 URL/파일의 각 시점 프레임 (BGR 배열), 영상을 얻거나 열 수 없으면 None"""
+        url = source if isinstance(source, str) and source.startswith(("http://", "https://")) else None
+        path = self.fetch(url, cookies) if url else Path(source)
+        if path is None:
+            return None
+        try:
+            frames = decode_frames_at(path, timestamps)
+        except VideoFrameError as exc:
+            logger.debug("영상 디코딩 실패 (%s): %s", str(source)[:80], exc)
+            if url:
+                with self._lock:
+                    self._failed.add(url)
+            return None
+        self.local_frames += sum(frame is not None for frame in frames)
+        return frames
+
+    def frame_from_element(self, driver: Any, video_element: Any, frame_time: float) -> Optional[np.ndarray]:
+        """
+        브라우저 <video> 요소의 frame_time초 프레임을 로컬에서 디코딩 (BGR 배열)
+
+        실제 미디어 URL을 찾지 못했거나 내려받기/디코딩에 실패하면 None (호출한 쪽에서 canvas 방식으로 추출).
+        """
+        key = getattr(video_element, "id", None) or str(id(video_element))
+        urls = self._element_urls.get(key)
+        if urls is None:
+            urls = resolve_video_urls(driver, video_element)
+            self._element_urls[key] = urls
+        cookies = None
+        for url in urls:
+            if url in self._failed:
+                continue
+            if cookies is None and url not in self._files:
+                try:
+                    cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+                except Exception:  # pylint: disable=broad-except
+                    cookies = {}
+            frames = self.frames_at(url, [frame_time], cookies)
+            if frames and frames[0] is not None:
+                return frames[0]
+        self.unresolved += 1
+        return None
+
+    def close(self) -> None:
+        """내려받은 영상 삭제"""
+        with self._lock:
+            files = list(self._files.values())
+            self._files.clear()
+        for path in files:
+            path.unlink(missing_ok=True)
+        if self._own_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+        if self.local_frames or self.unresolved:
+            logger.info(
+                "📊 영상 프레임: 로컬 디코딩 %d장, canvas 방식으로 넘긴 요청 %d건", self.local_frames, self.unresolved
+            )
+
+
+_frame_service: Optional[VideoFrameService] = None
+
+
+def get_frame_service() -> VideoFrameService:
+    """프로세스 공용 VideoFrameService (종료 시 내려받은 영상 삭제)"""
+    global _frame_service  # pylint: disable=global-statement
+    if _frame_service is None:
+        _frame_service = VideoFrameService()
+        atexit.register(_frame_service.close)
+    return _frame_service
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="영상에서 OCR할 장면 전환 프레임 확인")
+    parser.add_argument("videos", nargs="+", type=Path, help="영상 파일")
+    parser.add_argument("--max-frames", type=int, default=MAX_FRAMES)
+    parser.add_argument("--sample-fps", type=float, default=SAMPLE_FPS)
+    parser.add_argument("--all-frames", action="store_true", help="PyAV가 있어도 키프레임만이 아니라 간격마다 확인")
+    parser.add_argument("--at", nargs="+", type=float, help="장면 전환 대신 이 시점(초)들의 프레임 추출")
+    parser.add_argument("--save-dir", type=Path, help="고른 프레임을 PNG로 저장할 폴더")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    for video in args.videos:
+        started = time.perf_counter()
+        try:
+            if args.at:
+                frames = [frame for frame in decode_frames_at(video, args.at) if frame is not None]
+            else:
+                frames = sample_scene_frames(video, args.max_frames, args.sample_fps, not args.all_frames)
+        except VideoFrameError as exc:
+            print(f"{video.name}: {exc}")
+            continue
+        print(f"{video.name}: 프레임 {len(frames)}장, {time.perf_counter() - started:.2f}초")
+        if args.save_dir:
+            args.save_dir.mkdir(parents=True, exist_ok=True)
+            for index, frame in enumerate(frames):
+                cv2.imwrite(str(args.save_dir / f"{video.stem}_{index:02d}.png"), frame)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
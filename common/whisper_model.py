@@ -0,0 +1,319 @@
+"""
+프로세스당 한 번만 로드하는 Whisper 모델 (openai-whisper / CTranslate2 백엔드)
+
+facebook_audio_whisper/instagram_extract_voice의 process_video_with_ffmpeg_whisper()는
+영상마다 whisper.load_model("base")를 호출하여 릴스 한 개마다 모델 로드 비용(음성 인식보다 긴 경우가 많음)을 냈습니다.
+
+- get_whisper_model()은 설정한 모델(WHISPER_MODEL 환경 변수, 기본 base)의 관리자 싱글톤을 반환하고,
+  모델은 처음 transcribe()할 때 한 번만 로드하여 같은 프로세스의 모든 영상에서 재사용
+  (instagram_extract_audio_from_json처럼 process_video_with_ffmpeg_whisper를 import하는 스크립트도 같은 인스턴스 사용)
+- transcribe()는 whisper 모델의 transcribe()와 같은 인자/결과이며, 영상마다 모델 로드 시간과 음성 인식 시간을 기록
+  (last_timing(), 종료 시 누적 통계 로그)
+- 백엔드는 실행마다 환경 변수 WHISPER_BACKEND로 고릅니다.
+  - "openai" (기본값): 기존과 같은 openai-whisper (PyTorch)
+  - "ctranslate2": faster-whisper(CTranslate2) 모델을 WHISPER_COMPUTE_TYPE(기본 int8)으로 로드 (CPU에서 openai-whisper보다 빠름)
+    결과를 openai-whisper transcribe()와 같은 형식({"text", "segments", "language"})으로 바꾸므로 호출하는 쪽은 그대로 사용
+    가중치는 로컬에 있는 것만 사용 (WHISPER_CT2_MODEL_DIR의 변환 모델, 없으면 Hugging Face 캐시의 Systran/faster-whisper-<모델>)하며
+    인터넷 연결 없이 동작. faster-whisper가 없거나 로컬 가중치가 없으면 경고 후 openai-whisper 사용
+
+환경 변수:
+    WHISPER_MODEL=tiny|base|small|medium|large   (기본 base)
+    WHISPER_BACKEND=openai|ctranslate2
+    WHISPER_COMPUTE_TYPE=int8|int8_float32|float32|...  (ctranslate2 연산 타입, 기본 int8)
+    WHISPER_CT2_MODEL_DIR=/path/to/faster-whisper-base (변환 모델 폴더, 비우면 Hugging Face 캐시 사용)
+    WHISPER_CPU_THREADS=N                        (ctranslate2 스레드 수, 0이면 기본값)
+
+가중치 미리 받기 (인터넷이 되는 환경에서 한 번) / 백엔드 결과 동일성 비교 + 처리량 벤치마크:
+    python -m common.whisper_model download [--model base]
+    python -m common.whisper_model compare clip1.mp4 clip2.mp4 ... [--model base] [--compute-type int8] [--repeat 1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import difflib
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("openai", "ctranslate2")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base").strip() or "base"  # tiny, base, small, medium, large 중 선택
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "openai").strip().lower() or "openai"
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8").strip() or "int8"
+WHISPER_CT2_MODEL_DIR = os.getenv("WHISPER_CT2_MODEL_DIR", "").strip()
+# openai-whisper transcribe() 인자 중 faster-whisper에서 이름이 다르거나 의미가 없는 것
+_CT2_OPTION_NAMES = {"logprob_threshold": "log_prob_threshold"}
+_CT2_IGNORED_OPTIONS = ("fp16", "verbose")
+
+
+class WhisperBackendError(Exception):
+    """Whisper 백엔드 로드 실패 (패키지 또는 로컬 가중치 없음)"""
+
+
+def _cpu_threads() -> int:
+    try:
+        return max(0, int(os.getenv("WHISPER_CPU_THREADS", "0") or 0))
+    except ValueError:
+        return 0
+
+
+class _CTranslate2Whisper:
+    """faster-whisper(CTranslate2) 모델을 openai-whisper 모델의 transcribe()와 같은 결과 형식으로 감싼 것"""
+
+    def __init__(self, model_name: str, device: Optional[str] = None, compute_type: str = WHISPER_COMPUTE_TYPE) -> None:
+        try:
+            from faster_whisper import WhisperModel  # type: ignore  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise WhisperBackendError("faster-whisper가 설치되어 있지 않습니다 (pip install faster-whisper)") from exc
+        source = WHISPER_CT2_MODEL_DIR or model_name
+        try:
+            # local_files_only: 다운로드를 시도하지 않고 로컬 폴더/캐시의 가중치만 사용
+            self.model = WhisperModel(
+                source,
+                device=device or "auto",
+                compute_type=compute_type,
+                cpu_threads=_cpu_threads(),
+                local_files_only=True,
+            )
+        except (OSError, ValueError, RuntimeError) as exc:
+            raise WhisperBackendError(
+                f"CTranslate2 Whisper 모델을 로컬에서 찾을 수 없습니다 ({source}): {exc}\n"
+                "   인터넷이 되는 환경에서 python -m common.whisper_model download 를 한 번 실행하거나 "
+                "WHISPER_CT2_MODEL_DIR에 변환 모델 폴더를 지정하세요."
+            ) from exc
+        self.compute_type = compute_type
+
+    def transcribe(self, audio: Any, **options: Any) -> Dict[str, Any]:
+        for name in _CT2_IGNORED_OPTIONS:
+            options.pop(name, None)
+        for name, ct2_name in _CT2_OPTION_NAMES.items():
+            if name in options:
+                options[ct2_name] = options.pop(name)
+        # openai-whisper 기본 디코딩(temperature 0에서 greedy)과 같게 beam_size=1
+        options.setdefault("beam_size", 1)
+        if not isinstance(audio, str):
+            import numpy as np  # type: ignore  # pylint: disable=import-outside-toplevel
+
+            audio = np.asarray(audio, dtype=np.float32)
+        segments, info = self.model.transcribe(audio, **options)
+        segments = list(segments)  # 제너레이터: 순회해야 실제로 디코딩
+        return {
+            "text": "".join(segment.text for segment in segments),
+            "segments": [
+                {"id": index, "start": segment.start, "end": segment.end, "text": segment.text}
+                for index, segment in enumerate(segments)
+            ],
+            "language": info.language,
+        }
+
+
+def load_backend_model(model_name: str, backend: str, device: Optional[str] = None) -> Any:
+    """백엔드별 모델 로드 (transcribe(audio, **options)를 가진 객체)"""
+    if backend == "ctranslate2":
+        return _CTranslate2Whisper(model_name, device)
+    if backend != "openai":
+        raise WhisperBackendError(f"알 수 없는 Whisper 백엔드: {backend} (선택: {', '.join(BACKENDS)})")
+    import whisper  # type: ignore  # pylint: disable=import-outside-toplevel
+
+    return whisper.load_model(model_name, device=device)
+
+
+class WhisperModelManager:
+    """Whisper 모델을 지연 로드하여 재사용하고 로드/음성 인식 시간을 기록"""
+
+    def __init__(self, model_name: str = WHISPER_MODEL, device: Optional[str] = None, backend: str = WHISPER_BACKEND) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.backend = backend
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self.load_seconds = 0.0
+        self.transcribe_seconds = 0.0
+        self.transcribed = 0
+        self._last_load = 0.0
+        self._last_transcribe = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        """모델 반환 (처음 호출할 때만 로드, ctranslate2를 쓸 수 없으면 openai-whisper로 대체)"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    note = " (처음 실행 시 다운로드됩니다)" if self.backend == "openai" else ""
+                    logger.info("🔄 Whisper 모델 로드 중: %s [%s]%s", self.model_name, self.backend, note)
+                    started = time.perf_counter()
+                    try:
+                        self._model = load_backend_model(self.model_name, self.backend, self.device)
+                    except WhisperBackendError as exc:
+                        if self.backend == "openai":
+                            raise
+                        logger.warning("⚠️ %s\n   openai-whisper 백엔드를 사용합니다.", exc)
+                        self.backend = "openai"
+                        self._model = load_backend_model(self.model_name, self.backend, self.device)
+                    self.load_seconds = time.perf_counter() - started
+                    self._last_load = self.load_seconds
+                    logger.info("✅ Whisper 모델 로드 완료 (%s [%s], %.1f초)", self.model_name, self.backend, self.load_seconds)
+        return self._model
+
+    def transcribe(self, audio: Any, **options: Any) -> Dict[str, Any]:
+        """whisper 모델의 transcribe()와 같은 인자/결과 (모델은 한 번만 로드)"""
+        self._last_load = 0.0
+        model = self.load()
+        started = time.perf_counter()
+        try:
+            return model.transcribe(audio, **options)
+        finally:
+            self._last_transcribe = time.perf_counter() - started
+            self.transcribe_seconds += self._last_transcribe
+            self.transcribed += 1
+            logger.info("⏱️ Whisper %s", self.last_timing())
+
+    def last_timing(self) -> str:
+        """마지막 transcribe()의 모델 로드 시간 대 음성 인식 시간"""
+        load = f"모델 로드 {self._last_load:.1f}초" if self._last_load else "모델 재사용 (로드 0초)"
+        return f"{load} / 음성 인식 {self._last_transcribe:.1f}초"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "loaded": self.loaded,
+            "load_seconds": round(self.load_seconds, 2),
+            "transcribed": self.transcribed,
+            "transcribe_seconds": round(self.transcribe_seconds, 2),
+        }
+
+    def log_stats(self) -> None:
+        if not self.transcribed:
+            return
+        logger.info(
+            "📊 Whisper(%s [%s]): 모델 로드 1회 %.1f초, 음성 인식 %d건 %.1f초 (건당 %.1f초)",
+            self.model_name,
+            self.backend,
+            self.load_seconds,
+            self.transcribed,
+            self.transcribe_seconds,
+            self.transcribe_seconds / self.transcribed,
+        )
+
+
+_managers: Dict[str, WhisperModelManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_whisper_model(model_name: Optional[str] = None) -> WhisperModelManager:
+    """모델 이름별 WhisperModelManager 싱글톤 반환 (기본값 WHISPER_MODEL, 백엔드 WHISPER_BACKEND, 종료 시 누적 시간 로그)"""
+    name = model_name or WHISPER_MODEL
+    with _managers_lock:
+        manager = _managers.get(name)
+        if manager is None:
+            manager = _managers[name] = WhisperModelManager(name)
+            atexit.register(manager.log_stats)
+    return manager
+
+
+def compare_backends(clips: Dict[str, Any], baseline: Any, candidate: Any, repeat: int = 1, **options: Any) -> Dict[str, Any]:
+    """
+    두 백엔드 모델(baseline, candidate)의 음성 인식 결과 동일성과 처리량 비교
+
+    clips: {이름: 16kHz 모노 float32 PCM}. 클립별 텍스트가 완전히 같은 비율, 문자 유사도 평균과
+    각 백엔드의 실시간 배속(오디오 길이 / 음성 인식 시간)을 반환합니다.
+    """
+    from common.audio_decode import SAMPLE_RATE  # pylint: disable=import-outside-toplevel
+
+    audio_seconds = sum(len(samples) for samples in clips.values()) / SAMPLE_RATE
+    texts: Dict[str, Dict[str, str]] = {"baseline": {}, "candidate": {}}
+    seconds = {"baseline": 0.0, "candidate": 0.0}
+    for role, model in (("baseline", baseline), ("candidate", candidate)):
+        model.transcribe(next(iter(clips.values())), **options)  # 첫 호출 준비 시간 제외
+        started = time.perf_counter()
+        for _ in range(max(1, repeat)):
+            for name, samples in clips.items():
+                texts[role][name] = model.transcribe(samples, **options)["text"].strip()
+        seconds[role] = (time.perf_counter() - started) / max(1, repeat)
+
+    exact = similarity = 0.0
+    for name in clips:
+        base_text, cand_text = texts["baseline"][name], texts["candidate"][name]
+        ratio = difflib.SequenceMatcher(None, base_text, cand_text).ratio() if base_text or cand_text else 1.0
+        exact += base_text == cand_text
+        similarity += ratio
+        if base_text != cand_text:
+            logger.info("  %s: 유사도 %.3f\n    기준: %s\n    비교: %s", name, ratio, base_text, cand_text)
+
+    count = len(clips)
+    return {
+        "clips": count,
+        "audio_seconds": round(audio_seconds, 1),
+        "exact_match": round(exact / count, 3) if count else 1.0,
+        "similarity": round(similarity / count, 3) if count else 1.0,
+        "baseline_seconds": round(seconds["baseline"], 2),
+        "candidate_seconds": round(seconds["candidate"], 2),
+        "baseline_realtime": round(audio_seconds / seconds["baseline"], 1) if seconds["baseline"] else 0.0,
+        "candidate_realtime": round(audio_seconds / seconds["candidate"], 1) if seconds["candidate"] else 0.0,
+        "speedup": round(seconds["baseline"] / seconds["candidate"], 2) if seconds["candidate"] else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Whisper 백엔드 가중치 준비 및 openai-whisper와의 동일성/처리량 비교")
+    sub = parser.add_subparsers(dest="command", required=True)
+    download_parser = sub.add_parser("download", help="CTranslate2 Whisper 가중치를 로컬에 받아 두기 (이후 오프라인 실행)")
+    compare_parser = sub.add_parser("compare", help="openai-whisper와 ctranslate2 결과/속도 비교")
+    compare_parser.add_argument("clips", nargs="+", type=Path, help="테스트 비디오/오디오 파일")
+    compare_parser.add_argument("--repeat", type=int, default=1, help="속도 측정 반복 횟수")
+    compare_parser.add_argument("--compute-type", default=WHISPER_COMPUTE_TYPE, help="ctranslate2 연산 타입")
+    compare_parser.add_argument("--language", default="ko")
+    for command_parser in (download_parser, compare_parser):
+        command_parser.add_argument("--model", default=WHISPER_MODEL)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.command == "download":
+        from faster_whisper import download_model  # type: ignore  # pylint: disable=import-outside-toplevel
+
+        print(download_model(args.model, output_dir=WHISPER_CT2_MODEL_DIR or None))
+        return 0
+
+    from common.audio_decode import AudioDecodeError, decode_audio  # pylint: disable=import-outside-toplevel
+
+    clips: Dict[str, Any] = {}
+    for path in args.clips:
+        try:
+            with open(path, "rb") as clip_file:
+                clips[path.name] = decode_audio(clip_file.read())
+        except (OSError, AudioDecodeError) as exc:
+            logger.warning("⚠️ 클립을 디코딩할 수 없어 건너뜁니다: %s (%s)", path, exc)
+    if not clips:
+        return 1
+    try:
+        candidate = _CTranslate2Whisper(args.model, "cpu", args.compute_type)
+    except WhisperBackendError as exc:
+        logger.error("❌ %s", exc)
+        return 1
+    baseline = load_backend_model(args.model, "openai", "cpu")
+    report = compare_backends(clips, baseline, candidate, repeat=args.repeat, language=args.language)
+    print(
+        f"{report['clips']}개 클립 ({report['audio_seconds']}초): 텍스트 일치 {report['exact_match']}, "
+        f"유사도 {report['similarity']}"
+    )
+    print(
+        f"openai {report['baseline_seconds']}초 (실시간 {report['baseline_realtime']}배), "
+        f"ctranslate2[{args.compute_type}] {report['candidate_seconds']}초 (실시간 {report['candidate_realtime']}배), "
+        f"{report['speedup']}배 빠름"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
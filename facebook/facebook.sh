@@ -6,6 +6,8 @@ source "$VENV_PATH"
 
 # 페이스북 해시태그별 크롤링 수행
 python ./facebook_crawling.py
+# OCR 데몬 시작 (EasyOCR 모델을 한 번만 로드해서 OCR 스크립트들이 공유, 실패하면 스크립트별로 직접 로드)
+(cd "$(dirname "$SCRIPT_DIR")" && python -m common.ocr_daemon start) || true
 # facebook_media.json에서 이미지와 영상링크를 모아서 OCR 분석
 python ./facebook_imgocr.py
 # facebook_media.json에서 영상 미디어에서 음성분석
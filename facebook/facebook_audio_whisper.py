@@ -9,13 +9,11 @@ import json
 import logging
 import os
 import pickle
-import subprocess
-import tempfile
+import sys
 import time
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-import whisper
 from dotenv import load_dotenv
 
 # Selenium Wire 사용 시도 (없으면 일반 Selenium 사용)
@@ -46,6 +44,21 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.audio_cache import transcribe_audio  # noqa: E402
+from common.audio_decode import (  # noqa: E402
+    SAMPLE_RATE as AUDIO_SAMPLE_RATE,
+    AudioDecodeError,
+    NoAudioStreamError,
+    decode_audio,
+)
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.speech_vad import get_speech_recorder  # noqa: E402
+from common.whisper_model import get_whisper_model  # noqa: E402
+from facebook_dedupe_index import post_key  # noqa: E402
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 EMAIL = os.getenv("FB_EMAIL")
@@ -58,6 +71,9 @@ DATA_FILE = BASE_DIR / "facebook_media.json"
 COOKIE_PATH = BASE_DIR / "facebook_cookies.pkl"
 LOG_PATH = BASE_DIR / "facebook.log"
 
+# 저장 방식
+# 오디오 추출 결과(audio_caption)는 facebook_media.json을 수정하지 않고 facebook_media.audio_caption.jsonl 사이드카에 기록
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -714,163 +730,52 @@ def process_video_with_ffmpeg_whisper(video_bytes: bytes) -> Optional[str]:
     
     logger.info(f"📹 비디오 데이터 크기: {len(video_bytes)} bytes ({len(video_bytes) / (1024 * 1024):.2f} MB)")
     
-    # 임시 파일로 비디오 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as video_file:
-        video_path = video_file.name
-        video_file.write(video_bytes)
+    # ffmpeg 경로 찾기
+    ffmpeg_exe = find_ffmpeg()
+    if not ffmpeg_exe:
+        logger.error("❌ ffmpeg를 찾을 수 없습니다.")
+        return None
     
+    # ffmpeg 한 번으로 16kHz 모노 PCM 배열 디코딩 (임시 파일 없이 stdin → 파이프)
+    # 디코딩한 배열 하나를 무음 판단과 Whisper 음성 인식에 함께 사용
+    logger.info("🔄 ffmpeg로 오디오 디코딩 중...")
     try:
-        # ffmpeg 경로 찾기
-        ffmpeg_exe = find_ffmpeg()
-        if not ffmpeg_exe:
-            logger.error("❌ ffmpeg를 찾을 수 없습니다.")
-            return None
-        
-        # ffmpeg로 비디오에서 오디오 추출
-        logger.info("🔄 ffmpeg로 오디오 추출 중...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as audio_file:
-            audio_path = audio_file.name
-        
-        # ffmpeg 명령어 실행 (DASH 스트림 등 불완전한 파일도 처리 가능하도록 옵션 추가)
-        ffmpeg_cmd = [
-            ffmpeg_exe,
-            '-i', video_path,
-            '-vn',  # 비디오 스트림 제거
-            '-acodec', 'pcm_s16le',  # PCM 16-bit
-            '-ar', '16000',  # 샘플링 레이트 16kHz (Whisper 권장)
-            '-ac', '1',  # 모노
-            '-y',  # 덮어쓰기
-            '-err_detect', 'ignore_err',  # 오류 무시하고 계속 진행
-            '-fflags', '+genpts',  # 타임스탬프 재생성
-            audio_path
-        ]
-        
-        logger.info(f"   🔧 ffmpeg 명령어 실행 중...")
-        use_shell = os.name == 'nt'  # Windows인 경우
-        result = subprocess.run(
-            ffmpeg_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            shell=use_shell,
-            timeout=300  # 5분 타임아웃
-        )
-        
-        if result.returncode != 0:
-            logger.warning(f"⚠️ ffmpeg 오류 (returncode={result.returncode}): {result.stderr[-500:]}")  # 마지막 500자만 출력
-            # 파일이 손상되었을 수 있으므로 파일 크기 확인
-            if os.path.exists(video_path):
-                file_size = os.path.getsize(video_path)
-                logger.warning(f"⚠️ 다운로드한 파일 크기: {file_size} bytes")
-            return None
-        
-        logger.info(f"✅ 오디오 추출 완료: {audio_path}")
-        
-        # 무음 여부 확인
-        logger.info("🔍 무음 여부 확인 중...")
-        volume_check_cmd = [
-            ffmpeg_exe,
-            '-i', audio_path,
-            '-af', 'volumedetect',
-            '-f', 'null',
-            '-'
-        ]
-        
-        use_shell = os.name == 'nt'
-        volume_result = subprocess.run(
-            volume_check_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            shell=use_shell
-        )
-        
-        # 볼륨 레벨 파싱
-        is_silent = False
-        if volume_result.returncode == 0:
-            stderr_output = volume_result.stderr
-            mean_volume = None
-            max_volume = None
-            
-            for line in stderr_output.split('\n'):
-                if 'mean_volume:' in line:
-                    try:
-                        mean_volume = float(line.split('mean_volume:')[1].split('dB')[0].strip())
-                    except:
-                        pass
-                if 'max_volume:' in line:
-                    try:
-                        max_volume = float(line.split('max_volume:')[1].split('dB')[0].strip())
-                    except:
-                        pass
-            
-            if mean_volume is not None and max_volume is not None:
-                if mean_volume < -60 and max_volume < -50:
-                    is_silent = True
-                    logger.info(f"🔇 무음 비디오로 판단됨 (평균: {mean_volume:.2f} dB, 최대: {max_volume:.2f} dB)")
-                else:
-                    logger.info(f"🔊 음성이 있는 비디오 (평균: {mean_volume:.2f} dB, 최대: {max_volume:.2f} dB)")
-            elif mean_volume is not None:
-                if mean_volume < -60:
-                    is_silent = True
-                    logger.info(f"🔇 무음 비디오로 판단됨 (평균 볼륨: {mean_volume:.2f} dB)")
-                else:
-                    logger.info(f"🔊 음성이 있는 비디오 (평균 볼륨: {mean_volume:.2f} dB)")
-        
-        # 무음이면 Whisper 처리 생략
-        if is_silent:
-            logger.info("⏭️ 무음 비디오이므로 Whisper 처리를 건너뜁니다.")
-            return None
-        
-        # Whisper로 오디오를 텍스트로 변환
-        logger.info("🔄 Whisper로 음성 인식 중...")
-        try:
-            if not os.path.exists(audio_path):
-                logger.warning(f"⚠️ 오디오 파일을 찾을 수 없습니다: {audio_path}")
-                return None
-            
-            audio_path_abs = os.path.abspath(audio_path)
-            logger.info(f"   📁 오디오 파일 경로: {audio_path_abs}")
-            
-            # ffmpeg 경로 설정
-            ffmpeg_path = find_ffmpeg()
-            if ffmpeg_path:
-                if os.path.isfile(ffmpeg_path):
-                    ffmpeg_dir = os.path.dirname(ffmpeg_path)
-                else:
-                    ffmpeg_dir = ffmpeg_path
-                
-                current_path = os.environ.get('PATH', '')
-                if ffmpeg_dir not in current_path.split(os.pathsep):
-                    os.environ['PATH'] = ffmpeg_dir + os.pathsep + current_path
-                    logger.info(f"   🔧 PATH에 ffmpeg 디렉토리 추가: {ffmpeg_dir}")
-            
-            # Whisper 모델 로드 (base 모델 사용)
-            model = whisper.load_model("base")
-            
-            # 오디오 파일에서 텍스트 추출
-            result = model.transcribe(audio_path_abs, language="ko")  # 한국어 지정
-            
-            transcribed_text = result["text"].strip()
-            logger.info(f"✅ 음성 인식 완료: {len(transcribed_text)}자")
-            
-            return transcribed_text if transcribed_text else None
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Whisper 처리 실패: {e}")
-            import traceback
-            logger.warning(traceback.format_exc())
-            return None
+        audio = decode_audio(video_bytes, ffmpeg_exe)
+    except NoAudioStreamError:
+        logger.info("🔇 비디오에 오디오 스트림이 없습니다.")
+        return None
+    except AudioDecodeError as e:
+        logger.warning(f"⚠️ ffmpeg 오류: {e}")
+        return None
+    logger.info(f"✅ 오디오 디코딩 완료: {len(audio) / AUDIO_SAMPLE_RATE:.1f}초")
     
-    finally:
-        # 임시 파일 삭제
-        try:
-            if os.path.exists(video_path):
-                os.unlink(video_path)
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
-        except Exception as e:
-            logger.warning(f"⚠️ 임시 파일 삭제 실패: {e}")
+    # 오디오 캐시(같은 음원 재사용) → 무음 판단(기존 volumedetect와 같은 기준) → 음성 구간(VAD)만 Whisper로 변환
+    logger.info("🔄 Whisper로 음성 인식 중...")
+    try:
+        # Whisper 모델은 프로세스에서 처음 한 번만 로드하고 재사용 (WHISPER_MODEL, 기본 base)
+        whisper_model = get_whisper_model()
+        result = transcribe_audio(audio, whisper_model, language="ko")  # 한국어 지정
+    except Exception as e:
+        logger.warning(f"⚠️ Whisper 처리 실패: {e}")
+        import traceback
+        logger.warning(traceback.format_exc())
+        return None
+    
+    speech = result["speech"]
+    get_speech_recorder().add(speech)
+    transcribed_text = result["text"]
+    if result["cached"]:
+        logger.info(f"♻️ 오디오 캐시 적중: Whisper 생략 ({len(transcribed_text)}자)")
+    elif result["silent"]:
+        logger.info(f"🔇 무음 비디오로 판단됨 (평균: {result['mean_db']:.2f} dB, 최대: {result['max_db']:.2f} dB)")
+        logger.info("⏭️ 무음 비디오이므로 Whisper 처리를 건너뜁니다.")
+    else:
+        if result["mean_db"] is not None:
+            logger.info(f"🔊 음성이 있는 비디오 (평균: {result['mean_db']:.2f} dB, 최대: {result['max_db']:.2f} dB)")
+        if transcribed_text:
+            logger.info(f"✅ 음성 인식 완료: {len(transcribed_text)}자 ({whisper_model.last_timing()})")
+    
+    return transcribed_text if transcribed_text else None
 
 
 def extract_audio_from_video_url(driver: webdriver.Chrome, url: str) -> Optional[str]:
@@ -1297,47 +1202,65 @@ def extract_audio_from_video_url(driver: webdriver.Chrome, url: str) -> Optional
     return None
 
 
-def load_media_data() -> List[dict]:
-    """facebook_media.json 파일을 로드"""
-    if not DATA_FILE.exists():
+_media_store: Optional[JournaledJsonStore] = None
+_enrichment_store: Optional[EnrichmentStore] = None
+
+
+def get_media_store() -> JournaledJsonStore:
+    """facebook_media.json 저장소 싱글톤 반환 (이 스크립트는 읽기만 함)"""
+    global _media_store  # pylint: disable=global-statement
+    if _media_store is None:
+        _media_store = JournaledJsonStore(DATA_FILE)
+    return _media_store
+
+
+def get_enrichment_store() -> EnrichmentStore:
+    """OCR/오디오 결과 사이드카 저장소 싱글톤 반환"""
+    global _enrichment_store  # pylint: disable=global-statement
+    if _enrichment_store is None:
+        _enrichment_store = EnrichmentStore(DATA_FILE, key_func=post_key)
+    return _enrichment_store
+
+
+def load_media_data() -> List[Tuple[int, dict]]:
+    """
+    facebook_media.json에서 /reel/이나 /video/가 포함된 게시물만 스트리밍으로 로드 (저널 반영)
+
+    Returns:
+        List[Tuple[int, dict]]: (원본 인덱스, 사이드카 값을 합친 게시물) 리스트 - 다른 게시물은 메모리에 올리지 않음
+    """
+    store = get_media_store()
+    if not store.exists():
         logger.error(f"❌ {DATA_FILE} 파일을 찾을 수 없습니다.")
         return []
     
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            else:
-                logger.error("❌ JSON 파일 형식이 올바르지 않습니다. 리스트 형식이어야 합니다.")
-                return []
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ JSON 파일을 읽는 중 오류 발생: {e}")
-            return []
+    return list(get_enrichment_store().iter_joined(store.iter_records(where=is_video_or_reel_post)))
+
+
+def save_audio_caption(item: dict) -> None:
+    """게시물 하나의 audio_caption(과 audio_speech 음성 구간 통계)을 사이드카에 기록 (facebook_media.json은 수정하지 않음)"""
+    get_enrichment_store().set(item, "audio_caption", item.get("audio_caption", ""))
+    if item.get("audio_speech"):
+        get_enrichment_store().set(item, "audio_speech", item["audio_speech"])
+
+
+def save_media_data() -> None:
+    """사이드카 기록을 디스크에 동기화"""
+    get_enrichment_store().close()
+    logger.info(f"✅ {get_enrichment_store().sidecar_path('audio_caption').name} 저장 완료")
 
 
-def save_media_data(data: List[dict]) -> None:
-    """facebook_media.json 파일에 저장"""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    logger.info(f"✅ {DATA_FILE} 파일에 저장 완료")
+def is_video_or_reel_post(item: dict) -> bool:
+    """media_urls 중 하나라도 /reel/이나 /video/가 포함되어 있는지 확인"""
+    media_urls = item.get("media_urls", [])
+    if not media_urls:
+        return False
+    return any("/reel/" in url or "/video/" in url for url in media_urls)
 
 
 def filter_video_and_reel_posts(media_list: List[dict]) -> List[dict]:
     """media_urls에 /reel/이나 /video/가 포함된 게시물만 필터링"""
-    filtered = []
-    for item in media_list:
-        media_urls = item.get("media_urls", [])
-        if not media_urls:
-            continue
-        
-        # media_urls 중 하나라도 /reel/이나 /video/가 포함되어 있으면 포함
-        for url in media_urls:
-            if "/reel/" in url or "/video/" in url:
-                filtered.append(item)
-                break
-    
-    return filtered
+    return [item for item in media_list if is_video_or_reel_post(item)]
 
 
 def main():
@@ -1346,18 +1269,9 @@ def main():
     logger.info("📹 Facebook 비디오 오디오 추출 시작")
     logger.info("=" * 80)
     
-    # 데이터 로드
-    logger.info("\n📂 데이터 파일 로드 중...")
-    media_list = load_media_data()
-    if not media_list:
-        logger.error("❌ 로드할 데이터가 없습니다.")
-        return
-    
-    logger.info(f"✅ 총 {len(media_list)}개의 게시물 로드 완료")
-    
-    # /reel/이나 /video/가 포함된 게시물 필터링
-    logger.info("\n🔍 /reel/이나 /video/가 포함된 게시물 필터링 중...")
-    filtered_media = filter_video_and_reel_posts(media_list)
+    # 데이터 로드 (/reel/이나 /video/가 포함된 게시물만 스트리밍으로 필터링)
+    logger.info("\n📂 데이터 파일 로드 중 (/reel/이나 /video/가 포함된 게시물 필터링)...")
+    filtered_media = load_media_data()
     logger.info(f"📊 필터링 결과: {len(filtered_media)}개")
     
     if not filtered_media:
@@ -1368,23 +1282,23 @@ def main():
     logger.info("\n🔍 audio_caption이 이미 있는 항목 필터링 중...")
     media_without_audio = []
     media_with_audio = []
-    for item in filtered_media:
-        audio_caption = item.get("audio_caption", "")
+    for entry in filtered_media:
+        audio_caption = entry[1].get("audio_caption", "")
         # 리스트인 경우 모든 항목이 비어있지 않은지 확인
         if isinstance(audio_caption, list):
             # 리스트의 모든 항목이 비어있지 않은지 확인
             has_content = any(str(cap).strip() for cap in audio_caption if cap)
             if has_content:
-                media_with_audio.append(item)
+                media_with_audio.append(entry)
             else:
-                media_without_audio.append(item)
+                media_without_audio.append(entry)
         else:
             # 문자열인 경우
             audio_caption = str(audio_caption).strip() if audio_caption else ""
             if not audio_caption:
-                media_without_audio.append(item)
+                media_without_audio.append(entry)
             else:
-                media_with_audio.append(item)
+                media_with_audio.append(entry)
     
     logger.info(f"📊 필터링 결과:")
     logger.info(f"   - audio_caption 있음 (스킵): {len(media_with_audio)}개")
@@ -1408,7 +1322,7 @@ def main():
         processed_count = 0
         success_count = 0
         
-        for idx, media_item in enumerate(filtered_media, 1):
+        for idx, (_, media_item) in enumerate(filtered_media, 1):
             user_name = media_item.get("user_name", "N/A")
             media_urls = media_item.get("media_urls", [])
             
@@ -1448,23 +1362,7 @@ def main():
             logger.info(f"\n[{idx}/{len(filtered_media)}] 🎥 처리 중: {user_name}")
             logger.info(f"   📹 발견된 비디오 URL 개수: {len(video_urls)}개")
             
-            # 원본 media_list에서 해당 항목 찾기 (user_name, datetime, content로 매칭)
-            original_item = None
-            for item in media_list:
-                if (item.get("user_name") == user_name and 
-                    item.get("datetime") == media_item.get("datetime") and
-                    item.get("content") == media_item.get("content")):
-                    original_item = item
-                    break
-            
-            # 원본 항목을 찾지 못하면 media_item의 인덱스로 찾기
-            if not original_item:
-                # filtered_media의 인덱스를 media_list에서 찾기
-                try:
-                    original_item = media_list[media_list.index(media_item)]
-                except (ValueError, IndexError):
-                    # 매칭 실패 시 media_item을 직접 사용 (참조일 수 있음)
-                    original_item = media_item
+            original_item = media_item
             
             # 기존 audio_caption 확인 (리스트 또는 문자열)
             existing_audio_list = []
@@ -1478,6 +1376,7 @@ def main():
             audio_captions = existing_audio_list.copy()  # 기존 결과 유지
             processed_count += 1
             video_success_count = 0
+            get_speech_recorder().reset()  # 이 게시물의 음성 길이/건너뛴 길이 합계
             
             for video_idx, video_url in enumerate(video_urls, 1):
                 logger.info(f"   🎬 비디오 {video_idx}/{len(video_urls)} 처리 중: {video_url[:80]}...")
@@ -1501,7 +1400,7 @@ def main():
                     logger.error(traceback.format_exc())
                     # 오류 시에도 계속 진행 (다음 비디오 처리)
             
-            # 결과 저장 (원본 media_list에 반영)
+            # 결과 저장
             if audio_captions:
                 # 리스트에 결과가 있으면 리스트로 저장, 단일 결과면 문자열로 저장 (호환성)
                 if len(audio_captions) == 1 and not existing_audio_list:
@@ -1515,14 +1414,20 @@ def main():
                 logger.info(f"   ⚠️  모든 비디오 오디오 추출 실패 또는 무음")
                 original_item["audio_caption"] = ""  # 빈 문자열로 표시
             
-            # 중간 저장 (10개마다)
-            if processed_count % 10 == 0:
-                logger.info(f"\n💾 중간 저장 중... ({processed_count}개 처리됨)")
-                save_media_data(media_list)
+            speech_summary = get_speech_recorder().summary()
+            if speech_summary:
+                original_item["audio_speech"] = speech_summary
+                logger.info(
+                    f"   🗣️ 음성 {speech_summary['speech_seconds']}초 / {speech_summary['duration_seconds']}초 "
+                    f"(건너뜀 {speech_summary['skipped_seconds']}초)"
+                )
+            
+            # 게시물마다 사이드카에 기록 (중단 시에도 진행 상황 보존)
+            save_audio_caption(original_item)
         
-        # 최종 저장
+        # 최종 저장 (사이드카 동기화)
         logger.info(f"\n💾 최종 저장 중...")
-        save_media_data(media_list)
+        save_media_data()
         
         logger.info(f"\n✅ 처리 완료!")
         logger.info(f"   - 총 처리: {processed_count}개")
@@ -1530,6 +1435,8 @@ def main():
         logger.info(f"   - 실패: {processed_count - success_count}개")
         
     finally:
+        # 중단된 경우에도 사이드카 기록을 디스크에 동기화
+        get_enrichment_store().close()
         logger.info("\n🔚 브라우저 종료 중...")
         driver.quit()
         logger.info("✅ 완료")
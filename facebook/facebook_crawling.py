@@ -5,6 +5,7 @@ import logging
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Optional
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -15,6 +16,13 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from dotenv import load_dotenv
 import os
 import pickle
+import sys
+
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore
+from common.post_db import mirror_posts
+from facebook_dedupe_index import PostDedupeIndex, content_key, media_key, pin_post_key, post_key
 
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
@@ -53,6 +61,35 @@ HASHTAGS = [
 # 테스트 모드
 TEST_MODE = True  # True면 첫 번째 해시태그의 상위 40개 게시물만 처리
 
+# 저장 방식
+MEDIA_JOURNAL_ENABLED = True  # True면 신규/업데이트 게시물을 facebook_media.journal.jsonl에 추가 기록 (False면 매번 전체 저장)
+MEDIA_JOURNAL_COMPACT_EVERY = 200  # 저널 항목이 이 개수만큼 쌓이면 facebook_media.json에 병합
+
+# facebook_media.json 저장소 (프로세스당 한 번만 로드)
+_media_store: Optional[JournaledJsonStore] = None
+_dedupe_index: Optional[PostDedupeIndex] = None
+
+
+def get_media_store() -> JournaledJsonStore:
+    """facebook_media.json 저장소 싱글톤 반환"""
+    global _media_store  # pylint: disable=global-statement
+    if _media_store is None:
+        _media_store = JournaledJsonStore(
+            MEDIA_JSON,
+            journal_enabled=MEDIA_JOURNAL_ENABLED,
+            compact_threshold=MEDIA_JOURNAL_COMPACT_EVERY,
+        )
+    return _media_store
+
+
+def get_dedupe_index() -> PostDedupeIndex:
+    """facebook_media.json 중복 체크 인덱스 싱글톤 반환 (저장된 인덱스가 유효하면 재사용)"""
+    global _dedupe_index  # pylint: disable=global-statement
+    if _dedupe_index is None:
+        store = get_media_store()
+        _dedupe_index = PostDedupeIndex.load_or_build(store.load(), store.snapshot_path, store.journal_path)
+    return _dedupe_index
+
 # Selenium WebDriver 설정
 def setup_driver():
     """Selenium WebDriver 설정 (Chrome 경로 자동 탐지)"""
@@ -3081,28 +3118,14 @@ def is_duplicate_post(new_post, existing_post):
     Returns:
         bool: 중복이면 True, 아니면 False
     """
-    # 방법 1: media_urls의 첫 번째 요소 비교
-    new_first_media = new_post.get("media_urls", [None])[0] if new_post.get("media_urls") else None
-    existing_first_media = existing_post.get("media_urls", [None])[0] if existing_post.get("media_urls") else None
-    
-    if new_first_media and existing_first_media:
-        if new_first_media == existing_first_media:
-            return True
+    # 방법 1: media_urls의 첫 번째 요소 비교 (fbcdn 서명 파라미터 제거 후)
+    new_media_key = media_key(new_post)
+    if new_media_key and new_media_key == media_key(existing_post):
+        return True
     
     # 방법 2: user_name + content + hashtags 비교
-    new_user_name = new_post.get("user_name", "").strip()
-    new_content = new_post.get("content", "").strip()
-    new_hashtags = sorted(new_post.get("hashtags", []))
-    
-    existing_user_name = existing_post.get("user_name", "").strip()
-    existing_content = existing_post.get("content", "").strip()
-    existing_hashtags = sorted(existing_post.get("hashtags", []))
-    
-    if (new_user_name and existing_user_name and 
-        new_user_name == existing_user_name and
-        new_content and existing_content and
-        new_content == existing_content and
-        new_hashtags == existing_hashtags):
+    new_content_key = content_key(new_post)
+    if new_content_key and new_content_key == content_key(existing_post):
         return True
     
     return False
@@ -3116,81 +3139,87 @@ def save_to_json(posts_data, test_mode=False):
         test_mode: 테스트 모드 여부 (현재는 중복 제거에 영향 없음)
     """
     try:
-        # 기존 데이터 로드
-        existing_data = []
-        if MEDIA_JSON.exists():
-            try:
-                with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-                    existing_data = json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"⚠️ {MEDIA_JSON} 파일의 JSON 형식이 올바르지 않습니다. 새로 생성합니다.")
+        # 기존 데이터 로드 (첫 호출 시 스냅샷 + 저널을 한 번만 읽고 이후에는 메모리에서 재사용)
+        store = get_media_store()
+        existing_data = store.load()
+        dedupe_index = get_dedupe_index()
         
         # 중복 제거 수행 (테스트 모드 포함)
         logger.info("🔍 중복 게시물 체크 중...")
         new_posts = []
+        updated_posts = []
         duplicate_count = 0
         updated_count = 0
         
         for new_post in posts_data:
-            is_duplicate = False
-            existing_post_index = None
-            
-            # 기존 데이터와 비교
-            for idx, existing_post in enumerate(existing_data):
-                if is_duplicate_post(new_post, existing_post):
-                    is_duplicate = True
-                    existing_post_index = idx
-                    duplicate_count += 1
-                    
-                    # 기존 항목의 audio_caption과 media_caption 보존
-                    existing_audio_caption = existing_post.get("audio_caption")
-                    existing_media_caption = existing_post.get("media_caption")
-                    
-                    # 새 항목의 데이터로 기존 항목 업데이트 (단, audio_caption과 media_caption은 보존)
-                    for key, value in new_post.items():
-                        if key not in ["audio_caption", "media_caption"]:
-                            existing_post[key] = value
-                    
-                    # audio_caption과 media_caption이 기존에 있고 유효한 경우 보존
-                    if existing_audio_caption:
-                        # 리스트인 경우 내용이 있는지 확인
-                        if isinstance(existing_audio_caption, list):
-                            has_content = any(str(cap).strip() for cap in existing_audio_caption if cap)
-                            if has_content:
-                                existing_post["audio_caption"] = existing_audio_caption
-                                logger.info(f"   ✅ 기존 audio_caption 보존 ({len(existing_audio_caption)}개 항목)")
-                        # 문자열인 경우
-                        elif isinstance(existing_audio_caption, str) and existing_audio_caption.strip():
-                            existing_post["audio_caption"] = existing_audio_caption
-                            logger.info(f"   ✅ 기존 audio_caption 보존 (문자열)")
-                    
-                    if existing_media_caption:
-                        # 리스트인 경우 내용이 있는지 확인
-                        if isinstance(existing_media_caption, list):
-                            has_content = any(str(cap).strip() for cap in existing_media_caption if cap)
-                            if has_content:
-                                existing_post["media_caption"] = existing_media_caption
-                                logger.info(f"   ✅ 기존 media_caption 보존 ({len(existing_media_caption)}개 항목)")
-                        # 문자열인 경우
-                        elif isinstance(existing_media_caption, str) and existing_media_caption.strip():
-                            existing_post["media_caption"] = existing_media_caption
-                            logger.info(f"   ✅ 기존 media_caption 보존 (문자열)")
-                    
-                    # 중복 검사에 사용된 필드로 로그 표시 (datetime 제외)
-                    new_first_media = new_post.get("media_urls", [None])[0] if new_post.get("media_urls") else None
-                    if new_first_media:
-                        logger.info(f"   ⚠️ 중복 게시물 발견 (업데이트): media_url='{new_first_media[:80]}...', user_name='{new_post.get('user_name', 'N/A')}'")
-                    else:
-                        # media_url이 없으면 user_name, content, hashtags로 표시
-                        content_preview = new_post.get('content', 'N/A')[:50] if new_post.get('content') else 'N/A'
-                        hashtags_str = ', '.join(new_post.get('hashtags', []))[:50] if new_post.get('hashtags') else 'N/A'
-                        logger.info(f"   ⚠️ 중복 게시물 발견 (업데이트): user_name='{new_post.get('user_name', 'N/A')}', content='{content_preview}...', hashtags='{hashtags_str}'")
-                    
-                    updated_count += 1
-                    break
+            # 해시 인덱스로 중복 게시물 조회 (게시물당 O(1))
+            existing_post_index = dedupe_index.find(new_post)
             
-            if not is_duplicate:
+            if existing_post_index is None:
+                new_index = store.append(new_post)
+                dedupe_index.add(new_index, new_post)
                 new_posts.append(new_post)
+                continue
+            
+            existing_post = existing_data[existing_post_index]
+            duplicate_count += 1
+            # 게시물 내용이 바뀌기 전에 기존 키 제거
+            dedupe_index.remove(existing_post_index, existing_post)
+            # OCR/오디오 사이드카 키 (media_urls가 바뀌어도 기존 결과와 연결되도록 업데이트 후 고정)
+            previous_post_key = post_key(existing_post)
+            
+            # 기존 항목의 audio_caption과 media_caption 보존
+            existing_audio_caption = existing_post.get("audio_caption")
+            existing_media_caption = existing_post.get("media_caption")
+            
+            # 새 항목의 데이터로 기존 항목 업데이트 (단, audio_caption과 media_caption은 보존)
+            for key, value in new_post.items():
+                if key not in ["audio_caption", "media_caption"]:
+                    existing_post[key] = value
+            
+            # audio_caption과 media_caption이 기존에 있고 유효한 경우 보존
+            if existing_audio_caption:
+                # 리스트인 경우 내용이 있는지 확인
+                if isinstance(existing_audio_caption, list):
+                    has_content = any(str(cap).strip() for cap in existing_audio_caption if cap)
+                    if has_content:
+                        existing_post["audio_caption"] = existing_audio_caption
+                        logger.info(f"   ✅ 기존 audio_caption 보존 ({len(existing_audio_caption)}개 항목)")
+                # 문자열인 경우
+                elif isinstance(existing_audio_caption, str) and existing_audio_caption.strip():
+                    existing_post["audio_caption"] = existing_audio_caption
+                    logger.info(f"   ✅ 기존 audio_caption 보존 (문자열)")
+            
+            if existing_media_caption:
+                # 리스트인 경우 내용이 있는지 확인
+                if isinstance(existing_media_caption, list):
+                    has_content = any(str(cap).strip() for cap in existing_media_caption if cap)
+                    if has_content:
+                        existing_post["media_caption"] = existing_media_caption
+                        logger.info(f"   ✅ 기존 media_caption 보존 ({len(existing_media_caption)}개 항목)")
+                # 문자열인 경우
+                elif isinstance(existing_media_caption, str) and existing_media_caption.strip():
+                    existing_post["media_caption"] = existing_media_caption
+                    logger.info(f"   ✅ 기존 media_caption 보존 (문자열)")
+            
+            # 중복 검사에 사용된 필드로 로그 표시 (datetime 제외)
+            new_first_media = new_post.get("media_urls", [None])[0] if new_post.get("media_urls") else None
+            if new_first_media:
+                logger.info(f"   ⚠️ 중복 게시물 발견 (업데이트): media_url='{new_first_media[:80]}...', user_name='{new_post.get('user_name', 'N/A')}'")
+            else:
+                # media_url이 없으면 user_name, content, hashtags로 표시
+                content_preview = new_post.get('content', 'N/A')[:50] if new_post.get('content') else 'N/A'
+                hashtags_str = ', '.join(new_post.get('hashtags', []))[:50] if new_post.get('hashtags') else 'N/A'
+                logger.info(f"   ⚠️ 중복 게시물 발견 (업데이트): user_name='{new_post.get('user_name', 'N/A')}', content='{content_preview}...', hashtags='{hashtags_str}'")
+            
+            if pin_post_key(existing_post, previous_post_key):
+                logger.info("   📌 첫 번째 media_url이 바뀌어 기존 post_key를 고정 (OCR/오디오 결과 유지)")
+            
+            # 업데이트된 항목만 저널에 기록
+            store.put(existing_post_index, existing_post)
+            dedupe_index.add(existing_post_index, existing_post)
+            updated_posts.append(existing_post)
+            updated_count += 1
         
         if duplicate_count > 0:
             logger.info(f"   ℹ️ 총 {duplicate_count}개 중복 게시물 발견 (기존 항목 업데이트)")
@@ -3198,13 +3227,10 @@ def save_to_json(posts_data, test_mode=False):
                 logger.info(f"   ✅ {updated_count}개 기존 항목 업데이트됨 (audio_caption/media_caption 보존)")
             logger.info(f"   ✅ {len(new_posts)}개 새 게시물 저장됩니다")
         
-        # 중복 제거된 새 데이터만 추가
-        existing_data.extend(new_posts)
+        # 새 게시물과 업데이트된 항목만 저널에 추가됨 (전체 파일은 compaction 시에만 다시 씀)
         posts_to_save = new_posts
-        
-        # JSON 파일에 저장
-        with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-            json.dump(existing_data, f, ensure_ascii=False, indent=2)
+        # SNS_POST_DB가 설정되어 있으면 게시물 DB에도 기록
+        mirror_posts("facebook", new_posts + updated_posts)
         
         logger.info(f"✅ {MEDIA_JSON} 파일에 {len(posts_to_save)}개 게시물 저장 완료 (총 {len(existing_data)}개)")
         
@@ -3263,6 +3289,14 @@ def main():
     finally:
         driver.quit()
         logger.info("\n🔒 브라우저 종료")
+        # 남은 저널을 facebook_media.json에 병합하고 중복 체크 인덱스 저장
+        try:
+            store = get_media_store()
+            store.close()
+            if _dedupe_index is not None:
+                _dedupe_index.save(store.snapshot_path, len(store.load()))
+        except Exception as e:
+            logger.error(f"❌ 저널 병합 실패 (다음 실행 시 자동 병합됨): {e}")
         logger.info("=" * 60)
         logger.info("✅ 모든 작업 완료")
         logger.info("=" * 60)
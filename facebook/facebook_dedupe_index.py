@@ -0,0 +1,354 @@
+"""
+Facebook 게시물 중복 체크용 해시 인덱스
+
+save_to_json이 새 게시물마다 기존 게시물 전체를 순회하며 is_duplicate_post를 호출하던 방식(O(N×M)) 대신,
+게시물마다 아래 두 키를 미리 계산해 dict로 조회(게시물당 O(1))합니다.
+
+1. media 키: 첫 번째 media_url을 정규화한 값 (fbcdn 서명 파라미터 oh/oe/_nc_* 등 제거)
+2. content 키: (user_name, 정규화한 content, 정렬한 hashtags)의 SHA-1 digest
+   (기존 규칙과 동일하게 user_name과 content가 모두 있을 때만 생성)
+
+OCR/오디오 결과 사이드카의 게시물 키(post_key)도 media 키를 쓰므로, 재수집으로 첫 번째 media_url이 바뀌면
+save_to_json이 처음 키를 게시물의 post_key 필드에 고정해 기존 사이드카 결과와 계속 연결되도록 합니다.
+
+인덱스는 facebook_media.dedupe.json에 저장되며, 스냅샷 파일이 바뀌었거나 저널이 남아 있으면
+다음 로드 시 게시물 목록에서 다시 생성합니다.
+
+벤치마크 (합성 게시물 파일로 기존 선형 탐색과 비교):
+    python facebook_dedupe_index.py --bench 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".dedupe.json"
+
+# fbcdn URL에서 요청마다 달라지는 서명/캐시 파라미터
+FBCDN_VOLATILE_PARAMS = {"oh", "oe", "ccb", "efg", "dl"}
+FBCDN_VOLATILE_PREFIXES = ("_nc_",)
+# facebook.com 미디어 페이지 URL에서 게시물을 식별하는 파라미터 (그 외 추적 파라미터는 제거)
+FACEBOOK_ID_PARAMS = {"fbid", "v", "story_fbid", "id"}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def canonicalize_media_url(url: Optional[str]) -> Optional[str]:
+    """
+    미디어 URL을 중복 비교용으로 정규화
+
+    - fbcdn.net: 엣지 서버 호스트와 서명 파라미터(oh, oe, _nc_* 등)를 제거하고 경로 + 나머지 파라미터만 사용
+    - facebook.com: 게시물 식별 파라미터(fbid, v, story_fbid, id)만 남김
+    - 그 외: fragment만 제거
+    """
+    if not url or not isinstance(url, str):
+        return None
+    url = url.strip()
+    if not url:
+        return None
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    host = (parts.hostname or "").lower()
+    path = parts.path.rstrip("/") or "/"
+    params = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host.endswith("fbcdn.net"):
+        kept = sorted(
+            (k, v)
+            for k, v in params
+            if k not in FBCDN_VOLATILE_PARAMS and not k.startswith(FBCDN_VOLATILE_PREFIXES)
+        )
+        query = urlencode(kept)
+        return f"fbcdn:{path}" + (f"?{query}" if query else "")
+
+    if host.endswith("facebook.com"):
+        kept = sorted((k, v) for k, v in params if k in FACEBOOK_ID_PARAMS)
+        query = urlencode(kept)
+        return f"facebook:{path}" + (f"?{query}" if query else "")
+
+    query = urlencode(sorted(params))
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+def normalize_content(text: Optional[str]) -> str:
+    """content 비교용 정규화 (앞뒤 공백 제거 + 연속 공백을 하나로)"""
+    if not text:
+        return ""
+    return _WHITESPACE_RE.sub(" ", str(text)).strip()
+
+
+def media_key(post: dict) -> Optional[str]:
+    """첫 번째 media_url 기준 중복 키"""
+    media_urls = post.get("media_urls") or []
+    if not media_urls:
+        return None
+    return canonicalize_media_url(media_urls[0])
+
+
+def content_key(post: dict) -> Optional[str]:
+    """(user_name, content, hashtags) 기준 중복 키 (user_name과 content가 모두 있어야 생성)"""
+    user_name = (post.get("user_name") or "").strip()
+    content = normalize_content(post.get("content"))
+    if not user_name or not content:
+        return None
+    hashtags = sorted(str(tag) for tag in (post.get("hashtags") or []))
+    payload = json.dumps([user_name, content, hashtags], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def post_key(post: dict) -> Optional[str]:
+    """
+    게시물 식별 키 (OCR/오디오 결과 사이드카 저장용)
+
+    고정된 post_key 필드가 있으면 그 값, 없으면 첫 번째 미디어 URL 기준, 그것도 없으면 내용 기준
+    """
+    return post.get("post_key") or media_key(post) or content_key(post)
+
+
+def pin_post_key(post: dict, previous_key: Optional[str]) -> bool:
+    """
+    게시물 내용이 바뀌어 post_key가 달라졌으면 이전 키를 post_key 필드에 고정
+
+    Args:
+        post: 업데이트된 게시물 (제자리에서 수정됨)
+        previous_key: 업데이트 전에 계산한 post_key(post)
+
+    Returns:
+        bool: 키를 고정했으면 True
+    """
+    if not previous_key or post_key(post) == previous_key:
+        return False
+    post["post_key"] = previous_key
+    return True
+
+
+def _snapshot_fingerprint(snapshot_path: Path) -> Optional[Dict[str, int]]:
+    try:
+        stat = snapshot_path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class PostDedupeIndex:
+    """media 키 / content 키 → 게시물 리스트 인덱스 매핑"""
+
+    def __init__(self) -> None:
+        self.by_media: Dict[str, int] = {}
+        self.by_content: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(set(self.by_media.values()) | set(self.by_content.values()))
+
+    def add(self, index: int, post: dict) -> None:
+        """게시물의 키를 인덱스에 등록 (같은 키가 이미 있으면 앞선 게시물 유지)"""
+        key = media_key(post)
+        if key:
+            self.by_media.setdefault(key, index)
+        key = content_key(post)
+        if key:
+            self.by_content.setdefault(key, index)
+
+    def remove(self, index: int, post: dict) -> None:
+        """게시물의 키가 index를 가리키고 있으면 제거 (게시물 내용이 바뀌기 전에 호출)"""
+        key = media_key(post)
+        if key and self.by_media.get(key) == index:
+            del self.by_media[key]
+        key = content_key(post)
+        if key and self.by_content.get(key) == index:
+            del self.by_content[key]
+
+    def find(self, post: dict) -> Optional[int]:
+        """중복 게시물의 인덱스 반환 (두 키가 서로 다른 게시물을 가리키면 앞선 게시물)"""
+        candidates = []
+        key = media_key(post)
+        if key and key in self.by_media:
+            candidates.append(self.by_media[key])
+        key = content_key(post)
+        if key and key in self.by_content:
+            candidates.append(self.by_content[key])
+        return min(candidates) if candidates else None
+
+    def build(self, records: List[dict]) -> None:
+        """게시물 리스트 전체로 인덱스 재생성"""
+        self.by_media.clear()
+        self.by_content.clear()
+        for index, post in enumerate(records):
+            self.add(index, post)
+
+    # ------------------------------------------------------------------
+    # 저장 / 로드
+    # ------------------------------------------------------------------
+    @staticmethod
+    def index_path_for(snapshot_path: Path) -> Path:
+        snapshot_path = Path(snapshot_path)
+        return snapshot_path.with_name(snapshot_path.stem + INDEX_SUFFIX)
+
+    def save(self, snapshot_path: Path, record_count: int) -> None:
+        """
+        인덱스를 파일로 저장 (스냅샷이 저널과 병합된 직후에 호출해야 다음 실행에서 재사용됨)
+
+        Args:
+            snapshot_path: 인덱스가 가리키는 스냅샷 JSON 파일 경로
+            record_count: 스냅샷의 게시물 수
+        """
+        fingerprint = _snapshot_fingerprint(Path(snapshot_path))
+        if fingerprint is None:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "snapshot": fingerprint,
+            "count": record_count,
+            "media": self.by_media,
+            "content": self.by_content,
+        }
+        index_path = self.index_path_for(snapshot_path)
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp_path.replace(index_path)
+
+    @classmethod
+    def load_or_build(cls, records: List[dict], snapshot_path: Path, journal_path: Optional[Path] = None) -> "PostDedupeIndex":
+        """
+        저장된 인덱스가 현재 스냅샷과 일치하면 재사용하고, 아니면 records로 다시 생성
+
+        Args:
+            records: 스냅샷 + 저널이 병합된 게시물 리스트
+            snapshot_path: 스냅샷 JSON 파일 경로
+            journal_path: 저널 파일 경로 (존재하면 저장된 인덱스를 신뢰하지 않음)
+        """
+        index = cls()
+        index_path = cls.index_path_for(snapshot_path)
+        journal_pending = journal_path is not None and Path(journal_path).exists()
+
+        if index_path.exists() and not journal_pending:
+            try:
+                data = json.loads(index_path.read_text(encoding="utf-8"))
+                if (
+                    data.get("version") == INDEX_VERSION
+                    and data.get("snapshot") == _snapshot_fingerprint(Path(snapshot_path))
+                    and data.get("count") == len(records)
+                ):
+                    index.by_media = data.get("media") or {}
+                    index.by_content = data.get("content") or {}
+                    logger.info("📇 중복 체크 인덱스 로드 (%d개 게시물)", len(records))
+                    return index
+            except (OSError, json.JSONDecodeError, AttributeError) as exc:
+                logger.warning("⚠️ 중복 체크 인덱스 로드 실패, 다시 생성합니다: %s", exc)
+
+        index.build(records)
+        logger.info("📇 중복 체크 인덱스 생성 (%d개 게시물)", len(records))
+        return index
+
+
+# ----------------------------------------------------------------------
+# 벤치마크
+# ----------------------------------------------------------------------
+def _legacy_is_duplicate(new_post: dict, existing_post: dict) -> bool:
+    """기존 is_duplicate_post와 동일한 비교 (벤치마크 기준선)"""
+    new_first_media = new_post.get("media_urls", [None])[0] if new_post.get("media_urls") else None
+    existing_first_media = existing_post.get("media_urls", [None])[0] if existing_post.get("media_urls") else None
+    if new_first_media and existing_first_media and new_first_media == existing_first_media:
+        return True
+
+    new_user_name = new_post.get("user_name", "").strip()
+    new_content = new_post.get("content", "").strip()
+    new_hashtags = sorted(new_post.get("hashtags", []))
+    existing_user_name = existing_post.get("user_name", "").strip()
+    existing_content = existing_post.get("content", "").strip()
+    existing_hashtags = sorted(existing_post.get("hashtags", []))
+    return bool(
+        new_user_name and existing_user_name and new_user_name == existing_user_name
+        and new_content and existing_content and new_content == existing_content
+        and new_hashtags == existing_hashtags
+    )
+
+
+def _synthetic_post(i: int, rng: random.Random) -> dict:
+    tags = rng.sample(["#독일피엠", "#피엠", "#fitline", "#건강", "#다이어트", "#면역"], k=3)
+    return {
+        "user_name": f"user{i % 5000}",
+        "datetime": f"2025-01-01T00:{i % 60:02d}:00",
+        "content": f"게시물 내용 {i} " + "피트라인 " * rng.randint(5, 30),
+        "hashtags": tags,
+        "media_urls": [
+            f"https://scontent-icn2-1.xx.fbcdn.net/v/t39.30808-6/{i}_{rng.randint(0, 10**9)}_n.jpg"
+            f"?_nc_cat=1&ccb=1-7&_nc_sid=127cfc&_nc_ohc={rng.getrandbits(32):x}&oh=00_{rng.getrandbits(64):x}&oe=6789ABCD"
+        ],
+        "like_count": rng.randint(0, 500),
+    }
+
+
+def run_benchmark(total_posts: int, new_posts: int = 50, seed: int = 0) -> None:
+    """합성 게시물 파일로 선형 탐색과 해시 인덱스 성능 비교"""
+    rng = random.Random(seed)
+    records = [_synthetic_post(i, rng) for i in range(total_posts)]
+
+    # 절반은 기존 게시물과 중복(서명 파라미터만 다름), 절반은 신규
+    candidates: List[dict] = []
+    for j in range(new_posts):
+        if j % 2 == 0:
+            dup = dict(records[rng.randrange(total_posts)])
+            dup["media_urls"] = [dup["media_urls"][0].replace("oe=6789ABCD", "oe=7000FFFF")]
+            candidates.append(dup)
+        else:
+            candidates.append(_synthetic_post(total_posts + j, rng))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = Path(tmp_dir) / "facebook_media.json"
+        snapshot_path.write_text(json.dumps(records, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"합성 파일: {total_posts}개 게시물, {snapshot_path.stat().st_size / (1024 * 1024):.1f} MB")
+
+        start = time.perf_counter()
+        legacy_hits = 0
+        for post in candidates:
+            for existing in records:
+                if _legacy_is_duplicate(post, existing):
+                    legacy_hits += 1
+                    break
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = PostDedupeIndex()
+        index.build(records)
+        build_elapsed = time.perf_counter() - start
+        index.save(snapshot_path, len(records))
+
+        start = time.perf_counter()
+        PostDedupeIndex.load_or_build(records, snapshot_path)
+        load_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index_hits = sum(1 for post in candidates if index.find(post) is not None)
+        lookup_elapsed = time.perf_counter() - start
+
+    print(f"기존 선형 탐색: {len(candidates)}개 게시물 {legacy_elapsed:.3f}s "
+          f"({legacy_elapsed / len(candidates) * 1000:.2f} ms/게시물, 중복 {legacy_hits}개)")
+    print(f"해시 인덱스 생성: {build_elapsed:.3f}s / 저장된 인덱스 로드: {load_elapsed:.3f}s")
+    print(f"해시 인덱스 조회: {len(candidates)}개 게시물 {lookup_elapsed * 1000:.3f} ms "
+          f"({lookup_elapsed / len(candidates) * 1e6:.1f} µs/게시물, 중복 {index_hits}개)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Facebook 중복 체크 인덱스 벤치마크")
+    parser.add_argument("--bench", type=int, default=100000, help="합성 게시물 수 (기본값: 100000)")
+    parser.add_argument("--new-posts", type=int, default=50, help="중복 체크할 새 게시물 수 (기본값: 50)")
+    args = parser.parse_args()
+    run_benchmark(args.bench, args.new_posts)
@@ -7,17 +7,17 @@ from __future__ import annotations
 
 import base64
 import io
-import json
 import logging
 import os
 import pickle
 import re
+import sys
 import tempfile
 import time
 from pathlib import Path
-from typing import List, Optional
+from multiprocessing.pool import AsyncResult
+from typing import List, Optional, Tuple, Union
 
-import cv2  # type: ignore
 import easyocr  # type: ignore
 import numpy as np  # type: ignore
 import requests
@@ -31,6 +31,19 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.ocr_backend import create_ocr_reader, profile_tag  # noqa: E402
+from common.ocr_cache import get_ocr_cache  # noqa: E402
+from common.ocr_daemon import connect_ocr_daemon  # noqa: E402
+from common.ocr_pool import OCRWorkerPool, create_ocr_pool  # noqa: E402
+from common.ocr_preprocess import preprocess_image_bytes as preprocess_ocr_image  # noqa: E402
+from common.text_prefilter import TextPrefilter, create_text_prefilter  # noqa: E402
+from common.video_frames import get_frame_service  # noqa: E402
+from facebook_dedupe_index import post_key  # noqa: E402
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 EMAIL = os.getenv("FB_EMAIL")
@@ -40,6 +53,7 @@ PASSWORD = os.getenv("FB_PASSWORD")
 BASE_DIR = Path(__file__).parent
 COOKIE_PATH = BASE_DIR / "facebook_cookies.pkl"
 LOG_PATH = BASE_DIR / "facebook.log"  # facebook.log에 누적 저장
+MEDIA_JSON = BASE_DIR / "facebook_media.json"
 
 # 로깅 설정
 logging.basicConfig(
@@ -57,25 +71,85 @@ logger = logging.getLogger(__name__)
 REQUEST_TIMEOUT = 30
 EASYOCR_LANGS = ["ko", "en"]
 MIN_CAPTION_LENGTH = 20
+# OCR 워커 프로세스 수 (0이면 이 프로세스에서 처리, -1이면 CPU 코어 수) / 워커당 스레드 수 (None이면 코어 수 / 워커 수)
+# 워커를 쓰면 직접 이미지 URL은 워커에서 OCR하는 동안 다음 미디어를 계속 처리함
+OCR_WORKERS = 0
+OCR_THREADS_PER_WORKER: Optional[int] = None
+# 이미지 전처리 배율 (common/ocr_preprocess.py): "adaptive"는 글줄 높이/이미지 크기에 맞춰 배율 결정, "fixed"는 기존 3배 확대
+# adaptive는 큰 이미지를 축소하므로 실제 게시물에서 인식률 차이를 측정하기 전까지는 기존과 같은 fixed가 기본값
+PREPROCESS_MODE = "fixed"
+# OCR 결과 캐시(common/ocr_cache.py)에서 구분할 전처리 방식 (ocr_cache_profile()이 앞에 OCR 백엔드를 붙임)
+# 이미지는 kakaostory_postprocess와 같은 전처리, 비디오 프레임은 인스타그램 스크립트와 같이 원본 그대로 OCR
+OCR_CACHE_PREPROCESS = f"clahe-{PREPROCESS_MODE}:{','.join(EASYOCR_LANGS)}"
+FRAME_OCR_CACHE_PREPROCESS = "raw:ko,en"
+# 글자 사전 필터 (common/text_prefilter.py): "edges", "mser", "detector" 또는 None (사용 안 함)
+# 글자가 없어 보이는 이미지는 전처리(확대)와 OCR을 생략하고, 그중 TEXT_PREFILTER_AUDIT_RATE 비율은 그대로 OCR하여 놓친 비율을 측정
+# 걸러낸 이미지의 OCR 누락이 실제 게시물에서 측정되기 전까지는 기본으로 끔 (기존과 같은 결과)
+TEXT_PREFILTER: Optional[str] = None
+TEXT_PREFILTER_AUDIT_RATE = 0.05
+# OCR 결과(media_caption)는 facebook_media.json을 수정하지 않고 facebook_media.media_caption.jsonl 사이드카에 기록
 
 # EasyOCR Reader (전역 변수로 한 번만 초기화)
 _easyocr_reader: Optional[easyocr.Reader] = None
+_enrichment_store: Optional[EnrichmentStore] = None
+_ocr_pool: Optional[OCRWorkerPool] = None
+_ocr_pool_checked = False  # 워커 풀 생성 여부를 한 번만 결정 (데몬이 GPU에서 실행 중이면 풀 없이 처리)
+_text_prefilter: Optional[TextPrefilter] = None
+
+
+def get_enrichment_store() -> EnrichmentStore:
+    """OCR/오디오 결과 사이드카 저장소 싱글톤 반환"""
+    global _enrichment_store  # pylint: disable=global-statement
+    if _enrichment_store is None:
+        _enrichment_store = EnrichmentStore(MEDIA_JSON, key_func=post_key)
+    return _enrichment_store
 
 
 def get_easyocr_reader() -> easyocr.Reader:
-    """EasyOCR Reader 싱글톤 패턴으로 초기화"""
+    """EasyOCR Reader 싱글톤 패턴으로 초기화 (OCR 데몬이 실행 중이면 모델을 로드하지 않고 데몬 클라이언트 사용, 백엔드는 OCR_BACKEND)"""
     global _easyocr_reader  # pylint: disable=global-statement
     if _easyocr_reader is None:
-        try:
-            _easyocr_reader = easyocr.Reader(EASYOCR_LANGS, gpu=True)
-            logger.info("✅ EasyOCR GPU 모드로 초기화 완료")
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.warning("⚠️ EasyOCR GPU 초기화 실패, CPU로 재시도합니다: %s", exc)
-            _easyocr_reader = easyocr.Reader(EASYOCR_LANGS, gpu=False)
-            logger.info("✅ EasyOCR CPU 모드로 초기화 완료")
+        _easyocr_reader = connect_ocr_daemon(EASYOCR_LANGS)
+    if _easyocr_reader is None:
+        _easyocr_reader = create_ocr_reader(EASYOCR_LANGS)
     return _easyocr_reader
 
 
+def ocr_cache_profile(preprocess: str = OCR_CACHE_PREPROCESS) -> str:
+    """OCR 캐시 profile (실제 사용하는 OCR 백엔드 + 전처리 방식/언어, 백엔드가 다른 결과는 재사용하지 않음)"""
+    return f"{profile_tag(_easyocr_reader)}:{preprocess}"
+
+
+def create_local_ocr_reader() -> easyocr.Reader:
+    """OCR 워커용 Reader (데몬을 거치지 않고 워커 프로세스에서 직접 모델 로드)"""
+    return create_ocr_reader(EASYOCR_LANGS)
+
+
+def get_ocr_pool() -> Optional[OCRWorkerPool]:
+    """OCR_WORKERS가 1 이상이면 OCR 워커 풀 싱글톤 반환 (아니면, 또는 OCR 데몬이 GPU에서 실행 중이면 None)"""
+    global _ocr_pool, _ocr_pool_checked  # pylint: disable=global-statement
+    if not _ocr_pool_checked and OCR_WORKERS:
+        _ocr_pool_checked = True
+        _ocr_pool = create_ocr_pool(create_local_ocr_reader, OCR_WORKERS, OCR_THREADS_PER_WORKER, EASYOCR_LANGS)
+    return _ocr_pool
+
+
+def get_text_prefilter() -> Optional[TextPrefilter]:
+    """TEXT_PREFILTER가 설정되어 있으면 글자 사전 필터 싱글톤 반환 (아니면 None)"""
+    global _text_prefilter  # pylint: disable=global-statement
+    if _text_prefilter is None and TEXT_PREFILTER:
+        _text_prefilter = create_text_prefilter(TEXT_PREFILTER, TEXT_PREFILTER_AUDIT_RATE, get_easyocr_reader)
+    return _text_prefilter
+
+
+def ocr_readtext(array: np.ndarray) -> list:
+    """워커 풀이 있으면 워커에서, 없으면 이 프로세스의 EasyOCR Reader로 readtext 수행"""
+    pool = get_ocr_pool()
+    if pool is not None:
+        return pool.readtext(array)
+    return get_easyocr_reader().readtext(array)
+
+
 def setup_driver() -> webdriver.Chrome:
     """Chrome WebDriver 설정 (Headless 모드) - 리눅스 환경용 Chrome binary 자동 탐지"""
     import shutil
@@ -214,43 +288,19 @@ def login_facebook(driver: webdriver.Chrome) -> bool:
 
 
 def preprocess_image_bytes(data: bytes) -> Optional[Image.Image]:
-    """이미지 전처리 (크기 조정, 블러, CLAHE, adaptive threshold)"""
+    """이미지 전처리 (PREPROCESS_MODE에 따른 크기 조정, 블러, CLAHE, adaptive threshold)"""
     try:
-        np_array = np.frombuffer(data, dtype=np.uint8)
-        frame = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
-        if frame is None:
-            return None
-
-        # 이미지 크기 3배 확대
-        frame = cv2.resize(frame, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
-        # 중간값 블러 적용
-        frame = cv2.medianBlur(frame, 3)
-
-        # 그레이스케일 변환
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        # CLAHE (Contrast Limited Adaptive Histogram Equalization) 적용
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
-        # Adaptive Threshold 적용
-        thresh = cv2.adaptiveThreshold(
-            enhanced,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            31,
-            2,
-        )
-        return Image.fromarray(thresh)
+        return preprocess_ocr_image(data, PREPROCESS_MODE)
     except Exception as exc:  # pylint: disable=broad-except
         logger.debug("이미지 전처리 실패: %s", exc)
         return None
 
 
-def ocr_image_from_bytes(data: bytes) -> List[str]:
-    """바이너리 이미지 데이터에서 OCR 수행 (리스트 반환)"""
+def prepare_ocr_image(data: bytes) -> Optional[np.ndarray]:
+    """바이너리 이미지 데이터를 OCR 입력(RGB 배열)으로 변환 (전처리 실패 시 원본 이미지, 열 수 없으면 None)"""
     if not data or len(data) == 0:
         logger.debug("빈 이미지 데이터")
-        return []
+        return None
     
     # 전처리 시도
     preprocessed_image = preprocess_image_bytes(data)
@@ -265,36 +315,61 @@ def ocr_image_from_bytes(data: bytes) -> List[str]:
         except Exception as exc:
             logger.debug("이미지 열기 실패 (데이터 크기: %d bytes): %s", len(data), exc)
             # HTML이나 다른 형식일 수 있으므로 조용히 실패 처리
-            return []
+            return None
     else:
         image = preprocessed_image
     
     # RGB 모드로 변환
     if image.mode != "RGB":
         image = image.convert("RGB")
+    return np.array(image)
+
+
+def extract_ocr_texts(results: list) -> List[str]:
+    """EasyOCR 결과에서 신뢰도 0.3 이상인 텍스트 추출 (결과 로그 출력)"""
+    # 신뢰도 0.3 이상인 텍스트만 추출 (임계값 낮춤)
+    texts = [text.strip() for _, text, conf in results if text and conf >= 0.3]
+    
+    if texts:
+        logger.info(f"  ✅ OCR 성공: {len(texts)}개 텍스트 추출 (신뢰도 0.3 이상)")
+        # 디버깅: 추출된 텍스트 일부 출력
+        for idx, text in enumerate(texts[:3], 1):
+            logger.info(f"     {idx}. {text[:50]}")
+    else:
+        logger.info(f"  ℹ️ OCR 결과 없음 (신뢰도 0.3 이상 텍스트 없음)")
+        # 디버깅: 모든 결과 출력 (신뢰도 낮은 것도)
+        all_texts = [text.strip() for _, text, conf in results if text]
+        if all_texts:
+            logger.info(f"  📋 전체 OCR 결과 ({len(all_texts)}개, 신뢰도 무관):")
+            for idx, (_, text, conf) in enumerate(results[:5], 1):
+                logger.info(f"     {idx}. {text[:50]} (신뢰도: {conf:.2f})")
+    
+    return texts
+
+
+def ocr_image_from_bytes(data: bytes) -> List[str]:
+    """바이너리 이미지 데이터에서 OCR 수행 (리스트 반환, 이미 OCR한 이미지면 캐시 결과 사용)"""
+    cache = get_ocr_cache()
+    cached = cache.lookup(ocr_cache_profile(), data) if cache is not None else None
+    if cached is not None:
+        logger.info("  ♻️ OCR 캐시 사용")
+        return extract_ocr_texts(cached)
+    prefilter = get_text_prefilter()
+    if prefilter is not None and not prefilter.should_ocr(data):
+        logger.info("  ⏭️ 글자가 없는 이미지로 판단하여 OCR 생략")
+        return []
+
+    array = prepare_ocr_image(data)
+    if array is None:
+        return []
     
     try:
-        array = np.array(image)
-        reader = get_easyocr_reader()
-        results = reader.readtext(array)
-        
-        # 신뢰도 0.3 이상인 텍스트만 추출 (임계값 낮춤)
-        texts = [text.strip() for _, text, conf in results if text and conf >= 0.3]
-        
-        if texts:
-            logger.info(f"  ✅ OCR 성공: {len(texts)}개 텍스트 추출 (신뢰도 0.3 이상)")
-            # 디버깅: 추출된 텍스트 일부 출력
-            for idx, text in enumerate(texts[:3], 1):
-                logger.info(f"     {idx}. {text[:50]}")
-        else:
-            logger.info(f"  ℹ️ OCR 결과 없음 (신뢰도 0.3 이상 텍스트 없음)")
-            # 디버깅: 모든 결과 출력 (신뢰도 낮은 것도)
-            all_texts = [text.strip() for _, text, conf in results if text]
-            if all_texts:
-                logger.info(f"  📋 전체 OCR 결과 ({len(all_texts)}개, 신뢰도 무관):")
-                for idx, (_, text, conf) in enumerate(results[:5], 1):
-                    logger.info(f"     {idx}. {text[:50]} (신뢰도: {conf:.2f})")
-        
+        results = ocr_readtext(array)
+        if cache is not None:
+            cache.store(ocr_cache_profile(), data, results)
+        texts = extract_ocr_texts(results)
+        if prefilter is not None:
+            prefilter.report(data, texts)
         return texts
     except Exception as exc:  # pylint: disable=broad-except
         logger.warning("이미지 OCR 실패: %s", exc)
@@ -303,8 +378,8 @@ def ocr_image_from_bytes(data: bytes) -> List[str]:
         return []
 
 
-def ocr_image_url(url: str) -> List[str]:
-    """이미지 URL에서 OCR 수행 (리스트 반환)"""
+def download_image_data(url: str) -> Optional[bytes]:
+    """이미지 URL 다운로드 (이미지가 아니거나 실패하면 None)"""
     try:
         response = requests.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
@@ -313,14 +388,14 @@ def ocr_image_url(url: str) -> List[str]:
         content_type = response.headers.get('Content-Type', '').lower()
         if not content_type.startswith('image/'):
             logger.warning(f"⚠️ URL이 이미지가 아닙니다 (Content-Type: {content_type}): {url[:80]}...")
-            return []
+            return None
         
         image_data = response.content
         
         # 데이터 크기 확인
         if len(image_data) == 0:
             logger.warning(f"⚠️ 빈 이미지 데이터: {url[:80]}...")
-            return []
+            return None
         
         # 이미지 데이터인지 간단히 확인 (매직 넘버 체크)
         if not (image_data.startswith(b'\xff\xd8\xff') or  # JPEG
@@ -332,14 +407,103 @@ def ocr_image_url(url: str) -> List[str]:
             logger.debug(f"⚠️ 알 수 없는 이미지 형식 (첫 바이트: {image_data[:10]}): {url[:80]}...")
             # 일단 시도는 해봄 (일부 이미지 형식은 매직 넘버가 다를 수 있음)
         
-        return ocr_image_from_bytes(image_data)
+        return image_data
     except Exception as exc:  # pylint: disable=broad-except
         logger.warning("이미지 OCR 실패 (%s): %s", url[:80] if url else "N/A", exc)
+        return None
+
+
+def ocr_image_url(url: str) -> List[str]:
+    """이미지 URL에서 OCR 수행 (리스트 반환)"""
+    image_data = download_image_data(url)
+    return ocr_image_from_bytes(image_data) if image_data else []
+
+
+def submit_image_url(pool: OCRWorkerPool, url: str) -> Optional[Union[List[str], AsyncResult]]:
+    """
+    이미지 URL을 다운로드/전처리하여 워커에 보내고 결과 핸들 반환 (결과를 기다리지 않음)
+
+    이미 OCR한 이미지면 워커에 보내지 않고 캐시 결과(텍스트 리스트)를 바로 반환하고,
+    글자가 없어 보이는 이미지면 빈 리스트를 반환합니다.
+    """
+    image_data = download_image_data(url)
+    if not image_data:
+        return None
+    cache = get_ocr_cache()
+    cached = cache.lookup(ocr_cache_profile(), image_data) if cache is not None else None
+    if cached is not None:
+        logger.info("  ♻️ OCR 캐시 사용")
+        return extract_ocr_texts(cached)
+    prefilter = get_text_prefilter()
+    if prefilter is not None and not prefilter.should_ocr(image_data):
+        logger.info("  ⏭️ 글자가 없는 이미지로 판단하여 OCR 생략")
+        return []
+    array = prepare_ocr_image(image_data)
+    if array is None:
+        return None
+
+    def on_done(results: list) -> None:
+        # 워커 풀의 결과 처리 스레드에서 호출됨
+        if cache is not None:
+            cache.store(ocr_cache_profile(), image_data, results)
+        if prefilter is not None:
+            prefilter.report(image_data, [text.strip() for _, text, conf in results if text and conf >= 0.3])
+
+    return pool.submit(array, callback=on_done)
+
+
+def ocr_video_frame(image_data: Union[bytes, np.ndarray], array: np.ndarray) -> List[str]:
+    """
+    비디오 프레임 OCR (리스트 반환)
+
+    Args:
+        image_data: OCR 캐시 키로 사용할 프레임 (canvas PNG 바이트 또는 로컬 디코딩한 BGR 배열)
+        array: EasyOCR 입력 RGB 배열
+    """
+    # EasyOCR로 텍스트 추출 (같은 프레임을 이미 OCR했으면 캐시 결과 사용)
+    try:
+        cache = get_ocr_cache()
+        results = cache.lookup(ocr_cache_profile(FRAME_OCR_CACHE_PREPROCESS), image_data) if cache is not None else None
+        if results is None:
+            results = ocr_readtext(array)
+            if cache is not None:
+                cache.store(ocr_cache_profile(FRAME_OCR_CACHE_PREPROCESS), image_data, results)
+
+        # 신뢰도 0.3 이상인 텍스트만 추출 (이미지와 동일하게)
+        texts = [text.strip() for _, text, conf in results if text and conf >= 0.3]
+
+        if texts:
+            logger.info(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출 (신뢰도 0.3 이상)")
+            # 디버깅: 추출된 텍스트 일부 출력
+            for idx, text in enumerate(texts[:3], 1):
+                logger.info(f"     {idx}. {text[:50]}")
+        else:
+            logger.info(f"  ℹ️ OCR 결과 없음 (신뢰도 0.3 이상 텍스트 없음)")
+            # 디버깅: 모든 결과 출력 (신뢰도 낮은 것도)
+            all_texts = [text.strip() for _, text, conf in results if text]
+            if all_texts:
+                logger.info(f"  📋 전체 OCR 결과 ({len(all_texts)}개, 신뢰도 무관):")
+                for idx, (_, text, conf) in enumerate(results[:5], 1):
+                    logger.info(f"     {idx}. {text[:50]} (신뢰도: {conf:.2f})")
+
+        return texts
+    except Exception as e:
+        logger.warning(f"  ⚠️ OCR 처리 실패: {e}")
         return []
 
 
 def ocr_video_frame_from_blob(driver: webdriver.Chrome, video_element, frame_time: float) -> List[str]:
-    """비디오 요소에서 특정 시점의 프레임을 추출하여 OCR 수행 (리스트 반환)"""
+    """
+    비디오 요소에서 특정 시점의 프레임을 추출하여 OCR 수행 (리스트 반환)
+
+    실제 미디어 URL을 찾으면 영상을 내려받아 로컬에서 디코딩하고 (common/video_frames.py),
+    찾지 못했을 때만 브라우저에서 seek 후 canvas로 그려 PNG로 받아옵니다.
+    """
+    frame = get_frame_service().frame_from_element(driver, video_element, frame_time)
+    if frame is not None:
+        logger.info(f"  ✅ 프레임 로컬 디코딩 성공 (time={frame_time}, size={frame.shape[1]}x{frame.shape[0]})")
+        return ocr_video_frame(frame, np.ascontiguousarray(frame[:, :, ::-1]))
+
     try:
         # 비디오 상태 확인
         ready_state = driver.execute_script("return arguments[0].readyState;", video_element)
@@ -421,33 +585,7 @@ def ocr_video_frame_from_blob(driver: webdriver.Chrome, video_element, frame_tim
             logger.warning(f"  ⚠️ 이미지 변환 실패: {e}")
             return []
         
-        # EasyOCR로 텍스트 추출
-        try:
-            array = np.array(image)
-            reader = get_easyocr_reader()
-            results = reader.readtext(array)
-            
-            # 신뢰도 0.3 이상인 텍스트만 추출 (이미지와 동일하게)
-            texts = [text.strip() for _, text, conf in results if text and conf >= 0.3]
-            
-            if texts:
-                logger.info(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출 (신뢰도 0.3 이상)")
-                # 디버깅: 추출된 텍스트 일부 출력
-                for idx, text in enumerate(texts[:3], 1):
-                    logger.info(f"     {idx}. {text[:50]}")
-            else:
-                logger.info(f"  ℹ️ OCR 결과 없음 (신뢰도 0.3 이상 텍스트 없음)")
-                # 디버깅: 모든 결과 출력 (신뢰도 낮은 것도)
-                all_texts = [text.strip() for _, text, conf in results if text]
-                if all_texts:
-                    logger.info(f"  📋 전체 OCR 결과 ({len(all_texts)}개, 신뢰도 무관):")
-                    for idx, (_, text, conf) in enumerate(results[:5], 1):
-                        logger.info(f"     {idx}. {text[:50]} (신뢰도: {conf:.2f})")
-            
-            return texts
-        except Exception as e:
-            logger.warning(f"  ⚠️ OCR 처리 실패: {e}")
-            return []
+        return ocr_video_frame(image_data, np.array(image))
         
     except Exception as e:
         logger.warning(f"  ⚠️ 프레임 OCR 실패 (time={frame_time}): {e}")
@@ -616,11 +754,17 @@ def process_media_url_with_selenium(driver: webdriver.Chrome, url: str) -> List[
 
 
 def process_media_urls(media_urls: List[str], driver: Optional[webdriver.Chrome] = None) -> List[str]:
-    """미디어 URL 리스트를 처리하여 OCR 텍스트 리스트 반환"""
+    """
+    미디어 URL 리스트를 처리하여 OCR 텍스트 리스트 반환 (미디어 순서 유지)
+
+    OCR 워커 풀이 있으면 직접 이미지 URL은 워커에 보내고 다음 미디어를 계속 처리한 뒤 마지막에 결과를 모읍니다.
+    """
     if not media_urls:
         return []
     
-    ocr_texts: List[str] = []
+    pool = get_ocr_pool()
+    # 미디어 순서대로 (번호, 텍스트 리스트 또는 워커 결과 핸들)
+    media_results: List[Tuple[int, Union[List[str], AsyncResult]]] = []
     
     for idx, url in enumerate(media_urls, 1):
         logger.info("  🔍 미디어 #%d/%d 처리 중...", idx, len(media_urls))
@@ -628,47 +772,66 @@ def process_media_urls(media_urls: List[str], driver: Optional[webdriver.Chrome]
         # Facebook 페이지 URL인 경우 Selenium 사용
         if "facebook.com" in url and ("/reel/" in url or "/video/" in url or "/watch/" in url or "/photo/" in url):
             if driver:
-                texts = process_media_url_with_selenium(driver, url)
-                if texts:
-                    ocr_texts.extend(texts)
-                    logger.info("  ✅ 미디어 #%d OCR 완료 (텍스트 %d개)", idx, len(texts))
-                else:
-                    logger.info("  ℹ️ 미디어 #%d OCR 결과 없음", idx)
+                media_results.append((idx, process_media_url_with_selenium(driver, url)))
             else:
                 logger.warning("  ⚠️ Selenium driver가 없어 처리할 수 없습니다.")
         else:
             # 직접 이미지/비디오 URL인 경우
             try:
-                texts = ocr_image_url(url)
-                if texts:
-                    ocr_texts.extend(texts)
-                    logger.info("  ✅ 미디어 #%d OCR 완료 (텍스트 %d개)", idx, len(texts))
+                if pool is not None:
+                    handle = submit_image_url(pool, url)
+                    if isinstance(handle, AsyncResult):
+                        logger.info("  📤 미디어 #%d OCR 워커에 전달", idx)
+                    if handle is not None:
+                        media_results.append((idx, handle))
                 else:
-                    logger.info("  ℹ️ 미디어 #%d OCR 결과 없음", idx)
+                    media_results.append((idx, ocr_image_url(url)))
             except Exception as exc:
                 logger.warning("  ⚠️ 미디어 #%d 처리 실패: %s", idx, exc)
                 continue
     
+    ocr_texts: List[str] = []
+    for idx, result in media_results:
+        if isinstance(result, AsyncResult):
+            try:
+                logger.info("  📥 미디어 #%d OCR 결과", idx)
+                texts = extract_ocr_texts(result.get())
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning("  ⚠️ 미디어 #%d 처리 실패: %s", idx, exc)
+                continue
+        else:
+            texts = result
+        if texts:
+            ocr_texts.extend(texts)
+            logger.info("  ✅ 미디어 #%d OCR 완료 (텍스트 %d개)", idx, len(texts))
+        else:
+            logger.info("  ℹ️ 미디어 #%d OCR 결과 없음", idx)
+    
     return ocr_texts
 
 
 def process_single_post(post: dict, driver: Optional[webdriver.Chrome] = None) -> dict:
-    """단일 게시물의 media_urls를 처리하여 media_caption 업데이트"""
+    """
+    단일 게시물의 media_urls를 처리하여 media_caption 업데이트
+
+    결과는 사이드카에만 기록하고(원본 게시물은 수정하지 않음), 사이드카 값을 합친 게시물을 반환합니다.
+    """
     media_urls: List[str] = post.get("media_urls", [])
+    enrichment = get_enrichment_store()
     
     if not media_urls:
         logger.info("  ℹ️ media_urls가 없어 OCR 스킵")
-        return post
+        return enrichment.join(post)
     
-    # 기존 media_caption 확인
-    existing_caption = post.get("media_caption", "")
+    # 기존 media_caption 확인 (사이드카 값 우선)
+    existing_caption = enrichment.value(post, "media_caption", "")
     if isinstance(existing_caption, list):
         existing_caption = "\n".join(existing_caption)
     existing_caption = existing_caption.strip()
     
     if existing_caption and len(existing_caption) >= MIN_CAPTION_LENGTH:
         logger.info("  ℹ️ 기존 media_caption이 이미 존재하여 OCR 스킵")
-        return post
+        return enrichment.join(post)
     
     # OCR 수행
     logger.info("  🔍 OCR 시작 (media_urls: %d개)", len(media_urls))
@@ -676,32 +839,28 @@ def process_single_post(post: dict, driver: Optional[webdriver.Chrome] = None) -
     
     # 결과 업데이트 (리스트로 저장)
     if ocr_texts:
-        post["media_caption"] = ocr_texts
+        enrichment.set(post, "media_caption", ocr_texts)
         logger.info("  ✅ media_caption 업데이트 완료 (%d개 텍스트)", len(ocr_texts))
     else:
         logger.info("  ℹ️ OCR 결과 없음, media_caption 업데이트 안 함")
     
-    return post
+    return enrichment.join(post)
 
 
 def main():
     """메인 함수 - facebook_media.json 파일의 게시물들에 OCR 수행"""
-    import sys
-    
-    # JSON 파일 경로 (현재 파일 위치 기준)
-    BASE_DIR = Path(__file__).parent
-    MEDIA_JSON = BASE_DIR / "facebook_media.json"
+    # facebook_media.json은 읽기만 함 (크롤링 저널 반영, media_urls가 있는 게시물만 스트리밍으로 로드)
+    store = JournaledJsonStore(MEDIA_JSON)
+    enrichment = get_enrichment_store()
     
-    if not MEDIA_JSON.exists():
+    if not store.exists():
         logger.error(f"❌ {MEDIA_JSON} 파일을 찾을 수 없습니다.")
         sys.exit(1)
     
-    # JSON 파일 로드
     logger.info(f"📂 {MEDIA_JSON} 파일 로드 중...")
     try:
-        with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-            posts = json.load(f)
-        logger.info(f"✅ {len(posts)}개의 게시물 로드 완료")
+        posts = [post for _, post in store.iter_records(where=lambda item: bool(item.get("media_urls")))]
+        logger.info(f"✅ media_urls가 있는 게시물 {len(posts)}개 로드 완료")
     except Exception as e:
         logger.error(f"❌ JSON 파일 로드 실패: {e}")
         sys.exit(1)
@@ -732,8 +891,8 @@ def main():
             logger.info(f"\n[{idx}/{len(posts)}] 게시물 처리 중...")
             logger.info(f"  📌 permalink: {post.get('permalink', 'N/A')[:80]}...")
             
-            # media_caption이 이미 존재하는지 확인
-            existing_caption = post.get("media_caption", "")
+            # media_caption이 이미 존재하는지 확인 (사이드카 값 우선)
+            existing_caption = enrichment.value(post, "media_caption", "")
             if isinstance(existing_caption, list):
                 existing_caption = "\n".join(existing_caption)
             existing_caption = existing_caption.strip()
@@ -744,33 +903,21 @@ def main():
                 continue
             
             try:
-                # 게시물 처리
+                # 게시물 처리 (OCR 결과는 사이드카에 바로 기록되어 중단 시에도 보존)
                 updated_post = process_single_post(post, driver)
                 
-                # 업데이트된 게시물로 교체
-                posts[idx - 1] = updated_post
+                # media_caption이 업데이트되었는지 확인
+                existing_caption = updated_post.get("media_caption", "")
+                if isinstance(existing_caption, list):
+                    existing_caption = "\n".join(existing_caption)
+                existing_caption = existing_caption.strip()
                 
-                # JSON 파일 저장 (매번 저장하여 중단 시에도 진행 상황 보존)
-                try:
-                    with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-                        json.dump(posts, f, ensure_ascii=False, indent=2)
-                    
-                    # media_caption이 업데이트되었는지 확인
-                    existing_caption = updated_post.get("media_caption", "")
-                    if isinstance(existing_caption, list):
-                        existing_caption = "\n".join(existing_caption)
-                    existing_caption = existing_caption.strip()
-                    
-                    if existing_caption and len(existing_caption) >= MIN_CAPTION_LENGTH:
-                        processed_count += 1
-                        logger.info(f"  ✅ 게시물 #{idx} 처리 완료 및 저장 완료")
-                    else:
-                        skipped_count += 1
-                        logger.info(f"  ⏭️ 게시물 #{idx} 스킵 (OCR 결과 없음 또는 기존 caption 존재)")
-                        
-                except Exception as e:
-                    logger.error(f"  ❌ JSON 저장 실패: {e}")
-                    error_count += 1
+                if existing_caption and len(existing_caption) >= MIN_CAPTION_LENGTH:
+                    processed_count += 1
+                    logger.info(f"  ✅ 게시물 #{idx} 처리 완료 및 저장 완료")
+                else:
+                    skipped_count += 1
+                    logger.info(f"  ⏭️ 게시물 #{idx} 스킵 (OCR 결과 없음 또는 기존 caption 존재)")
                 
                 # 요청 간 딜레이 (Facebook 차단 방지)
                 time.sleep(2)
@@ -803,6 +950,15 @@ def main():
                 logger.info("🔒 브라우저 종료")
             except Exception as e:
                 logger.warning(f"⚠️ 브라우저 종료 중 오류: {e}")
+        if _ocr_pool is not None:
+            _ocr_pool.terminate()
+        if _text_prefilter is not None:
+            _text_prefilter.log_stats()
+        # 사이드카 기록 동기화
+        try:
+            enrichment.close()
+        except Exception as e:
+            logger.error(f"❌ media_caption 사이드카 정리 실패: {e}")
 
 
 if __name__ == "__main__":
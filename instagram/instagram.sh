@@ -14,6 +14,8 @@ python ./instagram_save_userinfo.py
 python ./instagram_crawling_postpermalink.py
 # 위에서 수집된 permalink로 들어가 게시물에 지정한 해시태그가 있다면 게시물 수집
 python ./instagram_filter_userposts.py
+# OCR 데몬 시작 (EasyOCR 모델을 한 번만 로드해서 OCR 스크립트들이 공유, 실패하면 스크립트별로 직접 로드)
+(cd "$(dirname "$SCRIPT_DIR")" && python -m common.ocr_daemon start) || true
 # 모인 데이터에서 Carousel_Album의 미디어 개수 정확히 세기 + OCR 분석
 python ./instagram_extract_imgurl.py
 # 모인 데이터에서 Image, Video가 media_type인 것들에 대해 OCR 분석
@@ -13,8 +13,13 @@ from dotenv import load_dotenv
 import os
 import pickle
 import shutil
+import sys
 import logging
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 USERNAME = os.getenv("IG_USERNAME")
@@ -370,10 +375,10 @@ def step1_collect_post_permalinks(test_mode=True):
     # instagram_media.json에서도 기존 permalink 로드 (추가 중복 체크용)
     print(f"\n📂 {MEDIA_JSON} 파일 로딩 중 (추가 중복 체크용)...")
     try:
-        if MEDIA_JSON.exists():
-            with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-                media_data = json.load(f)
-            for item in media_data:
+        media_store = JournaledJsonStore(MEDIA_JSON)
+        if media_store.exists():
+            # 다른 단계가 남긴 저널까지 반영, permalink 필드만 필요하므로 스트리밍으로 읽음
+            for _, item in media_store.iter_records():
                 permalink = item.get("permalink")
                 if permalink:
                     shortcode = normalize_permalink(permalink)
@@ -3,10 +3,10 @@ instagram_media.json에서 VIDEO와 CAROUSEL_ALBUM 타입의 미디어를 찾아
 오디오를 추출하고 audio_caption으로 저장하는 스크립트
 """
 
-import json
+import sys
 import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -21,9 +21,19 @@ from instagram_extract_voice import (
     process_video_with_ffmpeg_whisper
 )
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.speech_vad import get_speech_recorder  # noqa: E402
+from instagram_keys import media_key  # noqa: E402
+
 # 파일 경로 (현재 파일 위치 기준)
 BASE_DIR = Path(__file__).parent
 DATA_FILE = BASE_DIR / "instagram_media.json"
+# instagram_media.json은 읽기만 하고, 결과(audio_caption, is_video)는
+# instagram_media.audio_caption.jsonl, instagram_media.is_video.jsonl 사이드카에 기록
+AUDIO_RESULT_FIELDS = ("audio_caption", "audio_speech", "is_video")
 LOG_PATH = BASE_DIR / "instagram.log"
 
 def setup_logging(log_file: str = "instagram.log") -> None:
@@ -55,40 +65,59 @@ def setup_logging(log_file: str = "instagram.log") -> None:
     logging.info(f"로깅이 시작되었습니다. 로그 파일: {log_file}")
 
 
-def load_media_data() -> List[Dict]:
-    """instagram_media.json 파일을 로드"""
+_media_store: Optional[JournaledJsonStore] = None
+_enrichment_store: Optional[EnrichmentStore] = None
+
+
+def get_media_store() -> JournaledJsonStore:
+    """instagram_media.json 저장소 (스냅샷 + 저널, 한 번만 생성, 이 스크립트는 읽기만 함)"""
+    global _media_store
+    if _media_store is None:
+        _media_store = JournaledJsonStore(DATA_FILE)
+    return _media_store
+
+
+def get_enrichment_store() -> EnrichmentStore:
+    """OCR/오디오 결과 사이드카 저장소 (한 번만 생성)"""
+    global _enrichment_store
+    if _enrichment_store is None:
+        _enrichment_store = EnrichmentStore(DATA_FILE, key_func=media_key)
+    return _enrichment_store
+
+
+def is_video_or_carousel(item: Dict) -> bool:
+    """VIDEO 또는 CAROUSEL_ALBUM 타입인지 확인"""
+    return (item.get("media_type") or "").upper() in ("VIDEO", "CAROUSEL_ALBUM")
+
+
+def load_media_data() -> List[Tuple[int, Dict]]:
+    """
+    instagram_media.json에서 VIDEO와 CAROUSEL_ALBUM 타입 항목만 스트리밍으로 로드
+
+    Returns:
+        List[Tuple[int, Dict]]: (원본 인덱스, 사이드카 값을 합친 항목) 리스트 - 다른 타입의 항목은 메모리에 올리지 않음
+    """
     if not DATA_FILE.exists():
         print(f"❌ {DATA_FILE} 파일을 찾을 수 없습니다.")
         return []
-    
-    with open(DATA_FILE, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            else:
-                print("❌ JSON 파일 형식이 올바르지 않습니다. 리스트 형식이어야 합니다.")
-                return []
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON 파일을 읽는 중 오류 발생: {e}")
-            return []
-
-
-def save_media_data(data: List[Dict]) -> None:
-    """instagram_media.json 파일에 저장"""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"✅ {DATA_FILE} 파일에 저장 완료")
+    records = get_media_store().iter_records(where=is_video_or_carousel)
+    return list(get_enrichment_store().iter_joined(records))
+
+
+def save_media_item(item: Dict) -> None:
+    """처리한 항목의 audio_caption, is_video를 사이드카에 기록 (instagram_media.json은 수정하지 않음)"""
+    get_enrichment_store().update(item, {field: item[field] for field in AUDIO_RESULT_FIELDS if field in item})
+
+
+def save_media_data() -> None:
+    """사이드카 기록을 디스크에 동기화"""
+    get_enrichment_store().close()
+    print(f"✅ {', '.join(get_enrichment_store().sidecar_path(field).name for field in AUDIO_RESULT_FIELDS)} 저장 완료")
 
 
 def filter_video_and_carousel_media(media_list: List[Dict]) -> List[Dict]:
     """VIDEO와 CAROUSEL_ALBUM 타입의 미디어만 필터링"""
-    filtered = []
-    for item in media_list:
-        media_type = item.get("media_type", "").upper()
-        if media_type in ["VIDEO", "CAROUSEL_ALBUM"]:
-            filtered.append(item)
-    return filtered
+    return [item for item in media_list if is_video_or_carousel(item)]
 
 
 def extract_audio_from_carousel(driver, post_url: str) -> tuple:
@@ -211,21 +240,12 @@ def main():
     print("📹 Instagram 미디어 오디오 추출 시작")
     print("=" * 60)
     
-    # 데이터 로드
-    print("\n📂 데이터 파일 로드 중...")
-    media_list = load_media_data()
-    if not media_list:
-        print("❌ 로드할 데이터가 없습니다.")
-        return
-    
-    print(f"✅ 총 {len(media_list)}개의 미디어 항목 로드 완료")
+    # 데이터 로드 (VIDEO와 CAROUSEL_ALBUM만 스트리밍으로 필터링)
+    print("\n📂 데이터 파일 로드 중 (VIDEO와 CAROUSEL_ALBUM 타입 필터링)...")
+    filtered_media = load_media_data()
     
-    # VIDEO와 CAROUSEL_ALBUM 필터링
-    print("\n🔍 VIDEO와 CAROUSEL_ALBUM 타입 필터링 중...")
-    filtered_media = filter_video_and_carousel_media(media_list)
-    
-    video_count = sum(1 for item in filtered_media if item.get("media_type", "").upper() == "VIDEO")
-    carousel_count = sum(1 for item in filtered_media if item.get("media_type", "").upper() == "CAROUSEL_ALBUM")
+    video_count = sum(1 for _, item in filtered_media if item.get("media_type", "").upper() == "VIDEO")
+    carousel_count = sum(1 for _, item in filtered_media if item.get("media_type", "").upper() == "CAROUSEL_ALBUM")
     
     print(f"📊 필터링 결과:")
     print(f"   - VIDEO: {video_count}개")
@@ -241,21 +261,22 @@ def main():
     media_without_audio = []
     media_with_audio = []
     media_without_video = []
-    for item in filtered_media:
+    for entry in filtered_media:
+        item = entry[1]
         audio_caption = item.get("audio_caption")
         media_type = item.get("media_type", "").upper()
         is_video = item.get("is_video")
         
         # 캐러셀 앨범이고 is_video="N"이면 스킵
         if media_type == "CAROUSEL_ALBUM" and is_video == "N":
-            media_without_video.append(item)
+            media_without_video.append(entry)
             continue
         
         # audio_caption이 없거나 빈 문자열이면 처리 대상
         if not audio_caption or (isinstance(audio_caption, str) and not audio_caption.strip()):
-            media_without_audio.append(item)
+            media_without_audio.append(entry)
         else:
-            media_with_audio.append(item)
+            media_with_audio.append(entry)
     
     print(f"📊 필터링 결과:")
     print(f"   - audio_caption 있음 (스킵): {len(media_with_audio)}개")
@@ -280,7 +301,7 @@ def main():
         processed_count = 0
         success_count = 0
         
-        for idx, media_item in enumerate(filtered_media, 1):
+        for idx, (_, media_item) in enumerate(filtered_media, 1):
             media_id = media_item.get("id", "unknown")
             media_type = media_item.get("media_type", "").upper()
             permalink = media_item.get("permalink", "")
@@ -300,6 +321,7 @@ def main():
             
             processed_count += 1
             audio_caption = None
+            get_speech_recorder().reset()  # 이 게시물(캐러셀이면 모든 비디오)의 음성 길이/건너뛴 길이 합계
             
             try:
                 if media_type == "VIDEO":
@@ -317,6 +339,7 @@ def main():
                     if is_video == "N":
                         print(f"   ⏭️  스킵 (비디오가 없는 캐러셀): {media_id}")
                         media_item["audio_caption"] = ""  # 빈 문자열로 표시
+                        save_media_item(media_item)
                         continue
                     
                     if audio_captions:
@@ -338,14 +361,20 @@ def main():
                 import traceback
                 traceback.print_exc()
             
-            # 중간 저장 (10개마다)
-            if processed_count % 10 == 0:
-                print(f"\n💾 중간 저장 중... ({processed_count}개 처리됨)")
-                save_media_data(media_list)
+            speech_summary = get_speech_recorder().summary()
+            if speech_summary:
+                media_item["audio_speech"] = speech_summary
+                print(
+                    f"   🗣️ 음성 {speech_summary['speech_seconds']}초 / {speech_summary['duration_seconds']}초 "
+                    f"(건너뜀 {speech_summary['skipped_seconds']}초)"
+                )
+            
+            # 처리한 항목은 바로 사이드카에 기록 (강제 중단 시에도 보존)
+            save_media_item(media_item)
         
         # 최종 저장
         print(f"\n💾 최종 저장 중...")
-        save_media_data(media_list)
+        save_media_data()
         
         print(f"\n✅ 처리 완료!")
         print(f"   - 총 처리: {processed_count}개")
@@ -353,6 +382,8 @@ def main():
         print(f"   - 실패: {processed_count - success_count}개")
         
     finally:
+        # 중단된 경우에도 사이드카 기록을 디스크에 동기화
+        get_enrichment_store().close()
         print("\n🔚 브라우저 종료 중...")
         driver.quit()
         print("✅ 완료")
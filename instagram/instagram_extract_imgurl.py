@@ -1,5 +1,5 @@
-import json
 import os
+import sys
 import time
 import base64
 import io
@@ -15,11 +15,22 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from dotenv import load_dotenv
-import easyocr
 import numpy as np
 from PIL import Image
 import logging
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore
+from common.json_journal import JournaledJsonStore
+from common.json_stream import field_filter
+from common.ocr_backend import create_ocr_reader, profile_tag
+from common.ocr_cache import get_ocr_cache
+from common.ocr_daemon import connect_ocr_daemon
+from common.video_frames import get_frame_service
+from common.media_store import close_on_exit
+from instagram_keys import media_key
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 USERNAME = os.getenv("IG_USERNAME")
@@ -30,6 +41,16 @@ BASE_DIR = Path(__file__).parent
 LOG_PATH = BASE_DIR / "instagram.log"
 JSON_PATH = BASE_DIR / "instagram_media.json"
 
+# instagram_media.json 저장 설정
+# - 전체 파일을 메모리에 올리지 않고 CAROUSEL_ALBUM 항목만 스트리밍으로 읽음
+# - media_url/media_count가 바뀐 게시글만 instagram_media.journal.jsonl에 기록하고, 종료 시(또는 일정 개수마다) 원본에 병합
+# - OCR 결과(media_caption)는 instagram_media.media_caption.jsonl 사이드카에 shortcode별로 기록
+# - 이미지마다 바로 쓰지 않고 메모리에 모았다가 WRITE_FLUSH_EVERY개(게시글 기준) 또는 WRITE_FLUSH_INTERVAL초마다 한 번에 기록
+#   (같은 게시글의 media_caption이 이미지마다 바뀌어도 마지막 값 한 줄만 기록, 종료/SIGTERM 시에도 기록)
+MEDIA_JOURNAL_COMPACT_EVERY = 200
+WRITE_FLUSH_EVERY = 10
+WRITE_FLUSH_INTERVAL = 30.0
+
 def setup_logging(log_file: str = "instagram.log") -> None:
     """로깅 설정: 파일과 콘솔 모두에 로그 출력"""
     logger = logging.getLogger()
@@ -64,16 +85,25 @@ logging.info("=" * 80)
 logging.info("프로그램 시작 - instagram_extract_imgurl.py")
 logging.info("=" * 80)
 
-# JSON 파일 불러오기
+# JSON 파일 불러오기 (CAROUSEL_ALBUM 타입만 스트리밍으로 필터링, 원본 인덱스와 함께 저장)
 print("📂 instagram_media.json 파일 로딩 중...")
-with open(JSON_PATH, "r", encoding="utf-8") as f:
-    media_data = json.load(f)
-
-# CAROUSEL_ALBUM 타입만 필터링 (원본 인덱스와 함께 저장)
+media_store = JournaledJsonStore(
+    JSON_PATH,
+    compact_threshold=MEDIA_JOURNAL_COMPACT_EVERY,
+    flush_every=WRITE_FLUSH_EVERY,
+    flush_interval=WRITE_FLUSH_INTERVAL,
+)
+enrichment = EnrichmentStore(
+    JSON_PATH,
+    key_func=media_key,
+    flush_every=WRITE_FLUSH_EVERY,
+    flush_interval=WRITE_FLUSH_INTERVAL,
+)
+# 예상치 못한 종료(SIGTERM 등)에도 모아 둔 기록이 남도록 등록 (close는 여러 번 호출해도 안전)
+close_on_exit(media_store.close, enrichment.close)
 carousel_posts = []
-for idx, item in enumerate(media_data):
-    if item.get("media_type") == "CAROUSEL_ALBUM":
-        carousel_posts.append({"index": idx, "data": item})
+for idx, item in media_store.iter_records(where=field_filter(media_type="CAROUSEL_ALBUM")):
+    carousel_posts.append({"index": idx, "data": item})
 
 print(f"✅ CAROUSEL_ALBUM 타입 게시글 {len(carousel_posts)}개 발견\n")
 
@@ -82,12 +112,17 @@ _easyocr_reader = None
 def get_easyocr_reader():
     global _easyocr_reader
     if _easyocr_reader is None:
-        try:
-            _easyocr_reader = easyocr.Reader(["ko", "en"], gpu=True)
-        except Exception:
-            _easyocr_reader = easyocr.Reader(["ko", "en"], gpu=False)
+        # OCR 데몬이 실행 중이면 모델을 로드하지 않고 데몬 클라이언트 사용
+        _easyocr_reader = connect_ocr_daemon(["ko", "en"])
+    if _easyocr_reader is None:
+        # OCR_BACKEND 설정에 따라 EasyOCR(GPU 시도 후 CPU) 또는 ONNX Runtime CPU 백엔드
+        _easyocr_reader = create_ocr_reader(["ko", "en"])
     return _easyocr_reader
 
+# OCR 결과 캐시(common/ocr_cache.py)에서 구분할 OCR 백엔드와 전처리 방식 (전처리 없이 원본 이미지를 OCR)
+def ocr_cache_profile():
+    return f"{profile_tag(_easyocr_reader)}:raw:ko,en"
+
 # 이미지 URL에서 OCR 수행 함수
 def ocr_image_url(url: str) -> list:
     """이미지 URL에서 OCR을 수행하여 텍스트 리스트 반환"""
@@ -97,15 +132,21 @@ def ocr_image_url(url: str) -> list:
         response.raise_for_status()
         image_data = response.content
         
-        # 이미지 열기
-        image = Image.open(io.BytesIO(image_data))
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        # EasyOCR로 텍스트 추출
-        array = np.array(image)
-        reader = get_easyocr_reader()
-        results = reader.readtext(array)
+        # 다른 게시물/플랫폼에서 이미 OCR한 이미지면 캐시 결과 사용
+        cache = get_ocr_cache()
+        results = cache.lookup(ocr_cache_profile(), image_data) if cache is not None else None
+        if results is None:
+            # 이미지 열기
+            image = Image.open(io.BytesIO(image_data))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            
+            # EasyOCR로 텍스트 추출
+            array = np.array(image)
+            reader = get_easyocr_reader()
+            results = reader.readtext(array)
+            if cache is not None:
+                cache.store(ocr_cache_profile(), image_data, results)
         
         # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
         texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
@@ -115,9 +156,41 @@ def ocr_image_url(url: str) -> list:
         print(f"  ⚠️ 이미지 OCR 실패 ({url[:50]}...): {e}")
         return []
 
+# 비디오 프레임 OCR 함수 (canvas로 받은 PNG 또는 로컬에서 디코딩한 프레임)
+def ocr_video_frame(image_data, array):
+    """비디오 프레임 OCR (image_data: 캐시 키로 쓸 PNG 바이트 또는 BGR 배열, array: EasyOCR 입력 RGB 배열)"""
+    # EasyOCR로 텍스트 추출 (같은 프레임을 이미 OCR했으면 캐시 결과 사용)
+    try:
+        cache = get_ocr_cache()
+        results = cache.lookup(ocr_cache_profile(), image_data) if cache is not None else None
+        if results is None:
+            reader = get_easyocr_reader()
+            results = reader.readtext(array)
+            if cache is not None:
+                cache.store(ocr_cache_profile(), image_data, results)
+
+        # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
+        texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
+
+        if texts:
+            print(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출")
+        else:
+            print(f"  ℹ️ OCR 결과 없음")
+
+        return texts  # 리스트 반환
+    except Exception as e:
+        print(f"  ⚠️ OCR 처리 실패: {e}")
+        return []
+
 # 비디오 프레임에서 OCR 수행 함수
 def ocr_video_frame_from_blob(driver, video_element, frame_time):
     """비디오 요소에서 특정 시점의 프레임을 추출하여 OCR 수행 (리스트 반환)"""
+    # 실제 미디어 URL을 찾으면 영상을 내려받아 로컬에서 디코딩 (찾지 못했을 때만 아래 canvas 방식)
+    frame = get_frame_service().frame_from_element(driver, video_element, frame_time)
+    if frame is not None:
+        print(f"  ✅ 프레임 로컬 디코딩 성공 (time={frame_time}, size={frame.shape[1]}x{frame.shape[0]})")
+        return ocr_video_frame(frame, np.ascontiguousarray(frame[:, :, ::-1]))
+
     try:
         # 비디오 상태 확인
         ready_state = driver.execute_script("return arguments[0].readyState;", video_element)
@@ -204,24 +277,7 @@ def ocr_video_frame_from_blob(driver, video_element, frame_time):
             print(f"  ⚠️ 이미지 변환 실패: {e}")
             return []
         
-        # EasyOCR로 텍스트 추출
-        try:
-            array = np.array(image)
-            reader = get_easyocr_reader()
-            results = reader.readtext(array)
-            
-            # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
-            texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
-            
-            if texts:
-                print(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출")
-            else:
-                print(f"  ℹ️ OCR 결과 없음")
-            
-            return texts  # 리스트 반환
-        except Exception as e:
-            print(f"  ⚠️ OCR 처리 실패: {e}")
-            return []
+        return ocr_video_frame(image_data, np.array(image))
         
     except Exception as e:
         print(f"  ⚠️ 프레임 OCR 실패 (time={frame_time}): {e}")
@@ -529,7 +585,7 @@ try:
                                     print(f"  ✅ 이미지 OCR 완료: {len(ocr_texts)}개 텍스트 추출")
                                     
                                     # 기존 media_caption 가져오기
-                                    existing_caption = media_data[original_index].get("media_caption", [])
+                                    existing_caption = enrichment.value(post, "media_caption", [])
                                     
                                     # 기존 media_caption이 문자열이면 리스트로 변환
                                     if isinstance(existing_caption, str):
@@ -546,17 +602,15 @@ try:
                                             seen_texts.add(ocr_text)
                                             combined_caption.append(ocr_text)
                                     
-                                    media_data[original_index]["media_caption"] = combined_caption
                                     total_chars = sum(len(text) for text in combined_caption)
                                     print(f"  ✅ media_caption 업데이트 완료 (항목 {len(combined_caption)}개, 총 {total_chars}자)")
                                     
-                                    # media_caption 업데이트 후 즉시 JSON 파일에 저장 (강제 중단 시에도 보존)
+                                    # media_caption은 즉시 사이드카에 저장 (강제 중단 시에도 보존, instagram_media.json은 다시 쓰지 않음)
                                     try:
-                                        with open(JSON_PATH, "w", encoding="utf-8") as f:
-                                            json.dump(media_data, f, ensure_ascii=False, indent=2)
-                                        print(f"  💾 media_caption JSON 저장 완료")
+                                        enrichment.set(post, "media_caption", combined_caption)
+                                        print(f"  💾 media_caption 사이드카 저장 요청 완료")
                                     except Exception as e:
-                                        print(f"  ⚠️ media_caption JSON 저장 실패: {e}")
+                                        print(f"  ⚠️ media_caption 사이드카 저장 실패: {e}")
                                 else:
                                     print(f"  ℹ️ 이미지 OCR 결과 없음")
                     
@@ -644,7 +698,7 @@ try:
                                     print(f"  ✅ 이미지 OCR 완료: {len(ocr_texts)}개 텍스트 추출")
                                     
                                     # 기존 media_caption 가져오기
-                                    existing_caption = media_data[original_index].get("media_caption", [])
+                                    existing_caption = enrichment.value(post, "media_caption", [])
                                     
                                     # 기존 media_caption이 문자열이면 리스트로 변환
                                     if isinstance(existing_caption, str):
@@ -661,17 +715,15 @@ try:
                                             seen_texts.add(ocr_text)
                                             combined_caption.append(ocr_text)
                                     
-                                    media_data[original_index]["media_caption"] = combined_caption
                                     total_chars = sum(len(text) for text in combined_caption)
                                     print(f"  ✅ media_caption 업데이트 완료 (항목 {len(combined_caption)}개, 총 {total_chars}자)")
                                     
-                                    # media_caption 업데이트 후 즉시 JSON 파일에 저장 (강제 중단 시에도 보존)
+                                    # media_caption은 즉시 사이드카에 저장 (강제 중단 시에도 보존, instagram_media.json은 다시 쓰지 않음)
                                     try:
-                                        with open(JSON_PATH, "w", encoding="utf-8") as f:
-                                            json.dump(media_data, f, ensure_ascii=False, indent=2)
-                                        print(f"  💾 media_caption JSON 저장 완료")
+                                        enrichment.set(post, "media_caption", combined_caption)
+                                        print(f"  💾 media_caption 사이드카 저장 요청 완료")
                                     except Exception as e:
-                                        print(f"  ⚠️ media_caption JSON 저장 실패: {e}")
+                                        print(f"  ⚠️ media_caption 사이드카 저장 실패: {e}")
                                 else:
                                     print(f"  ℹ️ 이미지 OCR 결과 없음")
                     
@@ -764,7 +816,7 @@ try:
                                     # OCR 결과를 media_caption에 저장 (리스트 형식)
                                     if ocr_texts:
                                         # 기존 media_caption이 있으면 병합 (중복 제거)
-                                        existing_caption = media_data[original_index].get("media_caption", [])
+                                        existing_caption = enrichment.value(post, "media_caption", [])
                                         
                                         # 기존 media_caption이 문자열이면 리스트로 변환
                                         if isinstance(existing_caption, str):
@@ -781,17 +833,15 @@ try:
                                                 seen_texts.add(ocr_text)
                                                 combined_caption.append(ocr_text)
                                         
-                                        media_data[original_index]["media_caption"] = combined_caption
                                         total_chars = sum(len(text) for text in combined_caption)
                                         print(f"✅ media_caption 업데이트 완료 (항목 {len(combined_caption)}개, 총 {total_chars}자)")
                                         
-                                        # media_caption 업데이트 후 즉시 JSON 파일에 저장 (강제 중단 시에도 보존)
+                                        # media_caption은 즉시 사이드카에 저장 (강제 중단 시에도 보존, instagram_media.json은 다시 쓰지 않음)
                                         try:
-                                            with open(JSON_PATH, "w", encoding="utf-8") as f:
-                                                json.dump(media_data, f, ensure_ascii=False, indent=2)
-                                            print(f"💾 media_caption JSON 저장 완료")
+                                            enrichment.set(post, "media_caption", combined_caption)
+                                            print(f"💾 media_caption 사이드카 저장 요청 완료")
                                         except Exception as e:
-                                            print(f"⚠️ media_caption JSON 저장 실패: {e}")
+                                            print(f"⚠️ media_caption 사이드카 저장 실패: {e}")
                                     else:
                                         print(f"⚠️ OCR 결과가 없습니다.")
                                     
@@ -864,7 +914,7 @@ try:
         
         # 원본 데이터의 media_url과 media_count 업데이트
         # 기존 media_url 리스트 가져오기 (없으면 빈 리스트)
-        existing_media_urls = media_data[original_index].get("media_url", [])
+        existing_media_urls = post.get("media_url", [])
         if not isinstance(existing_media_urls, list):
             existing_media_urls = []
         
@@ -879,23 +929,10 @@ try:
         existing_urls_set = set(existing_media_urls)
         updated_media_urls = list(existing_media_urls) + [url for url in url_list if url not in existing_urls_set]
         
-        # media_url 업데이트 (media_caption은 이미 위에서 업데이트됨)
-        # audio_caption 보존 (instagram_extract_audio_from_json.py에서 추출한 오디오 텍스트)
-        existing_audio_caption = media_data[original_index].get("audio_caption")
-        # is_video 보존 (instagram_extract_audio_from_json.py에서 설정한 비디오 여부)
-        existing_is_video = media_data[original_index].get("is_video")
-        
-        media_data[original_index]["media_url"] = updated_media_urls
+        # media_url 업데이트 (media_caption은 이미 위에서 사이드카에 저장됨)
+        post["media_url"] = updated_media_urls
         # media_count 업데이트
-        media_data[original_index]["media_count"] = len(updated_media_urls)
-        
-        # audio_caption 보존
-        if existing_audio_caption:
-            media_data[original_index]["audio_caption"] = existing_audio_caption
-        
-        # is_video 보존
-        if existing_is_video:
-            media_data[original_index]["is_video"] = existing_is_video
+        post["media_count"] = len(updated_media_urls)
         
         # 메시지 출력 (대체 방법 실패 여부에 따라)
         if fallback_failed:
@@ -903,23 +940,26 @@ try:
         else:
             print(f"💾 JSON 데이터 업데이트 완료 (기존 첫 번째 URL 제거, media_count: {len(updated_media_urls)})")
         
-        # 각 게시글 처리 후 즉시 JSON 파일에 저장 (강제 중단 시에도 데이터 보존)
+        # 각 게시글 처리 후 저장 요청 (write-behind: 일정 개수/시간마다 저널에 한 번에 기록)
         try:
-            with open(JSON_PATH, "w", encoding="utf-8") as f:
-                json.dump(media_data, f, ensure_ascii=False, indent=2)
-            print(f"💾 JSON 파일 저장 완료 (게시글 #{idx})")
+            media_store.put(original_index, post)
+            print(f"💾 JSON 저장 요청 완료 (게시글 #{idx})")
         except Exception as e:
             print(f"⚠️ JSON 파일 저장 실패: {e}")
 
 finally:
     driver.quit()
     
-    # 최종 JSON 파일 저장 (안전장치)
+    # 최종 JSON 파일 저장 (저널을 instagram_media.json에 병합)
     try:
         print("\n📝 최종 JSON 파일 저장 중...")
-        with open(JSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(media_data, f, ensure_ascii=False, indent=2)
+        media_store.close()
+        enrichment.close()
         print("✅ 최종 JSON 파일 저장 완료")
+        for name, stats in (("instagram_media.json", media_store.io_stats()), ("media_caption 사이드카", enrichment.io_stats())):
+            logging.info(
+                f"📊 {name} 쓰기 통계: 저장 요청 {stats['requests']}건, 실제 기록 {stats['flushes']}회, {stats['bytes']:,} bytes"
+            )
     except Exception as e:
         print(f"⚠️ 최종 JSON 파일 저장 실패: {e}")
     
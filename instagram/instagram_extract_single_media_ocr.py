@@ -1,5 +1,5 @@
-import json
 import os
+import sys
 import time
 import base64
 import io
@@ -15,11 +15,21 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from dotenv import load_dotenv
-import easyocr
 import numpy as np
 from PIL import Image
 import logging
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore
+from common.json_journal import JournaledJsonStore
+from common.json_stream import field_filter
+from common.ocr_backend import create_ocr_reader, profile_tag
+from common.ocr_cache import get_ocr_cache
+from common.ocr_daemon import connect_ocr_daemon
+from common.video_frames import get_frame_service
+from instagram_keys import media_key
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 USERNAME = os.getenv("IG_USERNAME")
@@ -65,16 +75,16 @@ logging.info("=" * 80)
 
 # JSON 파일 불러오기
 MEDIA_JSON = BASE_DIR / "instagram_media.json"
+# instagram_media.json은 읽기만 하고, OCR 결과(media_caption)는 instagram_media.media_caption.jsonl 사이드카에 기록
 print("📂 instagram_media.json 파일 로딩 중...")
-with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-    media_data = json.load(f)
+media_store = JournaledJsonStore(MEDIA_JSON)
+enrichment = EnrichmentStore(MEDIA_JSON, key_func=media_key)
 
-# IMAGE와 VIDEO 타입만 필터링 (원본 인덱스와 함께 저장)
+# IMAGE와 VIDEO 타입만 스트리밍으로 필터링 (원본 인덱스와 함께 저장, 나머지 게시글은 메모리에 올리지 않음)
 single_media_posts = []
-for idx, item in enumerate(media_data):
-    media_type = item.get("media_type", "").upper()
-    if media_type in ["IMAGE", "VIDEO"]:
-        single_media_posts.append({"index": idx, "data": item})
+single_media_filter = field_filter(media_type=lambda value: (value or "").upper() in ("IMAGE", "VIDEO"))
+for idx, item in media_store.iter_records(where=single_media_filter):
+    single_media_posts.append({"index": idx, "data": item})
 
 image_count = sum(1 for item in single_media_posts if item["data"].get("media_type", "").upper() == "IMAGE")
 video_count = sum(1 for item in single_media_posts if item["data"].get("media_type", "").upper() == "VIDEO")
@@ -88,12 +98,17 @@ _easyocr_reader = None
 def get_easyocr_reader():
     global _easyocr_reader
     if _easyocr_reader is None:
-        try:
-            _easyocr_reader = easyocr.Reader(["ko", "en"], gpu=True)
-        except Exception:
-            _easyocr_reader = easyocr.Reader(["ko", "en"], gpu=False)
+        # OCR 데몬이 실행 중이면 모델을 로드하지 않고 데몬 클라이언트 사용
+        _easyocr_reader = connect_ocr_daemon(["ko", "en"])
+    if _easyocr_reader is None:
+        # OCR_BACKEND 설정에 따라 EasyOCR(GPU 시도 후 CPU) 또는 ONNX Runtime CPU 백엔드
+        _easyocr_reader = create_ocr_reader(["ko", "en"])
     return _easyocr_reader
 
+# OCR 결과 캐시(common/ocr_cache.py)에서 구분할 OCR 백엔드와 전처리 방식 (전처리 없이 원본 이미지를 OCR)
+def ocr_cache_profile():
+    return f"{profile_tag(_easyocr_reader)}:raw:ko,en"
+
 # 이미지 URL에서 OCR 수행 함수
 def ocr_image_url(url: str) -> list:
     """이미지 URL에서 OCR을 수행하여 텍스트 리스트 반환"""
@@ -103,15 +118,21 @@ def ocr_image_url(url: str) -> list:
         response.raise_for_status()
         image_data = response.content
         
-        # 이미지 열기
-        image = Image.open(io.BytesIO(image_data))
-        if image.mode != "RGB":
-            image = image.convert("RGB")
-        
-        # EasyOCR로 텍스트 추출
-        array = np.array(image)
-        reader = get_easyocr_reader()
-        results = reader.readtext(array)
+        # 다른 게시물/플랫폼에서 이미 OCR한 이미지면 캐시 결과 사용
+        cache = get_ocr_cache()
+        results = cache.lookup(ocr_cache_profile(), image_data) if cache is not None else None
+        if results is None:
+            # 이미지 열기
+            image = Image.open(io.BytesIO(image_data))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            
+            # EasyOCR로 텍스트 추출
+            array = np.array(image)
+            reader = get_easyocr_reader()
+            results = reader.readtext(array)
+            if cache is not None:
+                cache.store(ocr_cache_profile(), image_data, results)
         
         # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
         texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
@@ -121,9 +142,41 @@ def ocr_image_url(url: str) -> list:
         print(f"  ⚠️ 이미지 OCR 실패 ({url[:50]}...): {e}")
         return []
 
+# 비디오 프레임 OCR 함수 (canvas로 받은 PNG 또는 로컬에서 디코딩한 프레임)
+def ocr_video_frame(image_data, array):
+    """비디오 프레임 OCR (image_data: 캐시 키로 쓸 PNG 바이트 또는 BGR 배열, array: EasyOCR 입력 RGB 배열)"""
+    # EasyOCR로 텍스트 추출 (같은 프레임을 이미 OCR했으면 캐시 결과 사용)
+    try:
+        cache = get_ocr_cache()
+        results = cache.lookup(ocr_cache_profile(), image_data) if cache is not None else None
+        if results is None:
+            reader = get_easyocr_reader()
+            results = reader.readtext(array)
+            if cache is not None:
+                cache.store(ocr_cache_profile(), image_data, results)
+
+        # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
+        texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
+
+        if texts:
+            print(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출")
+        else:
+            print(f"  ℹ️ OCR 결과 없음")
+
+        return texts  # 리스트 반환
+    except Exception as e:
+        print(f"  ⚠️ OCR 처리 실패: {e}")
+        return []
+
 # 비디오 프레임에서 OCR 수행 함수
 def ocr_video_frame_from_blob(driver, video_element, frame_time):
     """비디오 요소에서 특정 시점의 프레임을 추출하여 OCR 수행 (리스트 반환)"""
+    # 실제 미디어 URL을 찾으면 영상을 내려받아 로컬에서 디코딩 (찾지 못했을 때만 아래 canvas 방식)
+    frame = get_frame_service().frame_from_element(driver, video_element, frame_time)
+    if frame is not None:
+        print(f"  ✅ 프레임 로컬 디코딩 성공 (time={frame_time}, size={frame.shape[1]}x{frame.shape[0]})")
+        return ocr_video_frame(frame, np.ascontiguousarray(frame[:, :, ::-1]))
+
     try:
         # 비디오 상태 확인
         ready_state = driver.execute_script("return arguments[0].readyState;", video_element)
@@ -210,24 +263,7 @@ def ocr_video_frame_from_blob(driver, video_element, frame_time):
             print(f"  ⚠️ 이미지 변환 실패: {e}")
             return []
         
-        # EasyOCR로 텍스트 추출
-        try:
-            array = np.array(image)
-            reader = get_easyocr_reader()
-            results = reader.readtext(array)
-            
-            # 신뢰도 0.5 이상인 텍스트만 추출하여 리스트로 반환
-            texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
-            
-            if texts:
-                print(f"  ✅ OCR 완료: {len(texts)}개 텍스트 추출")
-            else:
-                print(f"  ℹ️ OCR 결과 없음")
-            
-            return texts  # 리스트 반환
-        except Exception as e:
-            print(f"  ⚠️ OCR 처리 실패: {e}")
-            return []
+        return ocr_video_frame(image_data, np.array(image))
         
     except Exception as e:
         print(f"  ⚠️ 프레임 OCR 실패 (time={frame_time}): {e}")
@@ -411,7 +447,6 @@ try:
     # 각 IMAGE/VIDEO 게시글에 대해 순차적으로 처리
     for idx, post_info in enumerate(single_media_posts, 1):
         post = post_info["data"]
-        original_index = post_info["index"]
         url = post.get("permalink")
         media_type = post.get("media_type", "").upper()
         
@@ -420,7 +455,7 @@ try:
             continue
         
         # 이미 media_caption이 있고 리스트에 항목이 있으면 스킵
-        existing_caption = post.get("media_caption", [])
+        existing_caption = enrichment.value(post, "media_caption", [])
         if isinstance(existing_caption, str):
             existing_caption = [line.strip() for line in existing_caption.split("\n") if line.strip()]
         elif not isinstance(existing_caption, list):
@@ -605,7 +640,7 @@ try:
         # OCR 결과를 media_caption에 저장 (리스트 형식)
         if ocr_texts:
             # 기존 media_caption이 있으면 병합 (중복 제거)
-            existing_caption = media_data[original_index].get("media_caption", [])
+            existing_caption = enrichment.value(post, "media_caption", [])
             
             # 기존 media_caption이 문자열이면 리스트로 변환
             if isinstance(existing_caption, str):
@@ -622,51 +657,28 @@ try:
                     seen_texts.add(ocr_text)
                     combined_caption.append(ocr_text)
             
-            # audio_caption과 is_video 보존
-            existing_audio_caption = media_data[original_index].get("audio_caption")
-            existing_is_video = media_data[original_index].get("is_video")
-            
-            media_data[original_index]["media_caption"] = combined_caption
             total_chars = sum(len(text) for text in combined_caption)
             print(f"✅ media_caption 업데이트 완료 (항목 {len(combined_caption)}개, 총 {total_chars}자)")
             
-            # audio_caption 보존
-            if existing_audio_caption:
-                media_data[original_index]["audio_caption"] = existing_audio_caption
-            
-            # is_video 보존
-            if existing_is_video:
-                media_data[original_index]["is_video"] = existing_is_video
-            
-            # media_caption 업데이트 후 즉시 JSON 파일에 저장 (강제 중단 시에도 보존)
+            # media_caption은 즉시 사이드카에 저장 (강제 중단 시에도 보존, instagram_media.json은 다시 쓰지 않음)
             try:
-                with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-                    json.dump(media_data, f, ensure_ascii=False, indent=2)
-                print(f"💾 media_caption JSON 저장 완료")
+                enrichment.set(post, "media_caption", combined_caption)
+                print(f"💾 media_caption 사이드카 저장 완료")
             except Exception as e:
-                print(f"⚠️ media_caption JSON 저장 실패: {e}")
+                print(f"⚠️ media_caption 사이드카 저장 실패: {e}")
         else:
             print(f"⚠️ OCR 결과가 없습니다.")
-            # OCR 결과가 없어도 audio_caption과 is_video는 보존
-            existing_audio_caption = media_data[original_index].get("audio_caption")
-            existing_is_video = media_data[original_index].get("is_video")
-            
-            if existing_audio_caption:
-                media_data[original_index]["audio_caption"] = existing_audio_caption
-            if existing_is_video:
-                media_data[original_index]["is_video"] = existing_is_video
 
 finally:
     driver.quit()
     
-    # 최종 JSON 파일 저장 (안전장치)
+    # media_caption 사이드카 기록 동기화
     try:
-        print("\n📝 최종 JSON 파일 저장 중...")
-        with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-            json.dump(media_data, f, ensure_ascii=False, indent=2)
-        print("✅ 최종 JSON 파일 저장 완료")
+        print("\n📝 media_caption 사이드카 정리 중...")
+        enrichment.close()
+        print("✅ media_caption 사이드카 저장 완료")
     except Exception as e:
-        print(f"⚠️ 최종 JSON 파일 저장 실패: {e}")
+        print(f"⚠️ media_caption 사이드카 정리 실패: {e}")
     
     print("✅ 모든 작업 완료")
 
@@ -11,6 +11,11 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException
 import logging
 import os
 import shutil
+import sys
+
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore
 
 try:
     from bs4 import BeautifulSoup
@@ -393,15 +398,12 @@ def main():
     
     # JSON 파일 로드
     print(f"📂 {INPUT_JSON} 파일 로딩 중...")
-    try:
-        with open(INPUT_JSON, "r", encoding="utf-8") as f:
-            media_data = json.load(f)
-    except FileNotFoundError:
+    # 다른 단계가 남긴 저널(instagram_media.journal.jsonl)까지 반영해서 읽음
+    media_store = JournaledJsonStore(INPUT_JSON)
+    if not media_store.exists():
         print(f"❌ {INPUT_JSON} 파일을 찾을 수 없습니다.")
         return
-    except json.JSONDecodeError:
-        print(f"❌ {INPUT_JSON} 파일의 JSON 형식이 올바르지 않습니다.")
-        return
+    media_data = media_store.load()
     
     print(f"✅ {len(media_data)}개의 항목 발견\n")
     
@@ -1,10 +1,10 @@
 import os
+import sys
 import time
 import base64
 import io
 import pickle
 import subprocess
-import tempfile
 import shutil
 from pathlib import Path
 from selenium import webdriver
@@ -16,7 +16,18 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from dotenv import load_dotenv
-import whisper
+
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.audio_cache import transcribe_audio
+from common.audio_decode import (
+    SAMPLE_RATE as AUDIO_SAMPLE_RATE,
+    AudioDecodeError,
+    NoAudioStreamError,
+    decode_audio,
+)
+from common.speech_vad import get_speech_recorder
+from common.whisper_model import get_whisper_model
 
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv()
@@ -1122,194 +1133,61 @@ def process_video_with_ffmpeg_whisper(video_bytes):
     """
     print(f"📹 비디오 데이터 크기: {len(video_bytes)} bytes")
     
-    # 임시 파일로 비디오 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as video_file:
-        video_path = video_file.name
-        video_file.write(video_bytes)
+    # ffmpeg 경로 찾기
+    ffmpeg_exe = find_ffmpeg()
+    if not ffmpeg_exe:
+        return None
     
+    # ffmpeg 한 번으로 16kHz 모노 PCM 배열 디코딩 (임시 파일 없이 stdin → 파이프)
+    # 디코딩한 배열 하나를 무음 판단과 Whisper 음성 인식에 함께 사용
+    print("🔄 ffmpeg로 오디오 디코딩 중...")
     try:
-        # ffmpeg 경로 찾기
-        ffmpeg_exe = find_ffmpeg()
-        if not ffmpeg_exe:
-            return None
-        
-        # ffmpeg로 비디오에서 오디오 추출
-        print("🔄 ffmpeg로 오디오 추출 중...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as audio_file:
-            audio_path = audio_file.name
-        
-        # ffmpeg 명령어 실행
-        ffmpeg_cmd = [
-            ffmpeg_exe,
-            '-i', video_path,
-            '-vn',  # 비디오 스트림 제거
-            '-acodec', 'pcm_s16le',  # PCM 16-bit
-            '-ar', '16000',  # 샘플링 레이트 16kHz (Whisper 권장)
-            '-ac', '1',  # 모노
-            '-y',  # 덮어쓰기
-            audio_path
-        ]
-        
-        print(f"   🔧 ffmpeg 명령어 실행 중...")
-        # Windows에서는 shell=True를 사용하여 PATH 확인
-        use_shell = os.name == 'nt'  # Windows인 경우
-        result = subprocess.run(
-            ffmpeg_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            shell=use_shell
-        )
-        
-        if result.returncode != 0:
-            print(f"⚠️ ffmpeg 오류: {result.stderr}")
-            return None
-        
-        print(f"✅ 오디오 추출 완료: {audio_path}")
-        
-        # 무음 여부 확인
-        print("🔍 무음 여부 확인 중...")
-        volume_check_cmd = [
-            ffmpeg_exe,  # 찾은 ffmpeg 경로 사용
-            '-i', audio_path,
-            '-af', 'volumedetect',
-            '-f', 'null',
-            '-'
-        ]
-        
-        # Windows에서는 shell=True를 사용하여 PATH 확인
-        use_shell = os.name == 'nt'  # Windows인 경우
-        volume_result = subprocess.run(
-            volume_check_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            shell=use_shell
+        audio = decode_audio(video_bytes, ffmpeg_exe)
+    except NoAudioStreamError:
+        print("🔇 비디오에 오디오 스트림이 없습니다.")
+        return None
+    except AudioDecodeError as e:
+        print(f"⚠️ ffmpeg 오류: {e}")
+        return None
+    print(f"✅ 오디오 디코딩 완료: {len(audio) / AUDIO_SAMPLE_RATE:.1f}초")
+    
+    # 오디오 캐시(같은 음원/캐러셀에서 반복된 비디오) → 무음 판단 → 음성 구간(VAD)만 Whisper로 변환
+    # 무음 판단 기준 (기존 volumedetect와 같음): 평균 볼륨이 -60dB 이하이고, 최대 볼륨도 -50dB 이하인 경우
+    # (보컬이 있는 음악은 최대 볼륨이 보통 -20 ~ -10 dB 정도이므로,
+    #  최대 볼륨만으로 무음을 판단하면 안 됨)
+    # 배열을 그대로 전달하므로 Whisper가 ffmpeg를 다시 실행하지 않음
+    print("🔄 Whisper로 음성 인식 중...")
+    try:
+        # Whisper 모델은 프로세스에서 처음 한 번만 로드하고 재사용 (WHISPER_MODEL, 기본 base)
+        # instagram_extract_audio_from_json처럼 이 함수를 import하는 스크립트도 같은 인스턴스 사용
+        whisper_model = get_whisper_model()
+        result = transcribe_audio(audio, whisper_model, language="ko")  # 한국어 지정
+    except Exception as e:
+        print(f"⚠️ Whisper 처리 실패: {e}")
+        import traceback
+        print(f"   상세 오류:")
+        traceback.print_exc()
+        return None
+    
+    speech = result["speech"]
+    get_speech_recorder().add(speech)
+    transcribed_text = result["text"]
+    if result["cached"]:
+        print(f"♻️ 오디오 캐시 적중: Whisper 생략 ({len(transcribed_text)}자)")
+    elif result["silent"]:
+        print(f"🔇 무음 비디오로 판단됨 (평균: {result['mean_db']:.2f} dB, 최대: {result['max_db']:.2f} dB)")
+        print("⏭️ 무음 비디오이므로 Whisper 처리를 건너뜁니다.")
+    else:
+        if result["mean_db"] is not None:
+            print(f"🔊 음성이 있는 비디오 (평균: {result['mean_db']:.2f} dB, 최대: {result['max_db']:.2f} dB)")
+        print(
+            f"🗣️ 음성 {speech['speech_seconds']}초 / {speech['duration_seconds']}초 "
+            f"(건너뜀 {speech['skipped_seconds']}초)"
         )
-        
-        # 볼륨 레벨 파싱
-        is_silent = False
-        if volume_result.returncode == 0:
-            stderr_output = volume_result.stderr
-            # mean_volume과 max_volume 추출
-            mean_volume = None
-            max_volume = None
-            
-            for line in stderr_output.split('\n'):
-                if 'mean_volume:' in line:
-                    try:
-                        # mean_volume: -XX.X dB 형식에서 숫자 추출
-                        mean_volume = float(line.split('mean_volume:')[1].split('dB')[0].strip())
-                    except:
-                        pass
-                if 'max_volume:' in line:
-                    try:
-                        # max_volume: -XX.X dB 형식에서 숫자 추출
-                        max_volume = float(line.split('max_volume:')[1].split('dB')[0].strip())
-                    except:
-                        pass
-            
-            # 볼륨 레벨 분석
-            # 무음 판단 기준:
-            # 1. 평균 볼륨이 -60dB 이하이고, 최대 볼륨도 -50dB 이하인 경우
-            # 2. 또는 평균 볼륨과 최대 볼륨 모두 매우 낮은 경우
-            # (보컬이 있는 음악은 최대 볼륨이 보통 -20 ~ -10 dB 정도이므로, 
-            #  최대 볼륨만으로 무음을 판단하면 안 됨)
-            
-            if mean_volume is not None and max_volume is not None:
-                # 평균과 최대 모두 확인 가능한 경우
-                if mean_volume < -60 and max_volume < -50:
-                    is_silent = True
-                    print(f"🔇 무음 비디오로 판단됨 (평균: {mean_volume:.2f} dB, 최대: {max_volume:.2f} dB)")
-                else:
-                    print(f"🔊 음성이 있는 비디오 (평균: {mean_volume:.2f} dB, 최대: {max_volume:.2f} dB)")
-            elif mean_volume is not None:
-                # 평균 볼륨만 확인 가능한 경우
-                if mean_volume < -60:
-                    is_silent = True
-                    print(f"🔇 무음 비디오로 판단됨 (평균 볼륨: {mean_volume:.2f} dB)")
-                else:
-                    print(f"🔊 음성이 있는 비디오 (평균 볼륨: {mean_volume:.2f} dB)")
-            elif max_volume is not None:
-                # 최대 볼륨만 확인 가능한 경우
-                # 최대 볼륨이 -40dB보다 낮으면 의심스럽지만, 
-                # 최대 볼륨만으로는 무음을 확정할 수 없으므로 계속 진행
-                if max_volume < -40:
-                    print(f"⚠️ 최대 볼륨이 낮습니다 ({max_volume:.2f} dB). 계속 진행합니다.")
-                else:
-                    print(f"🔊 음성이 있는 비디오 (최대 볼륨: {max_volume:.2f} dB)")
-            else:
-                print(f"ℹ️ 볼륨 레벨을 확인할 수 없습니다. 계속 진행합니다.")
-        else:
-            print(f"⚠️ 볼륨 확인 실패, 계속 진행합니다.")
-        
-        # 무음이면 Whisper 처리 생략
-        if is_silent:
-            print("⏭️ 무음 비디오이므로 Whisper 처리를 건너뜁니다.")
-            return None
-        
-        # Whisper로 오디오를 텍스트로 변환
-        print("🔄 Whisper로 음성 인식 중...")
-        try:
-            # 오디오 파일 존재 여부 및 경로 확인
-            if not os.path.exists(audio_path):
-                print(f"⚠️ 오디오 파일을 찾을 수 없습니다: {audio_path}")
-                return None
-            
-            # 절대 경로로 변환 (Whisper가 상대 경로를 제대로 처리하지 못할 수 있음)
-            audio_path_abs = os.path.abspath(audio_path)
-            print(f"   📁 오디오 파일 경로: {audio_path_abs}")
-            
-            # Whisper가 내부적으로 사용하는 ffmpeg 경로 설정
-            # Whisper는 subprocess로 ffmpeg를 호출하므로, PATH에 ffmpeg가 있어야 함
-            ffmpeg_path = find_ffmpeg()
-            if ffmpeg_path:
-                # ffmpeg 실행 파일의 디렉토리 찾기
-                if os.path.isfile(ffmpeg_path):
-                    # 실행 파일인 경우 (예: C:\ffmpeg\bin\ffmpeg.exe)
-                    ffmpeg_dir = os.path.dirname(ffmpeg_path)
-                else:
-                    # 디렉토리인 경우 (예: C:\ffmpeg\bin)
-                    ffmpeg_dir = ffmpeg_path
-                
-                # PATH에 ffmpeg 디렉토리가 없으면 추가
-                current_path = os.environ.get('PATH', '')
-                if ffmpeg_dir not in current_path.split(os.pathsep):
-                    os.environ['PATH'] = ffmpeg_dir + os.pathsep + current_path
-                    print(f"   🔧 PATH에 ffmpeg 디렉토리 추가: {ffmpeg_dir}")
-                else:
-                    print(f"   ✅ PATH에 이미 ffmpeg 디렉토리 포함됨: {ffmpeg_dir}")
-            else:
-                print(f"   ⚠️ ffmpeg를 찾을 수 없어 Whisper가 실패할 수 있습니다.")
-            
-            # Whisper 모델 로드 (base 모델 사용, 필요시 변경 가능)
-            model = whisper.load_model("base")
-            
-            # 오디오 파일에서 텍스트 추출
-            # Whisper는 내부적으로 ffmpeg를 사용하여 오디오를 로드함
-            result = model.transcribe(audio_path_abs, language="ko")  # 한국어 지정
-            
-            transcribed_text = result["text"].strip()
-            print(f"✅ 음성 인식 완료: {len(transcribed_text)}자")
-            
-            return transcribed_text if transcribed_text else None
-            
-        except Exception as e:
-            print(f"⚠️ Whisper 처리 실패: {e}")
-            import traceback
-            print(f"   상세 오류:")
-            traceback.print_exc()
-            return None
+        if transcribed_text:
+            print(f"✅ 음성 인식 완료: {len(transcribed_text)}자 ({whisper_model.last_timing()})")
     
-    finally:
-        # 임시 파일 삭제
-        try:
-            if os.path.exists(video_path):
-                os.unlink(video_path)
-            if os.path.exists(audio_path):
-                os.unlink(audio_path)
-        except Exception as e:
-            print(f"⚠️ 임시 파일 삭제 실패: {e}")
+    return transcribed_text if transcribed_text else None
 
 
 def extract_voice_from_instagram_post(driver, post_url, is_carousel=False):
@@ -17,7 +17,6 @@ permalink.txt 형식:
     https://www.instagram.com/username/p/ABC123/
 """
 
-import json
 import logging
 import time
 import re
@@ -36,6 +35,14 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from dotenv import load_dotenv
 import os
 import pickle
+import sys
+
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.media_store import BufferedMediaStore
+from common.post_db import mirror_posts
+from common.progress_journal import AppendOnlyKeyJournal
+from instagram_keys import media_key, normalize_permalink
 
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
@@ -48,8 +55,14 @@ MEDIA_JSON = BASE_DIR / "instagram_media.json"
 PERMALINK_TXT = BASE_DIR / "permalink.txt"
 COOKIE_PATH = BASE_DIR / "instagram_cookies.pkl"
 LOG_PATH = BASE_DIR / "instagram.log"
-PROCESSED_PERMALINKS_JSON = BASE_DIR / "instagram_processed_permalinks.json"  # 처리된 permalink 추적
-SKIPPED_PERMALINKS_JSON = BASE_DIR / "instagram_skipped_permalinks.json"  # 스킵된 permalink 추적 (필터 단어 없음)
+PROCESSED_PERMALINKS_TXT = BASE_DIR / "instagram_processed_permalinks.txt"  # 처리된 permalink 추적 (한 줄에 하나, append-only)
+SKIPPED_PERMALINKS_TXT = BASE_DIR / "instagram_skipped_permalinks.txt"  # 스킵된 permalink 추적 (필터 단어 없음)
+PROCESSED_PERMALINKS_JSON = BASE_DIR / "instagram_processed_permalinks.json"  # 이전 형식 (시작 시 .txt로 한 번 마이그레이션)
+SKIPPED_PERMALINKS_JSON = BASE_DIR / "instagram_skipped_permalinks.json"  # 이전 형식 (시작 시 .txt로 한 번 마이그레이션)
+PERMALINK_JOURNAL_FSYNC_EVERY = 50  # permalink 저널 fsync 주기 (개수)
+PERMALINK_JOURNAL_FSYNC_INTERVAL = 5.0  # permalink 저널 fsync 주기 (초)
+MEDIA_FLUSH_EVERY = 20  # 수집한 게시물을 이 개수만큼 모아서 instagram_media.json 저널에 기록
+MEDIA_FLUSH_INTERVAL = 60.0  # 마지막 기록 이후 이 시간(초)이 지나면 기록
 BATCH_SIZE = 5000  # 배치 크기 (5000개씩 처리)
 
 
@@ -815,42 +828,6 @@ def login_instagram(driver, force_regenerate=False):
     # 쿠키가 없거나 실패한 경우 새 쿠키 생성
     return regenerate_cookies(driver)
 
-def normalize_permalink(url: str) -> Optional[str]:
-    """
-    permalink를 정규화하여 shortcode만 추출
-    - instagram_media.json 형식: "https://www.instagram.com/reel/DQ5hGrqE6SP/"
-    - 수집한 형식: "https://www.instagram.com/pmi_min/reel/DD4hDgTy82T/"
-    → 둘 다 shortcode만 추출하여 비교: "DQ5hGrqE6SP", "DD4hDgTy82T"
-    
-    Args:
-        url: permalink URL
-        
-    Returns:
-        shortcode 또는 None
-    """
-    if not url:
-        return None
-    # 쿼리 파라미터 제거
-    url = url.split("?")[0]
-    # 끝에 슬래시 제거
-    url = url.rstrip("/")
-    
-    # shortcode 추출
-    # 형식 1: /reel/SHORTCODE 또는 /p/SHORTCODE
-    # 형식 2: /USERNAME/reel/SHORTCODE 또는 /USERNAME/p/SHORTCODE
-    if "/reel/" in url:
-        parts = url.split("/reel/")
-        if len(parts) > 1:
-            shortcode = parts[-1].split("/")[0].split("?")[0]
-            return shortcode
-    elif "/p/" in url:
-        parts = url.split("/p/")
-        if len(parts) > 1:
-            shortcode = parts[-1].split("/")[0].split("?")[0]
-            return shortcode
-    
-    return None
-
 def clean_text(text: str) -> str:
     """
     텍스트에서 불필요한 공백과 특수 문자를 정리합니다.
@@ -916,6 +893,60 @@ def clean_handle(handle_text: str) -> str:
     
     return handle
 
+_processed_journal: Optional[AppendOnlyKeyJournal] = None
+_skipped_journal: Optional[AppendOnlyKeyJournal] = None
+
+
+def get_processed_journal() -> AppendOnlyKeyJournal:
+    """처리된 permalink 저널 반환 (첫 호출 시 이전 JSON 파일 마이그레이션)"""
+    global _processed_journal
+    if _processed_journal is None:
+        _processed_journal = AppendOnlyKeyJournal(
+            PROCESSED_PERMALINKS_TXT,
+            fsync_every=PERMALINK_JOURNAL_FSYNC_EVERY,
+            fsync_interval=PERMALINK_JOURNAL_FSYNC_INTERVAL,
+        )
+        _processed_journal.migrate_legacy_json(PROCESSED_PERMALINKS_JSON, "processed_permalinks")
+    return _processed_journal
+
+def get_skipped_journal() -> AppendOnlyKeyJournal:
+    """스킵된 permalink 저널 반환 (첫 호출 시 이전 JSON 파일 마이그레이션)"""
+    global _skipped_journal
+    if _skipped_journal is None:
+        _skipped_journal = AppendOnlyKeyJournal(
+            SKIPPED_PERMALINKS_TXT,
+            fsync_every=PERMALINK_JOURNAL_FSYNC_EVERY,
+            fsync_interval=PERMALINK_JOURNAL_FSYNC_INTERVAL,
+        )
+        _skipped_journal.migrate_legacy_json(SKIPPED_PERMALINKS_JSON, "skipped_permalinks")
+    return _skipped_journal
+
+_media_store: Optional[BufferedMediaStore] = None
+
+
+def get_media_store() -> BufferedMediaStore:
+    """instagram_media.json 저장소 반환 (프로세스당 한 번만 로드, 종료 시 자동 저장)"""
+    global _media_store
+    if _media_store is None:
+        _media_store = BufferedMediaStore(
+            MEDIA_JSON,
+            key_func=media_key,
+            flush_every=MEDIA_FLUSH_EVERY,
+            flush_interval=MEDIA_FLUSH_INTERVAL,
+        )
+        _media_store.register_exit_handlers()
+    return _media_store
+
+def close_permalink_journals():
+    """permalink 저널의 남은 기록을 디스크에 동기화하고 정리합니다."""
+    for journal in (_processed_journal, _skipped_journal):
+        if journal is None:
+            continue
+        try:
+            journal.close()
+        except Exception as e:
+            logging.warning(f"permalink 저널 정리 실패: {e}")
+
 def load_processed_permalinks() -> set:
     """
     처리된 permalink 목록을 로드합니다.
@@ -925,41 +956,33 @@ def load_processed_permalinks() -> set:
     """
     processed = set()
     
-    if PROCESSED_PERMALINKS_JSON.exists():
-        try:
-            with open(PROCESSED_PERMALINKS_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                processed = set(data.get("processed_permalinks", []))
-            print(f"📂 처리된 permalink {len(processed)}개 로드됨")
-            logging.info(f"처리된 permalink {len(processed)}개 로드됨")
-        except Exception as e:
-            print(f"⚠️ 처리된 permalink 로드 실패: {e}")
-            logging.warning(f"처리된 permalink 로드 실패: {e}")
+    try:
+        processed = set(get_processed_journal().load())
+        print(f"📂 처리된 permalink {len(processed)}개 로드됨")
+        logging.info(f"처리된 permalink {len(processed)}개 로드됨")
+    except Exception as e:
+        print(f"⚠️ 처리된 permalink 로드 실패: {e}")
+        logging.warning(f"처리된 permalink 로드 실패: {e}")
     
     return processed
 
 def save_processed_permalink(permalink: str):
     """
-    처리된 permalink를 저장합니다.
+    처리된 permalink를 저장합니다 (저널 끝에 한 줄 추가).
     
     Args:
         permalink: 저장할 permalink
     """
     try:
-        if PROCESSED_PERMALINKS_JSON.exists():
-            with open(PROCESSED_PERMALINKS_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
-            data = {"processed_permalinks": []}
-        
-        if permalink not in data["processed_permalinks"]:
-            data["processed_permalinks"].append(permalink)
-            
-            with open(PROCESSED_PERMALINKS_JSON, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        get_processed_journal().add(permalink)
     except Exception as e:
         logging.warning(f"처리된 permalink 저장 실패: {e}")
 
+def on_media_saved(permalink: str, item: dict):
+    """게시물이 instagram_media.json에 기록된 뒤 permalink 처리 완료 표시 (SNS_POST_DB가 설정되어 있으면 DB에도 기록)"""
+    save_processed_permalink(permalink)
+    mirror_posts("instagram", [item])
+
 def load_skipped_permalinks() -> set:
     """
     스킵된 permalink 목록을 로드합니다 (필터 단어가 없어서 스킵된 항목).
@@ -969,38 +992,25 @@ def load_skipped_permalinks() -> set:
     """
     skipped = set()
     
-    if SKIPPED_PERMALINKS_JSON.exists():
-        try:
-            with open(SKIPPED_PERMALINKS_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                skipped = set(data.get("skipped_permalinks", []))
-            print(f"📂 스킵된 permalink {len(skipped)}개 로드됨 (필터 단어 없음)")
-            logging.info(f"스킵된 permalink {len(skipped)}개 로드됨")
-        except Exception as e:
-            print(f"⚠️ 스킵된 permalink 로드 실패: {e}")
-            logging.warning(f"스킵된 permalink 로드 실패: {e}")
+    try:
+        skipped = set(get_skipped_journal().load())
+        print(f"📂 스킵된 permalink {len(skipped)}개 로드됨 (필터 단어 없음)")
+        logging.info(f"스킵된 permalink {len(skipped)}개 로드됨")
+    except Exception as e:
+        print(f"⚠️ 스킵된 permalink 로드 실패: {e}")
+        logging.warning(f"스킵된 permalink 로드 실패: {e}")
     
     return skipped
 
 def save_skipped_permalink(permalink: str):
     """
-    스킵된 permalink를 저장합니다 (필터 단어가 없어서 스킵된 항목).
+    스킵된 permalink를 저장합니다 (필터 단어가 없어서 스킵된 항목, 저널 끝에 한 줄 추가).
     
     Args:
         permalink: 저장할 permalink
     """
     try:
-        if SKIPPED_PERMALINKS_JSON.exists():
-            with open(SKIPPED_PERMALINKS_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
-            data = {"skipped_permalinks": []}
-        
-        if permalink not in data["skipped_permalinks"]:
-            data["skipped_permalinks"].append(permalink)
-            
-            with open(SKIPPED_PERMALINKS_JSON, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        get_skipped_journal().add(permalink)
     except Exception as e:
         logging.warning(f"스킵된 permalink 저장 실패: {e}")
 
@@ -1156,27 +1166,14 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
     # 스킵된 permalink 로드 (필터 단어가 없어서 스킵된 항목)
     skipped_permalinks = load_skipped_permalinks()
     
-    # instagram_media.json에 있는 permalink 로드 (이미 저장된 항목 스킵)
-    # shortcode 기준으로 중복 체크 (정규화된 permalink)
-    existing_media_shortcodes = set()
-    existing_media_permalinks = set()  # shortcode를 추출할 수 없는 경우를 위한 원본 permalink 저장
-    if MEDIA_JSON.exists():
-        try:
-            with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-                media_data = json.load(f)
-                if isinstance(media_data, list):
-                    for item in media_data:
-                        permalink = item.get("permalink")
-                        if permalink:
-                            shortcode = normalize_permalink(permalink)
-                            if shortcode:
-                                existing_media_shortcodes.add(shortcode)
-                            else:
-                                # shortcode를 추출할 수 없으면 원본 permalink 저장
-                                existing_media_permalinks.add(permalink)
-            print(f"📂 instagram_media.json에 있는 permalink (shortcode 기준): {len(existing_media_shortcodes)}개, 원본 permalink: {len(existing_media_permalinks)}개")
-        except Exception as e:
-            print(f"⚠️ instagram_media.json 로드 실패: {e}")
+    # instagram_media.json 로드 (한 번만 로드하여 shortcode 인덱스를 계속 사용)
+    # shortcode 기준으로 중복 체크 (shortcode를 추출할 수 없으면 원본 permalink)
+    media_store = get_media_store()
+    try:
+        media_store.load()
+        print(f"📂 instagram_media.json에 있는 permalink (shortcode 기준): {len(media_store.keys)}개")
+    except Exception as e:
+        print(f"⚠️ instagram_media.json 로드 실패: {e}")
     
     # 이미 처리된 permalink, 스킵된 permalink, instagram_media.json에 있는 permalink 제외
     # shortcode 기준으로 비교
@@ -1198,21 +1195,19 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
             # shortcode를 추출할 수 없으면 원본 permalink로 비교 (하위 호환성)
             if (permalink not in processed_permalinks 
                 and permalink not in skipped_permalinks
-                and permalink not in existing_media_permalinks):
+                and not media_store.contains(permalink)):
                 remaining_permalinks.append(item)
         else:
             # shortcode 기준으로 비교 (이미 계산된 shortcodes 사용)
             if (shortcode not in processed_shortcodes 
                 and shortcode not in skipped_shortcodes
-                and shortcode not in existing_media_shortcodes):
+                and not media_store.contains(shortcode)):
                 remaining_permalinks.append(item)
     
     if processed_permalinks:
         print(f"📂 이미 처리된 permalink: {len(processed_permalinks)}개")
     if skipped_permalinks:
         print(f"📂 스킵된 permalink (필터 단어 없음): {len(skipped_permalinks)}개")
-    if existing_media_permalinks:
-        print(f"📂 instagram_media.json에 있는 permalink: {len(existing_media_permalinks)}개")
     print(f"📊 남은 permalink: {len(remaining_permalinks)}개")
     
     if not remaining_permalinks:
@@ -1302,9 +1297,8 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
                     # shortcode 추출
                     shortcode = normalize_permalink(permalink)
                     
-                    # 이미 처리된 permalink는 건너뜀 (shortcode 기준)
+                    # 이미 처리된 permalink는 건너뜀 (shortcode 기준, processed_shortcodes는 처리할 때마다 함께 갱신)
                     if shortcode:
-                        processed_shortcodes = {normalize_permalink(p) for p in processed_permalinks if normalize_permalink(p)}
                         if shortcode in processed_shortcodes:
                             print(f"[{global_idx}/{len(remaining_permalinks)}] ⏭️ 이미 처리된 permalink입니다. (shortcode: {shortcode})")
                             continue
@@ -1314,19 +1308,23 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
                             print(f"[{global_idx}/{len(remaining_permalinks)}] ⏭️ 이미 처리된 permalink입니다.")
                             continue
                     
-                    # instagram_media.json에 있는 permalink는 건너뜀 (shortcode 기준)
-                    if shortcode and shortcode in existing_media_shortcodes:
+                    # instagram_media.json에 있는 permalink는 건너뜀 (저장소와 같은 키: shortcode, 없으면 원본 permalink)
+                    if shortcode and media_store.contains(media_key({"permalink": permalink})):
                         print(f"[{global_idx}/{len(remaining_permalinks)}] ⏭️ instagram_media.json에 이미 있는 permalink입니다. (shortcode: {shortcode})")
                         batch_skipped_count += 1
                         save_processed_permalink(permalink)
                         processed_permalinks.add(permalink)
+                        if shortcode:
+                            processed_shortcodes.add(shortcode)
                         continue
-                    elif not shortcode and permalink in existing_media_permalinks:
+                    elif not shortcode and media_store.contains(media_key({"permalink": permalink})):
                         # shortcode를 추출할 수 없으면 원본 permalink로 비교 (하위 호환성)
                         print(f"[{global_idx}/{len(remaining_permalinks)}] ⏭️ instagram_media.json에 이미 있는 permalink입니다.")
                         batch_skipped_count += 1
                         save_processed_permalink(permalink)
                         processed_permalinks.add(permalink)
+                        if shortcode:
+                            processed_shortcodes.add(shortcode)
                         continue
                     
                     print(f"\n[{global_idx}/{len(remaining_permalinks)}] 처리 중: @{user_handle}")
@@ -1773,67 +1771,36 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
                             # 처리된 permalink로 저장
                             save_processed_permalink(permalink)
                             processed_permalinks.add(permalink)
+                            if shortcode:
+                                processed_shortcodes.add(shortcode)
                         else:
-                            # 실제 모드면 JSON에 저장
-                            try:
-                                with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-                                    media_data = json.load(f)
-                            except FileNotFoundError:
-                                media_data = []
-                                print(f"  ⚠️ {MEDIA_JSON} 파일이 없어 새로 생성합니다.")
-                            
-                            # 중복 확인 (shortcode 기준으로 정규화)
-                            current_shortcode = normalize_permalink(permalink)
-                            if current_shortcode:
-                                # shortcode 기준으로 중복 체크
-                                existing_shortcodes = {normalize_permalink(item.get("permalink")) for item in media_data if item.get("permalink")}
-                                existing_shortcodes = {sc for sc in existing_shortcodes if sc}  # None 제거
-                                
-                                if current_shortcode in existing_shortcodes:
-                                    print(f"  ⚠️ 이미 존재하는 permalink입니다. (shortcode: {current_shortcode}) 건너뜁니다.")
-                                    batch_skipped_count += 1
-                                    # 처리된 permalink로 저장
-                                    save_processed_permalink(permalink)
-                                    processed_permalinks.add(permalink)
-                                else:
-                                    media_data.append(new_item)
-                                    
-                                    # JSON 파일에 저장
-                                    try:
-                                        with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-                                            json.dump(media_data, f, ensure_ascii=False, indent=2)
-                                        print(f"  💾 JSON 저장 완료!")
-                                    except Exception as e:
-                                        print(f"  ⚠️ JSON 저장 실패: {e}")
-                                    
-                                    batch_processed_count += 1
-                                    # 처리된 permalink로 저장
-                                    save_processed_permalink(permalink)
-                                    processed_permalinks.add(permalink)
+                            # 실제 모드면 instagram_media.json 저장소에 추가
+                            # 중복 확인 (shortcode 기준, 추출할 수 없으면 원본 permalink로 비교)
+                            current_key = media_key(new_item)
+                            if media_store.contains(current_key):
+                                print(f"  ⚠️ 이미 존재하는 permalink입니다. (shortcode: {current_key}) 건너뜁니다.")
+                                batch_skipped_count += 1
+                                # 처리된 permalink로 저장
+                                save_processed_permalink(permalink)
+                                processed_permalinks.add(permalink)
+                                if shortcode:
+                                    processed_shortcodes.add(shortcode)
                             else:
-                                # shortcode를 추출할 수 없으면 원본 permalink로 비교 (하위 호환성)
-                                existing_permalinks = {item.get("permalink") for item in media_data if item.get("permalink")}
-                                if permalink in existing_permalinks:
-                                    print(f"  ⚠️ 이미 존재하는 permalink입니다. 건너뜁니다.")
-                                    batch_skipped_count += 1
-                                    # 처리된 permalink로 저장
-                                    save_processed_permalink(permalink)
-                                    processed_permalinks.add(permalink)
-                                else:
-                                    media_data.append(new_item)
-                                    
-                                    # JSON 파일에 저장
-                                    try:
-                                        with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-                                            json.dump(media_data, f, ensure_ascii=False, indent=2)
-                                        print(f"  💾 JSON 저장 완료!")
-                                    except Exception as e:
-                                        print(f"  ⚠️ JSON 저장 실패: {e}")
-                                    
-                                    batch_processed_count += 1
-                                    # 처리된 permalink로 저장
-                                    save_processed_permalink(permalink)
-                                    processed_permalinks.add(permalink)
+                                # 버퍼에 추가 후 일정 개수/시간마다 저장
+                                # (처리된 permalink 기록은 게시물이 실제로 파일에 기록된 뒤에 수행)
+                                try:
+                                    media_store.add(
+                                        new_item,
+                                        on_flush=lambda p=permalink, item=new_item: on_media_saved(p, item),
+                                    )
+                                    print(f"  💾 저장 대기열에 추가 완료! (대기 중인 게시물은 {MEDIA_FLUSH_EVERY}개마다 저장)")
+                                except Exception as e:
+                                    print(f"  ⚠️ JSON 저장 실패: {e}")
+                                
+                                batch_processed_count += 1
+                                processed_permalinks.add(permalink)
+                                if shortcode:
+                                    processed_shortcodes.add(shortcode)
                             
                             # 요청 간 딜레이 (Instagram 차단 방지)
                             time.sleep(2)
@@ -1882,6 +1849,8 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
                             # 에러가 발생했어도 permalink는 처리된 것으로 표시 (재시도 방지)
                             save_processed_permalink(permalink)
                             processed_permalinks.add(permalink)
+                            if shortcode:
+                                processed_shortcodes.add(shortcode)
                             continue
                 
                 # 배치 내부 루프 완료 후 성공 처리
@@ -1955,7 +1924,6 @@ def step2_process_permalinks(permalinks, test_mode=False, batch_size=BATCH_SIZE)
 
 if __name__ == "__main__":
     # 쿠키 재생성 옵션 확인
-    import sys
     regenerate_cookie = False
     test_mode = False
     
@@ -2008,5 +1976,11 @@ if __name__ == "__main__":
     
     # 스텝2 실행
     print(f"\n{'='*60}")
-    step2_process_permalinks(permalinks, test_mode=test_mode)
+    try:
+        step2_process_permalinks(permalinks, test_mode=test_mode)
+    finally:
+        # 버퍼에 남은 게시물을 먼저 저장한 뒤 permalink 저널 정리
+        if _media_store is not None:
+            _media_store.close()
+        close_permalink_journals()
                
\ No newline at end of file
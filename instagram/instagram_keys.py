@@ -0,0 +1,53 @@
+"""
+instagram_media.json 항목의 키 함수 (permalink 정규화, 중복 체크 키)
+
+OCR/오디오/사용자 정보 스크립트가 키 함수만 쓰기 위해 instagram_filter_userposts(Selenium 크롤러, .env 로드)를
+import하지 않도록 따로 둡니다.
+"""
+
+from typing import Optional
+
+
+def normalize_permalink(url: str) -> Optional[str]:
+    """
+    permalink를 정규화하여 shortcode만 추출
+    - instagram_media.json 형식: "https://www.instagram.com/reel/DQ5hGrqE6SP/"
+    - 수집한 형식: "https://www.instagram.com/pmi_min/reel/DD4hDgTy82T/"
+    → 둘 다 shortcode만 추출하여 비교: "DQ5hGrqE6SP", "DD4hDgTy82T"
+    
+    Args:
+        url: permalink URL
+        
+    Returns:
+        shortcode 또는 None
+    """
+    if not url:
+        return None
+    # 쿼리 파라미터 제거
+    url = url.split("?")[0]
+    # 끝에 슬래시 제거
+    url = url.rstrip("/")
+    
+    # shortcode 추출
+    # 형식 1: /reel/SHORTCODE 또는 /p/SHORTCODE
+    # 형식 2: /USERNAME/reel/SHORTCODE 또는 /USERNAME/p/SHORTCODE
+    if "/reel/" in url:
+        parts = url.split("/reel/")
+        if len(parts) > 1:
+            shortcode = parts[-1].split("/")[0].split("?")[0]
+            return shortcode
+    elif "/p/" in url:
+        parts = url.split("/p/")
+        if len(parts) > 1:
+            shortcode = parts[-1].split("/")[0].split("?")[0]
+            return shortcode
+    
+    return None
+
+
+def media_key(item: dict) -> Optional[str]:
+    """instagram_media.json 항목의 중복 체크 키 (shortcode, 추출할 수 없으면 원본 permalink)"""
+    permalink = item.get("permalink")
+    if not permalink:
+        return None
+    return normalize_permalink(permalink) or permalink
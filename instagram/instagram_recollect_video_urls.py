@@ -9,7 +9,6 @@ instagram_media.json에서 media_type이 "VIDEO"이고 media_count가 0이거나
         --test, -t: 테스트 모드 (상위 10개만 처리)
 """
 
-import json
 import logging
 import time
 import re
@@ -27,6 +26,10 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 from instagram_filter_userposts import setup_driver, login_instagram, setup_logging
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore
+
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
 
@@ -34,6 +37,8 @@ load_dotenv('/home/pmi/venvs/source_code/.env')
 BASE_DIR = Path(__file__).parent
 MEDIA_JSON = BASE_DIR / "instagram_media.json"
 LOG_PATH = BASE_DIR / "instagram_recollect_video.log"
+# 업데이트한 항목만 instagram_media.journal.jsonl에 기록하고, 종료 시(또는 일정 개수마다) 원본에 병합
+MEDIA_JOURNAL_COMPACT_EVERY = 200
 
 
 def extract_real_url(url: str) -> str:
@@ -200,6 +205,14 @@ def extract_video_urls(driver, permalink: str) -> list:
     return media_urls
 
 
+def is_recollect_target(item: dict) -> bool:
+    """media_type이 "VIDEO"이고 media_count가 0이거나 media_url이 비어있는 항목인지 확인"""
+    media_type = (item.get("media_type") or "").upper()
+    media_count = item.get("media_count", 0)
+    media_url = item.get("media_url", [])
+    return media_type == "VIDEO" and (media_count == 0 or not media_url or len(media_url) == 0)
+
+
 def main(test_mode=False):
     """메인 함수"""
     # 로깅 초기화
@@ -221,33 +234,18 @@ def main(test_mode=False):
         print(f"❌ {MEDIA_JSON} 파일을 찾을 수 없습니다.")
         return
     
+    # media_type이 "VIDEO"이고 media_count가 0이거나 media_url이 비어있는 항목만 스트리밍으로 필터링
+    # (원본 인덱스와 함께 저장, 나머지 항목은 메모리에 올리지 않음)
     print(f"\n📂 {MEDIA_JSON} 파일 로드 중...")
+    media_store = JournaledJsonStore(MEDIA_JSON, compact_threshold=MEDIA_JOURNAL_COMPACT_EVERY)
     try:
-        with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-            media_data = json.load(f)
-        
-        if not isinstance(media_data, list):
-            print(f"❌ {MEDIA_JSON} 파일 형식이 올바르지 않습니다. (리스트가 아님)")
-            return
-        
-        print(f"✅ 총 {len(media_data)}개 항목 로드됨")
+        target_items = list(media_store.iter_records(where=is_recollect_target))
     except Exception as e:
         print(f"❌ {MEDIA_JSON} 파일 로드 실패: {e}")
         import traceback
         traceback.print_exc()
         return
     
-    # media_type이 "VIDEO"이고 media_count가 0이거나 media_url이 비어있는 항목 필터링
-    target_items = []
-    for item in media_data:
-        media_type = item.get("media_type", "").upper()
-        media_count = item.get("media_count", 0)
-        media_url = item.get("media_url", [])
-        
-        if media_type == "VIDEO":
-            if media_count == 0 or not media_url or len(media_url) == 0:
-                target_items.append(item)
-    
     print(f"\n📊 재수집 대상: {len(target_items)}개")
     if len(target_items) == 0:
         print("✅ 재수집할 비디오가 없습니다.")
@@ -260,7 +258,7 @@ def main(test_mode=False):
     
     # 처음 10개 항목 정보 출력
     print(f"\n📋 재수집 대상 항목 (처음 10개):")
-    for idx, item in enumerate(target_items[:10], 1):
+    for idx, (_, item) in enumerate(target_items[:10], 1):
         permalink = item.get("permalink", "N/A")
         handle = item.get("handle", "N/A")
         print(f"  {idx}. @{handle}: {permalink[:60]}...")
@@ -289,7 +287,7 @@ def main(test_mode=False):
         print(f"비디오 URL 재수집 시작 ({len(target_items)}개)")
         print(f"{'='*60}\n")
         
-        for idx, item in enumerate(target_items, 1):
+        for idx, (original_index, item) in enumerate(target_items, 1):
             permalink = item.get("permalink")
             handle = item.get("handle", "N/A")
             
@@ -309,6 +307,7 @@ def main(test_mode=False):
                 # media_url과 media_count 업데이트
                 item["media_url"] = media_urls
                 item["media_count"] = len(media_urls)
+                media_store.put(original_index, item)
                 updated_count += 1
                 success_count += 1
                 print(f"  ✅ 비디오 URL {len(media_urls)}개 수집 완료")
@@ -325,8 +324,7 @@ def main(test_mode=False):
         if updated_count > 0:
             print(f"\n💾 {MEDIA_JSON} 파일 저장 중...")
             try:
-                with open(MEDIA_JSON, "w", encoding="utf-8") as f:
-                    json.dump(media_data, f, ensure_ascii=False, indent=2)
+                media_store.close()
                 print(f"✅ {MEDIA_JSON} 파일 저장 완료!")
                 logging.info(f"{MEDIA_JSON} 파일 저장 완료: {updated_count}개 항목 업데이트")
             except Exception as e:
@@ -356,6 +354,8 @@ def main(test_mode=False):
         import traceback
         traceback.print_exc()
     finally:
+        # 중단된 경우에도 저널에 기록된 변경분을 원본에 병합
+        media_store.close()
         if driver:
             try:
                 driver.quit()
@@ -14,6 +14,14 @@ from dotenv import load_dotenv
 import os
 import logging
 import shutil
+import sys
+
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore
+from common.json_journal import JournaledJsonStore
+from common.post_db import mirror_users
+from instagram_keys import media_key
 
 # .env 파일에서 로그인 정보 불러오기
 load_dotenv('/home/pmi/venvs/source_code/.env')
@@ -1693,6 +1701,7 @@ finally:
             with open(USER_JSON, "w", encoding="utf-8") as f:
                 json.dump(user_data, f, ensure_ascii=False, indent=2)
             print("✅ 최종 JSON 파일 저장 완료")
+            mirror_users("instagram", user_data)
         except Exception as e:
             print(f"⚠️ 최종 JSON 파일 저장 실패: {e}")
     else:
@@ -1737,8 +1746,9 @@ try:
     elif not USER_JSON_FOR_NUM.exists():
         print(f"⚠️ {USER_JSON_FOR_NUM} 파일이 존재하지 않습니다.")
     else:
-        with open(MEDIA_JSON, "r", encoding="utf-8") as f:
-            media_data = json.load(f)
+        # OCR/오디오 단계가 사이드카에 저장한 media_caption, audio_caption을 합쳐서 사용
+        enrichment = EnrichmentStore(MEDIA_JSON, key_func=media_key)
+        media_data = [enrichment.join(item) for _, item in JournaledJsonStore(MEDIA_JSON).iter_records()]
         
         print(f"✅ {MEDIA_JSON} 로드 완료: {len(media_data)}개 항목")
         
@@ -1903,6 +1913,7 @@ try:
             # instagram_user.json 저장
             with open(USER_JSON_FOR_NUM, "w", encoding="utf-8") as f:
                 json.dump(user_data, f, ensure_ascii=False, indent=2)
+            mirror_users("instagram", user_data)
             
             # 통계 출력
             user_num_count = sum(1 for user in user_data if user.get("user_num"))
@@ -1,5 +1,6 @@
 import os
 import re
+import sys
 import logging
 from typing import Dict, List, Optional
 
@@ -8,6 +9,10 @@ from dotenv import load_dotenv
 from pathlib import Path
 import json
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore
+
 load_dotenv('/home/pmi/venvs/source_code/.env')
 USERNAME = os.getenv("IG_USERNAME")
 PASSWORD = os.getenv("IG_PASSWORD")
@@ -19,6 +24,9 @@ BASE_DIR = Path(__file__).parent
 COOKIE_PATH = BASE_DIR / "instagram_cookies.pkl"
 DATA_FILE = BASE_DIR / "instagram_media.json"
 
+# instagram_media.json 저장소: 다른 단계가 남긴 저널까지 반영해서 읽고, 저장 시 스냅샷과 저널을 함께 정리
+media_store = JournaledJsonStore(DATA_FILE)
+
 
 def normalize_permalink(url: Optional[str]) -> Optional[str]:
     """
@@ -80,6 +88,17 @@ def setup_logging(log_file: str = "instagram.log") -> None:
     logging.info(f"로깅이 시작되었습니다. 로그 파일: {log_file}")
 
 
+def is_legacy_dict_file(path: Path) -> bool:
+    """파일이 JSON 배열이 아닌 예전 dict 형식({hashtag: {...}})인지 첫 글자로 확인"""
+    if not path.exists():
+        return False
+    with open(path, "r", encoding="utf-8") as file:
+        while True:
+            char = file.read(1)
+            if not char or not char.isspace():
+                return char == "{"
+
+
 def load_existing_data() -> tuple[Dict[str, Dict[str, dict]], Dict[str, dict]]:
     """
     기존 데이터를 로드하고 permalink 기준 인덱스도 생성
@@ -89,15 +108,19 @@ def load_existing_data() -> tuple[Dict[str, Dict[str, dict]], Dict[str, dict]]:
         - hashtag_media_data: {hashtag: {media_id: item}}
         - permalink_index: {shortcode: item} (permalink 기준 인덱스)
     """
-    if not DATA_FILE.exists():
+    if not media_store.exists():
         return {}, {}
 
-    with open(DATA_FILE, "r", encoding="utf-8") as file:
-        try:
-            raw_data = json.load(file)
-        except json.JSONDecodeError:
-            logging.warning("기존 JSON 파일을 읽는 중 오류가 발생했습니다. 새로 생성합니다.")
-            return {}, {}
+    if is_legacy_dict_file(DATA_FILE):
+        # 예전 {hashtag: {...}} 형식은 저널 없이 그대로 읽음
+        with open(DATA_FILE, "r", encoding="utf-8") as file:
+            try:
+                raw_data = json.load(file)
+            except json.JSONDecodeError:
+                logging.warning("기존 JSON 파일을 읽는 중 오류가 발생했습니다. 새로 생성합니다.")
+                return {}, {}
+    else:
+        raw_data = media_store.load()
 
     data: Dict[str, Dict[str, dict]] = {}
     permalink_index: Dict[str, dict] = {}  # {shortcode: item}
@@ -179,8 +202,8 @@ def save_data(data: dict) -> None:
             # else: "unknown" 그룹이고 원본에 hashtag가 없으면 hashtag 필드를 추가하지 않음
             flattened.append(entry)
 
-    with open(DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(flattened, file, ensure_ascii=False, indent=2)
+    # 스냅샷을 원자적으로 다시 쓰고 저널을 비움 (저널 인덱스가 어긋난 채 남지 않도록)
+    media_store.save_all(flattened)
 
 
 def verify_access_token() -> bool:
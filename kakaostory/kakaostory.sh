@@ -6,6 +6,8 @@ source "$VENV_PATH"
 
 # 카카오스토리 해시태그 별로 게시글 수집
 python ./kakaostory_crawling_test.py
+# OCR 데몬 시작 (EasyOCR 모델을 한 번만 로드해서 OCR 스크립트들이 공유, 실패하면 스크립트별로 직접 로드)
+(cd "$(dirname "$SCRIPT_DIR")" && python -m common.ocr_daemon start) || true
 # 수집한 게시글의 이미지, 비디오 OCR(비디오는 처음과 끝 프레임 추출해서 OCR)
 python ./kakaostory_postprocess.py
 # 비디오 미디어에 대해서 whisper로 오디오분석
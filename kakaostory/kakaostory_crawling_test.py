@@ -2,6 +2,7 @@ from __future__ import annotations
 import json
 import logging
 import re
+import sys
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -17,6 +18,13 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.selenium_manager import SeleniumManager
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.media_store import close_on_exit  # noqa: E402
+from common.post_db import mirror_posts  # noqa: E402
+from common.progress_journal import AppendOnlyKeyJournal  # noqa: E402
+
 # --------------------
 # 환경 설정
 # --------------------
@@ -51,6 +59,9 @@ HASHTAG_LIST = [
 MAX_POSTS_PER_TAG: Optional[int] = None
 HEADLESS_MODE = True
 REFRESH_WINDOW_DAYS: Optional[int] = 3
+# 중단된 실행을 이어서 할 때, 이 시간(시간) 안에 수집을 마친 해시태그는 건너뜀 (None이면 항상 전체 해시태그 수집)
+# 모든 해시태그를 끝까지 수집하면 완료 기록을 비우므로, 다음 정상 실행은 전체 해시태그의 좋아요/댓글을 다시 갱신함
+TAG_RESUME_WINDOW_HOURS: Optional[float] = 12
 
 
 def setup_logging(log_file: str = "kakaostory.log") -> None:
@@ -288,20 +299,20 @@ def should_refresh(record: Dict) -> bool:
     return datetime.now() - post_dt <= timedelta(days=REFRESH_WINDOW_DAYS)
 
 
-def load_existing_posts(path: Path) -> tuple[Dict[str, Dict], int]:
-    if not path.exists():
-        return {}, 0
-
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        logging.warning("⚠️ 기존 JSON을 읽는 중 오류가 발생했습니다. 새 파일을 생성합니다.")
-        return {}, 0
+def load_existing_posts(store: JournaledJsonStore) -> tuple[Dict[str, int], int]:
+    """
+    저장소(스냅샷 + 저널)의 게시물을 로드하여 shortcode -> 인덱스 맵과 최대 p_num 반환
 
-    records: Dict[str, Dict] = {}
+    이전 실행이 중간에 끊겼더라도 저널에 기록된 게시물까지 포함하므로 p_num이 겹치지 않습니다.
+    p_num이 없는 게시물은 기존 최대값 다음 번호를 메모리에서만 채우고 저널에는 기록하지 않습니다
+    (이번 실행에서 파일을 다시 쓸 때 함께 저장됨).
+    """
+    records = store.load()  # 형식이 올바르지 않으면 경고 후 빈 리스트로 시작
+    index_by_shortcode: Dict[str, int] = {}
+    missing_p_num: List[int] = []
     max_p_num = 0
 
-    for entry in data:
+    for index, entry in enumerate(records):
         shortcode = entry.get("shortcode")
         if not shortcode:
             continue
@@ -309,11 +320,44 @@ def load_existing_posts(path: Path) -> tuple[Dict[str, Dict], int]:
         if isinstance(p_num, int):
             max_p_num = max(max_p_num, p_num)
         else:
-            max_p_num += 1
-            entry["p_num"] = max_p_num
-        records[shortcode] = order_post_fields(entry)
+            missing_p_num.append(index)
+        index_by_shortcode[shortcode] = index
+
+    for index in missing_p_num:
+        max_p_num += 1
+        records[index]["p_num"] = max_p_num
+        records[index] = order_post_fields(records[index])
+
+    return index_by_shortcode, max_p_num
 
-    return records, max_p_num
+
+def tag_journal_key(tag: str, completed_at: datetime) -> str:
+    return f"{completed_at.isoformat(timespec='seconds')}\t{tag}"
+
+
+def load_completed_tags(journal: AppendOnlyKeyJournal) -> set[str]:
+    """
+    TAG_RESUME_WINDOW_HOURS 안에 수집을 마친 해시태그 반환 (기간이 지난 기록은 저널에서 제거)
+    """
+    if TAG_RESUME_WINDOW_HOURS is None:
+        return set()
+    cutoff = datetime.now() - timedelta(hours=TAG_RESUME_WINDOW_HOURS)
+    completed: set[str] = set()
+    expired: set[str] = set()
+    for key in journal.load():
+        completed_at, _, tag = key.partition("\t")
+        try:
+            in_window = datetime.fromisoformat(completed_at) >= cutoff
+        except ValueError:
+            in_window = False
+        if in_window and tag:
+            completed.add(tag)
+        else:
+            expired.add(key)
+    if expired:
+        journal.keys -= expired
+        journal.compact()
+    return completed
 
 
 def wait_for_popup(driver: webdriver.Chrome) -> Optional[webdriver.remote.webelement.WebElement]:
@@ -588,17 +632,27 @@ def main() -> None:
     # 파일 경로 (현재 파일 위치 기준)
     BASE_DIR = Path(__file__).parent
     setup_logging(str(BASE_DIR / "kakaostory.log"))
-    driver = build_driver()
 
+    # 해시태그마다 신규/갱신 게시물만 저널(kakaostory_popup_posts.journal.jsonl)에 기록하고,
+    # 전체 파일은 종료 시(또는 저널이 쌓였을 때) 한 번만 다시 씀
     output_path = BASE_DIR / "kakaostory_popup_posts.json"
-    existing_records, max_p_num = load_existing_posts(output_path)
+    store = JournaledJsonStore(output_path)
+    tag_journal = AppendOnlyKeyJournal(BASE_DIR / "kakaostory_completed_tags.txt", fsync_every=1)
+    close_on_exit(store.close, tag_journal.close)
+
+    existing_records, max_p_num = load_existing_posts(store)
     existing_shortcodes = set(existing_records.keys())
     processed_shortcodes: set[str] = set()
-    new_posts: List[Dict] = []
-    updated_posts: List[Dict] = []
+    completed_tags = load_completed_tags(tag_journal)
+    new_count = 0
+    updated_count = 0
 
+    driver = build_driver()
     try:
         for tag in HASHTAG_LIST:
+            if tag in completed_tags:
+                logging.info(f"\n===== 해시태그 '{tag}'는 최근 {TAG_RESUME_WINDOW_HOURS}시간 안에 수집을 마쳐 건너뜁니다 =====")
+                continue
             logging.info(f"\n===== 해시태그 '{tag}' 처리 시작 =====")
             posts = crawl_tag(
                 driver,
@@ -607,15 +661,16 @@ def main() -> None:
                 existing_shortcodes,
                 processed_shortcodes,
             )
-            added = 0
-            refreshed = 0
+            new_posts: List[Dict] = []
+            updated_posts: List[Dict] = []
             for post in posts:
                 shortcode = post.get("shortcode")
                 if not shortcode:
                     continue
 
                 if shortcode in existing_records:
-                    current_record = dict(existing_records[shortcode])
+                    index = existing_records[shortcode]
+                    current_record = dict(store.records[index])
                     if not should_refresh(current_record):
                         continue
                     changed = False
@@ -629,42 +684,46 @@ def main() -> None:
 
                     if changed:
                         updated_record = order_post_fields(current_record)
-                        existing_records[shortcode] = updated_record
+                        store.put(index, updated_record)
                         updated_posts.append(updated_record)
-                        refreshed += 1
                 else:
                     max_p_num += 1
                     post["p_num"] = max_p_num
                     ordered_post = order_post_fields(post)
-                    existing_records[shortcode] = ordered_post
+                    existing_records[shortcode] = len(store.records) + len(new_posts)
                     existing_shortcodes.add(shortcode)
                     new_posts.append(ordered_post)
-                    added += 1
+
+            # 해시태그 단위로 저널에 기록한 뒤 완료 표시 (중단되어도 이 해시태그까지는 유지됨)
+            store.extend(new_posts)
+            tag_journal.add(tag_journal_key(tag, datetime.now()))
+            # SNS_POST_DB가 설정되어 있으면 신규/갱신 게시물을 DB에도 기록
+            mirror_posts("kakaostory", new_posts + updated_posts)
+            new_count += len(new_posts)
+            updated_count += len(updated_posts)
+
             logging.info(
-                f"===== 해시태그 '{tag}' 처리 종료 (신규 {added}건, 갱신 {refreshed}건) ====="
+                f"===== 해시태그 '{tag}' 처리 종료 (신규 {len(new_posts)}건, 갱신 {len(updated_posts)}건) ====="
             )
+            if new_posts:
+                logging.info("추가된 게시물 미리보기:")
+                logging.info(json.dumps(new_posts, ensure_ascii=False, indent=2))
+            if updated_posts:
+                logging.info("갱신된 게시물 미리보기:")
+                logging.info(json.dumps(updated_posts, ensure_ascii=False, indent=2))
+
+        # 모든 해시태그를 끝까지 수집했으면 완료 기록을 비움
+        # (중단된 실행만 다음 실행에서 이어서 수집하고, 정상 실행 뒤에는 전체 해시태그를 다시 갱신)
+        tag_journal.clear()
     finally:
         driver.quit()
-
-    final_records = sorted(
-        existing_records.values(), key=lambda record: record["p_num"]
-    )
-
-    output_path.write_text(
-        json.dumps(final_records, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+        store.close()
+        tag_journal.close()
 
     logging.info(
-        f"\n신규 게시물 {len(new_posts)}건, 좋아요/댓글 갱신 {len(updated_posts)}건 반영 "
-        f"(총 {len(final_records)}건)"
+        f"\n신규 게시물 {new_count}건, 좋아요/댓글 갱신 {updated_count}건 반영 "
+        f"(총 {len(store.records)}건)"
     )
-    if new_posts:
-        logging.info("\n추가된 게시물 미리보기:")
-        logging.info(json.dumps(new_posts, ensure_ascii=False, indent=2))
-    if updated_posts:
-        logging.info("\n갱신된 게시물 미리보기:")
-        logging.info(json.dumps(updated_posts, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,26 +1,24 @@
 from __future__ import annotations
 
-import json
 import logging
-import tempfile
+import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import requests
-import whisper
 
-try:
-    import librosa
-    import numpy as np
-    HAS_LIBROSA = True
-except ImportError:
-    HAS_LIBROSA = False
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.audio_cache import transcribe_audio  # noqa: E402
+from common.audio_decode import AudioDecodeError, NoAudioStreamError, decode_audio  # noqa: E402
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.whisper_model import get_whisper_model  # noqa: E402
 
 
 # 파일 경로 (현재 파일 위치 기준)
 BASE_DIR = Path(__file__).parent
-INPUT_PATH = BASE_DIR / "kakaostory_popup_posts.json"
-OUTPUT_PATH = INPUT_PATH
+INPUT_PATH = BASE_DIR / "kakaostory_popup_posts.json"  # 읽기만 함 (결과는 kakaostory_popup_posts.audio_caption/audio_speech.jsonl에 저장)
 LOG_PATH = BASE_DIR / "kakaostory.log"
 REQUEST_TIMEOUT = 300  # 비디오 다운로드는 시간이 걸릴 수 있음
 WHISPER_MODEL = "base"  # tiny, base, small, medium, large 중 선택
@@ -88,89 +86,76 @@ def find_mp4_url(media_urls: List[str]) -> Optional[str]:
     return None
 
 
-def calculate_audio_db(video_path: str) -> Optional[float]:
-    """비디오 파일에서 오디오의 평균 데시벨 계산
+def transcribe_video(video_bytes: bytes, model) -> tuple[str, Optional[float], dict]:
+    """Whisper를 사용하여 비디오에서 음성 인식 및 데시벨 계산 (임시 파일 없음)
     
-    Returns:
-        Optional[float]: 평균 데시벨 값 (dB), 계산 실패 시 None
-    """
-    if not HAS_LIBROSA:
-        return None
-    
-    try:
-        # 오디오 로드 (librosa는 자동으로 오디오만 추출)
-        y, sr = librosa.load(video_path, sr=None)
-        
-        if len(y) == 0:
-            return None
-        
-        # RMS (Root Mean Square) 계산
-        rms = librosa.feature.rms(y=y)[0]
-        
-        # 데시벨로 변환 (reference=1.0)
-        db = librosa.amplitude_to_db(rms, ref=1.0)
-        
-        # 평균 데시벨 반환
-        avg_db = float(np.mean(db))
-        return avg_db
-    except Exception as exc:
-        logging.debug(f"데시벨 계산 실패: {exc}")
-        return None
-
-
-def transcribe_video(video_bytes: bytes, model) -> tuple[str, Optional[float]]:
-    """Whisper를 사용하여 비디오에서 음성 인식 및 데시벨 계산 (임시 파일 자동 삭제)
+    ffmpeg 한 번으로 16kHz 모노 PCM 배열을 디코딩하여 데시벨 계산과 Whisper 음성 인식에 함께 사용합니다.
+    같은 음원이 이미 인식되어 있으면 오디오 캐시(common/audio_cache.py) 결과를 사용하고,
+    아니면 VAD로 찾은 음성 구간만 Whisper에 전달합니다 (무음이거나 음성 구간이 없으면 Whisper를 호출하지 않음).
     
     Returns:
-        tuple: (transcribed_text, average_db)
+        tuple: (transcribed_text, average_db, {"duration_seconds", "speech_seconds", "skipped_seconds"})
         
     Raises:
         RuntimeError: 오디오 스트림이 없는 경우 또는 기타 오디오 로드 실패
     """
-    # NamedTemporaryFile: delete=True로 설정하면 컨텍스트 종료 시 자동 삭제
-    # 메모리에서 직접 처리할 수 없으므로 임시 파일 사용하되, 자동으로 정리됨
-    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=True) as tmp_file:
-        tmp_file.write(video_bytes)
-        tmp_file.flush()  # 디스크에 쓰기 보장
-        
-        logging.info("Whisper 음성 인식 시작...")
-        try:
-            result = model.transcribe(tmp_file.name, language="ko")
-            text = result["text"].strip()
-                
-            # 오디오 데시벨 계산
-            avg_db = calculate_audio_db(tmp_file.name)
-                
-            db_info = f", 평균 데시벨: {avg_db:.1f} dB" if avg_db is not None else ""
-            logging.info(f"음성 인식 완료: {len(text)}자{db_info}")
-                
-            return text, avg_db
-        except RuntimeError as e:
-            error_msg = str(e)
-            # 오디오 스트림이 없는 경우를 감지
-            if "does not contain any stream" in error_msg or "no audio stream" in error_msg.lower():
-                raise RuntimeError("비디오에 오디오 스트림이 없습니다") from e
-            raise
-        # 컨텍스트 종료 시 자동으로 파일 삭제됨
+    try:
+        audio = decode_audio(video_bytes)
+    except NoAudioStreamError as e:
+        raise RuntimeError("비디오에 오디오 스트림이 없습니다") from e
+    except AudioDecodeError as e:
+        raise RuntimeError(f"오디오 디코딩 실패: {e}") from e
+    
+    logging.info("Whisper 음성 인식 시작...")
+    # 데시벨도 같은 배열로 계산 (다시 디코딩하지 않음, 캐시 적중 시 저장된 값)
+    result = transcribe_audio(audio, model, language="ko")
+    text, avg_db, speech = result["text"], result["average_db"], result["speech"]
+    
+    db_info = f", 평균 데시벨: {avg_db:.1f} dB" if avg_db is not None else ""
+    source = "오디오 캐시 적중 (Whisper 생략)" if result["cached"] else "음성 인식 완료"
+    logging.info(
+        f"{source}: {len(text)}자{db_info}, "
+        f"음성 {speech['speech_seconds']}초 / {speech['duration_seconds']}초 (건너뜀 {speech['skipped_seconds']}초)"
+    )
+    
+    return text, avg_db, speech
+
+
+def is_video_post(post: dict) -> bool:
+    return post.get("media_type") == "video"
+
+
+def is_target_post(post: dict) -> bool:
+    """
+    처리 대상 게시물인지 확인 (사이드카 값을 합친 게시물 기준)
+
+    media_type="video"인 게시물 중 audio_caption이 없는 게시물 (FORCE_REPROCESS면 전체 비디오 게시물)
+    이전 실행에서 음성 구간이 없다고 기록된(audio_speech.speech_seconds=0) 게시물은 다시 받지 않음
+    """
+    if not is_video_post(post):
+        return False
+    if FORCE_REPROCESS:
+        return True
+    speech = post.get("audio_speech")
+    if isinstance(speech, dict) and not speech.get("speech_seconds"):
+        return False
+    return not post.get("audio_caption") or not post.get("audio_caption").strip()
 
 
-def process_posts(posts: List[dict], model) -> int:
-    """비디오 게시물들을 처리하여 audio_caption 추출"""
+def load_target_posts(store: JournaledJsonStore, enrichment: EnrichmentStore) -> List[Tuple[int, dict]]:
+    """비디오 게시물만 스트리밍으로 읽고 사이드카 값을 합쳐 처리 대상 (원본 인덱스, 게시물) 리스트 반환"""
+    joined = enrichment.iter_joined(store.iter_records(where=is_video_post))
+    return [(index, post) for index, post in joined if is_target_post(post)]
+
+
+def process_posts(video_posts: List[Tuple[int, dict]], model, enrichment: EnrichmentStore) -> int:
+    """
+    비디오 게시물들을 처리하여 audio_caption 추출
+
+    audio_caption과 음성 구간 통계(audio_speech)는 바로 사이드카에 기록합니다 (원본 JSON은 수정하지 않음, 강제 중단 시에도 보존).
+    """
     updated_count = 0
     
-    # media_type="video"인 게시물 필터링
-    video_posts = [
-        post for post in posts
-        if post.get("media_type") == "video"
-    ]
-    
-    # audio_caption이 이미 있는 경우 스킵 (FORCE_REPROCESS가 False인 경우)
-    if not FORCE_REPROCESS:
-        video_posts = [
-            post for post in video_posts
-            if not post.get("audio_caption") or not post.get("audio_caption").strip()
-        ]
-    
     # 테스트 제한 적용
     if TEST_LIMIT > 0:
         video_posts = video_posts[:TEST_LIMIT]
@@ -179,7 +164,7 @@ def process_posts(posts: List[dict], model) -> int:
     total = len(video_posts)
     logging.info(f"처리할 비디오 게시물: {total}건")
     
-    for idx, post in enumerate(video_posts, start=1):
+    for idx, (_, post) in enumerate(video_posts, start=1):
         p_num = post.get("p_num")
         shortcode = post.get("shortcode")
         media_urls = post.get("media_url", [])
@@ -199,13 +184,17 @@ def process_posts(posts: List[dict], model) -> int:
             video_bytes = download_video(mp4_url)
             
             # Whisper로 음성 인식 및 데시벨 계산
-            audio_caption, avg_db = transcribe_video(video_bytes, model)
+            audio_caption, avg_db, speech = transcribe_video(video_bytes, model)
+            enrichment.set(post, "audio_speech", {"videos": 1, **speech})
             
             if audio_caption:
                 post["audio_caption"] = audio_caption
+                enrichment.set(post, "audio_caption", audio_caption)
                 updated_count += 1
                 db_info = f", 평균 데시벨: {avg_db:.1f} dB" if avg_db is not None else ""
                 logging.info(f"  → audio_caption 저장 완료: {len(audio_caption)}자{db_info}")
+            elif not speech["speech_seconds"]:
+                logging.info(f"  → 스킵: 음성 구간 없음 ({speech['duration_seconds']}초 전체 건너뜀)")
             else:
                 logging.warning("  → 음성 인식 결과가 비어있습니다.")
                 
@@ -236,39 +225,33 @@ def main() -> None:
     logging.info("프로그램 시작 - 로그 파일: %s", LOG_PATH.absolute())
     logging.info("=" * 80)
     
-    # JSON 파일 로드
+    # JSON 파일 로드 (비디오 게시물만 스트리밍으로 읽고 이전 결과 사이드카와 합쳐 필터링)
     logging.info(f"JSON 파일 로드: {INPUT_PATH}")
-    posts = json.loads(INPUT_PATH.read_text(encoding="utf-8"))
-    logging.info(f"총 {len(posts)}개 게시물 로드 완료")
+    store = JournaledJsonStore(INPUT_PATH)
+    enrichment = EnrichmentStore(INPUT_PATH, fields=("audio_caption", "audio_speech"))
+    video_posts = load_target_posts(store, enrichment)
+    logging.info(f"처리 대상 비디오 게시물 {len(video_posts)}개 로드 완료")
     
-    # Whisper 모델 로드
-    logging.info(f"Whisper 모델 로드 중: {WHISPER_MODEL} (처음 실행 시 다운로드됩니다)")
-    model = whisper.load_model(WHISPER_MODEL)
-    logging.info("Whisper 모델 로드 완료")
+    # Whisper 모델 (처리할 비디오가 있을 때 처음 한 번만 로드, 영상마다 로드/음성 인식 시간 기록)
+    model = get_whisper_model(WHISPER_MODEL)
     
-    # 게시물 처리
+    # 게시물 처리 (결과는 게시물마다 사이드카에 바로 기록됨)
     try:
-        updated_count = process_posts(posts, model)
+        updated_count = process_posts(video_posts, model, enrichment)
         
-        # 결과 저장
         if updated_count > 0:
-            logging.info(f"JSON 파일 저장 중: {OUTPUT_PATH}")
-            OUTPUT_PATH.write_text(
-                json.dumps(posts, ensure_ascii=False, indent=2),
-                encoding="utf-8"
+            logging.info(
+                f"✅ 저장 완료: {updated_count}개 게시물의 audio_caption이 업데이트되었습니다. "
+                f"({enrichment.sidecar_path('audio_caption').name})"
             )
-            logging.info(f"✅ 저장 완료: {updated_count}개 게시물의 audio_caption이 업데이트되었습니다.")
         else:
             logging.info("변경된 게시물이 없습니다.")
             
     except KeyboardInterrupt:
-        logging.warning("\n⚠️  사용자에 의해 중단되었습니다. 처리 완료된 데이터를 저장합니다...")
-        OUTPUT_PATH.write_text(
-            json.dumps(posts, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
-        logging.info("✅ 중간 저장 완료")
+        logging.warning("\n⚠️  사용자에 의해 중단되었습니다. 처리 완료된 데이터는 사이드카에 보존됩니다.")
         raise
+    finally:
+        enrichment.close()
 
 
 if __name__ == "__main__":
@@ -3,9 +3,16 @@ from __future__ import annotations
 import json
 import logging
 import re
+import sys
 from pathlib import Path
 from typing import List, Optional
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.post_db import mirror_users  # noqa: E402
+
 # 파일 경로 (현재 파일 위치 기준)
 BASE_DIR = Path(__file__).parent
 INPUT_PATH = BASE_DIR / "kakaostory_popup_posts.json"
@@ -645,8 +652,10 @@ def main() -> None:
     # 기존 사용자 데이터 로드
     existing_users_by_id, existing_users_by_name = load_existing_users()
     
-    # 게시물 데이터 로드
-    posts = json.loads(INPUT_PATH.read_text(encoding="utf-8"))
+    # 게시물 데이터 로드 (아직 압축하지 않은 저널의 게시물 포함, OCR/오디오 단계가 사이드카에 저장한
+    # media_caption, audio_caption을 합쳐서 사용)
+    enrichment = EnrichmentStore(INPUT_PATH)
+    posts = [enrichment.join(post) for _, post in JournaledJsonStore(INPUT_PATH).iter_records()]
     logger.info(f"총 {len(posts)}개 게시물 로드 완료")
     
     # user_id별로 게시물 그룹화
@@ -826,6 +835,7 @@ def main() -> None:
     # 결과 저장
     if updated_count > 0 or len(new_users) > 0 or name_only_updated > 0:
         OUTPUT_PATH.write_text(json.dumps(users_list, ensure_ascii=False, indent=2), encoding="utf-8")
+        mirror_users("kakaostory", users_list)
         logger.info(
             "kakaostory_user.json 저장 완료 (새 사용자 %d명, name만 있던 사용자에 user_id 추가 %d명, 총 %d명)",
             len(new_users),
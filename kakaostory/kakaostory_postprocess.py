@@ -5,32 +5,70 @@
 
 from __future__ import annotations
 
-import copy
 import io
 import json
 import logging
 import re
+import signal
+import sys
 import tempfile
 from pathlib import Path
-from typing import Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-import cv2  # type: ignore
 import easyocr  # type: ignore
 import numpy as np  # type: ignore
 import requests
 from PIL import Image
 
+# 공용 모듈(common/) import를 위해 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.enrichment_store import EnrichmentStore  # noqa: E402
+from common.json_journal import JournaledJsonStore  # noqa: E402
+from common.ocr_batch import BatchOCREngine, filter_texts  # noqa: E402
+from common.ocr_backend import create_ocr_reader, profile_tag  # noqa: E402
+from common.ocr_cache import get_ocr_cache  # noqa: E402
+from common.ocr_daemon import connect_ocr_daemon  # noqa: E402
+from common.ocr_pool import create_ocr_pool  # noqa: E402
+from common.ocr_preprocess import preprocess_image, preprocess_image_bytes as preprocess_ocr_image  # noqa: E402
+from common.text_prefilter import create_text_prefilter  # noqa: E402
+from common.video_frames import VideoFrameError, sample_scene_frames  # noqa: E402
+
 # 파일 경로 (현재 파일 위치 기준)
 BASE_DIR = Path(__file__).parent
-INPUT_PATH = BASE_DIR / "kakaostory_popup_posts.json"
-OUTPUT_PATH = INPUT_PATH
+INPUT_PATH = BASE_DIR / "kakaostory_popup_posts.json"  # 읽기만 함 (OCR 결과는 사이드카에 저장)
 LOG_PATH = BASE_DIR / "kakaostory.log"
+# 이전 버전의 체크포인트 파일 (남아 있으면 시작 시 사이드카로 옮기고 삭제)
+LEGACY_CHECKPOINT_PATH = BASE_DIR / "kakaostory_postprocess.checkpoint.json"
 TARGET_P_NUM = -1  # 특정 p_num을 테스트하려면 양수로 설정
 TEST_LIMIT = 0  # 샘플 테스트: 20같은 양수로 설정 / 전체 데이터: 0으로 설정
 FORCE_REPROCESS = False
 MIN_CAPTION_LENGTH = 20
 REQUEST_TIMEOUT = 30
 EASYOCR_LANGS = ["ko", "en"]
+OCR_BATCH_SIZE = 8  # 여러 게시물의 이미지를 이 개수만큼 모아 EasyOCR 배치 실행 (1이면 이미지별 실행)
+OCR_MIN_CONFIDENCE = 0.5
+# OCR 워커 프로세스 수 (0이면 이 프로세스에서 처리, -1이면 CPU 코어 수) / 워커당 스레드 수 (None이면 코어 수 / 워커 수)
+OCR_WORKERS = 0
+OCR_THREADS_PER_WORKER: Optional[int] = None
+# 이미지 전처리 배율 (common/ocr_preprocess.py): "adaptive"는 글줄 높이/이미지 크기에 맞춰 배율 결정, "fixed"는 기존 3배 확대
+# adaptive는 큰 이미지를 축소하므로 실제 게시물에서 인식률 차이를 측정하기 전까지는 기존과 같은 fixed가 기본값
+PREPROCESS_MODE = "fixed"
+# OCR 결과 캐시(common/ocr_cache.py)에서 구분할 전처리 방식 (facebook_imgocr과 같은 전처리이므로 결과를 공유)
+# ocr_cache_profile()이 앞에 OCR 백엔드를 붙임
+OCR_CACHE_PREPROCESS = f"clahe-{PREPROCESS_MODE}:{','.join(EASYOCR_LANGS)}"
+# 글자 사전 필터 (common/text_prefilter.py): "edges", "mser", "detector" 또는 None (사용 안 함)
+# 글자가 없어 보이는 이미지는 전처리(확대)와 OCR을 생략하고, 그중 TEXT_PREFILTER_AUDIT_RATE 비율은 그대로 OCR하여 놓친 비율을 측정
+# 걸러낸 이미지의 OCR 누락이 실제 게시물에서 측정되기 전까지는 기본으로 끔 (기존과 같은 결과)
+TEXT_PREFILTER: Optional[str] = None
+TEXT_PREFILTER_AUDIT_RATE = 0.05
+# 영상 OCR (common/video_frames.py): 장면이 바뀐 프레임만 골라 영상당 최대 VIDEO_MAX_FRAMES장 OCR
+VIDEO_MAX_FRAMES = 6
+# goal-directed OCR (여러 장 이미지 게시물): 첫/마지막 슬라이드부터 GOAL_WAVE_SIZE장씩 OCR하고,
+# user_num 패턴이나 핸드폰 번호가 나오면 나머지 슬라이드는 OCR하지 않음
+# 건너뛴 슬라이드는 ocr_skipped_slides 사이드카에 기록하며, False로 다시 실행하면 그 슬라이드만 OCR하여 채움
+GOAL_DIRECTED_OCR = False
+GOAL_WAVE_SIZE = 2
+# media_caption은 kakaostory_popup_posts.media_caption.jsonl 사이드카에 게시물(shortcode)별로 한 줄씩 기록
 
 # 로깅 설정: 콘솔과 파일 둘 다에 출력
 logging.basicConfig(
@@ -46,9 +84,11 @@ logger = logging.getLogger(__name__)
 
 # user_num 관련 함수는 kakaostory_extract_userinfo에서 import
 try:
-    from kakaostory_extract_userinfo import has_user_pattern
+    from kakaostory_extract_userinfo import PHONE_NUM_PATTERN, has_user_pattern
 except ImportError:
     # import 실패 시 빈 함수로 대체
+    PHONE_NUM_PATTERN = None
+
     def has_user_pattern(text: str) -> bool:
         return False
 
@@ -57,6 +97,37 @@ class OCRProcessingError(Exception):
     """테스트용 OCR 예외"""
 
 
+def migrate_legacy_checkpoint(enrichment: EnrichmentStore, path: Path = LEGACY_CHECKPOINT_PATH) -> int:
+    """
+    이전 버전의 체크포인트({"posts": {"<shortcode>": {"media_caption": "..."}}})를 사이드카로 옮기고 삭제
+
+    Returns:
+        int: 옮긴 게시물 수
+    """
+    if not path.exists():
+        return 0
+    try:
+        saved = json.loads(path.read_text(encoding="utf-8")).get("posts") or {}
+    except (OSError, ValueError, AttributeError) as exc:
+        logger.warning("이전 체크포인트 로드 실패 (무시하고 진행): %s", exc)
+        return 0
+
+    migrated = 0
+    for key, fields in saved.items():
+        caption = (fields or {}).get("media_caption")
+        if caption and not key.startswith(("p_num:", "obj:")):
+            enrichment.set({"shortcode": key}, "media_caption", caption)
+            migrated += 1
+    path.unlink()
+    if migrated:
+        logger.info("♻️ 이전 실행의 체크포인트에서 게시물 %d건을 사이드카로 이전", migrated)
+    return migrated
+
+
+def _raise_system_exit(signum, frame):  # pylint: disable=unused-argument
+    raise SystemExit(128 + signum)
+
+
 def download_bytes(url: str) -> bytes:
     response = requests.get(url, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
@@ -65,26 +136,7 @@ def download_bytes(url: str) -> bytes:
 
 def preprocess_image_bytes(data: bytes) -> Optional[Image.Image]:
     try:
-        np_array = np.frombuffer(data, dtype=np.uint8)
-        frame = cv2.imdecode(np_array, cv2.IMREAD_COLOR)
-        if frame is None:
-            return None
-
-        frame = cv2.resize(frame, None, fx=3.0, fy=3.0, interpolation=cv2.INTER_CUBIC)
-        frame = cv2.medianBlur(frame, 3)
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
-        thresh = cv2.adaptiveThreshold(
-            enhanced,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            31,
-            2,
-        )
-        return Image.fromarray(thresh)
+        return preprocess_ocr_image(data, PREPROCESS_MODE)
     except Exception:  # pylint: disable=broad-except
         return None
 
@@ -95,73 +147,60 @@ _easyocr_reader: Optional[easyocr.Reader] = None
 def get_easyocr_reader() -> easyocr.Reader:
     global _easyocr_reader  # pylint: disable=global-statement
     if _easyocr_reader is None:
-        try:
-            _easyocr_reader = easyocr.Reader(EASYOCR_LANGS, gpu=True)
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.warning("EasyOCR GPU 초기화 실패, CPU로 재시도합니다: %s", exc)
-            _easyocr_reader = easyocr.Reader(EASYOCR_LANGS, gpu=False)
+        # OCR 데몬이 실행 중이면 모델을 로드하지 않고 데몬 클라이언트 사용
+        _easyocr_reader = connect_ocr_daemon(EASYOCR_LANGS)
+    if _easyocr_reader is None:
+        # OCR_BACKEND 설정에 따라 EasyOCR(GPU 시도 후 CPU) 또는 ONNX Runtime CPU 백엔드
+        _easyocr_reader = create_ocr_reader(EASYOCR_LANGS)
     return _easyocr_reader
 
 
-def ocr_image_from_bytes(data: bytes) -> str:
+def ocr_cache_profile() -> str:
+    """OCR 캐시 profile (실제 사용하는 OCR 백엔드 + 전처리 방식/언어, 백엔드가 다른 결과는 재사용하지 않음)"""
+    return f"{profile_tag(_easyocr_reader)}:{OCR_CACHE_PREPROCESS}"
+
+
+def create_local_ocr_reader() -> easyocr.Reader:
+    """OCR 워커용 Reader (데몬을 거치지 않고 워커 프로세스에서 직접 모델 로드)"""
+    return create_ocr_reader(EASYOCR_LANGS)
+
+
+# OCR 대상: 다운로드한 이미지 바이트 또는 영상에서 추출한 BGR 프레임 배열 (PNG 인코딩 없이 그대로 사용)
+MediaImage = Union[bytes, np.ndarray]
+
+
+def image_array_from_bytes(data: MediaImage) -> np.ndarray:
+    """이미지 바이트(또는 영상 프레임)를 전처리하여 EasyOCR 입력(RGB 배열)으로 변환 (전처리 실패 시 원본 이미지 사용)"""
+    if isinstance(data, np.ndarray):
+        try:
+            return np.ascontiguousarray(np.stack([preprocess_image(data, PREPROCESS_MODE)] * 3, axis=-1))
+        except Exception:  # pylint: disable=broad-except
+            return np.ascontiguousarray(data[:, :, ::-1])
     image = preprocess_image_bytes(data)
     if image is None:
         image = Image.open(io.BytesIO(data))
     if image.mode != "RGB":
         image = image.convert("RGB")
-
-    array = np.array(image)
-    try:
-        reader = get_easyocr_reader()
-        results = reader.readtext(array)
-    except Exception as exc:  # pylint: disable=broad-except
-        logger.debug("EasyOCR 실패: %s", exc)
-        return ""
-
-    texts = [text.strip() for _, text, conf in results if text and conf >= 0.5]
-    return "\n".join(texts)
+    return np.array(image)
 
 
-def ocr_image_url(url: str) -> str:
+def download_image(url: str) -> Optional[bytes]:
     try:
-        return ocr_image_from_bytes(download_bytes(url))
+        return download_bytes(url)
     except Exception as exc:  # pylint: disable=broad-except
         logger.warning("이미지 OCR 실패 (%s): %s", url, exc)
-        return ""
-
+        return None
 
-def sample_video_frames(video_path: Path) -> Iterable[bytes]:
-    capture = cv2.VideoCapture(str(video_path))
-    if not capture.isOpened():
-        raise OCRProcessingError("영상 열기 실패")
 
+def sample_video_frames(video_path: Path) -> List[np.ndarray]:
+    """영상을 한 번 읽으면서 장면이 바뀐 프레임을 최대 VIDEO_MAX_FRAMES장 골라 BGR 배열로 반환"""
     try:
-        frames: List[np.ndarray] = []
-
-        ok, first_frame = capture.read()
-        if ok and first_frame is not None:
-            frames.append(first_frame)
-
-        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or 0
-        if frame_count > 1:
-            capture.set(cv2.CAP_PROP_POS_FRAMES, frame_count - 1)
-            ok, last_frame = capture.read()
-            if ok and last_frame is not None:
-                if not frames or not np.array_equal(frames[0], last_frame):
-                    frames.append(last_frame)
-
-        if not frames:
-            raise OCRProcessingError("프레임 추출에 실패했습니다")
-
-        for frame in frames:
-            ok, encoded = cv2.imencode(".png", frame)
-            if ok:
-                yield encoded.tobytes()
-    finally:
-        capture.release()
+        return sample_scene_frames(video_path, max_frames=VIDEO_MAX_FRAMES)
+    except VideoFrameError as exc:
+        raise OCRProcessingError(str(exc)) from exc
 
 
-def ocr_video(url: str) -> List[str]:
+def download_video_frames(url: str) -> List[np.ndarray]:
     try:
         data = download_bytes(url)
     except Exception as exc:  # pylint: disable=broad-except
@@ -172,23 +211,30 @@ def ocr_video(url: str) -> List[str]:
         tmp_file.write(data)
         video_path = Path(tmp_file.name)
 
-    texts: List[str] = []
+    frames: List[np.ndarray] = []
     try:
-        for frame_bytes in sample_video_frames(video_path):
-            try:
-                text = ocr_image_from_bytes(frame_bytes)
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.debug("프레임 OCR 실패: %s", exc)
-                continue
-            if text:
-                texts.append(text)
+        frames.extend(sample_video_frames(video_path))
+    except OCRProcessingError as exc:
+        logger.warning("영상 프레임 추출 실패 (%s): %s", url, exc)
     finally:
         try:
             video_path.unlink(missing_ok=True)
         except OSError:
             pass
 
-    return texts
+    return frames
+
+
+def has_goal_identifier(text: str) -> bool:
+    """goal-directed OCR의 목표(user_num 패턴 또는 핸드폰 번호)가 텍스트에 있는지"""
+    if not text:
+        return False
+    return has_user_pattern(text) or bool(PHONE_NUM_PATTERN and PHONE_NUM_PATTERN.search(text))
+
+
+def slide_priority(count: int) -> List[int]:
+    """goal-directed OCR의 슬라이드 순서: 연락처/추천 번호가 자주 있는 첫/마지막 슬라이드부터, 나머지는 순서대로"""
+    return list(dict.fromkeys(index for index in [0, count - 1, *range(1, count - 1)] if 0 <= index < count))
 
 
 def should_run_ocr(
@@ -238,37 +284,32 @@ def choose_media_caption(existing: str, candidate: str) -> Tuple[str, bool]:
     return existing, False
 
 
-def generate_media_caption(post: dict) -> str:
+def collect_media_images(post: dict, slides: Optional[Sequence[int]] = None) -> List[MediaImage]:
+    """
+    게시물의 OCR 대상 이미지를 caption 순서대로 반환 (이미지: 모든 URL의 바이트, 영상: 썸네일 + 장면 전환 프레임 배열)
+
+    slides를 주면 이미지 게시물에서 해당 번호(0부터)의 슬라이드만 다운로드합니다.
+    """
     media_type = post.get("media_type")
     media_urls: List[str] = post.get("media_url") or []
-    ocr_chunks: List[str] = []
+    images: List[Optional[MediaImage]] = []
 
     if media_type in {"image", "multi_image"}:
-        for url in media_urls:
-            text = ocr_image_url(url)
-            if text:
-                ocr_chunks.append(text)
+        if slides is not None:
+            media_urls = [media_urls[slide] for slide in sorted(slides) if 0 <= slide < len(media_urls)]
+        images.extend(download_image(url) for url in media_urls)
     elif media_type == "video" and len(media_urls) >= 2:
-        thumb_text = ocr_image_url(media_urls[0])
-        if thumb_text:
-            ocr_chunks.append(thumb_text)
-        ocr_chunks.extend(ocr_video(media_urls[1]))
+        images.append(download_image(media_urls[0]))
+        images.extend(download_video_frames(media_urls[1]))
 
-    return "\n".join(chunk for chunk in ocr_chunks if chunk).strip()
+    return [image for image in images if image is not None and len(image)]
 
 
-def process_target_post(post: dict, all_posts: List[dict]) -> bool:
+def apply_media_caption(post: dict, need_ocr: bool, candidate_caption: str) -> bool:
+    """OCR 결과와 기존 media_caption 중 더 나은 값을 post에 반영하고 변경 여부 반환"""
     existing_caption = (post.get("media_caption") or "").strip()
-    existing_user_num = post.get("user_num")
-    media_urls: List[str] = post.get("media_url") or []
-
     updated = False
 
-    need_ocr = should_run_ocr(existing_caption, existing_user_num, media_urls)
-    if need_ocr:
-        logger.debug("  → OCR 실행 필요")
-    candidate_caption = generate_media_caption(post) if need_ocr else ""
-
     chosen_caption, caption_updated = choose_media_caption(existing_caption, candidate_caption)
     if not need_ocr and not caption_updated:
         logger.debug("  → 기존 media_caption 유지 (재분석 조건 미충족)")
@@ -285,11 +326,144 @@ def process_target_post(post: dict, all_posts: List[dict]) -> bool:
     return updated
 
 
-def process_posts(posts: List[dict], targets: Iterable[dict]) -> int:
+def process_posts(
+    posts: List[dict],
+    targets: Iterable[dict],
+    enrichment: Optional[EnrichmentStore] = None,
+    batch_size: int = OCR_BATCH_SIZE,
+    goal_directed: bool = GOAL_DIRECTED_OCR,
+) -> int:
+    """
+    대상 게시물을 처리하고 media_caption이 바뀐 게시물 수 반환
+
+    여러 게시물의 이미지를 batch_size장씩 모아 OCR하고, 게시물의 이미지 결과가 모두 모이면
+    media_caption을 반영합니다. enrichment가 있으면 바뀐 media_caption을 바로 사이드카에 기록합니다
+    (원본 JSON은 수정하지 않음).
+
+    goal_directed이면 여러 장 이미지 게시물은 slide_priority() 순서로 GOAL_WAVE_SIZE장씩 OCR하고, 목표 식별자가
+    나오면 나머지 슬라이드를 건너뛰고 ocr_skipped_slides에 기록합니다. goal_directed가 아니면 ocr_skipped_slides가
+    남은 게시물은 그 슬라이드만 OCR하여 기존 media_caption 뒤에 붙입니다.
+    """
     updated_posts = 0
-    index = 0
+    # 결과를 기다리는 게시물: 게시물 번호 -> (게시물, 이미지별 OCR 결과)
+    pending: Dict[int, Tuple[dict, List[Optional[str]]]] = {}
+    # OCR 대기 중인 이미지의 원본 바이트/프레임 (결과를 캐시/사전 필터 통계에 기록할 때 사용)
+    sources: Dict[Tuple[int, int], MediaImage] = {}
+    # goal-directed OCR 중인 게시물: 게시물 번호 -> [아직 OCR하지 않은 슬라이드(우선순위 순), 결과를 기다리는 이미지 수]
+    goals: Dict[int, List] = {}
+    # 현재 묶음의 결과가 모두 나온 goal-directed 게시물 (OCR 콜백 밖에서 다음 묶음 제출/완료 처리)
+    ready_goals: List[int] = []
+    # 건너뛴 슬라이드를 채우는 게시물: 게시물 번호 -> 기존 media_caption
+    fills: Dict[int, str] = {}
+    cache = get_ocr_cache()
+    prefilter = create_text_prefilter(TEXT_PREFILTER, TEXT_PREFILTER_AUDIT_RATE, get_easyocr_reader)
+
+    def finish_post(
+        post: dict, need_ocr: bool, candidate_caption: str, skipped_slides: Optional[List[int]] = None
+    ) -> None:
+        nonlocal updated_posts
+        try:
+            if apply_media_caption(post, need_ocr, candidate_caption):
+                updated_posts += 1
+                if enrichment is not None:
+                    enrichment.set(post, "media_caption", post["media_caption"])
+            if skipped_slides is not None and (skipped_slides or post.get("ocr_skipped_slides")):
+                post["ocr_skipped_slides"] = skipped_slides
+                if enrichment is not None:
+                    enrichment.set(post, "ocr_skipped_slides", skipped_slides)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception(
+                "게시물 처리 실패 (p_num=%s, shortcode=%s): %s", post.get("p_num"), post.get("shortcode"), exc
+            )
+
+    def joined_caption(chunks: List[Optional[str]]) -> str:
+        return "\n".join(chunk for chunk in chunks if chunk).strip()
+
+    def on_result(key: Tuple[int, int], texts: List[str]) -> None:
+        post_index, slot = key
+        post, chunks = pending[post_index]
+        chunks[slot] = "\n".join(texts)
+        goal = goals.get(post_index)
+        if goal is not None:
+            goal[1] -= 1
+            if goal[1] == 0:
+                ready_goals.append(post_index)
+            return
+        if all(chunk is not None for chunk in chunks):
+            del pending[post_index]
+            caption = joined_caption(chunks)
+            if post_index in fills:
+                caption = "\n".join(part for part in (fills.pop(post_index), caption) if part)
+                finish_post(post, True, caption, [])
+            else:
+                finish_post(post, True, caption)
+
+    def on_raw_result(key: Tuple[int, int], results: list) -> None:
+        data = sources.pop(key, None)
+        if data is None:
+            return
+        if cache is not None:
+            cache.store(ocr_cache_profile(), data, results)
+        if prefilter is not None:
+            prefilter.report(data, filter_texts(results, OCR_MIN_CONFIDENCE))
+
+    def submit_image(key: Tuple[int, int], data: Optional[MediaImage]) -> bool:
+        """이미지 하나를 캐시/사전 필터 확인 후 OCR 대기열에 추가 (대기열에 넣었으면 True, 아니면 결과를 바로 반영)"""
+        if data is None:
+            on_result(key, [])
+            return False
+        # 다른 게시물/플랫폼에서 이미 OCR한 이미지면 캐시 결과 사용 (전처리/OCR 생략)
+        cached = cache.lookup(ocr_cache_profile(), data) if cache is not None else None
+        if cached is not None:
+            on_result(key, filter_texts(cached, OCR_MIN_CONFIDENCE))
+            return False
+        if prefilter is not None and not prefilter.should_ocr(data):
+            logger.debug("  → 글자가 없는 이미지로 판단하여 OCR 생략 (slot=%d)", key[1])
+            on_result(key, [])
+            return False
+        try:
+            image = image_array_from_bytes(data)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("이미지 OCR 실패 (이미지 변환): %s", exc)
+            on_result(key, [])
+            return False
+        if cache is not None or prefilter is not None:
+            sources[key] = data
+        engine.submit(key, image)
+        return True
+
+    def submit_goal_wave(index: int) -> None:
+        """goal-directed 게시물의 다음 슬라이드 묶음을 다운로드하여 제출"""
+        post, _ = pending[index]
+        goal = goals[index]
+        wave, goal[0] = goal[0][:GOAL_WAVE_SIZE], goal[0][GOAL_WAVE_SIZE:]
+        goal[1] = len(wave)
+        media_urls: List[str] = post.get("media_url") or []
+        for slot in wave:
+            submit_image((index, slot), download_image(media_urls[slot]))
+
+    def advance_goals() -> None:
+        """결과가 모두 나온 goal-directed 게시물: 목표를 찾았거나 슬라이드가 없으면 완료, 아니면 다음 묶음 제출"""
+        while ready_goals:
+            index = ready_goals.pop(0)
+            post, chunks = pending[index]
+            remaining = goals[index][0]
+            caption = joined_caption(chunks)
+            if remaining and not has_goal_identifier(caption):
+                submit_goal_wave(index)
+                continue
+            del goals[index]
+            del pending[index]
+            if remaining:
+                logger.info(
+                    "  → 목표 식별자를 찾아 슬라이드 %d장 OCR 생략 (p_num=%s, 생략한 슬라이드=%s)",
+                    len(remaining),
+                    post.get("p_num"),
+                    sorted(remaining),
+                )
+            finish_post(post, True, caption, sorted(remaining))
 
-    for index, post in enumerate(targets, start=1):
+    def collect_post(index: int, post: dict) -> None:
         shortcode = post.get("shortcode")
         p_num = post.get("p_num")
         user_id = post.get("user_id")
@@ -300,23 +474,73 @@ def process_posts(posts: List[dict], targets: Iterable[dict]) -> int:
             shortcode,
             user_id or "<없음>",
         )
+        media_urls: List[str] = post.get("media_url") or []
+        skipped_slides = post.get("ocr_skipped_slides") or []
         try:
-            if process_target_post(post, posts):
-                updated_posts += 1
+            if not goal_directed and skipped_slides:
+                # 이전 goal-directed 실행에서 건너뛴 슬라이드만 OCR하여 기존 media_caption에 추가
+                need_ocr = True
+                fills[index] = (post.get("media_caption") or "").strip()
+                images = collect_media_images(post, skipped_slides)
+            else:
+                need_ocr = should_run_ocr(
+                    (post.get("media_caption") or "").strip(), post.get("user_num"), media_urls
+                )
+                if (
+                    need_ocr
+                    and goal_directed
+                    and post.get("media_type") in {"image", "multi_image"}
+                    and len(media_urls) > GOAL_WAVE_SIZE
+                ):
+                    pending[index] = (post, [None] * len(media_urls))
+                    goals[index] = [slide_priority(len(media_urls)), 0]
+                    submit_goal_wave(index)
+                    return
+                images = collect_media_images(post) if need_ocr else []
         except Exception as exc:  # pylint: disable=broad-except
             logger.exception("게시물 처리 실패 (p_num=%s, shortcode=%s): %s", p_num, shortcode, exc)
-            continue
-
-    return updated_posts
-
-
-def save_posts(posts: List[dict], updated_posts: int) -> None:
-    """게시물 데이터를 파일에 저장"""
-    OUTPUT_PATH.write_text(json.dumps(posts, ensure_ascii=False, indent=2), encoding="utf-8")
-    logger.info(
-        "JSON 업데이트 완료 (media_caption 갱신 %d건)",
-        updated_posts,
+            pending.pop(index, None)
+            goals.pop(index, None)
+            fills.pop(index, None)
+            return
+
+        if not images:
+            if fills.pop(index, None) is not None:
+                # 건너뛴 슬라이드를 하나도 받지 못함 (URL 만료/범위 밖 번호 등): ocr_skipped_slides를 비워 두지 않으면
+                # 사이드카에 이전 값이 남아 매 실행마다 같은 게시물을 다시 채우기 대상으로 고름
+                finish_post(post, need_ocr, "", [])
+            else:
+                finish_post(post, need_ocr, "")
+            return
+        pending[index] = (post, [None] * len(images))
+        queued = sum(submit_image((index, slot), data) for slot, data in enumerate(images))
+        logger.debug("  → OCR 대기열에 이미지 %d장 추가 (전체 %d장)", queued, len(images))
+
+    pool = create_ocr_pool(create_local_ocr_reader, OCR_WORKERS, OCR_THREADS_PER_WORKER, EASYOCR_LANGS)
+    engine = BatchOCREngine(
+        get_easyocr_reader,
+        batch_size=batch_size,
+        min_confidence=OCR_MIN_CONFIDENCE,
+        on_result=on_result,
+        pool=pool,
+        on_raw_result=on_raw_result,
     )
+    try:
+        for index, post in enumerate(targets, start=1):
+            collect_post(index, post)
+            advance_goals()
+        engine.flush()
+        # goal-directed 게시물은 남은 묶음이 없을 때까지 다음 슬라이드를 제출하고 다시 처리
+        while ready_goals:
+            advance_goals()
+            engine.flush()
+    finally:
+        if pool is not None:
+            pool.terminate()
+    engine.log_stats()
+    if prefilter is not None:
+        prefilter.log_stats()
+    return updated_posts
 
 
 def main() -> None:
@@ -324,9 +548,12 @@ def main() -> None:
     logger.info("프로그램 시작 - 로그 파일: %s", LOG_PATH.absolute())
     logger.info("=" * 80)
     
-    posts = json.loads(INPUT_PATH.read_text(encoding="utf-8"))
-    # 초기 상태 백업 (실제 변경사항 확인용)
-    initial_posts_state = copy.deepcopy(posts)
+    # 이전 실행까지의 OCR 결과(사이드카)를 합친 게시물 목록
+    enrichment = EnrichmentStore(INPUT_PATH, fields=("media_caption", "ocr_skipped_slides"))
+    migrate_legacy_checkpoint(enrichment)
+    posts = [enrichment.join(post) for _, post in JournaledJsonStore(INPUT_PATH).iter_records()]
+    # SIGTERM도 KeyboardInterrupt와 같이 사이드카를 정리한 뒤 종료되도록
+    signal.signal(signal.SIGTERM, _raise_system_exit)
 
     if TARGET_P_NUM > 0:
         target_post = next((post for post in posts if post.get("p_num") == TARGET_P_NUM), None)
@@ -342,10 +569,12 @@ def main() -> None:
             logger.info("강제 재처리 모드: 모든 게시물 처리")
         else:
             # 일반 모드: media_caption이 없는 게시물만 처리
+            # (goal-directed 모드가 아니면 이전에 건너뛴 슬라이드가 남은 게시물도 처리)
             candidate_targets = [
                 post
                 for post in posts
                 if not (post.get("media_caption") or "").strip()
+                or (not GOAL_DIRECTED_OCR and post.get("ocr_skipped_slides"))
                 or should_run_ocr(
                     (post.get("media_caption") or "").strip(),
                     post.get("user_num"),
@@ -366,28 +595,21 @@ def main() -> None:
             targets = candidate_targets
             logger.info("전체 데이터 처리 모드: 총 %d건 처리", len(targets))
 
-    updated_posts = 0
-
     try:
-        updated_posts = process_posts(posts, targets)
-    except KeyboardInterrupt:
-        logger.warning("\n⚠️  사용자에 의해 중단되었습니다. 처리 완료된 데이터를 저장합니다...")
-        # 실제 변경사항 확인 (초기 상태와 비교)
-        # 빠른 비교: JSON 직렬화로 비교 (더 정확함)
-        initial_json = json.dumps(initial_posts_state, sort_keys=True, ensure_ascii=False)
-        current_json = json.dumps(posts, sort_keys=True, ensure_ascii=False)
-        has_changes = initial_json != current_json
-        
-        if has_changes or updated_posts > 0:
-            # 실제 변경사항이 있거나 카운터에 변경이 있으면 무조건 저장
-            save_posts(posts, updated_posts)
-            logger.info("✅ 중간 저장 완료 (처리된 데이터 보존됨)")
-        else:
-            logger.info("변경된 내용이 없어 저장하지 않습니다.")
+        updated_posts = process_posts(posts, targets, enrichment)
+    except (KeyboardInterrupt, SystemExit):
+        # 처리 완료된 게시물은 이미 사이드카에 기록되어 있음
+        logger.warning("\n⚠️  중단되었습니다. 처리 완료된 데이터는 사이드카에 보존됩니다.")
         raise
+    finally:
+        enrichment.close()
 
-    if updated_posts > 0:
-        save_posts(posts, updated_posts)
+    if updated_posts:
+        logger.info(
+            "사이드카 업데이트 완료 (media_caption 갱신 %d건): %s",
+            updated_posts,
+            enrichment.sidecar_path("media_caption").name,
+        )
     else:
         logger.info("변경된 게시물이 없습니다.")
 